@@ -0,0 +1,116 @@
+import os, sys, json, time, argparse, platform, subprocess, tempfile, statistics
+from pathlib import Path
+
+#-------------------------------------------------------------------------------
+#Mide cuánto tarda en importarse cada script en un intérprete nuevo y verifica que
+#la importación no cargue dependencias pesadas ni escriba archivos.
+#
+#   python benchmark_arranque.py                 -> tabla de tiempos y verificación
+#   python benchmark_arranque.py --referencia    -> agrega lo que cuesta cada dependencia
+#-------------------------------------------------------------------------------
+
+DIRECTORIO_BASE = Path(__file__).parent
+
+MODULOS = ["registro", "codigo_script", "pjud_script", "servicio"]
+
+# Dependencias que solo deben cargarse en la fase que las usa
+PESADOS = ["selenium", "webdriver_manager", "requests", "PyPDF2", "playwright", "pdf2image", "PIL"]
+
+# Tiempo de importación tolerado por módulo (ms)
+LIMITE_MS = 150
+
+CODIGO_MEDICION = """
+import sys, time, json
+inicio = time.perf_counter()
+import {modulo}
+duracion = time.perf_counter() - inicio
+cargados = sorted({{nombre.split('.')[0] for nombre in sys.modules}} & set({pesados!r}))
+print(json.dumps({{'ms': duracion * 1000, 'pesados': cargados}}))
+"""
+
+#Importa el módulo en un intérprete nuevo desde una carpeta vacía; retorna ms, pesados cargados y archivos creados
+def medir_importacion(modulo, pesados=PESADOS):
+    with tempfile.TemporaryDirectory() as carpeta:
+        entorno = dict(os.environ, PYTHONPATH=str(DIRECTORIO_BASE), PYTHONDONTWRITEBYTECODE="1")
+        # Sin credenciales de correo: importar no debe exigirlas
+        for variable in ("EMAIL_SENDER_TEST", "EMAIL_PASSWORD_TEST", "EMAIL_RECIPIENTS_TEST"):
+            entorno.pop(variable, None)
+        inicio = time.perf_counter()
+        proceso = subprocess.run([sys.executable, "-c", CODIGO_MEDICION.format(modulo=modulo, pesados=pesados)],
+                                 cwd=carpeta, env=entorno, capture_output=True, text=True)
+        total = time.perf_counter() - inicio
+        if proceso.returncode != 0:
+            return {'error': proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else f"código {proceso.returncode}"}
+        resultado = json.loads(proceso.stdout.strip().splitlines()[-1])
+        resultado['proceso_ms'] = total * 1000
+        resultado['archivos'] = sorted(os.listdir(carpeta))
+        return resultado
+
+#Mide cada módulo `repeticiones` veces y resume con la mediana
+def ejecutar(modulos, repeticiones):
+    resultados = {}
+    for modulo in modulos:
+        mediciones = [medir_importacion(modulo) for _ in range(repeticiones)]
+        errores = [m['error'] for m in mediciones if 'error' in m]
+        if errores:
+            resultados[modulo] = {'error': errores[0]}
+            continue
+        resultados[modulo] = {
+            'import_ms': round(statistics.median(m['ms'] for m in mediciones), 1),
+            'proceso_ms': round(statistics.median(m['proceso_ms'] for m in mediciones), 1),
+            'pesados': mediciones[-1]['pesados'],
+            'archivos': mediciones[-1]['archivos'],
+        }
+    return resultados
+
+def imprimir_resultados(resultados, limite_ms=LIMITE_MS, verificar=True):
+    problemas = []
+    print(f"\n{'módulo':<34}{'import ms':>11}{'proceso ms':>12}  observaciones")
+    for modulo, r in resultados.items():
+        if 'error' in r:
+            print(f"{modulo:<34}  error: {r['error']}")
+            problemas.append(modulo)
+            continue
+        observaciones = []
+        if r['pesados']:
+            observaciones.append(f"carga {', '.join(r['pesados'])}")
+        if r['archivos']:
+            observaciones.append(f"crea {', '.join(r['archivos'])}")
+        if r['import_ms'] > limite_ms:
+            observaciones.append(f"sobre {limite_ms} ms")
+        if verificar and observaciones:
+            problemas.append(modulo)
+        print(f"{modulo:<34}{r['import_ms']:>11}{r['proceso_ms']:>12}  {'; '.join(observaciones)}")
+    return problemas
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de arranque e importación sin efectos de los scripts")
+    parser.add_argument("--modulos", nargs="+", default=MODULOS)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--limite-ms", type=float, default=LIMITE_MS)
+    parser.add_argument("--referencia", action="store_true", help="medir también la importación de cada dependencia pesada")
+    parser.add_argument("--json", help="guardar el resultado en este archivo")
+    args = parser.parse_args()
+
+    resultados = ejecutar(args.modulos, args.repeticiones)
+    problemas = imprimir_resultados(resultados, args.limite_ms)
+    if args.referencia:
+        # Lo que pagaba cada arranque antes de diferir las importaciones
+        referencia = ejecutar(["selenium.webdriver", "webdriver_manager.chrome", "requests", "PyPDF2",
+                               "playwright.async_api", "pdf2image", "PIL.Image"], args.repeticiones)
+        imprimir_resultados(referencia, verificar=False)
+        resultados = {'modulos': resultados, 'referencia': referencia}
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            'fecha': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'resultados': resultados,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n[INFO] Resultado guardado en {args.json}")
+    if problemas:
+        print(f"\n[WARN] Importación con costo o efectos: {', '.join(problemas)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import os, sys, json, time, argparse, platform
+from pathlib import Path
+from mock_ojv import iniciar_servidor, agregar_argumentos_portal, config_desde_argumentos
+import pjud_script
+
+#-------------------------------------------------------------------------------
+#Ejecuta el flujo real de PJUD (login, pestañas, lupas, cuadernos y descargas)
+#contra el portal simulado de mock_ojv.py y reporta tiempos por etapa.
+#
+#   python benchmark_ojv.py --causas 2000 --latencia 80 --pestanas Civil Cobranza --max-causas 50
+#
+#Acepta las opciones de selección de pjud_script.py; por defecto sin pausas. El correo
+#no se envía y la fecha de la última ejecución no se registra.
+#-------------------------------------------------------------------------------
+
+DIRECTORIO_BASE = Path(__file__).parent
+SALIDA_DIR = DIRECTORIO_BASE / "bench_ojv_salida"
+
+#Apunta las URL de documentos de las especificaciones al portal simulado
+def apuntar_a_portal(modulo, url_base):
+    base_real = modulo.BASE_URL_DOCUMENTOS
+    base_mock = f"{url_base}/misCausas"
+    for spec in modulo.ESPECIFICACIONES_PESTANAS.values():
+        for documentos in (spec['documentos'], spec.get('escritos', {}).get('documentos', [])):
+            for documento in documentos:
+                if documento.get('url'):
+                    documento['url'] = documento['url'].replace(base_real, base_mock)
+                for fragmento, url in documento.get('url_por_action', {}).items():
+                    documento['url_por_action'][fragmento] = url.replace(base_real, base_mock)
+    modulo.BASE_URL_DOCUMENTOS = base_mock
+    modulo.BASE_URL_PJUD = f"{url_base}/"
+
+def _rss_maximo_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maximo / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def ejecutar(args):
+    servidor, portal, url_base = iniciar_servidor(config_desde_argumentos(args))
+    print(f"[INFO] Portal simulado en {url_base}")
+
+    # Las carpetas de documentos y los logs del script quedan en el directorio de salida
+    salida = Path(args.salida_dir).resolve()
+    salida.mkdir(parents=True, exist_ok=True)
+    os.chdir(salida)
+    modulo = pjud_script
+    modulo.TRAZADOR.activo = os.getenv("PJUD_TRAZAS", "1") == "1"
+
+    apuntar_a_portal(modulo, url_base)
+    modulo.TRAZAS_DIR = salida / "trazas"
+    modulo.ULTIMA_EJECUCION_PATH = salida / "pjud_ultima_ejecucion.json"
+    # Cada corrida del benchmark empieza de cero
+    modulo.PUNTO_CONTROL_PATH = salida / "pjud_punto_control.json"
+    modulo.REANUDAR_EJECUCION = False
+    correos = []
+    modulo.enviar_correo = lambda movimientos=None, asunto="": correos.append(len(movimientos or [])) or True
+    if args.paginas:
+        modulo.MAX_PAGINAS_PARALELAS = args.paginas
+    if args.perfil:
+        modulo.PERFIL_NAVEGADOR_DIR = args.perfil
+
+    try:
+        inicio = time.perf_counter()
+        exito = modulo.automatizar_poder_judicial("11111111-1", "clave")
+        duracion = time.perf_counter() - inicio
+    finally:
+        servidor.shutdown()
+
+    modulo.TRAZADOR.imprimir_resumen()
+    traza = modulo.TRAZADOR.exportar(modulo.TRAZAS_DIR)
+
+    causas = portal.estadisticas.get("/misCausas/detalle.php", {}).get('peticiones', 0)
+    documentos = sum(e['peticiones'] for ruta, e in portal.estadisticas.items() if "/documentos/" in ruta)
+    return {
+        'exito': bool(exito),
+        'duracion_s': round(duracion, 2),
+        'causas_abiertas': causas,
+        'causas_por_min': round(causas / duracion * 60, 1) if duracion else None,
+        'movimientos': len(modulo.MOVIMIENTOS_GLOBALES),
+        'documentos_descargados': documentos,
+        'peticiones': sum(e['peticiones'] for e in portal.estadisticas.values()),
+        'bytes': sum(e['bytes'] for e in portal.estadisticas.values()),
+        'rss_max_mb': _rss_maximo_mb(),
+        'paginas_recicladas': modulo.VIGILANTE_MEMORIA.reciclajes,
+        'traza': str(traza) if traza else None,
+        'por_ruta': portal.estadisticas,
+    }
+
+def imprimir_resultado(resultado):
+    print("\n--- Resultado del benchmark contra el portal simulado ---")
+    for clave in ('exito', 'duracion_s', 'causas_abiertas', 'causas_por_min', 'movimientos',
+                  'documentos_descargados', 'peticiones', 'bytes', 'rss_max_mb', 'paginas_recicladas', 'traza'):
+        print(f"  {clave}: {resultado[clave]}")
+    print("  Peticiones por ruta:")
+    for ruta, estadistica in sorted(resultado['por_ruta'].items(), key=lambda item: -item[1]['peticiones']):
+        print(f"    {estadistica['peticiones']:6d}  {ruta}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los controladores de lupa contra el portal OJV simulado")
+    parser.add_argument("--paginas", type=int, help="páginas que recorren pestañas a la vez (MAX_PAGINAS_PARALELAS)")
+    parser.add_argument("--perfil", help="perfil persistente de Chromium (PJUD_PERFIL_DIR); la segunda corrida mide la caché caliente")
+    parser.add_argument("--salida-dir", default=str(SALIDA_DIR))
+    parser.add_argument("--json", help="guardar el resultado en este archivo")
+    agregar_argumentos_portal(parser)
+    pjud_script.agregar_argumentos_ejecucion(parser)
+    parser.set_defaults(pausas="ninguna")
+    args = parser.parse_args()
+    pjud_script.configurar_desde_argumentos(parser, args)
+    if args.json:
+        args.json = str(Path(args.json).resolve())
+    if args.perfil:
+        args.perfil = str(Path(args.perfil).resolve())
+
+    resultado = ejecutar(args)
+    imprimir_resultado(resultado)
+    if args.json:
+        resultado.update({
+            'fecha': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'parametros': vars(args),
+        })
+        Path(args.json).write_text(json.dumps(resultado, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+        print(f"[INFO] Resultado guardado en {args.json}")
+    if not resultado['exito']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+import os, io, sys, json, time, random, zlib, shutil, argparse, logging, contextlib, multiprocessing, platform
+from pathlib import Path
+
+#-------------------------------------------------------------------------------
+#Benchmarks de las rutas de procesamiento de PDF (resumen, preview, metadatos y
+#limpieza de texto) sobre un corpus sintético reproducible.
+#
+#   python benchmark_pdf.py                     -> ejecuta y compara con la línea base
+#   python benchmark_pdf.py --guardar-baseline  -> ejecuta y guarda la línea base
+#-------------------------------------------------------------------------------
+
+DIRECTORIO_BASE = Path(__file__).parent
+CORPUS_DIR = DIRECTORIO_BASE / "bench_corpus"
+BASELINE_PATH = DIRECTORIO_BASE / "benchmark_pdf_baseline.json"
+
+# Incrementar cuando cambie el contenido del corpus para regenerarlo
+CORPUS_VERSION = 1
+CORPUS_SEMILLA = 2025
+
+# Regresión tolerada respecto de la línea base (0.25 = 25% más lento)
+TOLERANCIA_REGRESION = 0.25
+
+MESES = ["ENERO", "FEBRERO", "MARZO", "ABRIL", "MAYO", "JUNIO", "JULIO",
+         "AGOSTO", "SEPTIEMBRE", "OCTUBRE", "NOVIEMBRE", "DICIEMBRE"]
+
+VOCABULARIO = (
+    "contribuyente impuesto renta declaración tributaria servicio resolución artículo inciso "
+    "ley decreto normativa crédito fiscal débito documento electrónico factura boleta plazo "
+    "obligación sanción multa procedimiento fiscalización régimen exención patrimonio sociedad "
+    "dividendo retención pago provisional mensual ejercicio comercial tasa base imponible "
+    "instrucciones dispónese establece modifica deroga vigencia publicación diario oficial"
+).split()
+
+#-------------------------------------------------------------------------------
+#Generación del corpus (PDF escritos a mano, sin dependencias adicionales)
+#-------------------------------------------------------------------------------
+
+#Escapa una línea de texto para un string literal de PDF en WinAnsiEncoding
+def _texto_pdf(linea):
+    linea = linea.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return linea.encode("cp1252", "replace")
+
+#Arma un PDF válido; cada página es {'lineas': [...]} o {'imagen': (ancho, alto, bytes_gris)}
+def construir_pdf(paginas, titulo=None):
+    objetos = [None, None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"]
+    refs_paginas = []
+    for pagina in paginas:
+        if 'imagen' in pagina:
+            ancho, alto, datos = pagina['imagen']
+            comprimido = zlib.compress(datos, 6)
+            objetos.append(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceGray "
+                           b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>\nstream\n" % (ancho, alto, len(comprimido))
+                           + comprimido + b"\nendstream")
+            num_imagen = len(objetos)
+            contenido = b"q 595 0 0 842 0 0 cm /Im1 Do Q"
+            recursos = b"<< /XObject << /Im1 %d 0 R >> >>" % num_imagen
+        else:
+            contenido = b"BT /F1 10 Tf 13 TL 56 800 Td " + b"".join(b"(" + _texto_pdf(l) + b") Tj T* " for l in pagina['lineas']) + b"ET"
+            recursos = b"<< /Font << /F1 3 0 R >> >>"
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(contenido) + contenido + b"\nendstream")
+        num_contenido = len(objetos)
+        objetos.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources " + recursos
+                       + b" /Contents %d 0 R >>" % num_contenido)
+        refs_paginas.append(len(objetos))
+    objetos[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objetos[1] = b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % n for n in refs_paginas) + b"] /Count %d >>" % len(refs_paginas)
+    info = b""
+    if titulo:
+        objetos.append(b"<< /Title (" + _texto_pdf(titulo) + b") /Author (Benchmark) >>")
+        info = b" /Info %d 0 R" % len(objetos)
+
+    salida = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for num, objeto in enumerate(objetos, 1):
+        offsets.append(len(salida))
+        salida += b"%d 0 obj\n" % num + objeto + b"\nendobj\n"
+    inicio_xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    salida += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    salida += b"trailer\n<< /Size %d /Root 1 0 R" % (len(objetos) + 1) + info + b" >>\nstartxref\n%d\n%%%%EOF\n" % inicio_xref
+    return bytes(salida)
+
+def escribir_pdf(ruta, paginas, titulo=None):
+    Path(ruta).write_bytes(construir_pdf(paginas, titulo))
+
+def _frase(rnd, palabras):
+    return " ".join(rnd.choice(VOCABULARIO) for _ in range(palabras))
+
+#Reparte texto en líneas de ~95 caracteres y páginas de 58 líneas
+def _paginar(parrafos, lineas_por_pagina=58, ancho=95):
+    lineas = []
+    for parrafo in parrafos:
+        actual = ""
+        for palabra in parrafo.split():
+            if len(actual) + len(palabra) + 1 > ancho:
+                lineas.append(actual)
+                actual = palabra
+            else:
+                actual = f"{actual} {palabra}".strip()
+        lineas.extend([actual, ""])
+    return [{'lineas': lineas[i:i + lineas_por_pagina]} for i in range(0, len(lineas), lineas_por_pagina)]
+
+def _fecha_larga(rnd):
+    return f"{rnd.randint(1, 28)} DE {rnd.choice(MESES)} DE 2025"
+
+def _resolucion(rnd, numero):
+    parrafos = [
+        "SERVICIO DE IMPUESTOS INTERNOS",
+        f"RESOLUCIÓN EX. SII N° {numero}",
+        f"MATERIA: {_frase(rnd, rnd.randint(15, 35)).capitalize()}.",
+        f"SANTIAGO, {_fecha_larga(rnd)}.",
+        "VISTOS: " + _frase(rnd, 80),
+        "CONSIDERANDO: " + _frase(rnd, 120),
+        "SE RESUELVE: " + _frase(rnd, rnd.randint(150, 500)),
+        "ANÓTESE, COMUNÍQUESE Y PUBLÍQUESE EN EXTRACTO",
+    ]
+    return _paginar(parrafos)
+
+def _circular(rnd, numero):
+    parrafos = [
+        f"CIRCULAR N° {numero}, DEL {_fecha_larga(rnd)}",
+        f"MATERIA: {_frase(rnd, rnd.randint(12, 25)).capitalize()}.",
+        f"REF. LEGAL: Artículo {rnd.randint(1, 120)} de la Ley sobre Impuesto a la Renta.",
+        "I. INTRODUCCIÓN " + _frase(rnd, 200),
+        "II. INSTRUCCIONES SOBRE LA MATERIA " + _frase(rnd, 600),
+    ]
+    return _paginar(parrafos)
+
+def _ley(rnd, numero, paginas_objetivo=200):
+    parrafos = [
+        f"Ley {numero}",
+        _frase(rnd, 20).upper(),
+        "Publicación: 12-MAR-2025",
+        "Promulgación: 01-MAR-2025",
+    ]
+    articulo = 1
+    while len(_paginar(parrafos)) < paginas_objetivo:
+        parrafos.extend(f"Artículo {articulo}.- " + _frase(rnd, rnd.randint(60, 160)) for _ in range(20))
+        articulo += 20
+    return _paginar(parrafos)[:paginas_objetivo]
+
+#Página escaneada: bandas con ruido que imitan líneas de texto (sin capa de texto)
+def _pagina_escaneada(rnd, ancho=1240, alto=1754):
+    blanco = bytes([250]) * ancho
+    patrones = [bytes(rnd.choice((30, 60, 200, 245, 250)) for _ in range(ancho)) for _ in range(16)]
+    filas = []
+    for y in range(alto):
+        en_linea = 150 < y < alto - 150 and (y // 12) % 3 != 2 and rnd.random() > 0.05
+        filas.append(rnd.choice(patrones) if en_linea else blanco)
+    return {'imagen': (ancho, alto, b"".join(filas))}
+
+#Genera (o reutiliza) el corpus y devuelve su manifiesto {archivo: {'categoria', 'paginas'}}
+def generar_corpus(directorio=CORPUS_DIR):
+    directorio = Path(directorio)
+    manifiesto_path = directorio / "manifiesto.json"
+    if manifiesto_path.exists():
+        manifiesto = json.loads(manifiesto_path.read_text(encoding="utf-8"))
+        if manifiesto.get('version') == CORPUS_VERSION and all((directorio / a).exists() for a in manifiesto['archivos']):
+            return manifiesto['archivos']
+
+    print(f"[INFO] Generando corpus de benchmark en {directorio}...")
+    if directorio.exists():
+        shutil.rmtree(directorio)
+    directorio.mkdir(parents=True)
+    rnd = random.Random(CORPUS_SEMILLA)
+    archivos = {}
+
+    def agregar(nombre, categoria, paginas, titulo=None):
+        escribir_pdf(directorio / nombre, paginas, titulo)
+        archivos[nombre] = {'categoria': categoria, 'paginas': len(paginas)}
+
+    for i in range(20):
+        numero = 100 + i
+        agregar(f"reso{numero}.pdf", "resolucion_corta", _resolucion(rnd, numero), f"Resolución {numero}")
+    for i in range(10):
+        numero = 40 + i
+        agregar(f"circu{numero}.pdf", "circular", _circular(rnd, numero), f"Circular {numero}")
+    for i in range(2):
+        numero = 21700 + i
+        agregar(f"BCN_Ley_{numero}.pdf", "ley_200_paginas", _ley(rnd, numero))
+    for i in range(4):
+        agregar(f"reso9{i:02d}.pdf", "escaneada", [_pagina_escaneada(rnd) for _ in range(3)])
+
+    # Archivos malformados: truncado, vacío y bytes sin estructura PDF
+    original = (directorio / "reso100.pdf").read_bytes()
+    (directorio / "reso_truncado.pdf").write_bytes(original[:len(original) // 2])
+    (directorio / "reso_vacio.pdf").write_bytes(b"")
+    (directorio / "reso_basura.pdf").write_bytes(bytes(rnd.getrandbits(8) for _ in range(20000)))
+    for nombre in ("reso_truncado.pdf", "reso_vacio.pdf", "reso_basura.pdf"):
+        archivos[nombre] = {'categoria': "malformado", 'paginas': 0}
+
+    manifiesto_path.write_text(json.dumps({'version': CORPUS_VERSION, 'archivos': archivos}, indent=2), encoding="utf-8")
+    return archivos
+
+#-------------------------------------------------------------------------------
+#Medición (cada función corre en un proceso nuevo para aislar el RSS máximo)
+#-------------------------------------------------------------------------------
+
+def _rss_maximo_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB, macOS bytes
+    return round(maximo / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return None
+    indice = min(len(ordenados) - 1, max(0, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+#Ejecuta funcion(entrada) para cada entrada y repetición; devuelve latencias en segundos
+def _medir(funcion, entradas, repeticiones):
+    for entrada in entradas[:1]:
+        funcion(entrada)
+    latencias = []
+    for _ in range(repeticiones):
+        for entrada in entradas:
+            inicio = time.perf_counter()
+            funcion(entrada)
+            latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+def _importar_pjud():
+    import pjud_script
+    return pjud_script
+
+def _importar_codigo():
+    import codigo_script
+    return codigo_script
+
+def _bench_extraer_resumen(rutas, repeticiones, trabajo_dir):
+    pjud_script = _importar_pjud()
+    return _medir(pjud_script.extraer_resumen_pdf, rutas, repeticiones), rutas
+
+def _bench_generar_preview(rutas, repeticiones, trabajo_dir):
+    if not shutil.which("pdftoppm"):
+        raise RuntimeError("poppler (pdftoppm) no está instalado")
+    pjud_script = _importar_pjud()
+    # poppler no produce imagen para los malformados; solo se miden PDF válidos
+    rutas = [r for r in rutas if not os.path.basename(r).startswith(("reso_truncado", "reso_vacio", "reso_basura"))]
+    destino = os.path.join(trabajo_dir, "preview.png")
+    return _medir(lambda ruta: pjud_script.generar_preview_pdf(ruta, destino), rutas, repeticiones), rutas
+
+def _bench_get_pdf_metadata(rutas, repeticiones, trabajo_dir):
+    codigo_script = _importar_codigo()
+    FileUtils = codigo_script.FileUtils
+    return _medir(lambda ruta: FileUtils.get_pdf_metadata([ruta], cache_path=None), rutas, repeticiones), rutas
+
+def _bench_clean_text(rutas, repeticiones, trabajo_dir):
+    codigo_script = _importar_codigo()
+    from PyPDF2 import PdfReader
+    textos = []
+    for ruta in rutas:
+        try:
+            reader = PdfReader(ruta)
+            textos.append("".join(pagina.extract_text() or "" for pagina in reader.pages[:3]))
+        except Exception:
+            continue
+    return _medir(codigo_script.FileUtils.clean_text, textos, repeticiones), textos
+
+BENCHMARKS = {
+    'extraer_resumen_pdf': _bench_extraer_resumen,
+    'generar_preview_pdf': _bench_generar_preview,
+    'get_pdf_metadata': _bench_get_pdf_metadata,
+    'clean_text': _bench_clean_text,
+}
+
+def _proceso_benchmark(nombre, rutas, repeticiones, paginas_por_ruta, trabajo_dir, cola):
+    os.chdir(trabajo_dir)
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            rss_inicial = _rss_maximo_mb()
+            inicio = time.perf_counter()
+            latencias, entradas = BENCHMARKS[nombre](rutas, repeticiones, trabajo_dir)
+            total = time.perf_counter() - inicio
+        paginas = sum(paginas_por_ruta.get(e, 0) for e in entradas if isinstance(e, str)) * repeticiones
+        cola.put({
+            'items': len(latencias),
+            'total_s': round(total, 4),
+            'items_por_s': round(len(latencias) / sum(latencias), 2) if latencias and sum(latencias) else None,
+            'paginas_por_s': round(paginas / sum(latencias), 2) if paginas and sum(latencias) else None,
+            'p50_ms': round(_percentil(latencias, 50) * 1000, 3) if latencias else None,
+            'p90_ms': round(_percentil(latencias, 90) * 1000, 3) if latencias else None,
+            'p99_ms': round(_percentil(latencias, 99) * 1000, 3) if latencias else None,
+            'max_ms': round(max(latencias) * 1000, 3) if latencias else None,
+            'rss_import_mb': rss_inicial,
+            'rss_max_mb': _rss_maximo_mb(),
+        })
+    except Exception as e:
+        cola.put({'error': str(e)})
+
+#Ejecuta cada benchmark en un proceso nuevo y devuelve {funcion: resultados}
+def ejecutar_benchmarks(funciones, repeticiones, corpus_dir=CORPUS_DIR):
+    archivos = generar_corpus(corpus_dir)
+    corpus_dir = Path(corpus_dir).resolve()
+    rutas = [str(corpus_dir / nombre) for nombre in sorted(archivos)]
+    paginas_por_ruta = {str(corpus_dir / nombre): datos['paginas'] for nombre, datos in archivos.items()}
+    trabajo_dir = corpus_dir / "_trabajo"
+    trabajo_dir.mkdir(exist_ok=True)
+
+    # spawn: cada medición parte de un intérprete limpio (RSS e imports comparables)
+    contexto = multiprocessing.get_context("spawn")
+    resultados = {}
+    for nombre in funciones:
+        print(f"[INFO] Midiendo {nombre}...")
+        cola = contexto.Queue()
+        proceso = contexto.Process(target=_proceso_benchmark,
+                                   args=(nombre, rutas, repeticiones, paginas_por_ruta, str(trabajo_dir), cola))
+        proceso.start()
+        resultados[nombre] = cola.get()
+        proceso.join()
+    return resultados
+
+def imprimir_resultados(resultados, baseline=None, tolerancia=TOLERANCIA_REGRESION):
+    regresiones = []
+    print(f"\n{'función':<22}{'items':>7}{'items/s':>10}{'pág/s':>9}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'RSS MB':>8}  vs base")
+    for nombre, r in resultados.items():
+        if 'error' in r:
+            print(f"{nombre:<22}  omitido: {r['error']}")
+            continue
+        comparacion = ""
+        base = (baseline or {}).get(nombre)
+        if base and base.get('p50_ms') and r['p50_ms'] is not None:
+            cambio = r['p50_ms'] / base['p50_ms'] - 1
+            comparacion = f"{cambio:+.0%}"
+            if cambio > tolerancia:
+                comparacion += " REGRESIÓN"
+                regresiones.append(nombre)
+        print(f"{nombre:<22}{r['items']:>7}{r['items_por_s'] or '-':>10}{r['paginas_por_s'] or '-':>9}"
+              f"{r['p50_ms']:>10}{r['p90_ms']:>10}{r['p99_ms']:>10}{r['rss_max_mb'] or '-':>8}  {comparacion}")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de procesamiento de PDF")
+    parser.add_argument("--funciones", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--corpus", default=str(CORPUS_DIR))
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--guardar-baseline", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_REGRESION)
+    args = parser.parse_args()
+
+    resultados = ejecutar_benchmarks(args.funciones, args.repeticiones, args.corpus)
+
+    baseline_path = Path(args.baseline)
+    baseline = None
+    if baseline_path.exists() and not args.guardar_baseline:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8")).get('resultados')
+    regresiones = imprimir_resultados(resultados, baseline, args.tolerancia)
+
+    if args.guardar_baseline:
+        baseline_path.write_text(json.dumps({
+            'fecha': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'repeticiones': args.repeticiones,
+            'corpus_version': CORPUS_VERSION,
+            'resultados': resultados,
+        }, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\n[INFO] Línea base guardada en {baseline_path}")
+    elif baseline is None:
+        print("\n[INFO] Sin línea base para comparar (usar --guardar-baseline)")
+
+    if regresiones:
+        print(f"\n[WARN] Regresiones sobre {args.tolerancia:.0%}: {', '.join(regresiones)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,231 @@
+from __future__ import annotations
+
 import os
 import time
 import json
-import requests
 import datetime
 import re
+import shutil
+import hashlib
+import random
 import smtplib
 import logging
+import threading
+import multiprocessing
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from typing import List, Dict, Set, Optional, Tuple
-from PyPDF2 import PdfReader
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("scraper.log"),
-        logging.StreamHandler()
-    ]
-)
-
-YEAR = '2025'
+from typing import TYPE_CHECKING, List, Dict, Set, Optional, Tuple, Iterator, Callable
+from registro import configurar_registro
+
+# Selenium, webdriver_manager, requests y PyPDF2 se importan dentro de la fase que los usa:
+# importar el módulo (modo servicio, benchmarks, helpers) no los carga ni abre archivos
+if TYPE_CHECKING:
+    import requests
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from PyPDF2 import PdfReader
+
+YEAR = str(datetime.datetime.now().year)
 DOWNLOAD_DIR_SII = "downloaded_pdfs"
 DOWNLOAD_DIR_BCN = "downloaded_pdfs"
-os.makedirs(DOWNLOAD_DIR_SII, exist_ok=True)
-os.makedirs(DOWNLOAD_DIR_BCN, exist_ok=True)
-
-try:
-    EMAIL_SENDER = os.getenv("EMAIL_SENDER_TEST")
-    EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD_TEST")
-    EMAIL_RECIPIENTS = os.getenv("EMAIL_RECIPIENTS_TEST", "").split(",") 
-    
+BCN_LEDGER_PATH = os.path.join(DOWNLOAD_DIR_BCN, "descargadas.jsonl")
+BCN_LEGACY_IDS_PATH = os.path.join(DOWNLOAD_DIR_BCN, "descargadas.json")
+
+# Años que recorre el descubrimiento SII: "2025", "2020-2025" o "2021,2023" (por defecto, el año en curso)
+SII_YEARS = os.getenv("SII_ANIOS", YEAR)
+SII_STATE_PATH = os.path.join(DOWNLOAD_DIR_SII, "sii_anios.json")
+MANIFEST_PATH = os.path.join(DOWNLOAD_DIR_SII, "manifest.jsonl")
+# Combinaciones (año, fuente) simultáneas: sondeos HTTP y navegadores Selenium
+SII_WORKERS = int(os.getenv("SII_WORKERS", "8"))
+SII_BROWSERS = int(os.getenv("SII_NAVEGADORES", "2"))
+SII_DEBUG_PORT = 9222
+# El navegador BCN usa el puerto siguiente a los de SII: en modo servicio conviven abiertos
+BCN_DEBUG_PORT = SII_DEBUG_PORT + SII_BROWSERS
+
+# Reintentos por elemento (un número, un oficio, un idNorma): intentos totales y espera
+# exponencial en segundos, con jitter, entre uno y otro
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "4"))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "5"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "60"))
+
+# Fuentes SII por año: 'probe' se sondea por número (prefijo1.pdf, prefijo2.pdf...)
+# y 'page' es el listado de jurisprudencia que se recorre con Selenium
+SII_SOURCES = {
+    'reso': {
+        'probe': "https://www.sii.cl/normativa_legislacion/resoluciones/{year}/",
+    },
+    'circu': {
+        'probe': "https://www.sii.cl/normativa_legislacion/circulares/{year}/",
+    },
+    'VENTAS': {
+        'page': "https://www.sii.cl/normativa_legislacion/jurisprudencia_administrativa/ley_impuesto_ventas/{year}/ley_impuesto_ventas_jadm{year}.htm",
+        'xpath': "//a[starts-with(text(),'Ventas y Servicios')]",
+        'prefix': "VENTAS",
+    },
+    'RENTA': {
+        'page': "https://www.sii.cl/normativa_legislacion/jurisprudencia_administrativa/ley_impuesto_renta/{year}/ley_impuesto_renta_jadm{year}.htm",
+        'xpath': "//a[starts-with(text(),'Renta')]",
+        'prefix': "RENTA",
+    },
+    'OTRAS_NORMAS': {
+        'page': "https://www.sii.cl/normativa_legislacion/jurisprudencia_administrativa/otras_normas/{year}/otras_normas_jadm{year}.htm",
+        'xpath': "//a[contains(@href, '.pdf')]",
+        'prefix': None,
+        'wait': 1,
+    },
+}
+
+EMAIL_SENDER = os.getenv("EMAIL_SENDER_TEST")
+EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD_TEST")
+EMAIL_RECIPIENTS = os.getenv("EMAIL_RECIPIENTS_TEST", "").split(",")
+
+def check_email_config() -> None:
     if not all([EMAIL_SENDER, EMAIL_PASSWORD, EMAIL_RECIPIENTS]):
+        logging.error("Email config error: Missing email credentials")
         raise ValueError("Missing email credentials")
-except Exception as e:
-    logging.error(f"Email config error: {str(e)}")
-    raise
 
 ALLOWED_PREFIXES = [
     "reso", "VENTAS", "RENTA", "OTRAS_NORMAS_ORDINARIO", 
     "OTRAS_NORMAS_RESERVADO", "BCN", "circu"
 ]
 
+MESES = {
+    "01": "ENERO", "02": "FEBRERO", "03": "MARZO", "04": "ABRIL",
+    "05": "MAYO", "06": "JUNIO", "07": "JULIO", "08": "AGOSTO",
+    "09": "SEPTIEMBRE", "10": "OCTUBRE", "11": "NOVIEMBRE", "12": "DICIEMBRE"
+}
+
+MESES_ABR = {
+    "ENE": "ENERO", "FEB": "FEBRERO", "MAR": "MARZO", "ABR": "ABRIL",
+    "MAY": "MAYO", "JUN": "JUNIO", "JUL": "JULIO", "AGO": "AGOSTO",
+    "SEP": "SEPTIEMBRE", "OCT": "OCTUBRE", "NOV": "NOVIEMBRE", "DIC": "DICIEMBRE"
+}
+
+# Patrones de extracción de metadatos compilados una sola vez por proceso
+DATE_END_RE = re.compile(r"1\. se ha|\. de acuerdo|\. se ha|se ha|de acuerdo", re.IGNORECASE)
+
+DATE_RES = [
+    re.compile(r"(?:ORD\.|OFICIO|RESOLUCIÓN|CIRCULAR)\s*(?:N°|Nº|N[o°]\s*)?\d+\s*[,-]\s*DE\s*(\d{2}\.\d{2}\.\d{4})", re.IGNORECASE),
+    re.compile(r"(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})", re.IGNORECASE),
+    re.compile(r"(\d{2}-\w{3}-\d{4})", re.IGNORECASE),
+    re.compile(r"SANTIAGO[,\s]*(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})", re.IGNORECASE),
+    re.compile(r"FECHA\s*:\s*(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})", re.IGNORECASE),
+    re.compile(r".*?_(\d{2}_\d{2}_\d{4})\.pdf", re.IGNORECASE),
+    re.compile(r".*?-(\d{2}_\d{2}_\d{4})\.pdf", re.IGNORECASE)
+]
+
+FILENAME_DATE_RES = [
+    re.compile(r".*?_(\d{2}_\d{2}_\d{4})\.pdf"),
+    re.compile(r".*?-(\d{2}_\d{2}_\d{4})\.pdf")
+]
+
+BCN_FECHA_RES = [
+    re.compile(r"Promulgación:\s*(\d{2}-\w{3}-\d{4})"),
+    re.compile(r"Publicación:\s*(\d{2}-\w{3}-\d{4})")
+]
+
+BLANK_LINES_RE = re.compile(r'(\n\s*)+\n+')
+MULTI_SPACE_RE = re.compile(r'[ \t]{2,}')
+ARTICULO_RE = re.compile(r'(?<=[A-Z])(ART[ÍI]CULO|ART\.)')
+# Año en la URL de un sondeo (.../resoluciones/2025/reso1.pdf) y en una fecha ya formateada
+URL_YEAR_RE = re.compile(r"/((?:19|20)\d{2})/")
+YEAR_RE = re.compile(r"\b((?:19|20)\d{2})\b")
+CODES_RE = re.compile(r'\b[A-Z]{2,}\d{5,}\b|\b[A-Za-z]{1,}\s?\d{5,}\b|\b[A-Za-z0-9\-]{2,}\s?-?\d{4,}\s?\d{10,}\b', re.IGNORECASE)
+
+_CIRCU_END = r"(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))"
+_RESO_END = r"(?=\n*(?:SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))"
+
+# Estrategia de extracción por tipo de documento. El orden importa: se usa la
+# primera cuyo prefijo aparezca en el nombre del archivo.
+METADATA_STRATEGIES = [
+    ("BCN_Ley", {
+        'materia_res': [
+            re.compile(r"(Ley\s+\d{4,5}[\s\S]+?)(?=\n*(?:Publicación|Fecha Publicación)|\Z)", re.IGNORECASE)
+        ],
+        'normalize': True,
+        'strip_codes': False,
+        'max_len': 500,
+        'fecha_res': BCN_FECHA_RES
+    }),
+    ("circu", {
+        'materia_res': [
+            re.compile(r"MATERIA\s*:\s*(.+?)" + _CIRCU_END, re.DOTALL | re.IGNORECASE),
+            re.compile(r"MATERIA\s+(.+?)" + _CIRCU_END, re.DOTALL | re.IGNORECASE),
+            re.compile(r"SISTEMA:\s*(.+?)" + _CIRCU_END, re.DOTALL | re.IGNORECASE),
+            re.compile(r"(SUBDIRECCIÓN[\s\S]+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|\Z))", re.IGNORECASE | re.DOTALL),
+            re.compile(r"(DIRECCIÓN[\s\S]+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|\Z))", re.IGNORECASE | re.DOTALL)
+        ],
+        'normalize': False,
+        'strip_codes': True,
+        'max_len': 300
+    }),
+    ("reso", {
+        'materia_res': [
+            re.compile(r"MATERIA\s*:\s*(.+?)" + _RESO_END, re.DOTALL | re.IGNORECASE),
+            re.compile(r"MATERIA\s+(.+?)" + _RESO_END, re.DOTALL | re.IGNORECASE),
+            re.compile(r"SISTEMA:\s*(.+?)" + _RESO_END, re.DOTALL | re.IGNORECASE),
+            re.compile(r"(SUBDIRECCIÓN[\s\S]+?)(?=\n*(?:SANTIAGO|\Z))", re.IGNORECASE),
+            re.compile(r"(DIRECCIÓN[\s\S]+?)(?=\n*(?:SANTIAGO|\Z))", re.IGNORECASE),
+            re.compile(r"(.*?)(?=\n*SANTIAGO,\s*\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4}\.?)", re.DOTALL | re.IGNORECASE)
+        ],
+        'normalize': False,
+        'strip_codes': True,
+        'max_len': 500
+    }),
+    ("RENTA", {
+        'materia_res': [
+            re.compile(r"(RENTA(?: – LEY SOBRE IMPUESTO A LA)?[\s\S]+?)(?=\n*(De acuerdo|Se ha|$))", re.IGNORECASE),
+            re.compile(r"(VENTAS Y SERVICIOS – LEY SOBRE IMPUESTO A LAS[\s\S]+?)(?=\n*(De acuerdo|Se ha|$))", re.IGNORECASE)
+        ],
+        'normalize': True,
+        'strip_codes': True,
+        'max_len': 600
+    }),
+    ("VENTAS", {
+        'materia_res': [
+            re.compile(r"(VENTAS Y SERVICIOS(?: – LEY SOBRE IMPUESTO A LA)?[\s\S]+?)(?=\n*(?:Se ha|De acuerdo|1\.|$))", re.IGNORECASE)
+        ],
+        'normalize': True,
+        'strip_codes': True,
+        'max_len': 600
+    }),
+    #Mejorar esta parte
+    ("OTRAS_NORMAS", {
+        'materia_res': [
+            re.compile(r"(.*?)(?=\n*(?:Se ha|De acuerdo))", re.DOTALL | re.IGNORECASE)
+        ],
+        'normalize': False,
+        'strip_codes': True,
+        'max_len': 500,
+        'full_text_fallback': 450
+    })
+]
+
+# Tipo de cada PDF descargado según su nombre, en el orden en que se listan en el correo.
+# El número ordena los más recientes; la fecha y el año salen del nombre cuando lo incluye.
+MANIFEST_TYPES = [
+    ('circu', re.compile(r"circu(?P<number>\d+)(?:_(?P<year>\d{4}))?\.pdf$")),
+    ('reso', re.compile(r"reso(?P<number>\d+)(?:_(?P<year>\d{4}))?\.pdf$")),
+    ('VENTAS', re.compile(r"VENTAS_(?P<number>\d+)-(?P<day>\d{2})_(?P<month>\d{2})_(?P<year>\d{4})\.pdf$")),
+    ('RENTA', re.compile(r"RENTA_(?P<number>\d+)-(?P<day>\d{2})_(?P<month>\d{2})_(?P<year>\d{4})\.pdf$")),
+    ('OTRAS_NORMAS', re.compile(r"OTRAS_NORMAS_\w+?_(?P<number>\d+)-(?P<day>\d{2})_(?P<month>\d{2})_(?P<year>\d{4})\.pdf$")),
+    ('BCN_Ley', re.compile(r"BCN_Ley-ID-(?P<number>\d+)\.pdf$")),
+]
+# Archivos más recientes por tipo que se adjuntan al correo
+MANIFEST_TOP_PER_TYPE = 42
+
+METADATA_CACHE_PATH = os.path.join(DOWNLOAD_DIR_SII, "metadata_cache.json")
+# Incrementar cuando cambien los patrones para invalidar el caché en disco
+METADATA_CACHE_VERSION = 2
+# Extracción paralela: procesos de trabajo y tiempo máximo por PDF (segundos)
+METADATA_WORKERS = os.cpu_count() or 1
+METADATA_TIMEOUT = 60
+# Cola por la que cada proceso de trabajo avisa cuándo empieza un PDF (solo en los procesos del pool)
+_METADATA_STARTED = None
+
 class EmailSender:
     
     @staticmethod
@@ -100,335 +276,326 @@ class EmailSender:
 
         return False
 
+class MetadataCache:
+    """Caché en disco de metadatos PDF, indexado por (ruta, tamaño, mtime)."""
+
+    def __init__(self, path: str = METADATA_CACHE_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.dirty = False
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            logging.warning(f"Caché de metadatos ilegible, se reconstruirá: {self.path}")
+            return
+        if data.get("version") == METADATA_CACHE_VERSION:
+            self.entries = data.get("entries", {})
+
+    @staticmethod
+    def _key(pdf_path: str) -> Tuple[str, int, float]:
+        stat = os.stat(pdf_path)
+        return os.path.abspath(pdf_path), stat.st_size, stat.st_mtime
+
+    def get(self, pdf_path: str) -> Optional[Dict]:
+        path, size, mtime = self._key(pdf_path)
+        entry = self.entries.get(path)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            return entry["metadata"]
+        return None
+
+    def put(self, pdf_path: str, metadata: Dict) -> None:
+        path, size, mtime = self._key(pdf_path)
+        self.entries[path] = {"size": size, "mtime": mtime, "metadata": metadata}
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": METADATA_CACHE_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
 class FileUtils:
 
     @staticmethod
-    def get_pdf_metadata(pdf_paths: List[str]) -> Dict[str, Dict]:
+    def format_date(date_str: str) -> str:
+        if "." in date_str:
+            dia, mes, anio = date_str.split(".")
+            return f"{int(dia)} DE {MESES[mes]} DE {anio}"
+        elif "_" in date_str:
+            dia, mes, anio = date_str.split("_")
+            return f"{int(dia)} DE {MESES[mes]} DE {anio}"
+        elif "-" in date_str and len(date_str.split("-")[1]) == 3:
+            dia, mes_abr, anio = date_str.split("-")
+            return f"{int(dia)} DE {MESES_ABR[mes_abr.upper()]} DE {anio}"
+        return date_str.upper()
+
+    @staticmethod
+    def extract_date(text: str, filename: str) -> str:
+        end_match = DATE_END_RE.search(text)
+        search_text = text[:end_match.start()] if end_match else text
+
+        for pattern in DATE_RES:
+            match = pattern.search(search_text)
+            if match:
+                date_str = match.group(1)
+                try:
+                    return FileUtils.format_date(date_str)
+                except Exception as e:
+                    logging.warning(f"Error formateando fecha {date_str}: {str(e)}")
+                    continue
+
+        for pattern in FILENAME_DATE_RES:
+            match = pattern.search(filename)
+            if match:
+                return FileUtils.format_date(match.group(1))
+
+        return "No disponible"
+
+    @staticmethod
+    def match_fields(full_text: str, filename: str) -> Tuple[str, str, bool]:
+        # El tercer valor indica si ambos campos quedaron resueltos de forma
+        # definitiva, es decir, si leer más páginas ya no cambiaría el resultado.
+        for prefix, strategy in METADATA_STRATEGIES:
+            if prefix in filename:
+                break
+        else:
+            return "No disponible", "No disponible", True
+
+        materia_match = None
+        for materia_idx, pattern in enumerate(strategy['materia_res']):
+            materia_match = pattern.search(full_text)
+            if materia_match:
+                break
+
+        if materia_match:
+            materia = materia_match.group(1).strip()
+        elif strategy.get('full_text_fallback'):
+            limit = strategy['full_text_fallback']
+            clean_text = MULTI_SPACE_RE.sub(' ', full_text.strip())
+            clean_text = BLANK_LINES_RE.sub('\n\n', clean_text)
+            clean_text = ARTICULO_RE.sub(r'\n\1', clean_text)
+            materia = clean_text[:limit - 3] + '...' if len(clean_text) > limit else clean_text
+        else:
+            materia = "No disponible"
+
+        if strategy['normalize']:
+            materia = BLANK_LINES_RE.sub('\n\n', materia)
+            materia = MULTI_SPACE_RE.sub(' ', materia)
+            materia = ARTICULO_RE.sub(r'\n\1', materia)
+        if strategy['strip_codes']:
+            materia = CODES_RE.sub('', materia).strip()
+
+        max_len = strategy['max_len']
+        if len(materia) > max_len:
+            materia = materia[:max_len - 3] + '...'
+
+        # La materia es definitiva si la encontró el patrón preferido y su
+        # delimitador aparece antes del final del texto leído
+        materia_done = bool(materia_match) and materia_idx == 0 and materia_match.end() < len(full_text.rstrip())
+
+        fecha_match = None
+        for fecha_idx, pattern in enumerate(strategy.get('fecha_res', [])):
+            fecha_match = pattern.search(full_text)
+            if fecha_match:
+                break
+        if fecha_match:
+            fecha = fecha_match.group(1)
+            fecha_done = fecha_idx == 0
+        else:
+            fecha = FileUtils.extract_date(full_text, filename)
+            fecha_done = fecha != "No disponible" and DATE_END_RE.search(full_text) is not None
+
+        return materia, fecha, materia_done and fecha_done
+
+    @staticmethod
+    def extract_materia_fecha(full_text: str, filename: str) -> Tuple[str, str]:
+        materia, fecha, _ = FileUtils.match_fields(full_text, filename)
+        return materia, fecha
+
+    @staticmethod
+    def iter_page_text(reader: PdfReader, max_pages: int = 3) -> Iterator[str]:
+        # Extrae el texto página a página, solo cuando se solicita
+        for page_num in range(min(max_pages, len(reader.pages))):
+            yield reader.pages[page_num].extract_text() or ""
+
+    @staticmethod
+    def extract_pdf_metadata(pdf_path: str) -> Dict:
+        from PyPDF2 import PdfReader
+
+        with open(pdf_path, 'rb') as f:
+            reader = PdfReader(f)
+            raw_metadata = reader.metadata or {}
+
+            filename = os.path.basename(pdf_path)
+            if not reader.pages:
+                materia, fecha = FileUtils.extract_materia_fecha("", filename)
+
+            # Los encabezados (MATERIA, SANTIAGO, Promulgación) suelen estar en la
+            # primera página: se deja de extraer apenas los campos están completos
+            full_text = ""
+            for page_text in FileUtils.iter_page_text(reader, 3):
+                full_text += page_text
+                materia, fecha, complete = FileUtils.match_fields(full_text, filename)
+                if complete:
+                    break
+
+            return {
+                'file_name': filename,
+                'page_count': len(reader.pages),
+                'materia': materia,
+                'fecha': fecha,
+                'title': str(raw_metadata.get('/Title', 'No disponible')),
+                'author': str(raw_metadata.get('/Author', 'No disponible')),
+                'subject': str(raw_metadata.get('/Subject', 'No disponible')),
+                'keywords': str(raw_metadata.get('/Keywords', 'No disponible')),
+                'modification_date': datetime.datetime.fromtimestamp(os.path.getmtime(pdf_path)).strftime('%d/%m/%Y %H:%M:%S')
+            }
+
+    @staticmethod
+    def get_pdf_metadata(pdf_paths: List[str], cache_path: Optional[str] = METADATA_CACHE_PATH) -> Dict[str, Dict]:
         metadata_dict = {}
-        
+        cache = MetadataCache(cache_path) if cache_path else None
+
         for pdf_path in pdf_paths:
             try:
                 if not os.path.exists(pdf_path):
                     logging.warning(f"Archivo PDF no encontrado: {pdf_path}")
                     continue
-                
-                with open(pdf_path, 'rb') as f:
-                    reader = PdfReader(f)
-                    raw_metadata = reader.metadata or {}
-                    
-                    full_text = ""
-                    for page in reader.pages[:3]:
-                        full_text += page.extract_text() or ""
-                    
-                    materia = "No disponible"
-                    fecha = "No disponible"
-                    
-                    filename = os.path.basename(pdf_path)
-
-                    def extract_date(text, filename):
-                        end_patterns = [
-                            r"se ha",
-                            r"de acuerdo",
-                            r"\. de acuerdo",
-                            r"\. se ha",
-                            r"1\. se ha"
-                        ]
-                        
-                        cut_point = len(text)
-                        for pattern in end_patterns:
-                            match = re.search(pattern, text, re.IGNORECASE)
-                            if match and match.start() < cut_point:
-                                cut_point = match.start()
-                        
-                        search_text = text[:cut_point] if cut_point < len(text) else text
-                        
-                        patterns = [
-                            r"(?:ORD\.|OFICIO|RESOLUCIÓN|CIRCULAR)\s*(?:N°|Nº|N[o°]\s*)?\d+\s*[,-]\s*DE\s*(\d{2}\.\d{2}\.\d{4})",
-                            r"(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})",
-                            r"(\d{2}-\w{3}-\d{4})",
-                            r"SANTIAGO[,\s]*(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})",
-                            r"FECHA\s*:\s*(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})",
-                            r".*?_(\d{2}_\d{2}_\d{4})\.pdf",
-                            r".*?-(\d{2}_\d{2}_\d{4})\.pdf"
-                        ]
-
-                        for pattern in patterns:
-                            match = re.search(pattern, search_text, re.IGNORECASE)
-                            if match:
-                                date_str = match.group(1)
-                                try:
-                                    if "." in date_str:
-                                        dia, mes, anio = date_str.split(".")
-                                        meses = {
-                                            "01": "ENERO", "02": "FEBRERO", "03": "MARZO", "04": "ABRIL",
-                                            "05": "MAYO", "06": "JUNIO", "07": "JULIO", "08": "AGOSTO",
-                                            "09": "SEPTIEMBRE", "10": "OCTUBRE", "11": "NOVIEMBRE", "12": "DICIEMBRE"
-                                        }
-                                        return f"{int(dia)} DE {meses[mes]} DE {anio}"
-                                    elif "_" in date_str: 
-                                        dia, mes, anio = date_str.split("_")
-                                        meses = {
-                                            "01": "ENERO", "02": "FEBRERO", "03": "MARZO", "04": "ABRIL",
-                                            "05": "MAYO", "06": "JUNIO", "07": "JULIO", "08": "AGOSTO",
-                                            "09": "SEPTIEMBRE", "10": "OCTUBRE", "11": "NOVIEMBRE", "12": "DICIEMBRE"
-                                        }
-                                        return f"{int(dia)} DE {meses[mes]} DE {anio}"
-                                    elif "-" in date_str and len(date_str.split("-")[1]) == 3: 
-                                        dia, mes_abr, anio = date_str.split("-")
-                                        meses_abr = {
-                                            "ENE": "ENERO", "FEB": "FEBRERO", "MAR": "MARZO", "ABR": "ABRIL",
-                                            "MAY": "MAYO", "JUN": "JUNIO", "JUL": "JULIO", "AGO": "AGOSTO",
-                                            "SEP": "SEPTIEMBRE", "OCT": "OCTUBRE", "NOV": "NOVIEMBRE", "DIC": "DICIEMBRE"
-                                        }
-                                        return f"{int(dia)} DE {meses_abr[mes_abr.upper()]} DE {anio}"
-                                    else:  
-                                        return date_str.upper()
-                                except Exception as e:
-                                    logging.warning(f"Error formateando fecha {date_str}: {str(e)}")
-                                    continue
-
-                        filename_patterns = [
-                            r".*?_(\d{2}_\d{2}_\d{4})\.pdf",
-                            r".*?-(\d{2}_\d{2}_\d{4})\.pdf"
-                        ]
-                        
-                        for pattern in filename_patterns:
-                            match = re.search(pattern, filename)
-                            if match:
-                                date_str = match.group(1)
-                                dia, mes, anio = date_str.split("_")
-                                meses = {
-                                    "01": "ENERO", "02": "FEBRERO", "03": "MARZO", "04": "ABRIL",
-                                    "05": "MAYO", "06": "JUNIO", "07": "JULIO", "08": "AGOSTO",
-                                    "09": "SEPTIEMBRE", "10": "OCTUBRE", "11": "NOVIEMBRE", "12": "DICIEMBRE"
-                                }
-                                return f"{int(dia)} DE {meses[mes]} DE {anio}"
-                        
-                        return "No disponible"
-
-                    if "BCN_Ley" in filename:
-                        materia_match = re.search(
-                        r"(Ley\s+\d{4,5}[\s\S]+?)(?=\n*(?:Publicación|Fecha Publicación)|\Z)",
-                        full_text,
-                        re.IGNORECASE
-                    )
-                        materia = materia_match.group(1).strip() if materia_match else "No disponible"
-                        materia = re.sub(r'(\n\s*)+\n+', '\n\n', materia)
-                        materia = re.sub(r'[ \t]{2,}', ' ', materia)
-                        materia = re.sub(r'(?<=[A-Z])(ART[ÍI]CULO|ART\.)', r'\n\1', materia)
-
-                        if len(materia) > 500:
-                            materia = materia[:497] + '...'
-
-                        fecha_match = re.search(r"Promulgación:\s*(\d{2}-\w{3}-\d{4})", full_text)
-                        if not fecha_match:
-                            fecha_match = re.search(r"Publicación:\s*(\d{2}-\w{3}-\d{4})", full_text)
-                        fecha = fecha_match.group(1) if fecha_match else extract_date(full_text, filename)
-
-                    elif "circu" in filename:
-                        materia_match = re.search(
-                            r"MATERIA\s*:\s*(.+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))", 
-                            full_text, 
-                            re.DOTALL | re.IGNORECASE
-                        )
 
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"MATERIA\s+(.+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))", 
-                                full_text, 
-                                re.DOTALL | re.IGNORECASE
-                            )
-
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"SISTEMA:\s*(.+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))", 
-                                full_text, 
-                                re.DOTALL | re.IGNORECASE
-                            )
-
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"(SUBDIRECCIÓN[\s\S]+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|\Z))",
-                                full_text,
-                                re.IGNORECASE | re.DOTALL
-                            )
-
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"(DIRECCIÓN[\s\S]+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|\Z))",
-                                full_text,
-                                re.IGNORECASE | re.DOTALL
-                            )
-
-                        materia = materia_match.group(1).strip() if materia_match else "No disponible"
-                        materia = re.sub(r'\b[A-Z]{2,}\d{5,}\b|\b[A-Za-z]{1,}\s?\d{5,}\b|\b[A-Za-z0-9\-]{2,}\s?-?\d{4,}\s?\d{10,}\b', '', materia, flags=re.IGNORECASE).strip()
-
-                        if len(materia) > 300:
-                            materia = materia[:297] + '...'
-
-                        fecha = extract_date(full_text, filename)
-                        
-                    elif "reso" in filename:
-                        materia_match = re.search(
-                            r"MATERIA\s*:\s*(.+?)(?=\n*(?:SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))", 
-                            full_text, 
-                            re.DOTALL | re.IGNORECASE
-                        )
+                cached = cache.get(pdf_path) if cache else None
+                if cached is not None:
+                    metadata_dict[pdf_path] = cached
+                    continue
 
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"MATERIA\s+(.+?)(?=\n*(?:SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))", 
-                                full_text, 
-                                re.DOTALL | re.IGNORECASE
-                            )
-
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"SISTEMA:\s*(.+?)(?=\n*(?:SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))", 
-                                full_text, 
-                                re.DOTALL | re.IGNORECASE
-                            )
-
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"(SUBDIRECCIÓN[\s\S]+?)(?=\n*(?:SANTIAGO|\Z))",
-                                full_text,
-                                re.IGNORECASE
-                            )
-
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"(DIRECCIÓN[\s\S]+?)(?=\n*(?:SANTIAGO|\Z))",
-                                full_text,
-                                re.IGNORECASE
-                            )
-
-                        if not materia_match:
-                            materia_match = re.search(
-                                r"(.*?)(?=\n*SANTIAGO,\s*\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4}\.?)",
-                                full_text,
-                                re.DOTALL | re.IGNORECASE
-                            )
-
-                        materia = materia_match.group(1).strip() if materia_match else "No disponible"
-                        materia = re.sub(r'\b[A-Z]{2,}\d{5,}\b|\b[A-Za-z]{1,}\s?\d{5,}\b|\b[A-Za-z0-9\-]{2,}\s?-?\d{4,}\s?\d{10,}\b', '', materia, flags=re.IGNORECASE).strip()
-
-                        if len(materia) > 500:
-                            materia = materia[:497] + '...'
-                    
-                        fecha = extract_date(full_text, filename)
-
-                    elif "RENTA" in filename:
-                            # Intenta el método original primero
-                        materia_match = re.search(
-                            r"(RENTA(?: – LEY SOBRE IMPUESTO A LA)?[\s\S]+?)(?=\n*(De acuerdo|Se ha|$))",
-                            full_text,
-                            re.IGNORECASE
-                            )
-                            
-                         # Si falla, intenta el método alternativo para documentos de IVA/Ventas
-                        if not materia_match:
-                            materia_match = re.search(
-                                    r"(VENTAS Y SERVICIOS – LEY SOBRE IMPUESTO A LAS[\s\S]+?)(?=\n*(De acuerdo|Se ha|$))",
-                                    full_text,
-                                    re.IGNORECASE
-                                )
-                            
-                        materia = materia_match.group(1).strip() if materia_match else "No disponible"
-                        materia = re.sub(r'(\n\s*)+\n+', '\n\n', materia)
-                        materia = re.sub(r'[ \t]{2,}', ' ', materia)
-                        materia = re.sub(r'(?<=[A-Z])(ART[ÍI]CULO|ART\.)', r'\n\1', materia)
-                        materia = re.sub(r'\b[A-Z]{2,}\d{5,}\b|\b[A-Za-z]{1,}\s?\d{5,}\b|\b[A-Za-z0-9\-]{2,}\s?-?\d{4,}\s?\d{10,}\b', '', materia, flags=re.IGNORECASE).strip()
-
-                        if len(materia) > 600:
-                            materia = materia[:597] + '...'
-
-                        fecha = extract_date(full_text, filename)
-
-                    elif "VENTAS" in filename:
-                        materia_match = re.search(
-                            r"(VENTAS Y SERVICIOS(?: – LEY SOBRE IMPUESTO A LA)?[\s\S]+?)(?=\n*(?:Se ha|De acuerdo|1\.|$))",
-                            full_text,
-                            re.IGNORECASE
-                        )
+                metadata_dict[pdf_path] = FileUtils.extract_pdf_metadata(pdf_path)
+                if cache:
+                    cache.put(pdf_path, metadata_dict[pdf_path])
 
-                        materia = materia_match.group(1).strip() if materia_match else "No disponible"
-                        materia = re.sub(r'(\n\s*)+\n+', '\n\n', materia)
-                        materia = re.sub(r'[ \t]{2,}', ' ', materia)
-                        materia = re.sub(r'(?<=[A-Z])(ART[ÍI]CULO|ART\.)', r'\n\1', materia)
-                        materia = re.sub(r'\b[A-Z]{2,}\d{5,}\b|\b[A-Za-z]{1,}\s?\d{5,}\b|\b[A-Za-z0-9\-]{2,}\s?-?\d{4,}\s?\d{10,}\b', '', materia, flags=re.IGNORECASE).strip()
-
-                        if len(materia) > 600:
-                            materia = materia[:597] + '...'
-                        
-                        fecha = extract_date(full_text, filename)
-                    #Mejorar esta parte
-                    elif "OTRAS_NORMAS" in filename:
-                        materia_match = re.search(
-                            r"(.*?)(?=\n*(?:Se ha|De acuerdo))",
-                            full_text,
-                            re.DOTALL | re.IGNORECASE
-                        )
-                        
-                        if materia_match:
-                            materia = materia_match.group(1).strip()
-                        else:
-                            clean_text = re.sub(r'[ \t]{2,}', ' ', full_text.strip())
-                            clean_text = re.sub(r'(\n\s*)+\n+', '\n\n', clean_text)
-                            clean_text = re.sub(r'(?<=[A-Z])(ART[ÍI]CULO|ART\.)', r'\n\1', clean_text)
-                            materia = clean_text[:447] + '...' if len(clean_text) > 450 else clean_text
-                        
-                        materia = re.sub(r'\b[A-Z]{2,}\d{5,}\b|\b[A-Za-z]{1,}\s?\d{5,}\b|\b[A-Za-z0-9\-]{2,}\s?-?\d{4,}\s?\d{10,}\b', '', materia, flags=re.IGNORECASE).strip()
-                        
-                        if len(materia) > 500:
-                            materia = materia[:497] + '...'
-                        
-                        fecha = extract_date(full_text, filename)
-
-                    metadata_dict[pdf_path] = {
-                        'file_name': filename,
-                        'page_count': len(reader.pages),
-                        'materia': materia,
-                        'fecha': fecha,
-                        'title': raw_metadata.get('/Title', 'No disponible'),
-                        'author': raw_metadata.get('/Author', 'No disponible'),
-                        'subject': raw_metadata.get('/Subject', 'No disponible'),
-                        'keywords': raw_metadata.get('/Keywords', 'No disponible'),
-                        'modification_date': datetime.datetime.fromtimestamp(os.path.getmtime(pdf_path)).strftime('%d/%m/%Y %H:%M:%S')
-                    }
-                    
             except Exception as e:
                 logging.error(f"Error procesando {pdf_path}: {str(e)}")
                 metadata_dict[pdf_path] = {
                     'error': str(e),
                     'file_name': os.path.basename(pdf_path)
                 }
-        
+
+        if cache:
+            try:
+                cache.save()
+            except OSError as e:
+                logging.warning(f"No se pudo guardar el caché de metadatos: {str(e)}")
+
         return metadata_dict
-    
+
+    @staticmethod
+    def init_metadata_worker(started) -> None:
+        global _METADATA_STARTED
+        _METADATA_STARTED = started
+
+    @staticmethod
+    def extract_pdf_metadata_notified(pdf_path: str) -> Dict:
+        # El plazo de cada PDF corre desde que un proceso lo toma, no desde que se encola
+        _METADATA_STARTED.put((pdf_path, time.monotonic()))
+        return FileUtils.extract_pdf_metadata(pdf_path)
+
+    @staticmethod
+    def get_pdf_metadata_parallel(pdf_paths: List[str], cache_path: Optional[str] = METADATA_CACHE_PATH,
+                                  max_workers: int = METADATA_WORKERS, timeout: float = METADATA_TIMEOUT) -> Dict[str, Dict]:
+        cache = MetadataCache(cache_path) if cache_path else None
+        results: Dict[str, Dict] = {}
+        pending = []
+
+        for pdf_path in pdf_paths:
+            if not os.path.exists(pdf_path):
+                logging.warning(f"Archivo PDF no encontrado: {pdf_path}")
+                continue
+            cached = cache.get(pdf_path) if cache else None
+            if cached is not None:
+                results[pdf_path] = cached
+            else:
+                pending.append(pdf_path)
+
+        if len(pending) <= 1 or max_workers <= 1:
+            results.update(FileUtils.get_pdf_metadata(pending, cache_path))
+            return {p: results[p] for p in pdf_paths if p in results}
+
+        workers = min(max_workers, len(pending))
+        # spawn: en modo servicio el proceso ya tiene hilos (registro, estado HTTP, Playwright)
+        # y un fork puede heredar sus locks tomados y bloquear al hijo
+        context = multiprocessing.get_context("spawn")
+        started_queue = context.Queue()
+        pool = context.Pool(processes=workers, initializer=FileUtils.init_metadata_worker, initargs=(started_queue,))
+        try:
+            running = {p: pool.apply_async(FileUtils.extract_pdf_metadata_notified, (p,)) for p in pending}
+            started: Dict[str, float] = {}
+            stuck: Set[str] = set()
+            last_progress = time.monotonic()
+            while running:
+                while True:
+                    try:
+                        pdf_path, start = started_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    started[pdf_path] = start
+                    last_progress = time.monotonic()
+                now = time.monotonic()
+                for pdf_path, async_result in list(running.items()):
+                    if async_result.ready():
+                        del running[pdf_path]
+                        last_progress = now
+                        try:
+                            results[pdf_path] = async_result.get()
+                            if cache:
+                                cache.put(pdf_path, results[pdf_path])
+                        except Exception as e:
+                            logging.error(f"Error procesando {pdf_path}: {str(e)}")
+                            results[pdf_path] = {'error': str(e), 'file_name': os.path.basename(pdf_path)}
+                    elif pdf_path in started and now - started[pdf_path] > timeout:
+                        # El proceso sigue ocupado con este PDF: no vuelve a quedar libre
+                        del running[pdf_path]
+                        stuck.add(pdf_path)
+                        logging.error(f"Tiempo agotado procesando {pdf_path} ({timeout}s)")
+                        results[pdf_path] = {
+                            'error': f"Tiempo agotado tras {timeout} segundos",
+                            'file_name': os.path.basename(pdf_path)
+                        }
+                # Con todos los procesos bloqueados (o sin arrancar), lo que no empezó ya no se ejecutará
+                idle = not any(p in started for p in running) and now - last_progress > timeout
+                if len(stuck) >= workers or idle:
+                    for pdf_path in running:
+                        logging.error(f"Sin procesar {pdf_path}: todos los procesos quedaron bloqueados")
+                        results[pdf_path] = {
+                            'error': "Sin procesar: todos los procesos quedaron bloqueados",
+                            'file_name': os.path.basename(pdf_path)
+                        }
+                    break
+                time.sleep(0.05)
+        finally:
+            # terminate() también detiene los procesos bloqueados en un PDF malformado
+            pool.terminate()
+            pool.join()
+
+        if cache:
+            try:
+                cache.save()
+            except OSError as e:
+                logging.warning(f"No se pudo guardar el caché de metadatos: {str(e)}")
+
+        return {p: results[p] for p in pdf_paths if p in results}
+
     @staticmethod
     def save_metadata_to_json(metadata: Dict, json_path: str) -> None:
         with open(json_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, indent=2, ensure_ascii=False)
     
-    @staticmethod
-    def get_top_files(files: List[str], pattern: str) -> List[str]:
-        files_with_numbers = []
-        for file_path in files:
-            filename = os.path.basename(file_path)
-            try:
-                num_match = re.search(pattern, filename)
-                if num_match:
-                    num = int(num_match.group(1))
-                    files_with_numbers.append((num, file_path))
-            except:
-                continue
-        
-        files_with_numbers.sort(reverse=True, key=lambda x: x[0])
-        top_files = [f[1] for f in files_with_numbers[:42]]
-        
-        return top_files
-
     @staticmethod
     def clean_text(text: str) -> str:
         # Reemplazar caracteres especiales
@@ -471,59 +638,538 @@ class FileUtils:
         
         return text.strip()
 
+def file_sha256(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(8192), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class JsonlLedger:
+    """Registro append-only (JSON Lines) con una entrada vigente por clave.
+
+    Cada línea se confirma con flush + fsync, por lo que una interrupción solo
+    puede perder la línea en curso, que se descarta al cargar. Las bajas quedan
+    como lápidas y `compact` reescribe el archivo de forma atómica cuando
+    acumula demasiadas líneas obsoletas.
+    """
+
+    key = "id"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict] = {}
+        self.line_count = 0
+        # Reentrante: una subclase puede completar una entrada y escribirla sin soltarlo
+        self.lock = threading.RLock()
+        self.load()
+
+    def load(self) -> Dict[str, Dict]:
+        self.entries = {}
+        self.line_count = 0
+        if not os.path.exists(self.path):
+            return self.entries
+
+        self._repair_tail()
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                self.line_count += 1
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"Línea inválida en {self.path}, se ignora")
+                    continue
+                if entry.get("removed"):
+                    self.entries.pop(entry.get(self.key), None)
+                else:
+                    self.entries[entry[self.key]] = entry
+        return self.entries
+
+    def _repair_tail(self) -> None:
+        # Una caída durante la escritura puede dejar una línea sin terminar;
+        # se recorta para que el siguiente append no quede pegado a ella.
+        with open(self.path, "rb+") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            data = f.read()
+            f.seek(data.rfind(b"\n") + 1)
+            f.truncate()
+            logging.warning(f"Se descartó una línea incompleta al final de {self.path}")
+
+    def _append(self, entry: Dict) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.line_count += 1
+
+    def put(self, entry: Dict) -> Dict:
+        with self.lock:
+            self._append(entry)
+            self.entries[entry[self.key]] = entry
+        return entry
+
+    def forget(self, key: str) -> None:
+        with self.lock:
+            if key not in self.entries:
+                return
+            self._append({self.key: key, "removed": True,
+                          "timestamp": datetime.datetime.now().isoformat(timespec="seconds")})
+            del self.entries[key]
+
+    def needs_compaction(self, ratio: float = 2.0) -> bool:
+        return self.line_count > max(len(self.entries), 1) * ratio
+
+    def compact(self) -> None:
+        with self.lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self.line_count = len(self.entries)
+
+class PdfManifest(JsonlLedger):
+    """Índice de los PDF en las carpetas de descarga (JSON Lines, append-only).
+
+    Cada archivo se registra al llegar con su tipo, número, fecha, tamaño, hash y
+    URL de origen, de modo que las comprobaciones de existencia y la selección de
+    los más recientes por tipo no recorren la carpeta. `sync` concilia el índice
+    con el disco una vez por ejecución.
+    """
+
+    key = "path"
+
+    def __init__(self, path: str = MANIFEST_PATH, folders: Tuple[str, ...] = (DOWNLOAD_DIR_SII, DOWNLOAD_DIR_BCN)):
+        self.folders = tuple(dict.fromkeys(folders))
+        super().__init__(path)
+
+    @staticmethod
+    def classify(filename: str) -> Dict:
+        for doc_type, pattern in MANIFEST_TYPES:
+            match = pattern.match(filename)
+            if match:
+                fields = match.groupdict()
+                date = None
+                if fields.get("day"):
+                    date = f"{fields['year']}-{fields['month']}-{fields['day']}"
+                return {"type": doc_type, "number": int(fields["number"]),
+                        "year": fields.get("year"), "date": date}
+        return {"type": None, "number": None, "year": None, "date": None}
+
+    def record(self, file_path: str, url: Optional[str] = None, stat: Optional[os.stat_result] = None) -> Dict:
+        stat = stat or os.stat(file_path)
+        entry = {
+            "path": file_path,
+            **self.classify(os.path.basename(file_path)),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": file_sha256(file_path),
+            "url": url,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds")
+        }
+        with self.lock:
+            if url is None and file_path in self.entries:
+                entry["url"] = self.entries[file_path].get("url")
+            return self.put(entry)
+
+    def sync(self) -> Tuple[int, int]:
+        # Un único recorrido por carpeta: indexa los PDF nuevos o modificados y da de baja los borrados
+        on_disk = {}
+        for folder in self.folders:
+            with os.scandir(folder) as it:
+                for item in it:
+                    if item.is_file() and item.name.endswith(".pdf"):
+                        on_disk[os.path.join(folder, item.name)] = item.stat()
+
+        added = 0
+        for file_path, stat in on_disk.items():
+            entry = self.entries.get(file_path)
+            if not entry or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                self.record(file_path, stat=stat)
+                added += 1
+        missing = [file_path for file_path in self.entries if file_path not in on_disk]
+        for file_path in missing:
+            self.forget(file_path)
+
+        if self.needs_compaction():
+            self.compact()
+        return added, len(missing)
+
+    def contains(self, file_path: str) -> bool:
+        return file_path in self.entries
+
+    def of_type(self, doc_type: str) -> List[Dict]:
+        return [entry for entry in self.entries.values() if entry["type"] == doc_type]
+
+    def top_files(self, file_paths: List[str], per_type: int = MANIFEST_TOP_PER_TYPE) -> List[str]:
+        by_type: Dict[str, List[Dict]] = {}
+        for file_path in file_paths:
+            entry = self.entries.get(file_path)
+            if entry and entry["type"]:
+                by_type.setdefault(entry["type"], []).append(entry)
+
+        selected = []
+        for doc_type, _ in MANIFEST_TYPES:
+            entries = sorted(by_type.get(doc_type, []), key=lambda e: (e["year"] or "", e["number"]), reverse=True)
+            selected.extend(entry["path"] for entry in entries[:per_type])
+        return selected
+
+_MANIFEST: Optional[PdfManifest] = None
+
+# Manifiesto compartido por las descargas SII y BCN del proceso, conciliado con el disco al
+# crearlo (y al inicio de cada ejecución en modo servicio, donde el proceso no termina)
+def get_manifest(resync: bool = False) -> PdfManifest:
+    global _MANIFEST
+    if _MANIFEST is None or resync:
+        _MANIFEST = _MANIFEST or PdfManifest()
+        added, removed = _MANIFEST.sync()
+        logging.info(f"Manifiesto: {len(_MANIFEST.entries)} PDF indexados ({added} nuevos, {removed} dados de baja)")
+    return _MANIFEST
+
+class PartialDownloadError(Exception):
+    """Reintento fallido que igual dejó archivos nuevos."""
+
+    def __init__(self, message: str, files: List[str]):
+        super().__init__(message)
+        self.files = files
+
+class RetryScheduler:
+    """Cola de reintentos por elemento fallido.
+
+    Cada elemento tiene una clave legible y una acción que devuelve los archivos
+    nuevos o lanza una excepción. `run` ejecuta solo los pendientes, cada uno
+    cuando vence su espera exponencial con jitter, y termina en cuanto no queda
+    ninguno; los que agotan sus intentos quedan en `failed`.
+    """
+
+    def __init__(self, attempts: int = RETRY_ATTEMPTS, base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.pending: Dict[str, Dict] = {}
+        self.failed: List[str] = []
+        self.lock = threading.Lock()
+
+    def delay(self, attempt: int) -> float:
+        # Mitad fija y mitad aleatoria para que los elementos no se reintenten en bloque
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def schedule(self, key: str, action: Callable[[], List[str]], attempt: int = 1) -> None:
+        # attempt: intentos ya hechos; una clave ya pendiente conserva su turno
+        with self.lock:
+            if key in self.pending:
+                return
+            self.pending[key] = {"action": action, "attempt": attempt,
+                                 "due": time.monotonic() + self.delay(attempt)}
+        logging.info(f"Reintento programado: {key}")
+
+    def run(self) -> Dict[str, List[str]]:
+        recovered = {}
+        while self.pending:
+            with self.lock:
+                key, item = min(self.pending.items(), key=lambda pair: pair[1]["due"])
+                del self.pending[key]
+            wait = item["due"] - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            attempt = item["attempt"] + 1
+            try:
+                files = item["action"]() or []
+                recovered.setdefault(key, []).extend(files)
+                logging.info(f"Reintento {attempt} de {key}: {len(files)} archivos")
+            except Exception as e:
+                if getattr(e, "files", None):
+                    recovered.setdefault(key, []).extend(e.files)
+                if attempt >= self.attempts:
+                    logging.error(f"{key} falló tras {attempt} intentos: {e}")
+                    self.failed.append(key)
+                else:
+                    logging.warning(f"Reintento {attempt} de {key} falló: {e}")
+                    self.schedule(key, item["action"], attempt)
+        return recovered
+
+class SIIYearState:
+    """Estado del descubrimiento SII por año y fuente, en un JSON junto a los PDFs.
+
+    Una fuente de un año anterior al actual queda cerrada cuando termina sin
+    errores y no se vuelve a sondear. El año en curso se revisa siempre, pero
+    los sondeos retoman desde el último número encontrado.
+    """
+
+    def __init__(self, path: str = SII_STATE_PATH):
+        self.path = path
+        self.years: Dict[str, Dict[str, Dict]] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.years = json.load(f).get("years", {})
+        except (json.JSONDecodeError, OSError):
+            logging.warning(f"Estado SII ilegible, se volverán a sondear todos los años: {self.path}")
+
+    def get(self, year: str, source: str) -> Dict:
+        return self.years.get(year, {}).get(source, {})
+
+    def is_complete(self, year: str, source: str) -> bool:
+        return bool(self.get(year, source).get("complete"))
+
+    def known_numbers(self, year: str, source: str) -> List[int]:
+        return list(self.get(year, source).get("numbers", []))
+
+    def record(self, year: str, source: str, complete: bool, files: int, numbers: Optional[List[int]] = None) -> None:
+        entry = self.get(year, source)
+        self.years.setdefault(year, {})[source] = {
+            "complete": complete,
+            "numbers": sorted(numbers) if numbers is not None else entry.get("numbers", []),
+            "files": entry.get("files", 0) + files,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds")
+        }
+        self.save()
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"years": self.years}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+class ChromePool:
+    """Navegadores Chrome de los listados SII, reutilizables entre descargas.
+
+    Cada navegador tiene su propio puerto de depuración y la carpeta de descargas
+    se cambia por CDP al tomarlo, así que uno solo sirve a cualquier (año, fuente).
+    `main` cierra el grupo al terminar; el modo servicio (servicio.py) lo conserva
+    abierto entre ejecuciones junto con el ChromeDriver ya instalado.
+    """
+
+    def __init__(self, size: int = SII_BROWSERS, first_port: int = SII_DEBUG_PORT):
+        self.idle: queue.Queue = queue.Queue()
+        self.ports: queue.Queue = queue.Queue()
+        for i in range(size):
+            self.ports.put(first_port + i)
+        self.port_by_driver: Dict[webdriver.Chrome, int] = {}
+        self.driver_path: Optional[str] = None
+        self.lock = threading.Lock()
+
+    def install(self) -> str:
+        with self.lock:
+            if self.driver_path is None:
+                from webdriver_manager.chrome import ChromeDriverManager
+                self.driver_path = ChromeDriverManager().install()
+        return self.driver_path
+
+    def acquire(self, download_dir: str) -> webdriver.Chrome:
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                driver.execute_cdp_cmd("Page.setDownloadBehavior",
+                                       {"behavior": "allow", "downloadPath": os.path.abspath(download_dir)})
+                return driver
+            except Exception:
+                # Navegador caído mientras esperaba: se descarta y se prueba el siguiente
+                self.discard(driver)
+
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        port = self.ports.get()
+        try:
+            driver = webdriver.Chrome(service=Service(self.install()),
+                                      options=SIIDownloader.configure_browser(download_dir, port))
+        except Exception:
+            self.ports.put(port)
+            raise
+        self.port_by_driver[driver] = port
+        return driver
+
+    def release(self, driver: webdriver.Chrome, healthy: bool = True) -> None:
+        if healthy:
+            self.idle.put(driver)
+        else:
+            self.discard(driver)
+
+    def discard(self, driver: webdriver.Chrome) -> None:
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self.ports.put(self.port_by_driver.pop(driver))
+
+    def close(self) -> None:
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                return
+
 class SIIDownloader:
     
     @staticmethod
-    def download_with_requests() -> List[str]:
-        base_url_resoluciones = 'https://www.sii.cl/normativa_legislacion/resoluciones/'
-        base_url_circulares = 'https://www.sii.cl/normativa_legislacion/circulares/'
-
-        def scrape_pdf_links(base_url: str, year: str, prefix: str, max_missing: int = 10) -> List[str]:
-            pdf_links = []
-            i = 1
-            missing_count = 0
-            while True:
-                pdf_link = f"{base_url}{year}/{prefix}{i}.pdf"
-                response = requests.head(pdf_link)
-                if response.status_code == 200:
-                    pdf_links.append((pdf_link, f"{prefix}{i}.pdf"))
-                    missing_count = 0  # Reinicia el contador si encuentra uno válido
+    def parse_years(spec: str) -> List[str]:
+        # SII_ANIOS: "2025", "2022-2024" o "2020,2023-2025"; un rango invertido se acepta igual.
+        # Un valor inválido no debe detener la ejecución: se revisa solo el año en curso
+        years = set()
+        try:
+            for part in spec.split(','):
+                part = part.strip()
+                if not part:
+                    continue
+                if '-' in part:
+                    start, end = sorted(int(bound) for bound in part.split('-', 1))
+                    years.update(range(start, end + 1))
                 else:
-                    missing_count += 1
-                    if missing_count >= max_missing:
-                        break
-                i += 1
-            return pdf_links
-
-        def download_file(url: str, filename: str, folder: str) -> str:
-            local_filename = os.path.join(folder, filename)
-            with requests.get(url, stream=True) as r:
-                r.raise_for_status()
-                with open(local_filename, 'wb') as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        f.write(chunk)
-            return local_filename
-
-        # Buscar sin límite fijo, solo se detiene tras 10 archivos inexistentes seguidos
-        resoluciones_pdf_links = scrape_pdf_links(base_url_resoluciones, YEAR, 'reso', 10)
-        circulares_pdf_links = scrape_pdf_links(base_url_circulares, YEAR, 'circu', 10)
-        all_pdf_links = resoluciones_pdf_links + circulares_pdf_links
-
-        downloaded_files = set(os.listdir(DOWNLOAD_DIR_SII))
-        new_files = []
+                    years.add(int(part))
+        except ValueError:
+            years = set()
+        if not years:
+            logging.error(f"SII_ANIOS inválido ({spec!r}); se revisa solo {YEAR}")
+            return [YEAR]
+        return [str(year) for year in sorted(years)]
+
+    @staticmethod
+    def probe_filename(prefix: str, number: int, year: str) -> str:
+        # El número se repite cada año, por eso el nombre local lleva el año
+        return f"{prefix}{number}_{year}.pdf"
 
-        for pdf_link, filename in all_pdf_links:
-            if filename not in downloaded_files:
+    @staticmethod
+    def probe_numbers(session: requests.Session, base_url: str, prefix: str,
+                      numbers: List[int], max_missing: int = 10) -> List[int]:
+        # Sigue desde el último número conocido y se detiene tras max_missing inexistentes seguidos
+        i = max(numbers, default=0) + 1
+        missing_count = 0
+        while missing_count < max_missing:
+            response = session.head(f"{base_url}{prefix}{i}.pdf", timeout=15)
+            if response.status_code == 200:
+                numbers.append(i)
+                missing_count = 0  # Reinicia el contador si encuentra uno válido
+            else:
+                missing_count += 1
+            i += 1
+        return numbers
+
+    @staticmethod
+    def download_file(session: requests.Session, url: str, local_filename: str) -> str:
+        tmp_filename = f"{local_filename}.part"
+        with session.get(url, stream=True, timeout=30) as r:
+            r.raise_for_status()
+            with open(tmp_filename, 'wb') as f:
+                for chunk in r.iter_content(chunk_size=8192):
+                    f.write(chunk)
+        os.replace(tmp_filename, local_filename)
+        return local_filename
+
+    @staticmethod
+    def legacy_year(entry: Dict) -> str:
+        # El año de la URL de origen o, si no quedó registrada, el de la fecha del documento. El de
+        # la descarga es el último recurso: una resolución de diciembre bajada en enero lo tiene mal
+        url_match = URL_YEAR_RE.search(entry.get("url") or "")
+        if url_match:
+            return url_match.group(1)
+        try:
+            fecha = FileUtils.extract_pdf_metadata(entry["path"])["fecha"]
+        except Exception as e:
+            logging.warning(f"No se pudo leer la fecha de {entry['path']}: {str(e)}")
+            fecha = ""
+        fecha_match = YEAR_RE.search(fecha)
+        if fecha_match:
+            return fecha_match.group(1)
+        year = str(datetime.datetime.fromtimestamp(entry["mtime"]).year)
+        logging.warning(f"{os.path.basename(entry['path'])} sin año en su URL ni en el documento; se usa el de la descarga ({year})")
+        return year
+
+    @staticmethod
+    def migrate_legacy_files(manifest: PdfManifest) -> int:
+        # Antes de los nombres con año, los sondeos guardaban reso<N>.pdf y circu<N>.pdf del año en
+        # curso. Se renombran con el año del documento para que no se vuelvan a descargar
+        renamed = 0
+        for entry in list(manifest.entries.values()):
+            if 'probe' not in SII_SOURCES.get(entry["type"], {}) or entry["year"]:
+                continue
+            year = SIIDownloader.legacy_year(entry)
+            old_path = entry["path"]
+            new_path = os.path.join(os.path.dirname(old_path),
+                                    SIIDownloader.probe_filename(entry["type"], entry["number"], year))
+            if os.path.exists(new_path):
+                logging.warning(f"{os.path.basename(old_path)} ya existe como {os.path.basename(new_path)}; se conserva sin renombrar")
+                continue
+            os.replace(old_path, new_path)
+            url = entry.get("url") or f"{SII_SOURCES[entry['type']]['probe'].format(year=year)}{entry['type']}{entry['number']}.pdf"
+            manifest.forget(old_path)
+            manifest.record(new_path, url)
+            renamed += 1
+        if renamed:
+            logging.info(f"SII: {renamed} archivos con nombre anterior renombrados con su año")
+        return renamed
+
+    @staticmethod
+    def download_number(year: str, source: str, number: int, session: Optional[requests.Session] = None) -> str:
+        import requests
+
+        filename = SIIDownloader.probe_filename(source, number, year)
+        local_filename = os.path.join(DOWNLOAD_DIR_SII, filename)
+        url = f"{SII_SOURCES[source]['probe'].format(year=year)}{source}{number}.pdf"
+        SIIDownloader.download_file(session or requests, url, local_filename)
+        get_manifest().record(local_filename, url)
+        return local_filename
+
+    @staticmethod
+    def download_probe_source(year: str, source: str, known_numbers: List[int],
+                              scheduler: Optional[RetryScheduler] = None) -> Dict:
+        base_url = SII_SOURCES[source]['probe'].format(year=year)
+        # error: falló el sondeo en sí; ok: además no quedó ningún número pendiente
+        result = {'files': [], 'numbers': list(known_numbers), 'ok': True, 'error': False}
+        manifest = get_manifest()
+
+        import requests
+        with requests.Session() as session:
+            try:
+                SIIDownloader.probe_numbers(session, base_url, source, result['numbers'])
+            except Exception as e:
+                logging.error(f"Error sondeando {source} {year}: {e}")
+                result['ok'] = False
+                result['error'] = True
+            # Un año sin ningún número encontrado no se da por cerrado (sitio caído, URL cambiada)
+            if not result['numbers']:
+                result['ok'] = False
+
+            for number in result['numbers']:
+                if manifest.contains(os.path.join(DOWNLOAD_DIR_SII, SIIDownloader.probe_filename(source, number, year))):
+                    continue
                 try:
-                    pdf_file_path = download_file(pdf_link, filename, DOWNLOAD_DIR_SII)
-                    new_files.append(pdf_file_path)
+                    result['files'].append(SIIDownloader.download_number(year, source, number, session))
                 except Exception as e:
-                    logging.error(f"Error descargando {filename}: {e}")
-        
-        return new_files
+                    logging.error(f"Error descargando {source}{number} {year}: {e}")
+                    result['ok'] = False
+                    if scheduler:
+                        scheduler.schedule(f"{source}{number} {year}",
+                                           lambda number=number: [SIIDownloader.download_number(year, source, number)])
+
+        return result
 
     @staticmethod
-    def configure_browser() -> Options:
+    def configure_browser(download_dir: str = DOWNLOAD_DIR_SII, debugging_port: int = SII_DEBUG_PORT) -> Options:
+        from selenium.webdriver.chrome.options import Options
+
         chrome_options = Options()
         options = Options()
 
@@ -531,7 +1177,7 @@ class SIIDownloader:
         chrome_options.add_argument("--headless=new")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--remote-debugging-port=9222")
+        chrome_options.add_argument(f"--remote-debugging-port={debugging_port}")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1920,1080")
         chrome_options.add_argument("--start-maximized")
@@ -545,7 +1191,7 @@ class SIIDownloader:
 
 
         prefs = {
-            "download.default_directory": os.path.abspath(DOWNLOAD_DIR_SII),
+            "download.default_directory": os.path.abspath(download_dir),
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "plugins.always_open_pdf_externally": True,
@@ -554,12 +1200,16 @@ class SIIDownloader:
         chrome_options.add_experimental_option("prefs", prefs)
         
         chrome_options.add_argument("--remote-debugging-address=0.0.0.0")
-        chrome_options.add_argument("--remote-debugging-port=9222")
+        chrome_options.add_argument(f"--remote-debugging-port={debugging_port}")
         
         return chrome_options
 
     @staticmethod
     def navigate_to_page(driver: webdriver.Chrome, url: str) -> bool:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         driver.get(url)
         
         try:
@@ -589,11 +1239,11 @@ class SIIDownloader:
 
     @staticmethod
     def is_file_downloaded(filename: str) -> bool:
-        return os.path.exists(os.path.join(DOWNLOAD_DIR_SII, filename)) if filename else False
+        return get_manifest().contains(os.path.join(DOWNLOAD_DIR_SII, filename)) if filename else False
 
     @staticmethod
-    def wait_for_download(before_files: set, timeout: float = 0.5) -> Optional[str]:
-        download_path = os.path.abspath(DOWNLOAD_DIR_SII)
+    def wait_for_download(before_files: set, timeout: float = 0.5, folder: str = DOWNLOAD_DIR_SII) -> Optional[str]:
+        download_path = os.path.abspath(folder)
         start_time = time.time()
         
         while time.time() - start_time < timeout:
@@ -606,101 +1256,215 @@ class SIIDownloader:
         return None
 
     @staticmethod
-    def download_link(driver: webdriver.Chrome, link, prefix: str = None) -> Optional[str]:
+    def download_link(driver: webdriver.Chrome, link, prefix: str = None, folder: str = DOWNLOAD_DIR_SII,
+                      failures: Optional[List[Tuple[str, str]]] = None) -> Optional[str]:
         description = link.text.strip()
         filename = SIIDownloader.extract_filename(description, prefix)
         
         if not filename or SIIDownloader.is_file_downloaded(filename):
             return None
 
-        before_files = set(f for f in os.listdir(DOWNLOAD_DIR_SII) if f.endswith('.pdf'))
+        before_files = set(f for f in os.listdir(folder) if f.endswith('.pdf'))
 
         link.click() 
         
-        downloaded_file = SIIDownloader.wait_for_download(before_files)
+        downloaded_file = SIIDownloader.wait_for_download(before_files, folder=folder)
         if downloaded_file:
             # Asegurarse de que el archivo tenga el prefijo correcto
             if not any(downloaded_file.startswith(p) for p in ALLOWED_PREFIXES):
                 os.rename(
-                    os.path.join(DOWNLOAD_DIR_SII, downloaded_file),
-                    os.path.join(DOWNLOAD_DIR_SII, filename)
+                    os.path.join(folder, downloaded_file),
+                    os.path.join(folder, filename)
                 )
                 return filename
             else:
                 # Si ya tiene un prefijo válido, solo moverlo si es necesario
                 if downloaded_file != filename:
                     os.rename(
-                        os.path.join(DOWNLOAD_DIR_SII, downloaded_file),
-                        os.path.join(DOWNLOAD_DIR_SII, filename)
+                        os.path.join(folder, downloaded_file),
+                        os.path.join(folder, filename)
                     )
                 return filename
+        if failures is not None:
+            failures.append((filename, link.get_attribute('href')))
         return None
 
     @staticmethod
-    def find_and_download(driver: webdriver.Chrome, xpath: str, prefix: str = None) -> List[str]:
+    def find_and_download(driver: webdriver.Chrome, xpath: str, prefix: str = None, folder: str = DOWNLOAD_DIR_SII,
+                          failures: Optional[List[Tuple[str, str]]] = None) -> List[str]:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         links = WebDriverWait(driver, 0.15).until(
             EC.presence_of_all_elements_located((By.XPATH, xpath))
         )
         
         return [result for link in links 
-                if (result := SIIDownloader.download_link(driver, link, prefix))]
+                if (result := SIIDownloader.download_link(driver, link, prefix, folder, failures))]
 
     @staticmethod
-    def download_ventas_renta(driver: webdriver.Chrome) -> List[str]:
-        configs = [
-            ("https://www.sii.cl/normativa_legislacion/jurisprudencia_administrativa/ley_impuesto_ventas/2025/ley_impuesto_ventas_jadm2025.htm",
-             "//a[starts-with(text(),'Ventas y Servicios')]", "VENTAS"),
-            ("https://www.sii.cl/normativa_legislacion/jurisprudencia_administrativa/ley_impuesto_renta/2025/ley_impuesto_renta_jadm2025.htm",
-             "//a[starts-with(text(),'Renta')]", "RENTA")
-        ]
-
-        downloaded_files = []
-        for url, xpath, prefix in configs:
-            if SIIDownloader.navigate_to_page(driver, url):
-                downloaded_files.extend(SIIDownloader.find_and_download(driver, xpath, prefix))
-        
-        return downloaded_files
+    def download_href(filename: str, url: Optional[str]) -> List[str]:
+        # Reintento de un oficio puntual: se descarga directo desde su enlace, sin navegador
+        if not url:
+            raise ValueError(f"{filename} no tiene enlace directo")
+        import requests
 
-    @staticmethod
-    def download_other_rules(driver: webdriver.Chrome) -> List[str]:
-        url = "https://www.sii.cl/normativa_legislacion/jurisprudencia_administrativa/otras_normas/2025/otras_normas_jadm2025.htm"
-        if not SIIDownloader.navigate_to_page(driver, url):
-            return []
-
-        WebDriverWait(driver, 1).until(
-            EC.presence_of_element_located((By.XPATH, "//a[contains(@href, '.pdf')]"))
-        )
-
-        return SIIDownloader.find_and_download(driver, "//a[contains(@href, '.pdf')]")
+        file_path = os.path.join(DOWNLOAD_DIR_SII, filename)
+        SIIDownloader.download_file(requests, url, file_path)
+        get_manifest().record(file_path, url)
+        return [file_path]
 
     @staticmethod
-    def download_with_selenium() -> List[str]:
+    def download_page_source(year: str, source: str, pool: ChromePool,
+                             scheduler: Optional[RetryScheduler] = None) -> Dict:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        spec = SII_SOURCES[source]
+        # Cada navegador descarga en su propia carpeta para no confundir los archivos nuevos
+        staging_dir = os.path.join(DOWNLOAD_DIR_SII, f".{source}_{year}")
+        os.makedirs(staging_dir, exist_ok=True)
+        result = {'files': [], 'ok': True, 'error': False}
+        failures = []
+        existing = set()
         driver = None
+        healthy = True
         try:
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=SIIDownloader.configure_browser())
-            
-            ventas_renta_files = SIIDownloader.download_ventas_renta(driver)
-            other_rules_files = SIIDownloader.download_other_rules(driver)
-
-            return ventas_renta_files + other_rules_files
+            driver = pool.acquire(staging_dir)
+            if not SIIDownloader.navigate_to_page(driver, spec['page'].format(year=year)):
+                result['ok'] = False
+                result['error'] = True
+                return result
+
+            if spec.get('wait'):
+                WebDriverWait(driver, spec['wait']).until(
+                    EC.presence_of_element_located((By.XPATH, spec['xpath']))
+                )
+            SIIDownloader.find_and_download(driver, spec['xpath'], spec['prefix'], staging_dir, failures)
 
         except Exception as e:
-            logging.error(f"Execution error: {str(e)}")
-            return []
+            logging.error(f"Execution error {source} {year}: {str(e)}")
+            result['ok'] = False
+            result['error'] = True
+            healthy = False
         finally:
             if driver:
-                driver.quit()
+                pool.release(driver, healthy)
+            # Lo descargado antes de un error también se conserva
+            for filename in os.listdir(staging_dir):
+                if filename.endswith('.pdf'):
+                    file_path = os.path.join(DOWNLOAD_DIR_SII, filename)
+                    # Otro año en curso pudo dejar ya un archivo con el mismo nombre: os.link
+                    # falla si existe, en vez de reemplazarlo a él y a su entrada del manifiesto
+                    try:
+                        os.link(os.path.join(staging_dir, filename), file_path)
+                    except FileExistsError:
+                        logging.warning(f"{filename} ({source} {year}) ya existe en {DOWNLOAD_DIR_SII}; se conserva el existente")
+                        existing.add(filename)
+                        continue
+                    get_manifest().record(file_path, spec['page'].format(year=year))
+                    result['files'].append(file_path)
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        downloaded = existing | {os.path.basename(file_path) for file_path in result['files']}
+        for filename, url in failures:
+            # Una descarga lenta pudo terminar después de la espera y ya estar en la carpeta
+            if filename in downloaded:
+                continue
+            result['ok'] = False
+            if scheduler:
+                scheduler.schedule(filename, lambda filename=filename, url=url: SIIDownloader.download_href(filename, url))
+        return result
+
+    @staticmethod
+    def retry_source(year: str, source: str, state: SIIYearState, scheduler: RetryScheduler,
+                     pool: ChromePool, close_pool: bool = False) -> Callable[[], List[str]]:
+        # Reintento de un sondeo o un listado que no respondió; los números y oficios
+        # que fallen dentro de él se programan como elementos propios
+        def retry() -> List[str]:
+            if 'probe' in SII_SOURCES[source]:
+                result = SIIDownloader.download_probe_source(year, source, state.known_numbers(year, source), scheduler)
+            else:
+                try:
+                    result = SIIDownloader.download_page_source(year, source, pool, scheduler)
+                finally:
+                    # Grupo propio de discover (sin main): no deja navegadores abiertos
+                    if close_pool:
+                        pool.close()
+            state.record(year, source, result['ok'] and year < YEAR, len(result['files']), result.get('numbers'))
+            if result['error']:
+                raise PartialDownloadError(f"{source} {year} no respondió", result['files'])
+            return result['files']
+        return retry
+
+    @staticmethod
+    def discover(years: List[str], state: Optional[SIIYearState] = None,
+                 scheduler: Optional[RetryScheduler] = None, pool: Optional[ChromePool] = None) -> List[str]:
+        state = state or SIIYearState()
+        own_pool = pool is None
+        pool = pool or ChromePool()
+        # Se concilia antes de abrir los hilos, que solo consultan y registran
+        SIIDownloader.migrate_legacy_files(get_manifest())
+        units = [(year, source) for year in years for source in SII_SOURCES
+                 if not state.is_complete(year, source)]
+        skipped = len(years) * len(SII_SOURCES) - len(units)
+        logging.info(f"SII: {len(units)} combinaciones (año, fuente) por revisar en {', '.join(years)}"
+                     + (f"; {skipped} ya completas" if skipped else ""))
+
+        new_files = []
+        with ThreadPoolExecutor(max_workers=SII_WORKERS) as http_pool, \
+                ThreadPoolExecutor(max_workers=SII_BROWSERS) as browser_pool:
+            futures = {
+                http_pool.submit(SIIDownloader.download_probe_source, year, source,
+                                 state.known_numbers(year, source), scheduler): (year, source)
+                for year, source in units if 'probe' in SII_SOURCES[source]
+            }
+
+            page_units = [(year, source) for year, source in units if 'page' in SII_SOURCES[source]]
+            if page_units:
+                try:
+                    pool.install()
+                except Exception as e:
+                    logging.error(f"Execution error: {str(e)}")
+                    page_units = []
+                futures.update({
+                    browser_pool.submit(SIIDownloader.download_page_source, year, source, pool, scheduler): (year, source)
+                    for year, source in page_units
+                })
+
+            for future in as_completed(futures):
+                year, source = futures[future]
+                result = future.result()
+                # El año en curso sigue publicando documentos y nunca se cierra
+                complete = result['ok'] and year < YEAR
+                state.record(year, source, complete, len(result['files']), result.get('numbers'))
+                new_files.extend(result['files'])
+                logging.info(f"SII {source} {year}: {len(result['files'])} archivos nuevos"
+                             + (", completo" if complete else ""))
+                if result['error'] and scheduler:
+                    scheduler.schedule(f"{source} {year}",
+                                       SIIDownloader.retry_source(year, source, state, scheduler, pool, own_pool))
+
+        if own_pool:
+            pool.close()
+        return new_files
 
 class BCNScraper:
     BASE_URL = "https://www.bcn.cl/leychile/consulta/portada_ulp"
     NORMA_URL = "https://www.bcn.cl/leychile/navegar?idNorma={}"
 
     def __init__(self, driver: webdriver.Chrome):
+        from selenium.webdriver.support.ui import WebDriverWait
+
         self.driver = driver
         self.wait = WebDriverWait(driver, 0.15)
 
     def get_recent_laws(self) -> List[Dict[str, str]]:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+
         logging.info("Getting recent laws...")
         try:
             self.driver.get(self.BASE_URL)
@@ -715,6 +1479,10 @@ class BCNScraper:
         return url.split('idNorma=')[1] if 'idNorma=' in url else '0'
 
     def download_with_selenium(self, law_info: Dict[str, str]) -> bool:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
         try:
             main_window = self.driver.current_window_handle
             self.driver.execute_script("window.open('');")
@@ -735,10 +1503,12 @@ class BCNScraper:
             output_filename = f"BCN_Ley-ID-{law_info['norma_id']}.pdf"
             output_path = os.path.join(DOWNLOAD_DIR_BCN, output_filename)
             
-            if os.path.exists(output_path):
+            if get_manifest().contains(output_path):
                 success = True
             else:
                 success = self.download_pdf(download_url, output_path)
+                if success:
+                    get_manifest().record(output_path, download_url)
                 logging.info(f"{'Descargado' if success else 'Error'}: {output_filename}")
 
             self.driver.close()
@@ -753,6 +1523,8 @@ class BCNScraper:
             return False
 
     def download_pdf(self, url: str, output_path: str) -> bool:
+        import requests
+
         try:
             r = requests.get(url, timeout=15)
             if r.status_code == 200:
@@ -769,13 +1541,17 @@ class BCNScraper:
 class BCNBrowser:
     
     @staticmethod
-    def configure() -> webdriver.Chrome:
+    def configure(driver_path: Optional[str] = None) -> webdriver.Chrome:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+
         options = Options()
         
         options.add_argument("--headless=new")
         options.add_argument("--no-sandbox")
         options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--remote-debugging-port=9222")
+        options.add_argument(f"--remote-debugging-port={BCN_DEBUG_PORT}")
         options.add_argument("--disable-gpu")
         options.add_argument("--window-size=1920,1080")
         options.add_argument("--disable-extensions")
@@ -788,49 +1564,113 @@ class BCNBrowser:
         options.add_experimental_option("prefs", prefs)
         
         options.add_argument("--remote-debugging-address=0.0.0.0")
-        options.add_argument("--remote-debugging-port=9222")
+        options.add_argument(f"--remote-debugging-port={BCN_DEBUG_PORT}")
         
-        service = Service(ChromeDriverManager().install())
+        if not driver_path:
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+        service = Service(driver_path)
         driver = webdriver.Chrome(service=service, options=options)
         return driver
 
-class BCNManager:
-    
-    @staticmethod
-    def load_downloaded_ids(path: str = "downloaded_pdfs/descargadas.json") -> Set[str]:
-        if not os.path.exists(path):
-            return set()
-        with open(path, "r", encoding="utf-8") as f:
-            try:
+class BCNLedger(JsonlLedger):
+    """Registro de las leyes BCN descargadas, una línea por idNorma.
+
+    Sin registro previo se migra el JSON de versiones anteriores.
+    """
+
+    def __init__(self, path: str = BCN_LEDGER_PATH, legacy_path: str = BCN_LEGACY_IDS_PATH):
+        self.legacy_path = legacy_path
+        super().__init__(path)
+
+    def load(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            self.entries = {}
+            self.line_count = 0
+            self._migrate_legacy()
+            return self.entries
+        return super().load()
+
+    def _migrate_legacy(self) -> None:
+        if not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                return {entry["id"] for entry in data.get("descargadas", [])}
-            except json.JSONDecodeError:
-                return set()
+        except (json.JSONDecodeError, OSError):
+            return
+
+        for item in data.get("descargadas", []):
+            norma_id = item["id"]
+            file_path = os.path.join(DOWNLOAD_DIR_BCN, f"BCN_Ley-ID-{norma_id}.pdf")
+            self.entries[norma_id] = self._build_entry(norma_id, BCNScraper.NORMA_URL.format(norma_id), file_path)
+        self.compact()
+        logging.info(f"Migradas {len(self.entries)} entradas desde {self.legacy_path}")
 
     @staticmethod
-    def save_downloaded_ids(ids: Set[str], path: str = "downloaded_pdfs/descargadas.json") -> None:
-        data = {"descargadas": [{"id": id_} for id_ in ids]}
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    def _build_entry(norma_id: str, url: str, file_path: str, known: Optional[Dict] = None) -> Dict:
+        # known: entrada del manifiesto para el mismo archivo, que ya trae su hash
+        sha256 = None
+        size = None
+        if known:
+            sha256 = known["sha256"]
+            size = known["size"]
+        elif os.path.exists(file_path):
+            sha256 = file_sha256(file_path)
+            size = os.path.getsize(file_path)
+        return {
+            "id": norma_id,
+            "url": url,
+            "sha256": sha256,
+            "size": size,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds")
+        }
+
+    def ids(self) -> Set[str]:
+        return set(self.entries)
+
+    def record(self, norma_id: str, url: str, file_path: str, known: Optional[Dict] = None) -> Dict:
+        return self.put(self._build_entry(norma_id, url, file_path, known))
+
+class BCNManager:
 
     @staticmethod
-    def clean_missing_files(downloaded_ids: Set[str]) -> Set[str]:
-        existing_files = {f.replace("BCN_Ley-ID-", "").replace(".pdf", "") for f in os.listdir(DOWNLOAD_DIR_BCN) if f.endswith(".pdf")}
-        cleaned_ids = downloaded_ids.intersection(existing_files)
-        logging.info(f"Missing files: {len(downloaded_ids) - len(cleaned_ids)}")
-        BCNManager.save_downloaded_ids(cleaned_ids)
-        return cleaned_ids
+    def clean_missing_files(ledger: BCNLedger) -> Set[str]:
+        existing_files = {str(entry["number"]) for entry in get_manifest().of_type("BCN_Ley")}
+        missing_ids = ledger.ids() - existing_files
+        for norma_id in missing_ids:
+            ledger.forget(norma_id)
+        logging.info(f"Missing files: {len(missing_ids)}")
+        return ledger.ids()
+
+    @staticmethod
+    def retry_law(law: Dict[str, str], ledger: BCNLedger,
+                  warm_driver: Optional[webdriver.Chrome] = None) -> Callable[[], List[str]]:
+        # Sin navegador del modo servicio, el de la descarga principal ya se cerró
+        # y cada reintento abre uno propio
+        def retry() -> List[str]:
+            driver = warm_driver or BCNBrowser.configure()
+            try:
+                if not BCNScraper(driver).download_with_selenium(law):
+                    raise RuntimeError(f"Descarga fallida idNorma {law['norma_id']}")
+            finally:
+                if driver is not warm_driver:
+                    driver.quit()
+            output_path = os.path.join(DOWNLOAD_DIR_BCN, f"BCN_Ley-ID-{law['norma_id']}.pdf")
+            ledger.record(law['norma_id'], law['url'], output_path, get_manifest().entries.get(output_path))
+            return [output_path]
+        return retry
 
     @staticmethod
-    def download() -> List[str]:
+    def download(scheduler: Optional[RetryScheduler] = None, warm_driver: Optional[webdriver.Chrome] = None) -> List[str]:
         start_time = time.time()
 
-        driver = BCNBrowser.configure()
+        driver = warm_driver or BCNBrowser.configure()
         scraper = BCNScraper(driver)
 
         try:
-            downloaded_ids = BCNManager.load_downloaded_ids()
-            downloaded_ids = BCNManager.clean_missing_files(downloaded_ids)
+            ledger = BCNLedger()
+            downloaded_ids = BCNManager.clean_missing_files(ledger)
 
             laws = scraper.get_recent_laws()
             new_laws = [law for law in laws if law['norma_id'] not in downloaded_ids][:42]  
@@ -838,22 +1678,67 @@ class BCNManager:
             success = 0
             for law in new_laws:
                 if scraper.download_with_selenium(law):
-                    downloaded_ids.add(law['norma_id'])
+                    output_path = os.path.join(DOWNLOAD_DIR_BCN, f"BCN_Ley-ID-{law['norma_id']}.pdf")
+                    # El manifiesto ya calculó el hash al registrar la descarga
+                    ledger.record(law['norma_id'], law['url'], output_path, get_manifest().entries.get(output_path))
                     success += 1
+                elif scheduler:
+                    scheduler.schedule(f"BCN idNorma {law['norma_id']}", BCNManager.retry_law(law, ledger, warm_driver))
 
-            BCNManager.save_downloaded_ids(downloaded_ids)
+            if ledger.needs_compaction():
+                ledger.compact()
 
             total_time = time.time() - start_time
             logging.info(f"\nTotal time: {total_time:.2f} seconds")
             logging.info(f"Successful downloads: {success}/{len(new_laws)}")
             logging.info(f"Saved in: {os.path.abspath(DOWNLOAD_DIR_BCN)}")
 
-            return [os.path.join(DOWNLOAD_DIR_BCN, f"BCN_Ley-ID-{law['norma_id']}.pdf") for law in new_laws if os.path.exists(os.path.join(DOWNLOAD_DIR_BCN, f"BCN_Ley-ID-{law['norma_id']}.pdf"))]
+            manifest = get_manifest()
+            return [output_path for law in new_laws
+                    if manifest.contains(output_path := os.path.join(DOWNLOAD_DIR_BCN, f"BCN_Ley-ID-{law['norma_id']}.pdf"))]
 
         finally:
-            driver.quit()
+            if driver is not warm_driver:
+                driver.quit()
+
+class WarmBrowsers:
+    """Navegadores que el modo servicio (servicio.py) mantiene abiertos entre ejecuciones."""
+
+    def __init__(self):
+        self.sii = ChromePool()
+        self.bcn: Optional[webdriver.Chrome] = None
+
+    def bcn_driver(self) -> webdriver.Chrome:
+        if self.bcn is not None:
+            try:
+                self.bcn.current_url
+                return self.bcn
+            except Exception:
+                logging.warning("El navegador BCN dejó de responder; se abrirá uno nuevo")
+                self.close_bcn()
+        self.bcn = BCNBrowser.configure(self.sii.install())
+        return self.bcn
+
+    def close_bcn(self) -> None:
+        if self.bcn is not None:
+            try:
+                self.bcn.quit()
+            except Exception:
+                pass
+            self.bcn = None
+
+    def close(self) -> None:
+        self.sii.close()
+        self.close_bcn()
+
+def main(browsers: Optional[WarmBrowsers] = None) -> Optional[Dict]:
+    # Logging en segundo plano (cola) hacia consola, scraper.log y eventos JSON; en modo
+    # servicio ya está configurado y la llamada no hace nada
+    configurar_registro("scraper.log", "scraper_eventos.jsonl")
+    check_email_config()
+    os.makedirs(DOWNLOAD_DIR_SII, exist_ok=True)
+    os.makedirs(DOWNLOAD_DIR_BCN, exist_ok=True)
 
-def main():
     today = datetime.datetime.now()
     is_weekend = today.weekday() >= 5
     
@@ -864,71 +1749,41 @@ def main():
     logging.info("\nIniciando proceso de descarga de documentos SII y BCN...")
     start_time = time.time()
 
-    # Sistema de reintentos para SII
-    max_retries = 3
-    retry_delay = 20  # 20 segundos entre intentos
-    all_sii_files = set()
-    
-    for attempt in range(max_retries):
-        logging.info(f"\nIntento {attempt + 1} de {max_retries}")
-        
-        sii_requests_files = SIIDownloader.download_with_requests()
-        sii_selenium_files = SIIDownloader.download_with_selenium()
-        current_sii_files = set(sii_requests_files + [os.path.join(DOWNLOAD_DIR_SII, f) for f in sii_selenium_files])
-        
-        if current_sii_files:
-            all_sii_files.update(current_sii_files)
-            logging.info(f"Archivos encontrados en este intento: {len(current_sii_files)}")
-            
-            if attempt < max_retries - 1:
-                logging.info(f"Esperando {retry_delay} segundos antes del siguiente intento...")
-                time.sleep(retry_delay)
-        else:
-            logging.info("No se encontraron nuevos archivos en este intento")
-            break
-
-    sii_files = list(all_sii_files)
-    bcn_files = BCNManager.download()
+    # Una sola pasada por fuente; solo los elementos que fallan (un número, un oficio,
+    # un idNorma, o un sondeo o listado que no respondió) se reintentan con espera exponencial
+    scheduler = RetryScheduler()
+    # En modo servicio los navegadores vienen abiertos de la ejecución anterior
+    pool = browsers.sii if browsers else ChromePool()
+    get_manifest(resync=True)
+    try:
+        sii_files = SIIDownloader.discover(SIIDownloader.parse_years(SII_YEARS), SIIYearState(), scheduler, pool)
+        bcn_files = BCNManager.download(scheduler, browsers.bcn_driver() if browsers else None)
+
+        if scheduler.pending:
+            logging.info(f"\nReintentando {len(scheduler.pending)} elementos fallidos...")
+        for key, files in scheduler.run().items():
+            (bcn_files if key.startswith("BCN ") else sii_files).extend(files)
+    finally:
+        if not browsers:
+            pool.close()
+    if scheduler.failed:
+        logging.warning(f"Sin descargar tras {RETRY_ATTEMPTS} intentos: {', '.join(scheduler.failed)}")
+    sii_files = list(dict.fromkeys(sii_files))
 
     logging.info("Resumen de descargas:")
     logging.info(f"- SII (Resoluciones y circulares): {len(sii_files)} archivos totales")
     logging.info(f"- BCN (Leyes recientes): {len(bcn_files)} archivos nuevos")
     
     if sii_files or bcn_files:
-        patterns = {
-            'circu': r'circu(\d+)\.pdf',
-            'reso': r'reso(\d+)\.pdf',
-            'VENTAS': r'VENTAS_(\d+)-\d{2}_\d{2}_2025\.pdf',
-            'RENTA': r'RENTA_(\d+)-\d{2}_\d{2}_2025\.pdf',
-            'OTRAS_NORMAS': r'OTRAS_NORMAS_\w+_(\d+)-\d{2}_\d{2}_2025\.pdf',
-            'BCN_Ley': r'BCN_Ley-ID-(\d+)\.pdf'
-        }
-        
-        files_to_send = []
-        
-        sii_types = {
-            'circu': [f for f in sii_files if re.search(patterns['circu'], os.path.basename(f))],
-            'reso': [f for f in sii_files if re.search(patterns['reso'], os.path.basename(f))],
-            'VENTAS': [f for f in sii_files if re.search(patterns['VENTAS'], os.path.basename(f))],
-            'RENTA': [f for f in sii_files if re.search(patterns['RENTA'], os.path.basename(f))],
-            'OTRAS_NORMAS': [f for f in sii_files if re.search(patterns['OTRAS_NORMAS'], os.path.basename(f))]
-        }
-        
-        for file_type, files in sii_types.items():
-            if files:
-                top_files = FileUtils.get_top_files(files, patterns[file_type])
-                files_to_send.extend(top_files)
-        
-        if bcn_files:
-            top_bcn_files = FileUtils.get_top_files(bcn_files, patterns['BCN_Ley'])
-            files_to_send.extend(top_bcn_files)
+        # Selección por tipo desde el manifiesto, sin volver a clasificar los nombres
+        files_to_send = get_manifest().top_files(sii_files + bcn_files)
         
         logging.info("\nArchivos seleccionados para enviar (2 más recientes de cada tipo):")
         for file in files_to_send:
             logging.info(f"- {os.path.basename(file)}")
         
         if files_to_send:
-            metadata = FileUtils.get_pdf_metadata(files_to_send)
+            metadata = FileUtils.get_pdf_metadata_parallel(files_to_send)
 
             html_content = """\
 <html>
@@ -1052,6 +1907,12 @@ def main():
         EmailSender.send_email(subject, body)
 
     logging.info(f"\nTotal execution time: {time.time() - start_time:.2f} seconds")
+    return {
+        "sii_files": len(sii_files),
+        "bcn_files": len(bcn_files),
+        "retry_failed": scheduler.failed,
+        "seconds": round(time.time() - start_time, 2)
+    }
 
 
 if __name__ == "__main__":
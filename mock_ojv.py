@@ -0,0 +1,544 @@
+import time, random, datetime, threading, argparse, html, secrets
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from benchmark_pdf import construir_pdf
+
+#-------------------------------------------------------------------------------
+#Portal OJV simulado para medir los controladores de lupa sin credenciales reales.
+#Reproduce el login con Clave Única, las pestañas de Mis Causas con paginación,
+#los modales de cada causa, los dropdowns de cuadernos y los endpoints de documentos
+#con los mismos selectores que usa ESPECIFICACIONES_PESTANAS.
+#
+#   python mock_ojv.py --causas 2000 --latencia 80
+#
+#Las cargas del portal se hacen con XHR síncrono: así la página ya está actualizada
+#cuando termina cada clic y las mediciones sin pausas aleatorias son deterministas.
+#-------------------------------------------------------------------------------
+
+# Registros por página de la tabla de causas (igual que el portal)
+REGISTROS_POR_PAGINA = 15
+
+COOKIE_SESION = "PHPSESSID"
+
+CONFIG_POR_DEFECTO = {
+    'causas': 30,            # causas por pestaña
+    'cuadernos': 3,          # máximo de cuadernos por causa (pestañas con cuadernos)
+    'movimientos': 12,       # movimientos por cuaderno
+    'escritos': 2,           # máximo de escritos por resolver por cuaderno (Civil)
+    'fraccion_nuevos': 0.1,  # fracción de movimientos con la fecha de hoy
+    'fecha_nuevos': None,    # dd/mm/yyyy de los movimientos nuevos (None = hoy)
+    'paginas_pdf': 1,
+    'latencia': 0.0,         # segundos por respuesta
+    'jitter': 0.0,           # segundos aleatorios adicionales
+    'semilla': 2025,
+}
+
+#Pestañas del portal: sufijo de las funciones busc*, ids del modal y columnas de cada tabla.
+#En 'movimientos' cada columna es (encabezado, campo); los campos salen de CarteraSimulada.movimientos
+PESTANAS = {
+    "Corte Suprema": {
+        'sufijo': "Sup", 'modal': "modalDetalleMisCauSuprema", 'href_lupa': "#modalDetalleMisCauSuprema",
+        'identificador': ("Libro", "Libro : "), 'prefijo_causa': "",
+        'causas': ["", "Libro", "Caratulado", "Tipo Recurso", "Fecha Ingreso", "Corte"],
+        'pestana': None, 'cuaderno': None,
+        'movimientos': [("Folio", 'folio'), ("Doc.", 'doc'), ("Tipo", 'tramite'), ("Descripción", 'descripcion'), ("Fecha", 'fecha')],
+        'formulario': {'name': "frmPdf", 'action': "/misCausas/suprema/documentos/docCausaSuprema.php", 'input': "valorFile"},
+    },
+    "Corte Apelaciones": {
+        'sufijo': "Ape", 'modal': "modalDetalleMisCauApelaciones", 'href_lupa': "#modalDetalleMisCauApelaciones",
+        'identificador': ("Libro", "Libro : "), 'prefijo_causa': "Protección-",
+        'causas': ["", "Libro", "Corte", "Caratulado", "Fecha Ingreso", "Estado"],
+        'pestana': "movimientosApe", 'cuaderno': None,
+        'movimientos': [("Folio", 'folio'), ("Doc.", 'doc'), ("Anexo", 'anexo'), ("Trámite", 'tramite'), ("Descripción", 'descripcion'),
+                        ("Fecha", 'fecha'), ("Sala", 'sala'), ("Estado", 'estado'), ("Georeferencia", 'vacio')],
+        'formulario': {'name': "frmDoc", 'action': "/misCausas/apelaciones/documentos/docCausaApelaciones.php", 'input': "valorDoc"},
+    },
+    "Civil": {
+        'sufijo': "Civ", 'modal': "modalDetalleMisCauCivil", 'href_lupa': "#modalAnexoCausaCivil",
+        'identificador': ("Rol", "Rol: "), 'prefijo_causa': "C-",
+        'causas': ["", "Rol", "Tribunal", "Caratulado", "Fecha Ingreso", "Estado"],
+        'pestana': "historiaCiv", 'cuaderno': "selCuaderno",
+        'movimientos': [("Folio", 'folio'), ("Doc.", 'doc'), ("Anexo", 'anexo'), ("Etapa", 'etapa'), ("Trámite", 'tramite'),
+                        ("Desc. Trámite", 'descripcion'), ("Fec. Trámite", 'fecha'), ("Foja", 'foja'), ("Georeferencia", 'vacio')],
+        'formulario': {'name': "", 'action': "/misCausas/civil/documentos/docuN.php", 'input': "dtaDoc"},
+        'certificado': {'name': "", 'action': "/misCausas/civil/documentos/docCertificadoEscrito.php", 'input': "dtaCert"},
+        'escritos': "escritosCiv",
+    },
+    "Laboral": {
+        'sufijo': "Lab", 'modal': "modalDetalleMisCauLaboral", 'href_lupa': "#modalAnexoCausaLaboral",
+        'identificador': ("RIT", "RIT: "), 'prefijo_causa': "O-",
+        'causas': ["", "RIT", "Tribunal", "Caratulado", "Fecha Ingreso", "Estado"],
+        'pestana': "historiaLab", 'cuaderno': "selCuadernoLab",
+        'movimientos': [("Folio", 'folio'), ("Doc.", 'doc'), ("Anexo", 'anexo'), ("Trámite", 'tramite'),
+                        ("Desc. Trámite", 'descripcion'), ("Fecha Trámite", 'fecha'), ("Estado", 'estado')],
+        'formulario': {'name': "", 'action': "/misCausas/laboral/documentos/docuLaboral.php", 'input': "dtaDoc"},
+    },
+    "Penal": {
+        'sufijo': "Pen", 'modal': "modalDetalleMisCauPenal", 'href_lupa': "#modalAnexoCausaPenal",
+        'identificador': ("RIT", "RIT: "), 'prefijo_causa': "",
+        'causas': ["", "RIT", "Tribunal", "Caratulado", "Fecha Ingreso", "Estado"],
+        'pestana': "historiaPen", 'cuaderno': None,
+        'movimientos': [("Folio", 'folio'), ("Doc.", 'doc'), ("Anexo", 'anexo'), ("Etapa", 'etapa'), ("Trámite", 'tramite'),
+                        ("Desc. Trámite", 'descripcion'), ("Fecha Trámite", 'fecha'), ("Estado", 'estado')],
+        'formulario': {'name': "", 'action': "/misCausas/penal/documentos/docuPenal.php", 'input': "dtaDoc"},
+    },
+    "Cobranza": {
+        'sufijo': "Cob", 'modal': "modalDetalleMisCauCobranza", 'href_lupa': "#modalAnexoCausaCobranza",
+        'identificador': ("RIT", "RIT: "), 'prefijo_causa': "A-",
+        'causas': ["", "RIT", "Tribunal", "Caratulado", "Fecha Ingreso", "Estado"],
+        'pestana': "historiaCob", 'cuaderno': "selCuadernoCob",
+        'movimientos': [("Folio", 'folio'), ("Doc.", 'doc'), ("Anexo", 'anexo'), ("Etapa", 'etapa'), ("Trámite", 'tramite'),
+                        ("Desc. Trámite", 'descripcion'), ("Estado Firma", 'estado'), ("Fec. Trámite", 'fecha'), ("Georeferencia", 'vacio')],
+        'formulario': {'name': "frmDocH", 'action': "/misCausas/cobranza/documentos/docuCobranza.php", 'input': "dtaDoc"},
+    },
+    "Familia": {
+        'sufijo': "Fam", 'modal': "modalDetalleMisCauFamilia", 'href_lupa': "#modalAnexoCausaFamilia",
+        'identificador': ("RIT", "RIT: "), 'prefijo_causa': "C-",
+        'causas': ["", "RIT", "Tribunal", "Caratulado", "Fecha Ingreso", "Estado"],
+        'pestana': "historiaFam", 'cuaderno': "selCuadernoFam",
+        'movimientos': [("Folio", 'folio'), ("Doc.", 'doc'), ("Anexo", 'anexo'), ("Etapa", 'etapa'), ("Trámite", 'tramite'),
+                        ("Desc. Trámite", 'descripcion'), ("Fecha Trámite", 'fecha')],
+        'formulario': {'name': "", 'action': "/misCausas/familia/documentos/docuFamilia.php", 'input': "dtaDoc"},
+    },
+    "Disciplinario": {
+        'sufijo': "Dis", 'modal': "modalDetalleMisCauDisciplinario", 'href_lupa': "#modalDetalleMisCauDisciplinario",
+        'identificador': ("Rol", "Rol: "), 'prefijo_causa': "AD-",
+        'causas': ["", "Rol", "Corte", "Caratulado", "Fecha", "Estado"],
+        'pestana': None, 'cuaderno': None,
+        'movimientos': [("Folio", 'folio'), ("Doc.", 'doc'), ("Trámite", 'tramite'), ("Descripción", 'descripcion'), ("Fecha", 'fecha')],
+        'formulario': {'name': "", 'action': "/misCausas/disciplinario/documentos/docDisciplinario.php", 'input': "valorDoc"},
+    },
+}
+
+PESTANA_POR_SUFIJO = {datos['sufijo']: nombre for nombre, datos in PESTANAS.items()}
+
+TRIBUNALES = ["1º Juzgado Civil de Santiago", "2º Juzgado de Letras del Trabajo de Santiago", "4º Juzgado de Garantía de Santiago",
+              "Juzgado de Cobranza Laboral y Previsional de Santiago", "2º Juzgado de Familia de Santiago", "C.A. de Santiago"]
+APELLIDOS = ["GONZÁLEZ", "MUÑOZ", "ROJAS", "DÍAZ", "PÉREZ", "SOTO", "CONTRERAS", "SILVA", "MARTÍNEZ", "SEPÚLVEDA"]
+TRAMITES = ["Resolución", "Escrito", "Actuación Receptor", "Notificación", "Certificado", "Sentencia"]
+DESCRIPCIONES = ["Mero trámite", "Téngase presente", "Cítese a audiencia", "Traslado", "Autos para fallo", "Da cuenta", "Proveído"]
+TIPOS_ESCRITO = ["Téngase presente", "Acompaña documentos", "Solicita audiencia", "Se tenga por notificado"]
+
+ESTILOS = """
+    body { font-family: Arial, sans-serif; margin: 20px; }
+    .modal { display: none; position: fixed; top: 0; left: 0; right: 0; bottom: 0; z-index: 1050; overflow: auto; }
+    .modal-backdrop { position: fixed; top: 0; left: 0; right: 0; bottom: 0; z-index: 1040; background: rgba(0,0,0,.5); }
+    .modal-dialog { background: #fff; margin: 30px auto; width: 1100px; padding: 10px; }
+    .tab-pane { display: none; }
+    .tab-pane.active { display: block; }
+    .oculto { display: none; }
+    table { border-collapse: collapse; margin: 8px 0; }
+    td, th { border: 1px solid #ccc; padding: 2px 6px; font-size: 12px; }
+    .pagination { list-style: none; padding: 0; }
+    .pagination li { display: inline; }
+"""
+
+PAGINA_INICIO = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Poder Judicial de Chile</title><style>{estilos}</style></head>
+<body>
+<h2>Poder Judicial de Chile</h2>
+<button type="button" onclick="document.getElementById('servicios').classList.remove('oculto')">Todos los servicios</button>
+<div id="servicios" class="oculto">
+    <a href="/claveunica/login">Clave Única</a>
+</div>
+</body></html>"""
+
+PAGINA_LOGIN = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>ClaveÚnica</title></head>
+<body>
+<h2>Inicia sesión con tu ClaveÚnica</h2>
+<form method="post" action="/claveunica/login">
+    <input id="uname" name="run" type="text" autofocus>
+    <input id="pword" name="password" type="password">
+    <button type="submit">Ingresa</button>
+</form>
+</body></html>"""
+
+PAGINA_OJV = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Oficina Judicial Virtual</title><style>{estilos}</style></head>
+<body>
+<h2>Oficina Judicial Virtual</h2>
+<nav><a href="#" onclick="misCausas(); return false;">Mis Causas</a></nav>
+<div id="contenido"></div>
+{modales}
+<script>
+function xhr(metodo, url, cuerpo) {{
+    const peticion = new XMLHttpRequest();
+    peticion.open(metodo, url, false);
+    peticion.setRequestHeader('X-Requested-With', 'XMLHttpRequest');
+    if (cuerpo) peticion.setRequestHeader('Content-Type', 'application/x-www-form-urlencoded');
+    peticion.send(cuerpo || null);
+    return peticion.status === 200 ? peticion.responseText : '';
+}}
+function misCausas() {{
+    document.getElementById('contenido').innerHTML = xhr('GET', '/misCausas/index.php');
+}}
+function cargarPestana(sufijo, pagina) {{
+    document.getElementById('resultados').innerHTML = xhr('POST', '/misCausas/consulta.php', `pestana=${{sufijo}}&pagina=${{pagina}}`);
+}}
+function pagina(numero, sufijo) {{ cargarPestana(sufijo, numero); }}
+{funciones_busqueda}
+function detalleCausa(sufijo, modalId, causa) {{
+    const modal = document.getElementById(modalId);
+    modal.querySelector('.modal-content').innerHTML = xhr('GET', `/misCausas/detalle.php?pestana=${{sufijo}}&causa=${{causa}}`);
+    modal.style.display = 'block';
+    modal.classList.add('in');
+    document.body.classList.add('modal-open');
+    const fondo = document.createElement('div');
+    fondo.className = 'modal-backdrop in';
+    document.body.appendChild(fondo);
+    return false;
+}}
+function cerrarModal(modalId) {{
+    const modal = document.getElementById(modalId);
+    modal.style.display = 'none';
+    modal.classList.remove('in');
+    modal.querySelector('.modal-content').innerHTML = '';
+    document.body.classList.remove('modal-open');
+    document.querySelectorAll('.modal-backdrop').forEach(fondo => fondo.remove());
+}}
+function cambiarCuaderno(sufijo, causa, valor) {{
+    const html = xhr('POST', '/misCausas/cuaderno.php', `pestana=${{sufijo}}&causa=${{causa}}&cuaderno=${{encodeURIComponent(valor)}}`);
+    const raiz = new DOMParser().parseFromString(html, 'text/html');
+    raiz.querySelectorAll('body > [id]').forEach(nuevo => {{
+        const actual = document.getElementById(nuevo.id);
+        if (actual) actual.innerHTML = nuevo.innerHTML;
+    }});
+}}
+document.addEventListener('click', evento => {{
+    const enlace = evento.target.closest('a[data-toggle="tab"]');
+    if (!enlace) return;
+    evento.preventDefault();
+    const destino = document.querySelector(enlace.getAttribute('href'));
+    destino.parentElement.querySelectorAll(':scope > .tab-pane').forEach(panel => panel.classList.remove('active'));
+    destino.classList.add('active');
+}});
+</script>
+</body></html>"""
+
+MODAL = """<div class="modal fade" id="{id}" tabindex="-1"><div class="modal-dialog"><div class="modal-content"></div></div></div>"""
+
+#Datos deterministas de la cartera: cada causa y cuaderno se genera desde su propia semilla
+class CarteraSimulada:
+    def __init__(self, config):
+        self.config = config
+        fecha = config.get('fecha_nuevos')
+        self.fecha_nuevos = fecha or datetime.date.today().strftime("%d/%m/%Y")
+
+    def _rnd(self, *partes):
+        return random.Random("-".join(str(p) for p in (self.config['semilla'],) + partes))
+
+    def _fecha_antigua(self, rnd):
+        fecha = datetime.date.today() - datetime.timedelta(days=rnd.randint(1, 900))
+        return fecha.strftime("%d/%m/%Y")
+
+    def causa(self, pestana, indice):
+        datos = PESTANAS[pestana]
+        rnd = self._rnd(pestana, indice)
+        anio = rnd.randint(2015, 2025)
+        numero = f"{datos['prefijo_causa']}{rnd.randint(1, 25000)}-{anio}"
+        con_cuadernos = datos['cuaderno'] is not None
+        return {
+            'id': f"{datos['sufijo']}{indice:06d}",
+            'numero': numero,
+            'caratulado': f"{rnd.choice(APELLIDOS)}/{rnd.choice(APELLIDOS)} {indice}",
+            'tribunal': rnd.choice(TRIBUNALES),
+            'fecha': f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}/{anio}",
+            'estado': rnd.choice(["Tramitación", "Fallada", "Sin archivar"]),
+            'cuadernos': rnd.randint(1, self.config['cuadernos']) if con_cuadernos else 1,
+        }
+
+    def indice_causa(self, causa_id):
+        return PESTANA_POR_SUFIJO[causa_id[:3]], int(causa_id[3:])
+
+    def movimientos(self, pestana, causa_id, cuaderno):
+        rnd = self._rnd(causa_id, cuaderno, "movimientos")
+        total = self.config['movimientos']
+        filas = []
+        for i in range(total):
+            nuevo = rnd.random() < self.config['fraccion_nuevos']
+            folio = total - i
+            filas.append({
+                'folio': str(folio),
+                'token': f"{causa_id}c{cuaderno}f{folio}",
+                'fecha': self.fecha_nuevos if nuevo else self._fecha_antigua(rnd),
+                'tramite': rnd.choice(TRAMITES),
+                'descripcion': rnd.choice(DESCRIPCIONES),
+                'etapa': rnd.choice(["Discusión", "Prueba", "Sentencia", "Cumplimiento"]),
+                'anexo': "",
+                'sala': f"{rnd.randint(1, 9)}ª Sala",
+                'estado': rnd.choice(["Firmado", "Pendiente"]),
+                'foja': str(rnd.randint(1, 400)),
+                'vacio': "",
+                'certificado': pestana == "Civil" and rnd.random() < 0.2,
+                'firma_s': pestana == "Civil" and rnd.random() < 0.3,
+            })
+        return filas
+
+    def escritos(self, causa_id, cuaderno):
+        rnd = self._rnd(causa_id, cuaderno, "escritos")
+        escritos = []
+        for i in range(rnd.randint(0, self.config['escritos'])):
+            nuevo = rnd.random() < self.config['fraccion_nuevos']
+            escritos.append({
+                'token': f"{causa_id}c{cuaderno}e{i}",
+                'fecha': self.fecha_nuevos if nuevo else self._fecha_antigua(rnd),
+                'tipo': rnd.choice(TIPOS_ESCRITO),
+                'solicitante': rnd.choice(APELLIDOS),
+            })
+        return escritos
+
+    def documento(self, token):
+        rnd = self._rnd("documento", token)
+        lineas = [
+            "Santiago, " + rnd.choice(["uno", "dos", "tres", "cuatro"]) + " de " + rnd.choice(["enero", "marzo", "julio"]) + " de dos mil veinticinco.",
+            f"{rnd.choice(DESCRIPCIONES)}. Proveyendo el escrito folio {rnd.randint(1, 99)}: " + rnd.choice(DESCRIPCIONES).lower() + ".",
+        ] + [" ".join(rnd.choice(DESCRIPCIONES).lower() for _ in range(8)) for _ in range(30)] + [
+            "Este documento tiene firma electrónica y su original puede ser validado en http://verificadoc.pjud.cl",
+        ]
+        return construir_pdf([{'lineas': lineas}] * self.config['paginas_pdf'], titulo=token)
+
+#Genera el HTML de cada respuesta del portal a partir de la cartera simulada
+class PortalSimulado:
+    def __init__(self, config):
+        self.config = dict(CONFIG_POR_DEFECTO, **(config or {}))
+        self.cartera = CarteraSimulada(self.config)
+        self.sesiones = set()
+        self.lock = threading.Lock()
+        self.estadisticas = {}
+
+    def registrar(self, ruta, bytes_enviados):
+        with self.lock:
+            estadistica = self.estadisticas.setdefault(ruta, {'peticiones': 0, 'bytes': 0})
+            estadistica['peticiones'] += 1
+            estadistica['bytes'] += bytes_enviados
+
+    def pagina_ojv(self):
+        funciones = "\n".join(f"function busc{datos['sufijo']}() {{ cargarPestana('{datos['sufijo']}', 1); }}" for datos in PESTANAS.values())
+        modales = "\n".join(MODAL.format(id=datos['modal']) for datos in PESTANAS.values())
+        return PAGINA_OJV.format(estilos=ESTILOS, modales=modales, funciones_busqueda=funciones)
+
+    def mis_causas(self):
+        enlaces = "".join(f'<li><a href="#" onclick="busc{datos["sufijo"]}(); return false;">{html.escape(nombre)}</a></li>'
+                          for nombre, datos in PESTANAS.items())
+        return f'<ul class="nav nav-tabs">{enlaces}</ul><div id="resultados"></div>'
+
+    def consulta(self, sufijo, pagina):
+        pestana = PESTANA_POR_SUFIJO[sufijo]
+        datos = PESTANAS[pestana]
+        total = self.config['causas']
+        total_paginas = max(1, (total + REGISTROS_POR_PAGINA - 1) // REGISTROS_POR_PAGINA)
+        pagina = min(max(1, pagina), total_paginas)
+        filas = []
+        for indice in range((pagina - 1) * REGISTROS_POR_PAGINA, min(total, pagina * REGISTROS_POR_PAGINA)):
+            causa = self.cartera.causa(pestana, indice)
+            valores = {
+                "Libro": causa['numero'], "Rol": causa['numero'], "RIT": causa['numero'],
+                "Caratulado": causa['caratulado'], "Tribunal": causa['tribunal'], "Corte": f"Corte: {causa['tribunal']}",
+                "Tipo Recurso": "Protección", "Fecha Ingreso": causa['fecha'], "Fecha": causa['fecha'], "Estado": causa['estado'],
+            }
+            lupa = (f'<a href="{datos["href_lupa"]}" onclick="return detalleCausa(\'{sufijo}\', \'{datos["modal"]}\', \'{causa["id"]}\')">'
+                    f'<i class="fa fa-search">&#128269;</i></a>')
+            celdas = [lupa] + [html.escape(valores[columna]) for columna in datos['causas'][1:]]
+            filas.append("<tr>" + "".join(f"<td>{celda}</td>" for celda in celdas) + "</tr>")
+        encabezados = "".join(f"<th>{html.escape(columna)}</th>" for columna in datos['causas'])
+        paginador = "".join(
+            f'<li><a class="page-link{" active" if numero == pagina else ""}" href="#" onclick="pagina({numero}, \'{sufijo}\'); return false;">{numero}</a></li>'
+            for numero in range(1, total_paginas + 1))
+        return (f'<div class="loadTotal{sufijo}">Total de registros: <b>{total}</b></div>'
+                f'<table id="dtaTableDetalleMisCau{sufijo}" class="table"><thead><tr>{encabezados}</tr></thead><tbody>{"".join(filas)}</tbody></table>'
+                f'<ul class="pagination">{paginador}</ul>')
+
+    def _formulario(self, formulario, token, action=None):
+        nombre = f' name="{formulario["name"]}"' if formulario['name'] else ""
+        return (f'<form{nombre} action="{action or formulario["action"]}" method="post" target="_blank">'
+                f'<input type="hidden" name="{formulario["input"]}" value="{token}"><i class="fa fa-file-pdf-o"></i></form>')
+
+    def tabla_movimientos(self, pestana, causa_id, cuaderno):
+        datos = PESTANAS[pestana]
+        filas = []
+        for movimiento in self.cartera.movimientos(pestana, causa_id, cuaderno):
+            celdas = []
+            for _, campo in datos['movimientos']:
+                if campo == 'doc':
+                    action = datos['formulario']['action'].replace("docuN.php", "docuS.php") if movimiento['firma_s'] else None
+                    celda = self._formulario(datos['formulario'], movimiento['token'], action)
+                    if movimiento['certificado']:
+                        celda += self._formulario(datos['certificado'], f"{movimiento['token']}cert")
+                else:
+                    celda = html.escape(movimiento[campo])
+                celdas.append(f"<td>{celda}</td>")
+            filas.append("<tr>" + "".join(celdas) + "</tr>")
+        encabezados = "".join(f"<th>{html.escape(encabezado)}</th>" for encabezado, _ in datos['movimientos'])
+        return f'<table class="table table-bordered table-striped"><thead><tr>{encabezados}</tr></thead><tbody>{"".join(filas)}</tbody></table>'
+
+    def tabla_escritos(self, causa_id, cuaderno):
+        filas = []
+        for escrito in self.cartera.escritos(causa_id, cuaderno):
+            formulario = (f'<form name="formAneEsc" action="/misCausas/civil/documentos/docuN.php" method="post" target="_blank">'
+                          f'<input type="hidden" name="dtaDoc" value="{escrito["token"]}"></form>')
+            celdas = [formulario, "", escrito['fecha'], html.escape(escrito['tipo']), html.escape(escrito['solicitante'])]
+            filas.append("<tr>" + "".join(f"<td>{celda}</td>" for celda in celdas) + "</tr>")
+        encabezados = "".join(f"<th>{e}</th>" for e in ("Doc.", "Anexo", "Fecha de Ingreso", "Tipo Escrito", "Solicitante"))
+        return f'<table class="table table-bordered table-striped"><thead><tr>{encabezados}</tr></thead><tbody>{"".join(filas)}</tbody></table>'
+
+    #Paneles que dependen del cuaderno (historia y, en Civil, escritos por resolver)
+    def paneles_cuaderno(self, pestana, causa_id, cuaderno):
+        datos = PESTANAS[pestana]
+        paneles = {datos['pestana']: self.tabla_movimientos(pestana, causa_id, cuaderno)}
+        if datos.get('escritos'):
+            paneles[datos['escritos']] = self.tabla_escritos(causa_id, cuaderno)
+        return paneles
+
+    def detalle(self, sufijo, causa_id):
+        pestana, indice = self.cartera.indice_causa(causa_id)
+        datos = PESTANAS[pestana]
+        causa = self.cartera.causa(pestana, indice)
+        etiqueta, prefijo = datos['identificador']
+        panel = (f'<div class="panel panel-default"><table class="table-titulos"><tr>'
+                 f'<td>{prefijo}{html.escape(causa["numero"])}</td><td>F. Ing.: {causa["fecha"]}</td></tr><tr>'
+                 f'<td>Estado Adm.: {html.escape(causa["estado"])}</td><td>Fecha Ingreso: {causa["fecha"]}</td>'
+                 f'<td>Tribunal: {html.escape(causa["tribunal"])}</td></tr></table></div>')
+
+        cuadernos = ""
+        if datos['cuaderno']:
+            opciones = "".join(f'<option value="{causa_id}q{n}"{" selected" if n == 1 else ""}>{n} - {"Principal" if n == 1 else f"Cuaderno {n}"}</option>'
+                               for n in range(1, causa['cuadernos'] + 1))
+            cuadernos = (f'<label>Cuaderno:</label><select id="{datos["cuaderno"]}" class="form-control" '
+                         f'onchange="cambiarCuaderno(\'{sufijo}\', \'{causa_id}\', this.value)">{opciones}</select>')
+
+        if datos['pestana']:
+            paneles = self.paneles_cuaderno(pestana, causa_id, f"{causa_id}q1")
+            enlaces = "".join(f'<li><a href="#{panel_id}" data-toggle="tab">{"Escritos por Resolver" if panel_id.startswith("escritos") else "Historia"}</a></li>'
+                              for panel_id in paneles)
+            contenido = (f'<ul class="nav nav-tabs">{enlaces}</ul><div class="tab-content">'
+                         + "".join(f'<div id="{panel_id}" class="tab-pane{" active" if i == 0 else ""}">{tabla}</div>'
+                                   for i, (panel_id, tabla) in enumerate(paneles.items()))
+                         + "</div>")
+        else:
+            contenido = self.tabla_movimientos(pestana, causa_id, f"{causa_id}q1")
+
+        return (f'<div class="modal-header"><button type="button" class="close" data-dismiss="modal" '
+                f'onclick="cerrarModal(\'{datos["modal"]}\')">&times;</button><h4 class="modal-title">Detalle Causa</h4></div>'
+                f'<div class="modal-body">{panel}{cuadernos}{contenido}</div>')
+
+    def cuaderno(self, sufijo, causa_id, cuaderno):
+        pestana, _ = self.cartera.indice_causa(causa_id)
+        paneles = self.paneles_cuaderno(pestana, causa_id, cuaderno)
+        return "".join(f'<div id="{panel_id}">{tabla}</div>' for panel_id, tabla in paneles.items())
+
+class ManejadorOJV(BaseHTTPRequestHandler):
+    portal = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _responder(self, cuerpo, tipo="text/html; charset=utf-8", estado=200, cabeceras=None):
+        datos = cuerpo.encode("utf-8") if isinstance(cuerpo, str) else cuerpo
+        config = self.portal.config
+        if config['latencia'] or config['jitter']:
+            time.sleep(config['latencia'] + random.uniform(0, config['jitter']))
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(datos)))
+        for nombre, valor in (cabeceras or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+        self.portal.registrar(urlsplit(self.path).path, len(datos))
+
+    def _sesion_valida(self):
+        cookies = dict(par.strip().split("=", 1) for par in (self.headers.get("Cookie") or "").split(";") if "=" in par)
+        return cookies.get(COOKIE_SESION) in self.portal.sesiones
+
+    def _parametros(self):
+        parametros = parse_qs(urlsplit(self.path).query)
+        largo = int(self.headers.get("Content-Length") or 0)
+        if largo:
+            parametros.update(parse_qs(self.rfile.read(largo).decode("utf-8")))
+        return {clave: valores[0] for clave, valores in parametros.items()}
+
+    def do_GET(self):
+        self._atender()
+
+    def do_POST(self):
+        self._atender()
+
+    def _atender(self):
+        ruta = urlsplit(self.path).path
+        parametros = self._parametros()
+        if ruta == "/":
+            return self._responder(PAGINA_INICIO.format(estilos=ESTILOS))
+        if ruta == "/claveunica/login":
+            if self.command == "GET":
+                return self._responder(PAGINA_LOGIN)
+            sesion = secrets.token_hex(16)
+            self.portal.sesiones.add(sesion)
+            return self._responder("", estado=303, cabeceras={"Location": "/ojv", "Set-Cookie": f"{COOKIE_SESION}={sesion}; Path=/"})
+        if not self._sesion_valida():
+            return self._responder("Sesión expirada", estado=403)
+        if ruta == "/ojv":
+            return self._responder(self.portal.pagina_ojv())
+        if ruta == "/misCausas/index.php":
+            return self._responder(self.portal.mis_causas())
+        if ruta == "/misCausas/consulta.php":
+            return self._responder(self.portal.consulta(parametros.get('pestana', "Sup"), int(parametros.get('pagina', 1))))
+        if ruta == "/misCausas/detalle.php":
+            return self._responder(self.portal.detalle(parametros['pestana'], parametros['causa']))
+        if ruta == "/misCausas/cuaderno.php":
+            return self._responder(self.portal.cuaderno(parametros['pestana'], parametros['causa'], parametros['cuaderno']))
+        if "/documentos/" in ruta and parametros:
+            token = next(iter(parametros.values()))
+            return self._responder(self.portal.cartera.documento(token), tipo="application/pdf")
+        return self._responder("No encontrado", estado=404)
+
+#Levanta el portal en un hilo; devuelve (servidor, portal, url_base)
+def iniciar_servidor(config=None, host="127.0.0.1", puerto=0):
+    portal = PortalSimulado(config)
+    manejador = type("ManejadorPortal", (ManejadorOJV,), {'portal': portal})
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, portal, f"http://{host}:{servidor.server_address[1]}"
+
+def agregar_argumentos_portal(parser):
+    parser.add_argument("--causas", type=int, default=CONFIG_POR_DEFECTO['causas'], help="causas por pestaña")
+    parser.add_argument("--cuadernos", type=int, default=CONFIG_POR_DEFECTO['cuadernos'], help="máximo de cuadernos por causa")
+    parser.add_argument("--movimientos", type=int, default=CONFIG_POR_DEFECTO['movimientos'], help="movimientos por cuaderno")
+    parser.add_argument("--escritos", type=int, default=CONFIG_POR_DEFECTO['escritos'])
+    parser.add_argument("--fraccion-nuevos", type=float, default=CONFIG_POR_DEFECTO['fraccion_nuevos'])
+    parser.add_argument("--fecha-nuevos", default=None, help="dd/mm/yyyy de los movimientos nuevos (por defecto hoy)")
+    parser.add_argument("--paginas-pdf", type=int, default=CONFIG_POR_DEFECTO['paginas_pdf'])
+    parser.add_argument("--latencia", type=float, default=0, help="milisegundos por respuesta")
+    parser.add_argument("--jitter", type=float, default=0, help="milisegundos aleatorios adicionales")
+    parser.add_argument("--semilla", type=int, default=CONFIG_POR_DEFECTO['semilla'])
+
+def config_desde_argumentos(args):
+    return {
+        'causas': args.causas,
+        'cuadernos': args.cuadernos,
+        'movimientos': args.movimientos,
+        'escritos': args.escritos,
+        'fraccion_nuevos': args.fraccion_nuevos,
+        'fecha_nuevos': args.fecha_nuevos,
+        'paginas_pdf': args.paginas_pdf,
+        'latencia': args.latencia / 1000,
+        'jitter': args.jitter / 1000,
+        'semilla': args.semilla,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Portal OJV simulado")
+    parser.add_argument("--puerto", type=int, default=8765)
+    agregar_argumentos_portal(parser)
+    args = parser.parse_args()
+    servidor, portal, url = iniciar_servidor(config_desde_argumentos(args), puerto=args.puerto)
+    print(f"[INFO] Portal OJV simulado en {url} (BASE_URL_PJUD={url}/)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+if __name__ == "__main__":
+    main()
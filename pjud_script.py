@@ -1,33 +1,33 @@
-import time, random, os, re, smtplib, logging, datetime
-from playwright.sync_api import sync_playwright
+import time, random, os, re, io, json, smtplib, logging, datetime, hashlib, shutil, threading, contextlib, contextvars, itertools, asyncio, argparse
 from dotenv import load_dotenv
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from pathlib import Path
-from pdf2image import convert_from_path
-import PyPDF2
+from urllib.parse import urlparse, urlsplit, urlunsplit, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor
 import uuid
 from email.mime.image import MIMEImage
-from PIL import Image 
-
-#-----------------------------------------------------
-#Script con breaks, sin fecha dinamica, headless False
-#-----------------------------------------------------
+from registro import configurar_registro, contexto_registro, abrir_contexto, cerrar_contexto
+
+#-------------------------------------------------------------------------------
+#Revisión de movimientos en Mis Causas de la OJV. Sin opciones recorre las pestañas
+#verificadas (PESTANAS_VERIFICADAS) y todas sus causas, revisa la fecha del día y usa
+#el navegador sin interfaz.
+#
+#   python pjud_script.py --pestanas Civil Cobranza --max-causas 3 --fecha 27/06/2025 --con-interfaz
+#   python pjud_script.py --desde-ultima --pausas rapido
+#
+#Una ejecución parcial (pestañas o causas limitadas) no cuenta como última ejecución.
+#-------------------------------------------------------------------------------
 
 #Carga del env  
 dotenv_path = Path(__file__).parent / '.env'
 load_dotenv(dotenv_path=dotenv_path, override=True)
 
-# Configuración del logging de errores
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('email_sender.log'),
-        logging.StreamHandler()
-    ]
-)
+# Playwright, PyPDF2, pdf2image y PIL se importan en la función que los usa y el registro se
+# configura al ejecutar (automatizar_poder_judicial, main): importar el módulo no abre nada
+log = logging.getLogger("pjud")
 
 # Variables globales para correo
 EMAIL_SENDER = os.getenv("EMAIL_SENDER_TEST")
@@ -35,6 +35,8 @@ EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD_TEST")
 EMAIL_RECIPIENTS = os.getenv("EMAIL_RECIPIENTS_TEST", "").split(",")
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = 587
+# False = el resultado solo se imprime (--sin-correo)
+ENVIAR_CORREO = True
 
 # URL base de PJUD
 BASE_URL_PJUD = os.getenv("BASE_URL_PJUD")
@@ -42,23 +44,27 @@ BASE_URL_PJUD = os.getenv("BASE_URL_PJUD")
 # Lista global para almacenar todos los movimientos nuevos
 MOVIMIENTOS_GLOBALES = []
 
+# Pestañas cuyos selectores están comprobados contra la OJV: forman la revisión completa.
+# Laboral, Penal, Familia y Disciplinario tienen especificación, pero sus selectores siguen
+# el patrón de nombres del portal sin haberse comprobado; solo se recorren con --pestanas
+PESTANAS_VERIFICADAS = ["Corte Suprema", "Corte Apelaciones", "Civil", "Cobranza"]
+
 # Listas y diccionarios para la navegación en PJUD
-MIS_CAUSAS_TABS = ["Corte Suprema", "Corte Apelaciones", 
-                   "Civil", 
-                   #"Laboral", "Penal", 
-                   "Cobranza", 
-                   #"Familia", "Disciplinario"
-                   ]
+MIS_CAUSAS_TABS = list(PESTANAS_VERIFICADAS)
+
+# Causas que se revisan como máximo en cada pestaña; None = todas (--max-causas)
+MAX_CAUSAS_POR_PESTANA = None
 
 # Diccionario de funciones JavaScript por pestaña
 TAB_FUNCTIONS = {
     "Corte Suprema": "buscSup",
     "Corte Apelaciones": "buscApe",
     "Civil": "buscCiv",
-    #"Laboral": "buscLab",
-    #"Penal": "buscPen",
+    "Laboral": "buscLab",
+    "Penal": "buscPen",
     "Cobranza": "buscCob",
-    #"Familia": "buscFam"
+    "Familia": "buscFam",
+    "Disciplinario": "buscDis"
 }
 
 # Lista de user agents
@@ -72,8 +78,242 @@ USER_AGENTS = [
     "Mozilla/5.0 (Linux; Android 12; SM-G991B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.6367.78 Mobile Safari/537.36"
 ]
 
+# Archivo donde se registra la fecha de la última ejecución exitosa
+ULTIMA_EJECUCION_PATH = Path(__file__).parent / "pjud_ultima_ejecucion.json"
+
+# Ventana de fechas activa (desde, hasta); None = solo la fecha objetivo de cada controlador
+VENTANA_FECHAS = None
+
+FECHA_DMY_RE = re.compile(r"(\d{2})/(\d{2})/(\d{4})")
+
+#Convierte la primera fecha dd/mm/yyyy de un texto a datetime.date
+def parsear_fecha(fecha_str):
+    match = FECHA_DMY_RE.search(fecha_str or "")
+    if not match:
+        return None
+    dia, mes, anio = match.groups()
+    try:
+        return datetime.date(int(anio), int(mes), int(dia))
+    except ValueError:
+        return None
+
+#Lee la fecha de la última ejecución exitosa, si existe
+def leer_ultima_ejecucion():
+    try:
+        with open(ULTIMA_EJECUCION_PATH, "r", encoding="utf-8") as f:
+            return parsear_fecha(json.load(f).get("fecha"))
+    except (OSError, ValueError):
+        return None
+
+#Registra la fecha hasta la que se revisaron movimientos en una ejecución exitosa. Una ventana
+#antigua (--fecha, PJUD_FECHA_HASTA) no retrocede la fecha ya registrada
+def registrar_ejecucion_exitosa():
+    hasta = VENTANA_FECHAS[1] if VENTANA_FECHAS else datetime.date.today()
+    ultima = leer_ultima_ejecucion()
+    if ultima and ultima >= hasta:
+        return
+    tmp_path = f"{ULTIMA_EJECUCION_PATH}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"fecha": hasta.strftime("%d/%m/%Y")}, f)
+    os.replace(tmp_path, ULTIMA_EJECUCION_PATH)
+
+#Define la ventana de fechas a revisar en una sola pasada por las pestañas
+def configurar_ventana_fechas(desde=None, hasta=None, desde_ultima_ejecucion=False):
+    global VENTANA_FECHAS
+    hasta = parsear_fecha(hasta) if isinstance(hasta, str) else hasta
+    desde = parsear_fecha(desde) if isinstance(desde, str) else desde
+    hasta = hasta or datetime.date.today()
+
+    if desde_ultima_ejecucion and not desde:
+        ultima = leer_ultima_ejecucion()
+        if ultima:
+            # Se registra la fecha del día de la ejecución: los movimientos publicados más tarde
+            # ese mismo día solo los ve la siguiente, por eso el día registrado se vuelve a revisar
+            desde = ultima
+        else:
+            log.warning("No hay registro de una ejecución anterior; se revisará solo la fecha de hoy")
+
+    if not desde:
+        VENTANA_FECHAS = None
+        return None
+
+    VENTANA_FECHAS = (min(desde, hasta), hasta)
+    log.info(f"Ventana de fechas: {VENTANA_FECHAS[0].strftime('%d/%m/%Y')} - {VENTANA_FECHAS[1].strftime('%d/%m/%Y')}")
+    return VENTANA_FECHAS
+
+#Ventana de fechas: rango explícito o desde la última ejecución exitosa (PJUD_VENTANA=desde_ultima)
+def configurar_ventana_desde_entorno():
+    return configurar_ventana_fechas(
+        desde=os.getenv("PJUD_FECHA_DESDE"),
+        hasta=os.getenv("PJUD_FECHA_HASTA"),
+        desde_ultima_ejecucion=os.getenv("PJUD_VENTANA") == "desde_ultima"
+    )
+
+#Indica si una fecha cae en la ventana activa; sin ventana, compara con la fecha objetivo (hoy por defecto)
+def fecha_en_ventana(fecha_str, fecha_objetivo=None):
+    fecha = parsear_fecha(fecha_str)
+    if fecha is None:
+        return False
+    if VENTANA_FECHAS:
+        return VENTANA_FECHAS[0] <= fecha <= VENTANA_FECHAS[1]
+    return fecha == (parsear_fecha(fecha_objetivo) if fecha_objetivo else datetime.date.today())
+
+#Describe la ventana activa para los mensajes de progreso
+def describir_ventana(fecha_objetivo=None):
+    if VENTANA_FECHAS:
+        return f"{VENTANA_FECHAS[0].strftime('%d/%m/%Y')} - {VENTANA_FECHAS[1].strftime('%d/%m/%Y')}"
+    return fecha_objetivo or datetime.date.today().strftime("%d/%m/%Y")
+
+# Trazas de tiempo de la ejecución (PJUD_TRAZAS=1): ejecución → pestaña → página → causa →
+# cuaderno → movimiento → descarga/resumen/preview → correo
+TRAZAS_ACTIVAS = os.getenv("PJUD_TRAZAS", "0") == "1"
+TRAZAS_DIR = Path(__file__).parent / "trazas"
+
+# Carril de la traza (tid) de la tarea actual: cada página y cada descarga en segundo plano
+# tiene el suyo para que sus spans no se mezclen en el visor
+CARRIL_TRAZA = contextvars.ContextVar("carril_traza", default=None)
+
+# Span desactivado compartido: sin trazas, TRAZADOR.span no crea objetos ni mide tiempo
+SPAN_NULO = contextlib.nullcontext()
+
+class SpanTraza:
+    def __init__(self, trazador, nombre, categoria, args):
+        self.trazador = trazador
+        self.nombre = nombre
+        self.categoria = categoria
+        self.args = args
+        self.inicio = None
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        fin = time.perf_counter()
+        if exc_type:
+            self.args['error'] = exc_type.__name__
+        self.trazador.registrar(self, fin)
+        return False
+
+#Registra spans anidados con su tiempo real y los exporta en formato Chrome trace-event
+class Trazador:
+    def __init__(self, activo):
+        self.activo = activo
+        self.origen = time.perf_counter()
+        self.eventos = []
+        self.contadores = {}
+        self.lock = threading.Lock()
+        self.carriles = itertools.count(1)
+
+    def span(self, nombre, categoria, **args):
+        if not self.activo:
+            return SPAN_NULO
+        return SpanTraza(self, str(nombre), categoria, args)
+
+    #Versión sin "with" para bloques largos: abrir() al inicio y cerrar() en un finally
+    def abrir(self, nombre, categoria, **args):
+        span = self.span(nombre, categoria, **args)
+        span.__enter__()
+        return span
+
+    def cerrar(self, span):
+        span.__exit__(None, None, None)
+
+    #Asigna un carril propio a la tarea actual (se hereda en las tareas que esta cree)
+    def nuevo_carril(self):
+        if self.activo:
+            CARRIL_TRAZA.set(next(self.carriles))
+
+    def contar(self, nombre, cantidad=1):
+        if not self.activo:
+            return
+        with self.lock:
+            self.contadores[nombre] = self.contadores.get(nombre, 0) + cantidad
+
+    def registrar(self, span, fin):
+        evento = {
+            'name': span.nombre,
+            'cat': span.categoria,
+            'ph': 'X',
+            'ts': round((span.inicio - self.origen) * 1e6),
+            'dur': round((fin - span.inicio) * 1e6),
+            'pid': os.getpid(),
+            'tid': CARRIL_TRAZA.get() or threading.get_ident(),
+            'args': span.args,
+        }
+        with self.lock:
+            self.eventos.append(evento)
+            self.contadores[span.categoria] = self.contadores.get(span.categoria, 0) + 1
+
+    #Escribe la traza (abrir en chrome://tracing o https://ui.perfetto.dev)
+    def exportar(self, directorio=TRAZAS_DIR):
+        if not self.activo or not self.eventos:
+            return None
+        directorio.mkdir(parents=True, exist_ok=True)
+        ruta = directorio / f"pjud_traza_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump({'traceEvents': self.eventos, 'displayTimeUnit': 'ms', 'otherData': {'contadores': self.contadores}}, f, ensure_ascii=False)
+        print(f"[INFO] Traza de tiempos guardada en: {ruta}")
+        return ruta
+
+    #Descarta lo registrado para empezar la traza de la siguiente ejecución (modo servicio)
+    def reiniciar(self):
+        with self.lock:
+            self.origen = time.perf_counter()
+            self.eventos = []
+            self.contadores = {}
+
+    def imprimir_resumen(self, top_n=10):
+        if not self.activo or not self.eventos:
+            return
+        print("\n--- Resumen de tiempos ---")
+        totales = {}
+        for evento in self.eventos:
+            totales[evento['cat']] = totales.get(evento['cat'], 0) + evento['dur']
+        for categoria, total in sorted(totales.items(), key=lambda item: -item[1]):
+            print(f"  {categoria}: {total / 1e6:.1f}s en {self.contadores.get(categoria, 0)} spans")
+        causas = sorted((e for e in self.eventos if e['cat'] == 'causa'), key=lambda e: -e['dur'])[:top_n]
+        if causas:
+            print(f"  Causas más lentas (top {len(causas)}):")
+            for evento in causas:
+                print(f"    {evento['dur'] / 1e6:8.1f}s  {evento['args'].get('pestana', '')} - {evento['name']}")
+        otros = {k: v for k, v in self.contadores.items() if k not in totales}
+        if otros:
+            print(f"  Contadores: {', '.join(f'{k}={v}' for k, v in sorted(otros.items()))}")
+
+TRAZADOR = Trazador(TRAZAS_ACTIVAS)
+
+# Perfil de bloqueo de recursos de red del contexto (PJUD_BLOQUEO_RECURSOS=0 lo desactiva)
+PERFIL_BLOQUEO_RECURSOS = {
+    'activo': os.getenv("PJUD_BLOQUEO_RECURSOS", "1") != "0",
+    # No se bloquea 'stylesheet': panel.screenshot necesita el CSS para las capturas
+    'tipos': ["image", "font", "media"],
+    'dominios': [
+        "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+        "facebook.net", "facebook.com", "hotjar.com", "clarity.ms", "newrelic.com", "nr-data.net"
+    ]
+}
+
+# Perfil persistente de Chromium (PJUD_PERFIL_DIR): conserva la caché HTTP entre ejecuciones y
+# los JS, CSS y fuentes de la OJV se cargan desde disco después de la primera. Sin valor = navegador
+# efímero. Un mismo perfil no admite dos ejecuciones a la vez
+PERFIL_NAVEGADOR_DIR = os.getenv("PJUD_PERFIL_DIR")
+# Navegador sin interfaz gráfica (PJUD_HEADLESS=0 o --con-interfaz lo muestra)
+NAVEGADOR_HEADLESS = os.getenv("PJUD_HEADLESS", "1") != "0"
+# Tamaño máximo de la caché en disco del perfil
+CACHE_NAVEGADOR_MB = int(os.getenv("PJUD_CACHE_MB", "256"))
+
+#Bloqueo de recursos con opciones de Chromium, para el perfil persistente: con rutas activas
+#Playwright desactiva la caché HTTP. Imágenes desactivadas y dominios de trackers sin DNS
+def argumentos_bloqueo_chromium(perfil_bloqueo):
+    reglas = ", ".join(f"MAP {dominio} ~NOTFOUND, MAP *.{dominio} ~NOTFOUND" for dominio in perfil_bloqueo['dominios'])
+    argumentos = [f"--host-resolver-rules={reglas}"]
+    if "image" in perfil_bloqueo['tipos']:
+        argumentos.append("--blink-settings=imagesEnabled=false")
+    return argumentos
+
 class MovimientoPJUD:
-    def __init__(self, folio, seccion, caratulado, fecha, tribunal=None, corte=None, libro=None, rit=None, rol=None, pdf_path=None, pdf_paths=None, cuaderno=None, archivos_apelaciones=None, historia_causa_cuaderno=None):
+    def __init__(self, folio, seccion, caratulado, fecha, tribunal=None, corte=None, libro=None, rit=None, rol=None, pdf_path=None, pdf_paths=None, cuaderno=None, archivos_apelaciones=None, historia_causa_cuaderno=None, detalle_causa=None):
         self.folio = folio
         self.seccion = seccion
         self.caratulado = caratulado
@@ -93,6 +333,7 @@ class MovimientoPJUD:
         self.cuaderno = cuaderno
         self.archivos_apelaciones = archivos_apelaciones or []  # Lista de archivos de apelaciones para corte suprema
         self.historia_causa_cuaderno = historia_causa_cuaderno 
+        self.detalle_causa = detalle_causa or {}  # Campos del panel de la causa (ROL/RIT/Libro, tribunal, fecha, estado)
     
     @property
     def pdf_path(self):
@@ -120,7 +361,8 @@ class MovimientoPJUD:
             'pdf_paths': self.pdf_paths,
             'cuaderno': self.cuaderno,
             'archivos_apelaciones': self.archivos_apelaciones,
-            'historia_causa_cuaderno': self.historia_causa_cuaderno
+            'historia_causa_cuaderno': self.historia_causa_cuaderno,
+            'detalle_causa': self.detalle_causa
         }
     
     def __eq__(self, other):
@@ -151,17 +393,173 @@ def agregar_movimiento_sin_duplicar(movimiento):
         return True
     return False
 
-#Configura y retorna un navegador con Playwright
-def setup_browser():
+# Punto de control de la ejecución en curso: si el navegador se cae o la ejecución se corta,
+# la siguiente retoma desde ahí (PJUD_REANUDAR=0 empieza siempre de cero)
+PUNTO_CONTROL_PATH = Path(__file__).parent / "pjud_punto_control.json"
+REANUDAR_EJECUCION = os.getenv("PJUD_REANUDAR", "1") != "0"
+
+# Ejecuciones que pueden terminar con pestañas pendientes sin enviar el correo; en la
+# última se informa lo encontrado aunque alguna pestaña siga fallando
+MAX_INTENTOS_EJECUCION = 3
+
+#Avance durable de la ejecución: pestañas, páginas y causas terminadas, posición actual
+#(página, causa, cuaderno) y movimientos encontrados. Se guarda en cada avance y se borra
+#cuando el correo con el resultado se envía
+class PuntoControl:
+    def __init__(self):
+        self.ruta = None
+        self.estado = None
+        self.reanudar = False
+
+    #Carga el punto de control de la misma ejecución (misma clave) o empieza uno nuevo.
+    #Retorna True si se retoma una ejecución interrumpida
+    def iniciar(self, ruta, clave, reanudar=True):
+        self.ruta = Path(ruta)
+        self.reanudar = reanudar
+        estado = None
+        if reanudar:
+            try:
+                with open(self.ruta, "r", encoding="utf-8") as f:
+                    estado = json.load(f)
+            except (OSError, ValueError):
+                estado = None
+            if estado and estado.get('clave') != clave:
+                log.info("El punto de control guardado es de otra ejecución; se empieza de cero")
+                estado = None
+        self.estado = estado or {'clave': clave, 'intentos': 0, 'pestanas': {}, 'movimientos': []}
+        self.estado['intentos'] += 1
+        if estado:
+            completas = [tab for tab, pestana in estado['pestanas'].items() if pestana['completa']]
+            log.info(f"Reanudando ejecución interrumpida: {len(completas)} pestañas terminadas, {len(estado['movimientos'])} movimientos recuperados")
+            for tab_name, pestana in estado['pestanas'].items():
+                if not pestana['completa'] and pestana['posicion']:
+                    log.info(f"  '{tab_name}' se interrumpió en {pestana['posicion']}")
+        self.guardar()
+        return bool(estado)
+
+    def _pestana(self, tab_name):
+        return self.estado['pestanas'].setdefault(tab_name, {'completa': False, 'paginas': [], 'causas': [], 'posicion': {}})
+
+    def pestana_completa(self, tab_name):
+        return bool(self.estado) and self.estado['pestanas'].get(tab_name, {}).get('completa', False)
+
+    #Pestañas con especificación que aún no terminan
+    def pestanas_pendientes(self, pestanas):
+        return [tab for tab in dict.fromkeys(pestanas) if tab in ESPECIFICACIONES_PESTANAS and not self.pestana_completa(tab)]
+
+    #Indica si conviene dejar el correo para la próxima ejecución en vez de informar un resultado parcial
+    def puede_reintentar(self):
+        return bool(self.estado) and self.reanudar and self.estado['intentos'] < MAX_INTENTOS_EJECUCION
+
+    def pagina_completa(self, tab_name, pagina):
+        return bool(self.estado) and pagina in self.estado['pestanas'].get(tab_name, {}).get('paginas', [])
+
+    def causa_completa(self, tab_name, clave_causa):
+        return bool(self.estado) and clave_causa in self.estado['pestanas'].get(tab_name, {}).get('causas', [])
+
+    def marcar_posicion(self, tab_name, **posicion):
+        if not self.estado:
+            return
+        self._pestana(tab_name)['posicion'].update(posicion)
+        self.guardar()
+
+    def completar_causa(self, tab_name, clave_causa, movimientos):
+        if not self.estado:
+            return
+        self._pestana(tab_name)['causas'].append(clave_causa)
+        self.estado['movimientos'].extend(movimiento.to_dict() for movimiento in movimientos)
+        self.guardar()
+
+    def completar_pagina(self, tab_name, pagina):
+        if not self.estado:
+            return
+        self._pestana(tab_name)['paginas'].append(pagina)
+        self.guardar()
+
+    def completar_pestana(self, tab_name):
+        if not self.estado:
+            return
+        pestana = self._pestana(tab_name)
+        pestana['completa'] = True
+        pestana['posicion'] = {}
+        self.guardar()
+
+    #Movimientos encontrados antes de la interrupción
+    def movimientos(self):
+        if not self.estado:
+            return []
+        return [MovimientoPJUD(**datos) for datos in self.estado['movimientos']]
+
+    def guardar(self):
+        tmp_path = f"{self.ruta}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.estado, f, ensure_ascii=False)
+        os.replace(tmp_path, self.ruta)
+
+    #La ejecución terminó y se informó: la próxima empieza de cero
+    def finalizar(self):
+        self.estado = None
+        if self.ruta and self.ruta.exists():
+            self.ruta.unlink()
+
+PUNTO_CONTROL = PuntoControl()
+
+#Identifica la ejecución: un punto de control solo se retoma el mismo día y con la misma ventana
+def clave_ejecucion():
+    return {
+        'script': Path(__file__).name,
+        'fecha': datetime.date.today().isoformat(),
+        'ventana': describir_ventana(),
+        'pestanas': list(dict.fromkeys(MIS_CAUSAS_TABS)),
+        'max_causas': MAX_CAUSAS_POR_PESTANA,
+    }
+
+#Indica si la ejecución revisa solo parte de la cartera (pestañas verificadas o causas limitadas)
+def seleccion_parcial():
+    return MAX_CAUSAS_POR_PESTANA is not None or not set(PESTANAS_VERIFICADAS) <= set(MIS_CAUSAS_TABS)
+
+#Filtro de peticiones del contexto, con contadores por tipo de recurso
+class FiltroRecursos:
+    def __init__(self, tipos, dominios):
+        self.tipos = set(tipos)
+        self.dominios = tuple(dominios)
+        self.contadores = {}
+
+    def _es_tracker(self, url):
+        host = urlparse(url).hostname or ""
+        return any(host == dominio or host.endswith("." + dominio) for dominio in self.dominios)
+
+    async def manejar(self, route):
+        request = route.request
+        tipo = request.resource_type
+        bloquear = tipo in self.tipos or self._es_tracker(request.url)
+        contador = self.contadores.setdefault(tipo, {'permitidos': 0, 'bloqueados': 0})
+        if bloquear:
+            contador['bloqueados'] += 1
+            await route.abort("blockedbyclient")
+        else:
+            contador['permitidos'] += 1
+            await route.continue_()
+
+    def imprimir_resumen(self):
+        print("\n--- Resumen de recursos de red ---")
+        for tipo, contador in sorted(self.contadores.items()):
+            print(f"  {tipo}: {contador['permitidos']} permitidos, {contador['bloqueados']} bloqueados")
+
+# Filtro instalado por setup_browser (None si el bloqueo está desactivado)
+FILTRO_RECURSOS = None
+
+#Configura y retorna un navegador con Playwright. Retorna (navegador, página); navegador.close()
+#cierra todo (con perfil persistente, el navegador es el contexto)
+async def setup_browser(playwright, perfil_bloqueo=PERFIL_BLOQUEO_RECURSOS, perfil_dir=None):
+    perfil_dir = perfil_dir or PERFIL_NAVEGADOR_DIR
 
-    playwright = sync_playwright().start()
-    
     # Seleccionar un user agent aleatorio
     selected_user_agent = random.choice(USER_AGENTS)
-    print(f"User-Agent seleccionado: {selected_user_agent}")
+    log.info(f"User-Agent seleccionado: {selected_user_agent}")
     
-    browser = playwright.chromium.launch(
-        headless=False,  # True = sin interfaz gráfica
+    opciones_navegador = dict(
+        headless=NAVEGADOR_HEADLESS,  # True = sin interfaz gráfica
         args=[
             '--disable-blink-features=AutomationControlled',
             '--disable-dev-shm-usage',
@@ -181,8 +579,8 @@ def setup_browser():
         ]
     )
     
-    # Crear el contexto con las configuraciones básicas
-    context = browser.new_context(
+    # Configuraciones básicas del contexto
+    opciones_contexto = dict(
         viewport={'width': 1366, 'height': 768},
         user_agent=selected_user_agent,
         locale='es-ES',
@@ -201,9 +599,21 @@ def setup_browser():
             'Sec-Fetch-User': '?1'
         }
     )
+    bloquear_recursos = perfil_bloqueo and perfil_bloqueo.get('activo')
+
+    if perfil_dir:
+        log.info(f"Usando perfil persistente de Chromium: {perfil_dir}")
+        opciones_navegador['args'].append(f"--disk-cache-size={CACHE_NAVEGADOR_MB * 1024 * 1024}")
+        if bloquear_recursos:
+            opciones_navegador['args'].extend(argumentos_bloqueo_chromium(perfil_bloqueo))
+        context = await playwright.chromium.launch_persistent_context(perfil_dir, **opciones_navegador, **opciones_contexto)
+        browser = context
+    else:
+        browser = await playwright.chromium.launch(**opciones_navegador)
+        context = await browser.new_context(**opciones_contexto)
     
     # Configurar el contexto para evitar la detección de automatización
-    context.add_init_script("""
+    await context.add_init_script("""
         Object.defineProperty(navigator, 'webdriver', {
             get: () => undefined
         });
@@ -215,131 +625,262 @@ def setup_browser():
         });
     """)
     
-    # Crear la página
-    page = context.new_page()
+    # Filtrar imágenes, fuentes, multimedia y trackers antes de que lleguen a la red
+    # (con perfil persistente ya se filtran con las opciones de Chromium)
+    if bloquear_recursos and not perfil_dir:
+        global FILTRO_RECURSOS
+        FILTRO_RECURSOS = FiltroRecursos(perfil_bloqueo['tipos'], perfil_bloqueo['dominios'])
+        await context.route("**/*", FILTRO_RECURSOS.manejar)
+
+    # Configurar timeouts (a nivel de contexto, para que apliquen a todas las páginas)
+    context.set_default_timeout(30000)  # 30 segundos
+    context.set_default_navigation_timeout(30000)
+
+    # Crear la página (el contexto persistente abre con una pestaña en blanco)
+    page = context.pages[0] if context.pages else await context.new_page()
     
-    # Configurar timeouts
-    page.set_default_timeout(30000)  # 30 segundos
-    page.set_default_navigation_timeout(30000)
-    
-    return playwright, browser, page
+    return browser, page
+
+# Vigilante de memoria (PJUD_VIGILANTE=0 lo desactiva): cada cierta cantidad de causas mide el heap
+# JS y los nodos DOM de la página (CDP Performance.getMetrics) y el RSS de Python y del navegador.
+# Si se supera un límite, la página se reemplaza por una nueva entre dos causas
+LIMITES_MEMORIA = {
+    'activo': os.getenv("PJUD_VIGILANTE", "1") != "0",
+    'cada_causas': int(os.getenv("PJUD_VIGILANTE_CADA", "5")),
+    'heap_js_mb': int(os.getenv("PJUD_LIMITE_HEAP_MB", "400")),
+    'nodos_dom': int(os.getenv("PJUD_LIMITE_NODOS", "150000")),
+    'rss_mb': int(os.getenv("PJUD_LIMITE_RSS_MB", "3072")),
+}
+
+#RSS (MB) del proceso y de sus descendientes (driver de Playwright y Chromium). Usa /proc; en
+#otros sistemas retorna solo el máximo del proceso actual
+def rss_procesos_mb():
+    pid_propio = os.getpid()
+    try:
+        tamano_pagina = os.sysconf('SC_PAGE_SIZE')
+        padres, rss = {}, {}
+        for entrada in os.listdir('/proc'):
+            if not entrada.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entrada}/stat', 'rb') as f:
+                    campos = f.read().rsplit(b')', 1)[1].split()
+            except OSError:
+                continue
+            padres[int(entrada)] = int(campos[1])
+            rss[int(entrada)] = int(campos[21]) * tamano_pagina
+    except (OSError, ValueError, AttributeError):
+        import resource
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return {'python': round(maximo), 'navegador': 0}
+    hijos = {}
+    for pid, ppid in padres.items():
+        hijos.setdefault(ppid, []).append(pid)
+    pendientes, navegador = list(hijos.get(pid_propio, [])), 0
+    while pendientes:
+        pid = pendientes.pop()
+        navegador += rss.get(pid, 0)
+        pendientes.extend(hijos.get(pid, []))
+    return {'python': round(rss.get(pid_propio, 0) / 2**20), 'navegador': round(navegador / 2**20)}
+
+#Decide cuándo reemplazar una página que acumula memoria y recuerda qué página reemplazó a cuál
+class VigilanteMemoria:
+    def __init__(self, limites):
+        self.limites = limites
+        self.causas = {}
+        self.sesiones = {}
+        self.reemplazos = {}
+        self.reciclajes = 0
+
+    async def medir(self, page):
+        sesion = self.sesiones.get(page)
+        if sesion is None:
+            sesion = await page.context.new_cdp_session(page)
+            await sesion.send("Performance.enable")
+            self.sesiones[page] = sesion
+        metricas = {m['name']: m['value'] for m in (await sesion.send("Performance.getMetrics"))['metrics']}
+        medicion = {
+            'heap_js_mb': round(metricas.get('JSHeapUsedSize', 0) / 2**20),
+            'nodos_dom': int(metricas.get('Nodes', 0)),
+            'listeners': int(metricas.get('JSEventListeners', 0)),
+        }
+        rss = await asyncio.to_thread(rss_procesos_mb)
+        medicion.update(rss_python_mb=rss['python'], rss_navegador_mb=rss['navegador'], rss_mb=rss['python'] + rss['navegador'])
+        return medicion
+
+    #Se llama antes de abrir cada causa; retorna True si conviene reciclar la página
+    async def requiere_reciclaje(self, page):
+        if not self.limites['activo']:
+            return False
+        self.causas[page] = self.causas.get(page, 0) + 1
+        if self.causas[page] % self.limites['cada_causas']:
+            return False
+        try:
+            medicion = await self.medir(page)
+        except Exception as e:
+            log.debug("No se pudo medir la memoria de la página: %s", e)
+            return False
+        log.debug("Memoria: %s", medicion, extra={'datos': medicion})
+        excedidos = [clave for clave in ('heap_js_mb', 'nodos_dom', 'rss_mb') if medicion[clave] > self.limites[clave]]
+        if excedidos:
+            log.warning(f"Límite de memoria superado ({', '.join(f'{clave}={medicion[clave]}' for clave in excedidos)}); se reciclará la página")
+            return True
+        return False
+
+    def registrar_reemplazo(self, anterior, nueva):
+        self.reemplazos[anterior] = nueva
+        self.causas.pop(anterior, None)
+        self.sesiones.pop(anterior, None)
+        self.reciclajes += 1
+        TRAZADOR.contar("paginas_recicladas")
+
+    #Página que sigue en uso en lugar de la indicada (la misma si no se recicló)
+    def vigente(self, page):
+        while page in self.reemplazos:
+            page = self.reemplazos[page]
+        return page
+
+VIGILANTE_MEMORIA = VigilanteMemoria(LIMITES_MEMORIA)
+
+# Perfiles de pausas (PJUD_PAUSAS o --pausas): factor que se aplica a cada espera aleatoria.
+# 'ninguna' es para el portal simulado y las pruebas locales, no para la OJV
+PERFILES_PAUSAS = {
+    'normal': 1.0,
+    'rapido': 0.3,
+    'ninguna': 0.0,
+}
+PERFIL_PAUSAS = os.getenv("PJUD_PAUSAS", "normal")
+FACTOR_PAUSAS = PERFILES_PAUSAS.get(PERFIL_PAUSAS, 1.0)
 
-#Espera un tiempo aleatorio entre min_seconds y max_seconds
-def random_sleep(min_seconds=1, max_seconds=3):
-    time.sleep(random.uniform(min_seconds, max_seconds))
+#Espera un tiempo aleatorio entre min_seconds y max_seconds; las demás páginas siguen avanzando
+async def random_sleep(min_seconds=1, max_seconds=3):
+    await asyncio.sleep(random.uniform(min_seconds, max_seconds) * FACTOR_PAUSAS)
 
 #Simula varios comportamientos humanos aleatorios
-def simulate_human_behavior(page):
+async def simulate_human_behavior(page):
     # Scroll aleatorio
     if random.random() < 0.3:  # 30% de probabilidad
-        page.mouse.wheel(0, random.randint(100, 500))
-        random_sleep(0.5, 1.5)
+        await page.mouse.wheel(0, random.randint(100, 500))
+        await random_sleep(0.5, 1.5)
     
     # Movimiento del mouse aleatorio
     if random.random() < 0.2:  # 20% de probabilidad
         x = random.randint(100, 800)
         y = random.randint(100, 600)
-        page.mouse.move(x, y)
-        random_sleep(0.5, 1.5)
+        await page.mouse.move(x, y)
+        await random_sleep(0.5, 1.5)
 
 #Realiza el proceso de login
-def login(page, username, password):
+async def login(page, username, password):
     try:
-        print("Esperando página de Clave Única...")
-        random_sleep(2, 4)
+        log.info("Esperando página de Clave Única...")
+        await random_sleep(2, 4)
         
         # Simular comportamiento humano antes de interactuar
-        simulate_human_behavior(page)
+        await simulate_human_behavior(page)
 
-        print("Ingresando usuario...")
-        page.fill('#uname', username)
+        log.debug("Ingresando usuario...")
+        await page.fill('#uname', username)
         
-        random_sleep(1, 2)
+        await random_sleep(1, 2)
         
-        print("Ingresando contraseña...")
-        page.fill('#pword', password)
+        log.debug("Ingresando contraseña...")
+        await page.fill('#pword', password)
         
-        random_sleep(1, 2)
+        await random_sleep(1, 2)
         
         # Simular la pulsación de Enter para enviar el formulario
-        page.keyboard.press('Enter')
-        page.keyboard.press('Enter')
+        await page.keyboard.press('Enter')
+        await page.keyboard.press('Enter')
         
         # Simular comportamiento humano después del login
-        random_sleep(2, 4)
-        simulate_human_behavior(page)
+        await random_sleep(2, 4)
+        await simulate_human_behavior(page)
         
         # Verificar que el login fue exitoso
-        print("Verificando inicio de sesión...")
-        page.wait_for_selector('text=Oficina Judicial Virtual', timeout=30000)
+        log.info("Verificando inicio de sesión...")
+        await page.wait_for_selector('text=Oficina Judicial Virtual', timeout=30000)
         
-        print("Inicio de sesión exitoso!")
+        log.info("Inicio de sesión exitoso!")
         return True
         
     except Exception as e:
-        print(f"Error durante el proceso de login: {str(e)}") 
+        log.error(f"Error durante el proceso de login: {str(e)}") 
+        return False
+
+#Comprueba si la página conserva la sesión de una ejecución anterior (modo servicio): vuelve a la
+#Oficina Judicial Virtual y busca la función misCausas, que solo existe con la sesión iniciada
+async def sesion_vigente(page, url_ojv):
+    if not url_ojv:
+        return False
+    try:
+        await page.goto(url_ojv)
+        await page.wait_for_selector('text=Oficina Judicial Virtual', timeout=10000)
+        return await page.evaluate("typeof misCausas === 'function'")
+    except Exception as e:
+        log.info(f"La sesión anterior ya no está vigente: {str(e)}")
         return False
 
 #Navega a la sección Mis Causas
-def navigate_to_mis_causas(page):
+async def navigate_to_mis_causas(page):
     try:
-        print("Navegando a 'Mis Causas'...")
+        log.info("Navegando a 'Mis Causas'...")
         
         # Intentar hacer clic mediante JavaScript
         try:
-            page.evaluate("misCausas();")
-            print("Navegación a 'Mis Causas' mediante JS exitosa!")
+            await page.evaluate("misCausas();")
+            log.info("Navegación a 'Mis Causas' mediante JS exitosa!")
         except Exception as js_error:
-            print(f"Error al ejecutar JavaScript: {str(js_error)}")
+            log.error(f"Error al ejecutar JavaScript: {str(js_error)}")
             
             # Intento alternativo haciendo clic directamente en el elemento
             try:
-                page.click("a:has-text('Mis Causas')")
-                print("Navegación a 'Mis Causas' mediante clic directo exitosa!")
+                await page.click("a:has-text('Mis Causas')")
+                log.info("Navegación a 'Mis Causas' mediante clic directo exitosa!")
             except Exception as click_error:
-                print(f"Error al hacer clic directo: {str(click_error)}")
+                log.error(f"Error al hacer clic directo: {str(click_error)}")
                 return False
         
         # Dar tiempo para que cargue la página
-        random_sleep(1, 4)
+        await random_sleep(1, 4)
         
         return True
         
     except Exception as e:
-        print(f"Error al navegar a 'Mis Causas': {str(e)}")
+        log.error(f"Error al navegar a 'Mis Causas': {str(e)}")
         return False
 
 #Descarga un PDF desde una URL directa usando las cookies de sesión
-def descargar_pdf_directo(pdf_url, pdf_filename, page):
+async def descargar_pdf_directo(pdf_url, pdf_filename, page):
     try:
         # Verificar si el archivo ya existe
         if os.path.exists(pdf_filename):
-            print(f"[INFO] El archivo {pdf_filename} ya existe. No se descargará nuevamente.")
+            log.debug("El archivo %s ya existe. No se descargará nuevamente.", pdf_filename)
             return True
 
-        cookies_list = page.context.cookies()
+        cookies_list = await page.context.cookies()
         cookie_header = '; '.join([f"{c['name']}={c['value']}" for c in cookies_list])
         headers = {
             'Accept': 'application/pdf,application/x-pdf,application/octet-stream',
             'Accept-Language': 'es-ES,es;q=0.9',
             'Connection': 'keep-alive',
-            'User-Agent': page.evaluate('navigator.userAgent'),
+            'User-Agent': await page.evaluate('navigator.userAgent'),
             'Cookie': cookie_header
         }
-        response = page.context.request.get(
+        response = await page.context.request.get(
             pdf_url,
             headers=headers
         )
         if response.status == 200:
             with open(pdf_filename, 'wb') as f:
-                f.write(response.body())
-            print(f"[INFO] PDF descargado exitosamente: {pdf_filename}")
+                f.write(await response.body())
+            log.info(f"PDF descargado exitosamente: {pdf_filename}")
             return True
         else:
-            print(f"[ERROR] Error al descargar PDF: Status code {response.status}")
+            log.error(f"Error al descargar PDF: Status code {response.status}")
             return False
     except Exception as e:
-        print(f"[ERROR] Error general al descargar el PDF: {str(e)}")
+        log.error(f"Error general al descargar el PDF: {str(e)}")
         return False
     
 #Elimina caracteres no válidos para nombres de archivo en Windows
@@ -347,41 +888,78 @@ def limpiar_nombre_archivo(nombre):
     """Elimina caracteres no válidos para nombres de archivo en Windows."""
     return re.sub(r'[<>:"/\\|?*\n\r\t]', '', nombre)
 
+# Lineas de firma electrónica y URLs que no aportan al resumen
+LINEAS_IGNORADAS_RESUMEN = (
+    "firma electrónica",
+    "verificadoc.pjud.cl",
+    "horaoficial.cl",
+    "puede ser validado",
+    "establecido en chile",
+    "para más información",
+)
+
+#Genera el texto de cada página solo cuando se solicita, hasta max_paginas
+def iterar_texto_paginas(reader, max_paginas=1):
+    for num_pagina in range(min(max_paginas, len(reader.pages))):
+        yield reader.pages[num_pagina].extract_text() or ""
+
 #Extrae un resumen del PDF (primeras 15 palabras del primer texto encontrado)
-def extraer_resumen_pdf(pdf_path):
+def extraer_resumen_pdf(pdf_path, max_palabras=15):
+    import PyPDF2
+
     try:
         with open(pdf_path, "rb") as f:
             reader = PyPDF2.PdfReader(f)
-            if len(reader.pages) > 0:
-                text = reader.pages[0].extract_text()
-                if text:
-                    # Elimina advertencias de firma electrónica y URLs
-                    lineas = text.strip().splitlines()
-                    lineas_utiles = []
-                    for linea in lineas:
-                        if (
-                            "firma electrónica" in linea.lower()
-                            or "verificadoc.pjud.cl" in linea.lower()
-                            or "horaoficial.cl" in linea.lower()
-                            or "puede ser validado" in linea.lower()
-                            or "establecido en chile" in linea.lower()
-                            or "para más información" in linea.lower()
-                        ):
-                            continue
-                        if linea.strip():
-                            lineas_utiles.append(linea.strip())
-                    # Toma las primeras 15 palabras de las primeras líneas útiles
-                    resumen = " ".join(" ".join(lineas_utiles).split()[:15])
-                    return resumen if resumen else "sin_resumen"
-        return "sin_resumen"
+            palabras = []
+            for text in iterar_texto_paginas(reader):
+                # Elimina advertencias de firma electrónica y URLs
+                for linea in text.strip().splitlines():
+                    linea_lower = linea.lower()
+                    if any(ignorada in linea_lower for ignorada in LINEAS_IGNORADAS_RESUMEN):
+                        continue
+                    palabras.extend(linea.split())
+                    # Deja de recorrer líneas apenas se tienen las palabras necesarias
+                    if len(palabras) >= max_palabras:
+                        break
+                if len(palabras) >= max_palabras:
+                    break
+            resumen = " ".join(palabras[:max_palabras])
+            return resumen if resumen else "sin_resumen"
     except Exception as e:
-        print(f"[ERROR] No se pudo extraer resumen del PDF: {e}")
+        log.error(f"No se pudo extraer resumen del PDF: {e}")
         return "sin_resumen"
     
-#genera un screenshot de la primera página del PDF  
-def generar_preview_pdf(pdf_path, preview_path, width=400):
+# Vistas previas del correo: se generan al armar el correo, solo para los PDF que van en él.
+# La primera página se rasteriza a baja resolución (el preview mide PREVIEW_ANCHO px) y se
+# codifica como PNG de paleta o JPEG, lo que quede bajo PREVIEW_MAX_BYTES
+PREVIEW_ANCHO = 400
+PREVIEW_DPI = 72
+PREVIEW_MAX_BYTES = int(os.getenv("PJUD_PREVIEW_MAX_KB", "60")) * 1024
+
+#Codifica el preview: PNG de 16 colores (texto nítido) si cabe en el presupuesto; si no
+#(páginas escaneadas), el JPEG de mejor calidad que cabe. Retorna (bytes, subtipo)
+def codificar_preview(imagen, max_bytes=PREVIEW_MAX_BYTES):
+    imagen = imagen.convert('RGB')
+    png = io.BytesIO()
+    imagen.quantize(colors=16).save(png, 'PNG', optimize=True)
+    if png.tell() <= max_bytes:
+        return png.getvalue(), 'png'
+    jpeg = None
+    for calidad in (75, 60, 45, 30):
+        jpeg = io.BytesIO()
+        imagen.save(jpeg, 'JPEG', quality=calidad, optimize=True, progressive=True)
+        if jpeg.tell() <= max_bytes:
+            break
+    return jpeg.getvalue(), 'jpeg'
+
+#genera un screenshot de la primera página del PDF. La extensión de preview_path se ajusta al
+#formato elegido (.png o .jpg); retorna la ruta escrita o None
+def generar_preview_pdf(pdf_path, preview_path, width=PREVIEW_ANCHO, max_bytes=PREVIEW_MAX_BYTES):
+    from pdf2image import convert_from_path
+    from PIL import Image
+
     try:
-        images = convert_from_path(pdf_path, first_page=1, last_page=1)
+        images = convert_from_path(pdf_path, dpi=PREVIEW_DPI, first_page=1, last_page=1)
         if images:
             img = images[0]
             w, h = img.size
@@ -392,19 +970,88 @@ def generar_preview_pdf(pdf_path, preview_path, width=400):
             aspect_ratio = crop_height / w
             new_height = int(width * aspect_ratio)
             resized = upper_part.resize((width, new_height), Image.LANCZOS)
-            resized.save(preview_path, 'PNG')
-            print(f"[INFO] Vista previa guardada en: {preview_path}")
+            datos, subtipo = codificar_preview(resized, max_bytes)
+            preview_path = os.path.splitext(preview_path)[0] + ('.png' if subtipo == 'png' else '.jpg')
+            with open(preview_path, 'wb') as f:
+                f.write(datos)
+            log.debug("Vista previa guardada en: %s (%s bytes)", preview_path, len(datos))
+            return preview_path
         else:
-            print(f"[WARN] No se pudo generar la vista previa para {pdf_path}")
+            log.warning(f"No se pudo generar la vista previa para {pdf_path}")
+    except Exception as e:
+        log.error(f"Error generando preview: {e}")
+    return None
+
+#Vista previa de un PDF para el correo: se genera la primera vez que se pide y queda junto al PDF
+def preview_para_correo(pdf_path):
+    base = os.path.splitext(pdf_path)[0] + '_preview'
+    for extension in ('.png', '.jpg'):
+        if os.path.exists(base + extension):
+            return base + extension
+    with TRAZADOR.span(os.path.basename(pdf_path), "preview"):
+        return generar_preview_pdf(pdf_path, base + '.png')
+
+#Renombra el PDF temporal a su nombre final
+def finalizar_pdf_descargado(pdf_filename_tmp, pdf_filename):
+    # Evitar sobrescribir archivos existentes
+    if os.path.exists(pdf_filename):
+        log.warning(f"El archivo final {pdf_filename} ya existe. Se eliminará para evitar conflicto.")
+        os.remove(pdf_filename)
+    # Limitar el nombre del archivo si es demasiado largo
+    base, ext = os.path.splitext(pdf_filename)
+    if len(pdf_filename) > MAX_LARGO_NOMBRE_PDF:
+        pdf_filename = base[:MAX_LARGO_NOMBRE_PDF - len(ext)] + ext
+    try:
+        os.rename(pdf_filename_tmp, pdf_filename)
     except Exception as e:
-        print(f"[ERROR] Error generando preview: {e}")
+        log.warning(f"No se pudo renombrar el archivo temporal: {pdf_filename_tmp} -> {pdf_filename} - {e}")
+    finally:
+        if os.path.exists(pdf_filename_tmp):
+            try:
+                os.remove(pdf_filename_tmp)
+                log.debug("Archivo temporal eliminado: %s", pdf_filename_tmp)
+            except Exception as e:
+                log.warning(f"No se pudo eliminar el archivo temporal: {pdf_filename_tmp} - {e}")
+    return pdf_filename
         
         
 # Manejo de paginación 
-def manejar_paginacion(page, tab_name):
-    """Maneja la paginación en la tabla de causas"""
+#Hace clic en el paginador de la tabla de causas; retorna False si no hay uno visible y habilitado
+async def cambiar_pagina(page, pagina):
+    pagina_selector = f'.pagination .page-link[onclick^="pagina({pagina},"]'
+    log.debug("Buscando selector de paginación: %s", pagina_selector)
+    paginadores = await page.query_selector_all(pagina_selector)
+    for pag in paginadores:
+        try:
+            classes = await pag.get_attribute("class") or ""
+            # Verifica visibilidad real y que no sea el actual ni deshabilitado
+            style = await pag.evaluate("el => window.getComputedStyle(el).display")
+            if await pag.is_visible() and style != "none" and "disabled" not in classes and "active" not in classes:
+                await pag.click()
+                log.debug("Click en paginador: %s", pagina_selector)
+                await random_sleep(1, 2)
+                await page.wait_for_load_state("networkidle")
+                return True
+        except Exception:
+            continue
+    return False
+
+#Lleva la tabla de causas a la página indicada: directo si el paginador la muestra, si no página a página
+async def ir_a_pagina(page, pagina):
+    if pagina <= 1 or await cambiar_pagina(page, pagina):
+        return True
+    for intermedia in range(2, pagina + 1):
+        if not await cambiar_pagina(page, intermedia):
+            return False
+    return True
+
+async def manejar_paginacion(page, tab_name, pagina_vigente=None):
+    """Maneja la paginación en la tabla de causas
+
+    pagina_vigente: función que retorna la página en uso, si el vigilante de memoria la reemplaza
+    """
     try:
-        print(f"  Iniciando paginación para {tab_name}...")
+        log.info(f"Iniciando paginación para {tab_name}...")
 
         # Detectar selector de total de registros según pestaña
         total_selectors = {
@@ -421,150 +1068,647 @@ def manejar_paginacion(page, tab_name):
         total_selector = total_selectors.get(tab_name, '.loadTotalApe b')
 
         # Obtener el número total de registros
-        total_registros = page.evaluate(f'''() => {{
+        total_registros = await page.evaluate(f'''() => {{
             const el = document.querySelector('{total_selector}');
             return el ? parseInt(el.textContent.replace(/\\D/g, '')) : 0;
         }}''')
 
         if not total_registros or total_registros <= 15:
-            print("  Menos de 15 registros, no se requiere paginación")
+            log.info("Menos de 15 registros, no se requiere paginación")
             yield 1
             return
 
         # Calcular número de páginas (15 registros por página)
         total_paginas = (total_registros + 14) // 15
-        print(f"  Total de registros: {total_registros} | Páginas: {total_paginas}")
+        log.info(f"Total de registros: {total_registros} | Páginas: {total_paginas}")
 
         # Procesar cada página
         for pagina in range(1, total_paginas + 1):
-            print(f"  Procesando página {pagina}/{total_paginas}")
+            log.info(f"Procesando página {pagina}/{total_paginas}")
 
             # Si no es la primera página, cambiar de página
             if pagina > 1:
-                pagina_selector = f'.pagination .page-link[onclick^="pagina({pagina},"]'
-                print(f"  Buscando selector de paginación: {pagina_selector}")
+                if pagina_vigente:
+                    page = pagina_vigente()
                 try:
-                    paginadores = page.query_selector_all(pagina_selector)
-                    clicked = False
-                    for pag in paginadores:
-                        try:
-                            classes = pag.get_attribute("class") or ""
-                            # Verifica visibilidad real y que no sea el actual ni deshabilitado
-                            style = pag.evaluate("el => window.getComputedStyle(el).display")
-                            if pag.is_visible() and style != "none" and "disabled" not in classes and "active" not in classes:
-                                pag.click()
-                                clicked = True
-                                print(f"  Click en paginador: {pagina_selector}")
-                                random_sleep(1, 2)
-                                page.wait_for_load_state("networkidle")
-                                break
-                        except Exception:
-                            continue
-                    if not clicked:
-                        print(f"  No se encontró un paginador visible y habilitado para la página {pagina}")
+                    if not await cambiar_pagina(page, pagina):
+                        log.warning(f"No se encontró un paginador visible y habilitado para la página {pagina}")
                         continue
                 except Exception as e:
-                    print(f"  No se pudo hacer click en paginador: {e}")
+                    log.warning(f"No se pudo hacer click en paginador: {e}")
                     continue
-            random_sleep(0.5, 1.5)  # Pequeña pausa para asegurar carga
+            await random_sleep(0.5, 1.5)  # Pequeña pausa para asegurar carga
             yield pagina
 
-        print("  Paginación completada")
+        log.info("Paginación completada")
 
     except Exception as e:
-        print(f"  Error en paginación: {str(e)}")
+        log.error(f"Error en paginación: {str(e)}")
         yield 1
 
-#Lupa se refiere a el icon de lupa para abrir cada causa 
-#esta es la clase base o general para los controladores de lupas
+#URL base de los documentos de Mis Causas
+BASE_URL_DOCUMENTOS = "https://oficinajudicialvirtual.pjud.cl/misCausas"
+
+#Largo máximo del nombre final de cada PDF descargado
+MAX_LARGO_NOMBRE_PDF = 156
+
+#Hilos para generar resumen y nombre final de los PDF descargados, y los previews del correo
+MAX_HILOS_DOCUMENTOS = 4
+EJECUTOR_DOCUMENTOS = ThreadPoolExecutor(max_workers=MAX_HILOS_DOCUMENTOS, thread_name_prefix="documentos")
+
+#Descargas de PDF simultáneas por página; siguen en segundo plano mientras se navega a la próxima causa
+MAX_DESCARGAS_PARALELAS = 4
+
+#Ejecuta una función bloqueante en los hilos de documentos con el contexto de registro actual
+async def en_hilo_documentos(funcion, *args):
+    contexto = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(EJECUTOR_DOCUMENTOS, contexto.run, funcion, *args)
+
+#Peticiones simultáneas al cargar el historial de todos los cuadernos de una causa
+MAX_CUADERNOS_PARALELOS = 4
+
+#Especificación declarativa de cada pestaña de Mis Causas. ControladorLupa recorre
+#cualquier pestaña solo con estos datos:
+#   lupa_selector / modal_selector / modal_title / table_selector: tabla de causas y modal
+#   columna_caratulado / columna_corte: columnas (td) de la fila de la causa
+#   panel_selector / identificador: panel de la causa y campo que la identifica (libro, rol o rit)
+#   pestana_movimientos: pestaña del modal que se activa antes de leer los movimientos
+#   cuaderno_selector: dropdown de cuadernos (None si la pestaña no tiene cuadernos)
+#   tabla_movimientos / columna_folio / columna_fecha: tabla de movimientos; si columna_fecha
+#       es None se busca por el encabezado (encabezados_fecha)
+#   documentos: formularios con el token del PDF; url None = usar el action del formulario
+#   nombre_pdf / limites / separador_identificador: nombre final del PDF
+#   escritos: tabla adicional de escritos por resolver (solo Civil)
+#   pagina_propia: la pestaña se recorre en una página recién cargada, que no pasó por otras pestañas
+ESPECIFICACIONES_PESTANAS = {
+    "Corte Suprema": {
+        'lupa_selector': "#dtaTableDetalleMisCauSup tbody tr td a[href*='modalDetalleMisCauSuprema']",
+        'modal_selector': "#modalDetalleMisCauSuprema",
+        'modal_title': "Detalle Causa",
+        'table_selector': ".modal-content table.table-bordered",
+        'expected_headers': ['Folio', 'Tipo', 'Descripción', 'Fecha', 'Documento'],
+        'columna_caratulado': 2,
+        'columna_corte': 5,
+        'panel_selector': "#modalDetalleMisCauSuprema .modal-body .panel.panel-default",
+        'identificador': 'libro',
+        'separador_identificador': "",
+        'pestana_movimientos': None,
+        'cuaderno_selector': None,
+        'tabla_movimientos': "#modalDetalleMisCauSuprema table.table-bordered",
+        'columna_folio': 0,
+        'columna_fecha': 4,
+        'folio_numerico': True,
+        'documentos': [
+            {'form': "form[name='frmPdf']", 'input': 'valorFile',
+             'url': f"{BASE_URL_DOCUMENTOS}/suprema/documentos/docCausaSuprema.php?valorFile="},
+        ],
+        'nombre_pdf': "{fecha} {identificador} {resumen}",
+        'limites': {},
+        'fecha_objetivo': None,
+    },
+    "Corte Apelaciones": {
+        'lupa_selector': "#dtaTableDetalleMisCauApe a[href*='modalDetalleMisCauApelaciones']",
+        'modal_selector': "#modalDetalleMisCauApelaciones",
+        'modal_title': "Detalle Causa",
+        'table_selector': ".modal-content table.table-bordered",
+        'expected_headers': ['Folio', 'Doc.', 'Anexo', 'Trámite', 'Descripción', 'Fecha', 'Sala', 'Estado', 'Georeferencia'],
+        'columna_caratulado': 3,
+        'columna_corte': 2,
+        'panel_selector': "#modalDetalleMisCauApelaciones .modal-body .panel.panel-default",
+        'identificador': 'libro',
+        'separador_identificador': "",
+        'pestana_movimientos': "#movimientosApe",
+        'cuaderno_selector': None,
+        'tabla_movimientos': "#modalDetalleMisCauApelaciones #movimientosApe table.table-bordered",
+        'columna_folio': 0,
+        'columna_fecha': 5,
+        'documentos': [
+            {'form': "form[name='frmDoc']", 'input': 'valorDoc',
+             'url': f"{BASE_URL_DOCUMENTOS}/apelaciones/documentos/docCausaApelaciones.php?valorDoc="},
+        ],
+        'nombre_pdf': "{fecha} {identificador} {resumen}",
+        'limites': {},
+        'fecha_objetivo': None,
+        # En una página que ya recorrió otras pestañas el modal de la causa queda inactivo
+        'pagina_propia': True,
+    },
+    "Civil": {
+        'lupa_selector': "#dtaTableDetalleMisCauCiv a[href*='modalAnexoCausaCivil']",
+        'modal_selector': "#modalDetalleMisCauCivil",
+        'modal_title': "Detalle Causa",
+        'table_selector': ".modal-content table.table-bordered",
+        'expected_headers': ['Folio', 'Doc.', 'Anexo', 'Etapa', 'Trámite', 'Desc. Trámite', 'Fec. Trámite', 'Foja', 'Georeferencia'],
+        'columna_caratulado': 3,
+        'columna_corte': None,
+        'panel_selector': "#modalDetalleMisCauCivil .modal-body .panel.panel-default",
+        'identificador': 'rol',
+        'separador_identificador': " ",
+        'pestana_movimientos': "#historiaCiv",
+        'cuaderno_selector': "#selCuaderno",
+        'tabla_movimientos': "#historiaCiv table.table-bordered",
+        'columna_folio': 0,
+        'columna_fecha': 6,
+        'documentos': [
+            {'form': "form", 'input': 'dtaDoc',
+             'url': f"{BASE_URL_DOCUMENTOS}/civil/documentos/docuN.php?dtaDoc=",
+             'url_por_action': {'docuS.php': f"{BASE_URL_DOCUMENTOS}/civil/documentos/docuS.php?dtaDoc="}},
+            {'form': "form", 'input': 'dtaCert', 'sufijo': "_cert",
+             'url': f"{BASE_URL_DOCUMENTOS}/civil/documentos/docCertificadoEscrito.php?dtaCert="},
+        ],
+        'nombre_pdf': "{fecha} {folio} {identificador}{sufijo} {resumen}",
+        'limites': {},
+        'fecha_objetivo': None,
+        'escritos': {
+            'pestana': "#escritosCiv",
+            'tabla': "#escritosCiv table.table-bordered",
+            'columna_fecha': 2,
+            'columna_tipo': 3,
+            'documentos': [
+                {'form': "form[name='formAneEsc']", 'input': 'dtaDoc',
+                 'url': f"{BASE_URL_DOCUMENTOS}/civil/documentos/docuN.php?dtaDoc="},
+            ],
+            'nombre_pdf': "{fecha} {identificador} {resumen}",
+            'fecha_objetivo': None,
+        },
+    },
+    "Laboral": {
+        'lupa_selector': "#dtaTableDetalleMisCauLab a[href*='modalAnexoCausaLaboral']",
+        'modal_selector': "#modalDetalleMisCauLaboral",
+        'modal_title': "Detalle Causa",
+        'table_selector': ".modal-content table.table-bordered",
+        'columna_caratulado': 3,
+        'columna_corte': None,
+        'panel_selector': "#modalDetalleMisCauLaboral .modal-body .panel.panel-default",
+        'identificador': 'rit',
+        'separador_identificador': " ",
+        'pestana_movimientos': "#historiaLab",
+        'cuaderno_selector': "#selCuadernoLab",
+        'tabla_movimientos': "#historiaLab table.table-bordered",
+        'columna_folio': 0,
+        'columna_fecha': None,
+        'documentos': [
+            {'form': "form", 'input': 'dtaDoc', 'url': None},
+        ],
+        'nombre_pdf': "{fecha} {folio} {identificador} {resumen}",
+        'limites': {'folio': 10, 'identificador': 20, 'resumen': 40},
+        'fecha_objetivo': None,
+    },
+    "Penal": {
+        'lupa_selector': "#dtaTableDetalleMisCauPen a[href*='modalAnexoCausaPenal']",
+        'modal_selector': "#modalDetalleMisCauPenal",
+        'modal_title': "Detalle Causa",
+        'table_selector': ".modal-content table.table-bordered",
+        'columna_caratulado': 3,
+        'columna_corte': None,
+        'panel_selector': "#modalDetalleMisCauPenal .modal-body .panel.panel-default",
+        'identificador': 'rit',
+        'separador_identificador': " ",
+        'pestana_movimientos': "#historiaPen",
+        'cuaderno_selector': None,
+        'tabla_movimientos': "#historiaPen table.table-bordered",
+        'columna_folio': 0,
+        'columna_fecha': None,
+        'documentos': [
+            {'form': "form", 'input': 'dtaDoc', 'url': None},
+        ],
+        'nombre_pdf': "{fecha} {folio} {identificador} {resumen}",
+        'limites': {'folio': 10, 'identificador': 20, 'resumen': 40},
+        'fecha_objetivo': None,
+    },
+    "Cobranza": {
+        'lupa_selector': "#dtaTableDetalleMisCauCob a[href*='modalAnexoCausaCobranza']",
+        'modal_selector': "#modalDetalleMisCauCobranza",
+        'modal_title': "Detalle Causa",
+        'table_selector': ".modal-content table.table-bordered",
+        'expected_headers': ['Folio', 'Doc.', 'Anexo', 'Etapa', 'Trámite', 'Desc. Trámite', 'Estado Firma', 'Fec. Trámite', 'Georeferencia'],
+        'columna_caratulado': 3,
+        'columna_corte': None,
+        'panel_selector': "#modalDetalleMisCauCobranza .modal-body .panel.panel-default",
+        'identificador': 'rit',
+        'separador_identificador': " ",
+        'pestana_movimientos': None,
+        'cuaderno_selector': "#selCuadernoCob",
+        'tabla_movimientos': "#historiaCob table.table-bordered",
+        'columna_folio': 0,
+        'columna_fecha': 7,
+        'documentos': [
+            {'form': "form[name='frmDocH']", 'input': 'dtaDoc',
+             'url': f"{BASE_URL_DOCUMENTOS}/cobranza/documentos/docuCobranza.php?dtaDoc="},
+        ],
+        'nombre_pdf': "{fecha} {folio} {identificador} {resumen}",
+        'limites': {'folio': 10, 'identificador': 20, 'resumen': 40},
+        'fecha_objetivo': None,
+    },
+    "Familia": {
+        'lupa_selector': "#dtaTableDetalleMisCauFam a[href*='modalAnexoCausaFamilia']",
+        'modal_selector': "#modalDetalleMisCauFamilia",
+        'modal_title': "Detalle Causa",
+        'table_selector': ".modal-content table.table-bordered",
+        'columna_caratulado': 3,
+        'columna_corte': None,
+        'panel_selector': "#modalDetalleMisCauFamilia .modal-body .panel.panel-default",
+        'identificador': 'rit',
+        'separador_identificador': " ",
+        'pestana_movimientos': "#historiaFam",
+        'cuaderno_selector': "#selCuadernoFam",
+        'tabla_movimientos': "#historiaFam table.table-bordered",
+        'columna_folio': 0,
+        'columna_fecha': None,
+        'documentos': [
+            {'form': "form", 'input': 'dtaDoc', 'url': None},
+        ],
+        'nombre_pdf': "{fecha} {folio} {identificador} {resumen}",
+        'limites': {'folio': 10, 'identificador': 20, 'resumen': 40},
+        'fecha_objetivo': None,
+    },
+    "Disciplinario": {
+        'lupa_selector': "#dtaTableDetalleMisCauDis a[href*='modalDetalleMisCauDisciplinario']",
+        'modal_selector': "#modalDetalleMisCauDisciplinario",
+        'modal_title': "Detalle Causa",
+        'table_selector': ".modal-content table.table-bordered",
+        'columna_caratulado': 3,
+        'columna_corte': 2,
+        'panel_selector': "#modalDetalleMisCauDisciplinario .modal-body .panel.panel-default",
+        'identificador': 'rol',
+        'separador_identificador': " ",
+        'pestana_movimientos': None,
+        'cuaderno_selector': None,
+        'tabla_movimientos': "#modalDetalleMisCauDisciplinario table.table-bordered",
+        'columna_folio': 0,
+        'columna_fecha': None,
+        'documentos': [
+            {'form': "form", 'input': 'valorDoc', 'url': None},
+            {'form': "form", 'input': 'dtaDoc', 'url': None},
+        ],
+        'nombre_pdf': "{fecha} {identificador} {resumen}",
+        'limites': {},
+        'fecha_objetivo': None,
+    },
+}
+
+#Encabezados usados para ubicar la columna de fecha cuando la especificación no la fija
+ENCABEZADOS_FECHA = ("Fec. Trámite", "Fecha Trámite", "Fecha Ingreso", "Fecha")
+
+#Etiquetas del panel de la causa que se extraen para cada movimiento
+ETIQUETAS_PANEL = {
+    'libro': "libro",
+    'rol': "rol:",
+    'rit': "rit",
+    'tribunal': "tribunal:",
+    'fecha': "fecha",
+    'estado': "estado",
+}
+
+#Nombre con que se muestra cada campo del panel en el detalle de la causa del correo
+NOMBRES_DETALLE_CAUSA = {
+    'libro': "Libro",
+    'rol': "ROL",
+    'rit': "RIT",
+    'tribunal': "Tribunal",
+    'fecha': "Fecha",
+    'estado': "Estado",
+}
+
+#Capturas del panel de la causa: solo si se piden (PJUD_CAPTURA_PANEL=1), cacheadas por hash del HTML
+CAPTURA_PANEL = os.getenv("PJUD_CAPTURA_PANEL", "0") == "1"
+CAPTURAS_PANEL_DIR = Path(__file__).parent / "capturas_panel"
+
+#Convierte filas de una tabla (del DOM o de un HTML parseado) en celdas y formularios de documentos
+JS_FILAS_A_DATOS = """
+    (filas, documentos, encabezadosFecha) => {
+        let columnaFechaEncabezado = -1;
+        if (filas.length) {
+            const tabla = filas[0].closest('table');
+            const encabezados = tabla ? Array.from(tabla.querySelectorAll('th')).map(th => th.textContent.trim()) : [];
+            columnaFechaEncabezado = encabezados.findIndex(texto => encabezadosFecha.includes(texto));
+        }
+        return {
+            columnaFechaEncabezado,
+            filas: filas.map(fila => {
+                const celdas = Array.from(fila.querySelectorAll(':scope > td')).map(td => td.textContent.replace(/\\s+/g, ' ').trim());
+                const docs = [];
+                fila.querySelectorAll('form').forEach(form => {
+                    for (let i = 0; i < documentos.length; i++) {
+                        if (!form.matches(documentos[i].form)) continue;
+                        const input = form.querySelector(`input[name='${documentos[i].input}']`);
+                        if (!input) continue;
+                        docs.push({
+                            tipo: i,
+                            token: input.getAttribute('value'),
+                            action: form.getAttribute('action') || '',
+                            action_absoluta: form.getAttribute('action') ? new URL(form.getAttribute('action'), document.baseURI).href : ''
+                        });
+                        break;
+                    }
+                });
+                return {celdas, documentos: docs};
+            })
+        };
+    }
+"""
+
+#Lee en una sola llamada las filas de una tabla de la página
+JS_LEER_FILAS = """
+    ([filasSelector, documentos, encabezadosFecha]) => (""" + JS_FILAS_A_DATOS + """)(
+        Array.from(document.querySelectorAll(filasSelector)), documentos, encabezadosFecha)
+"""
+
+#Repite en paralelo, dentro del navegador, las peticiones que carga cada cuaderno y lee sus tablas
+JS_REPLICAR_PETICIONES = """
+    async ([peticiones, tablas, encabezadosFecha, limite]) => {
+        const filasADatos = """ + JS_FILAS_A_DATOS + """;
+        const resultados = new Array(peticiones.length).fill(null);
+        let siguiente = 0;
+        const trabajador = async () => {
+            while (siguiente < peticiones.length) {
+                const i = siguiente++;
+                const peticion = peticiones[i];
+                try {
+                    const respuesta = await fetch(peticion.url, {
+                        method: peticion.method,
+                        body: peticion.body,
+                        headers: peticion.headers,
+                        credentials: 'include'
+                    });
+                    if (!respuesta.ok) continue;
+                    const html = await respuesta.text();
+                    const raiz = new DOMParser().parseFromString(html, 'text/html');
+                    const porTabla = {};
+                    for (const [nombre, tabla] of Object.entries(tablas)) {
+                        let filas = Array.from(raiz.querySelectorAll(tabla.filas));
+                        if (!filas.length) filas = Array.from(raiz.querySelectorAll('tbody tr'));
+                        porTabla[nombre] = filasADatos(filas, tabla.documentos, encabezadosFecha);
+                    }
+                    resultados[i] = porTabla;
+                } catch (e) {
+                    resultados[i] = null;
+                }
+            }
+        };
+        await Promise.all(Array.from({length: Math.min(limite, peticiones.length)}, trabajador));
+        return resultados;
+    }
+"""
+
+#Plantilla de una petición xhr del cambio de cuaderno: los parámetros con el valor del cuaderno se reemplazan
+def plantilla_peticion_cuaderno(request, valor_cuaderno):
+    try:
+        post_data = request.post_data or ""
+    except Exception:
+        return None
+    cuerpo = parse_qsl(post_data, keep_blank_values=True)
+    consulta = parse_qsl(urlsplit(request.url).query, keep_blank_values=True)
+    if not any(v == valor_cuaderno for _, v in cuerpo + consulta):
+        return None
+    headers = {k: v for k, v in request.headers.items() if k.lower() in ('content-type', 'x-requested-with')}
+    return {
+        'url': request.url,
+        'method': request.method,
+        'cuerpo': cuerpo,
+        'consulta': consulta,
+        'headers': headers,
+        'valor': valor_cuaderno,
+    }
+
+#Arma la petición de un cuaderno a partir de la plantilla
+def armar_peticion_cuaderno(plantilla, valor_cuaderno):
+    def reemplazar(pares):
+        return urlencode([(k, valor_cuaderno if v == plantilla['valor'] else v) for k, v in pares])
+    url = plantilla['url']
+    if plantilla['consulta']:
+        url = urlunsplit(urlsplit(url)._replace(query=reemplazar(plantilla['consulta'])))
+    return {
+        'url': url,
+        'method': plantilla['method'],
+        'body': reemplazar(plantilla['cuerpo']) if plantilla['cuerpo'] else None,
+        'headers': plantilla['headers'],
+    }
+
+#Lupa se refiere a el icon de lupa para abrir cada causa
+#ControladorLupa recorre cualquier pestaña de Mis Causas a partir de ESPECIFICACIONES_PESTANAS
 class ControladorLupa:
-    def __init__(self, page):
+    def __init__(self, page, tab_name):
         self.page = page
+        self.tab_name = tab_name
         self.config = self.obtener_config()
-    
+        # Movimientos cuyos documentos se descargan mientras se navega; manejar() los espera al terminar
+        self.tareas_documentos = []
+        self.descargas = asyncio.Semaphore(MAX_DESCARGAS_PARALELAS)
+        # False si alguna causa quedó sin procesar: la pestaña no se marca terminada en el punto de control
+        self.completa = True
+        self.error_causa = False
+        # Causas revisadas en la pestaña, para MAX_CAUSAS_POR_PESTANA
+        self.causas_revisadas = 0
+
     def obtener_config(self):
-        raise NotImplementedError
+        return ESPECIFICACIONES_PESTANAS[self.tab_name]
 
-    def _obtener_lupas(self):
-        print("  Buscando todas las lupas en la tabla...")
-        lupas = self.page.query_selector_all(self.config['lupa_selector'])
-        print(f"  Se encontraron {len(lupas)} lupas.")
+    async def _obtener_lupas(self):
+        log.debug("Buscando todas las lupas en la tabla...")
+        lupas = await self.page.query_selector_all(self.config['lupa_selector'])
+        log.debug("Se encontraron %s lupas.", len(lupas))
         return lupas
 
-    def manejar(self, tab_name):
+    #Lee en una sola llamada las celdas de la fila de cada lupa
+    async def _leer_filas_causas(self, lupas):
+        return await self.page.evaluate("""
+            (lupas) => lupas.map(lupa => {
+                const fila = lupa.closest('tr');
+                return fila ? Array.from(fila.querySelectorAll(':scope > td')).map(td => td.innerText.trim()) : [];
+            })
+        """, lupas)
+
+    #Identifica la causa de una fila de la tabla para el punto de control
+    def _clave_causa(self, celdas):
+        return hashlib.sha1("|".join(celdas).encode("utf-8")).hexdigest()[:16]
+
+    def _limite_alcanzado(self):
+        return MAX_CAUSAS_POR_PESTANA is not None and self.causas_revisadas >= MAX_CAUSAS_POR_PESTANA
+
+    async def manejar(self, tab_name=None):
+        tab_name = tab_name or self.tab_name
         try:
-            print(f"  Procesando lupa tipo '{self.__class__.__name__}' en pestaña '{tab_name}'...")
-            for pagina in manejar_paginacion(self.page, tab_name):
-                
-                lupas = self._obtener_lupas()
-                if not lupas:
-                    print("  No se encontraron lupas en la pestaña.")
-                    return False
-                
-                for idx, lupa_link in enumerate(lupas):
-                    try:
-                        fila = lupa_link.evaluate_handle('el => el.closest("tr")')
-                        tds = fila.query_selector_all('td')
-                        if len(tds) < 4:
+            log.info(f"Procesando lupas de la pestaña '{tab_name}'...")
+            columna_caratulado = self.config['columna_caratulado']
+            columna_corte = self.config.get('columna_corte')
+            async for pagina in manejar_paginacion(self.page, tab_name, pagina_vigente=lambda: self.page):
+                if PUNTO_CONTROL.pagina_completa(tab_name, pagina):
+                    log.info(f"Página {pagina} ya procesada en la ejecución anterior")
+                    continue
+                with TRAZADOR.span(f"página {pagina}", "pagina", pestana=tab_name):
+
+                    lupas = await self._obtener_lupas()
+                    if not lupas:
+                        log.warning("No se encontraron lupas en la pestaña.")
+                        return False
+                    filas_causas = await self._leer_filas_causas(lupas)
+                    causas_pagina = []
+                    errores_pagina = False
+                    pagina_parcial = False
+
+                    for idx, celdas in enumerate(filas_causas):
+                        # La página queda a medias: no se marca terminada en el punto de control
+                        if self._limite_alcanzado():
+                            pagina_parcial = True
+                            break
+                        try:
+                            if len(celdas) <= max(columna_caratulado, columna_corte or 0):
+                                continue
+                            clave_causa = self._clave_causa(celdas)
+                            if PUNTO_CONTROL.causa_completa(tab_name, clave_causa):
+                                log.debug("Causa %s ya procesada en la ejecución anterior", idx+1)
+                                continue
+
+                            # Entre dos causas: si la página acumuló demasiada memoria se reemplaza
+                            if await VIGILANTE_MEMORIA.requiere_reciclaje(self.page):
+                                lupas = await self._reciclar_pagina(tab_name, pagina, filas_causas) or lupas
+                            lupa_link = lupas[idx]
+                            caratulado = celdas[columna_caratulado]
+                            corte = celdas[columna_corte].replace("Corte:", "").strip() if columna_corte is not None else None
+                            if corte:
+                                log.debug("Corte: %s", corte)
+                            log.debug("Procesando lupa %s de %s (caratulado: %s)", idx+1, len(lupas), caratulado)
+
+                            PUNTO_CONTROL.marcar_posicion(tab_name, pagina=pagina, causa=caratulado, cuaderno=None)
+                            self.causas_revisadas += 1
+                            with TRAZADOR.span(caratulado, "causa", pestana=tab_name), contexto_registro(causa=caratulado):
+                                inicio_tareas = len(self.tareas_documentos)
+                                self.error_causa = False
+                                await lupa_link.scroll_into_view_if_needed()
+                                await random_sleep(0.5, 1)
+                                await lupa_link.click()
+                                await random_sleep(1, 2)
+                                await self._verificar_modal()
+                                await self._verificar_tabla()
+                                movimientos_nuevos = await self._procesar_contenido(tab_name, caratulado, corte)
+                                await self._cerrar_modal()
+                            if self.error_causa:
+                                # La causa se vuelve a revisar completa en la próxima ejecución
+                                errores_pagina = True
+                            else:
+                                causas_pagina.append(self._en_segundo_plano(self._completar_causa(
+                                    tab_name, clave_causa, self.tareas_documentos[inicio_tareas:])))
+
+                        except Exception as e:
+                            log.error(f"Error procesando la lupa {idx+1}: {str(e)}")
+                            errores_pagina = True
+                            await self._manejar_error(e)
+                            await self._cerrar_modal()
                             continue
-                        # Usar la columna 4 (índice 3) para el caratulado
-                        caratulado = tds[3].inner_text().strip()
-                        print(f"  Procesando lupa {idx+1} de {len(lupas)} (caratulado: {caratulado})")
-                        
-                        lupa_link.scroll_into_view_if_needed()
-                        random_sleep(0.5, 1)
-                        lupa_link.click()
-                        random_sleep(1, 2)
-                        self._verificar_modal()
-                        self._verificar_tabla()
-                        movimientos_nuevos = self._procesar_contenido(tab_name, caratulado)
-                        self._cambiar_pestana_modal(caratulado, tab_name)
-                        self._cerrar_modal()
-                        
-                        #break para procesar solo la primera lupa 
-                        break
-                        
-                    except Exception as e:
-                        print(f"  Error procesando la lupa {idx+1}: {str(e)}")
-                        self._manejar_error(e)
-                        self._cerrar_modal()
-                        continue
+
+                    if errores_pagina:
+                        self.completa = False
+                    elif not pagina_parcial:
+                        self._en_segundo_plano(self._completar_pagina(tab_name, pagina, causas_pagina))
+                # Se corta antes de pasar a la página siguiente
+                if self._limite_alcanzado():
+                    log.info(f"Límite de {MAX_CAUSAS_POR_PESTANA} causas alcanzado en '{tab_name}'")
+                    break
+            await self._esperar_documentos()
+            if self.completa:
+                PUNTO_CONTROL.completar_pestana(tab_name)
             return True
         except Exception as e:
-            self._manejar_error(e)
+            await self._manejar_error(e)
             return False
-    
-    def _manejar_error(self, e):
+        finally:
+            await self._esperar_documentos()
+
+    #Reemplaza la página por una nueva del mismo contexto (misma sesión) en la misma pestaña y
+    #página de resultados. Retorna las lupas de la página nueva, o None si se mantiene la anterior
+    async def _reciclar_pagina(self, tab_name, pagina, filas_causas):
+        anterior = self.page
+        with TRAZADOR.span("reciclaje de página", "reciclaje", pestana=tab_name, pagina=pagina):
+            # Las descargas en curso usan la página anterior
+            await asyncio.gather(*self.tareas_documentos)
+            nueva = await anterior.context.new_page()
+            try:
+                await nueva.goto(anterior.url)
+                if not await navigate_to_mis_causas(nueva) or not await abrir_pestana(nueva, tab_name):
+                    raise RuntimeError("no se pudo volver a la pestaña")
+                await random_sleep(2, 4)
+                if not await ir_a_pagina(nueva, pagina):
+                    raise RuntimeError(f"no se pudo volver a la página {pagina}")
+                self.page = nueva
+                lupas = await self._obtener_lupas()
+                if await self._leer_filas_causas(lupas) != filas_causas:
+                    raise RuntimeError("la tabla de causas no coincide con la de la página anterior")
+            except Exception as e:
+                log.warning(f"No se pudo reciclar la página, se mantiene la actual: {str(e)}")
+                self.page = anterior
+                await nueva.close()
+                return None
+        VIGILANTE_MEMORIA.registrar_reemplazo(anterior, nueva)
+        await anterior.close()
+        log.info(f"Página reciclada en '{tab_name}', página {pagina} ({VIGILANTE_MEMORIA.reciclajes} en la ejecución)")
+        return lupas
+
+    #Marca la causa como terminada cuando sus movimientos quedaron registrados (corre en segundo plano)
+    async def _completar_causa(self, tab_name, clave_causa, tareas):
+        movimientos = await asyncio.gather(*tareas)
+        if any(movimiento is None for movimiento in movimientos):
+            self.completa = False
+            return False
+        PUNTO_CONTROL.completar_causa(tab_name, clave_causa, movimientos)
+        return True
+
+    #Marca la página como terminada cuando todas sus causas lo están
+    async def _completar_pagina(self, tab_name, pagina, causas):
+        if all(await asyncio.gather(*causas)):
+            PUNTO_CONTROL.completar_pagina(tab_name, pagina)
+
+    #Descarga los documentos del movimiento en segundo plano; la tarea hereda el contexto de registro
+    def _en_segundo_plano(self, corrutina):
+        tarea = asyncio.create_task(corrutina)
+        self.tareas_documentos.append(tarea)
+        return tarea
+
+    #Espera las descargas pendientes y agrega los movimientos en el orden en que se encontraron
+    async def _esperar_documentos(self):
+        tareas, self.tareas_documentos = self.tareas_documentos, []
+        if not tareas:
+            return
+        log.info(f"Esperando {len(tareas)} movimientos con documentos pendientes...")
+        for movimiento_pjud in await asyncio.gather(*tareas):
+            # Las tareas del punto de control no retornan movimientos
+            if not isinstance(movimiento_pjud, MovimientoPJUD):
+                continue
+            if agregar_movimiento_sin_duplicar(movimiento_pjud):
+                log.debug("Movimiento agregado exitosamente al diccionario global")
+            else:
+                log.debug("El movimiento ya existía en el diccionario global")
+
+    async def _manejar_error(self, e):
         """Maneja errores durante el procesamiento"""
-        print(f"  Error: {str(e)}")
+        log.error(f"Error: {str(e)}")
         # Asegurarse de cerrar los modales si hay un error
         try:
-            self._cerrar_ambos_modales()
+            await self._cerrar_ambos_modales()
         except Exception as close_error:
-            print(f"  Error adicional al intentar cerrar modales: {str(close_error)}")
+            log.error(f"Error adicional al intentar cerrar modales: {str(close_error)}")
     
-    def _cerrar_modal(self):
+    async def _cerrar_modal(self):
         try:
-            print("  Cerrando modal principal...")
+            log.debug("Cerrando modal principal...")
             # Intentar cerrar usando el botón de cerrar del modal
-            close_button = self.page.query_selector(f"{self.config['modal_selector']} .close, {self.config['modal_selector']} button[data-dismiss='modal']")
+            close_button = await self.page.query_selector(f"{self.config['modal_selector']} .close, {self.config['modal_selector']} button[data-dismiss='modal']")
             if close_button:
-                close_button.click()
+                await close_button.click()
                 # Esperar a que el modal desaparezca realmente
-                self.page.wait_for_selector(self.config['modal_selector'], state='hidden', timeout=5000)
+                await self.page.wait_for_selector(self.config['modal_selector'], state='hidden', timeout=5000)
             else:
                 # Si no hay botón, usar el método antiguo como fallback
-                self._cerrar_ambos_modales()
-                self.page.wait_for_selector(self.config['modal_selector'], state='hidden', timeout=5000)
+                await self._cerrar_ambos_modales()
+                await self.page.wait_for_selector(self.config['modal_selector'], state='hidden', timeout=5000)
         except Exception as e:
-            print(f"  Error al cerrar modal: {str(e)}")
+            log.error(f"Error al cerrar modal: {str(e)}")
     
-    def _verificar_modal(self):
-        print(f"  Esperando que el modal esté visible...")
-        self.page.wait_for_selector(self.config['modal_selector'], timeout=10000)
-        random_sleep(1, 2)
+    async def _verificar_modal(self):
+        log.debug("Esperando que el modal esté visible...")
+        await self.page.wait_for_selector(self.config['modal_selector'], timeout=10000)
+        await random_sleep(1, 2)
         
-        modal_visible = self.page.evaluate(f"""
+        modal_visible = await self.page.evaluate(f"""
             () => {{
                 const modal = document.querySelector('{self.config['modal_selector']}');
                 if (!modal) return false;
@@ -578,182 +1722,568 @@ class ControladorLupa:
         """)
         
         if not modal_visible:
-            print(f"  Modal no está visible o no tiene el título esperado")
+            log.warning(f"Modal no está visible o no tiene el título esperado")
             return False
             
-        print(f"  Modal encontrado y verificado")
+        log.debug("Modal encontrado y verificado")
         return True
     
-    def _verificar_tabla(self):
+    async def _verificar_tabla(self):
         if not self.config.get('table_selector'):
             return True
             
         try:
-            self.page.wait_for_selector(self.config['table_selector'], timeout=10000)
+            await self.page.wait_for_selector(self.config['table_selector'], timeout=10000)
             
             if self.config.get('expected_headers'):
-                table_structure = self.page.evaluate(f"""
+                table_structure = await self.page.evaluate(f"""
                     () => {{
                         const table = document.querySelector('{self.config['table_selector']}');
                         if (!table) return false;
                         
                         const headers = Array.from(table.querySelectorAll('th')).map(th => th.textContent.trim());
-                        const expectedHeaders = {self.config['expected_headers']};
-                        
                         const rows = table.querySelectorAll('tbody tr');
                         return headers.length > 0 && rows.length > 0;
                     }}
                 """)
                 
                 if not table_structure:
-                    print(f"  Tabla encontrada pero no tiene la estructura esperada")
+                    log.warning(f"Tabla encontrada pero no tiene la estructura esperada")
                     return False
                     
-                print(f"  Tabla encontrada y verificada")
+                log.debug("Tabla encontrada y verificada")
             return True
         except Exception as table_error:
-            print(f"  Error esperando la tabla: {str(table_error)}")
+            log.error(f"Error esperando la tabla: {str(table_error)}")
             return False
     
-    def _procesar_contenido(self, tab_name, caratulado):
+    #Verifica que el modal tenga contenido y activa la pestaña de movimientos si corresponde
+    async def _preparar_modal(self):
+        modal_usable = await self.page.evaluate("""
+            (selector) => {
+                const modal = document.querySelector(selector);
+                return !!modal && modal.querySelectorAll('table').length > 0;
+            }
+        """, self.config['modal_selector'])
+        if not modal_usable:
+            log.warning("El modal parece estar en estado bloqueado o incompleto.")
+            return False
+        if self.config.get('pestana_movimientos'):
+            await self._activar_pestana(self.config['pestana_movimientos'])
+        return True
+
+    #Activa una pestaña interna del modal (por ejemplo #movimientosApe o #escritosCiv)
+    async def _activar_pestana(self, pestana):
+        activada = await self.page.evaluate("""
+            ([modalSelector, pestana]) => {
+                const panel = document.querySelector(`${modalSelector} ${pestana}`) || document.querySelector(pestana);
+                if (panel && panel.classList.contains('active')) return 'activa';
+                const tabLink = document.querySelector(`a[href="${pestana}"]`);
+                if (tabLink) {
+                    tabLink.click();
+                    return 'click';
+                }
+                return null;
+            }
+        """, [self.config['modal_selector'], pestana])
+        if activada == 'click':
+            await random_sleep(1, 2)
+        elif not activada:
+            log.warning(f"No se pudo activar la pestaña {pestana}")
+        return bool(activada)
+
+    #Extrae Libro/ROL/RIT, Tribunal, Fecha y Estado del panel de la causa en una sola llamada.
+    #'detalle' guarda los valores sin etiqueta para mostrarlos como tabla en el correo
+    async def _leer_panel(self):
+        datos = {clave: None for clave in ETIQUETAS_PANEL}
+        datos['detalle'] = {}
         try:
-            print(f"[INFO] Verificando movimientos nuevos en pestaña '{tab_name}'...")
-            self.page.wait_for_selector("table.table-titulos", timeout=10000)
-            panel = self.page.query_selector("table.table-titulos")
-            numero_causa = None
-            if panel:
-                panel.scroll_into_view_if_needed()
-                random_sleep(1, 2)
+            await self.page.wait_for_selector(self.config['panel_selector'], state='attached', timeout=5000)
+            celdas = await self.page.evaluate("""
+                (selector) => {
+                    const panel = document.querySelector(selector);
+                    return panel ? Array.from(panel.querySelectorAll('td')).map(td => td.innerText.trim()) : [];
+                }
+            """, self.config['panel_selector'])
+        except Exception as e:
+            log.warning(f"No se encontró el panel de información: {str(e)}")
+            return datos
+        for clave, etiqueta in ETIQUETAS_PANEL.items():
+            candidatas = [c for c in celdas if c.lower().startswith(etiqueta)] or [c for c in celdas if etiqueta in c.lower()]
+            if candidatas:
+                datos[clave] = candidatas[0]
+        if datos['tribunal']:
+            datos['tribunal'] = datos['tribunal'].replace("Tribunal:", "").strip()
+        for clave, nombre in NOMBRES_DETALLE_CAUSA.items():
+            if datos[clave]:
+                datos['detalle'][nombre] = datos[clave].split(":", 1)[-1].strip()
+        identificador = datos.get(self.config['identificador'])
+        if identificador:
+            log.debug("Texto completo del %s extraído: %s", self.config['identificador'].upper(), identificador)
+        return datos
+
+    #Lee todas las filas de una tabla de movimientos con sus formularios de documentos
+    async def _leer_filas(self, tabla_selector, documentos, columna_fecha):
+        resultado = await self.page.evaluate(JS_LEER_FILAS, [f"{tabla_selector} tbody tr", documentos, list(ENCABEZADOS_FECHA)])
+        return self._normalizar_filas(resultado, columna_fecha, tabla_selector)
+
+    #Agrega la fecha de cada fila y descarta las que no tienen la columna de fecha
+    def _normalizar_filas(self, resultado, columna_fecha, tabla_selector):
+        if columna_fecha is None:
+            columna_fecha = resultado['columnaFechaEncabezado']
+            if columna_fecha < 0:
+                log.warning(f"No se encontró la columna de fecha en {tabla_selector}")
+                return []
+        filas = []
+        for fila in resultado['filas']:
+            celdas = fila['celdas']
+            if len(celdas) <= columna_fecha:
+                continue
+            fila['fecha'] = celdas[columna_fecha].split('(')[0].strip()
+            filas.append(fila)
+        return filas
+
+    #Tablas que cambian con el cuaderno seleccionado: movimientos y, si la pestaña los tiene, escritos
+    def _tablas_cuaderno(self):
+        tablas = {
+            'movimientos': {
+                'tabla': self.config['tabla_movimientos'],
+                'documentos': self.config['documentos'],
+                'columna_fecha': self.config.get('columna_fecha'),
+                'pestana': None,
+            },
+        }
+        escritos_spec = self.config.get('escritos')
+        if escritos_spec:
+            tablas['escritos'] = {
+                'tabla': escritos_spec['tabla'],
+                'documentos': escritos_spec['documentos'],
+                'columna_fecha': escritos_spec['columna_fecha'],
+                'pestana': escritos_spec['pestana'],
+            }
+        return tablas
+
+    #Lee las tablas del cuaderno seleccionado, activando la pestaña de cada una si hace falta
+    async def _leer_tablas(self, tablas):
+        resultado = {}
+        for nombre, tabla in tablas.items():
+            try:
+                if tabla['pestana']:
+                    if not await self._activar_pestana(tabla['pestana']):
+                        resultado[nombre] = []
+                        continue
+                    # Espera a que la tabla esté presente (aunque esté vacía)
+                    await self.page.wait_for_selector(f"{tabla['tabla']} tbody", timeout=5000, state="attached")
+                resultado[nombre] = await self._leer_filas(tabla['tabla'], tabla['documentos'], tabla['columna_fecha'])
+            except Exception as e:
+                log.warning(f"No se pudo leer la tabla {nombre}: {str(e)}")
+                resultado[nombre] = []
+        if any(tabla['pestana'] for tabla in tablas.values()) and self.config.get('pestana_movimientos'):
+            await self._activar_pestana(self.config['pestana_movimientos'])
+        return resultado
+
+    #Obtiene las tablas de todos los cuadernos. El primero se selecciona en el dropdown y las
+    #peticiones que dispara se repiten en paralelo para el resto; las tablas que no se puedan
+    #validar contra la página se leen cambiando de cuaderno uno a uno
+    async def _leer_tablas_cuadernos(self, opciones):
+        tablas = self._tablas_cuaderno()
+        primera = opciones[0]['texto']
+        log.info(f"Procesando cuaderno: {primera}")
+        peticiones = await self._seleccionar_cuaderno(primera, registrar_peticiones=True)
+        por_cuaderno = {primera: await self._leer_tablas(tablas)}
+        if len(opciones) == 1:
+            return por_cuaderno
+
+        paralelas = await self._replicar_peticiones_cuaderno(peticiones, opciones, tablas, por_cuaderno[primera])
+        for opcion in opciones[1:]:
+            por_cuaderno[opcion['texto']] = {nombre: filas[opcion['texto']] for nombre, filas in paralelas.items()}
+
+        pendientes = {nombre: tabla for nombre, tabla in tablas.items() if nombre not in paralelas}
+        if pendientes:
+            log.info(f"Leyendo cuaderno por cuaderno: {', '.join(pendientes)}")
+            for opcion in opciones[1:]:
+                texto = opcion['texto']
                 try:
-                    libro_td = panel.query_selector("td:has-text('libro')")
-                    if libro_td:
-                        libro_text = libro_td.inner_text()
-                        print(f"[INFO] Texto completo del libro extraído: {libro_text}")
-                        
-                        #Modificacion para nombre pdf
-                        libro_pdf = libro_text.replace(f"Libro :", "").strip().replace("/", "").replace("-", "") 
+                    log.info(f"Procesando cuaderno: {texto}")
+                    await self._seleccionar_cuaderno(texto)
+                    por_cuaderno[texto].update(await self._leer_tablas(pendientes))
+                except Exception as e:
+                    log.error(f"Error procesando cuaderno {texto}: {str(e)}")
+                    self.error_causa = True
+                    por_cuaderno[texto].update({nombre: [] for nombre in pendientes})
+        return por_cuaderno
+
+    #Repite las peticiones del cambio de cuaderno para todos los cuadernos a la vez. Devuelve
+    #{tabla: {cuaderno: filas}} solo para las tablas cuya respuesta coincide con la página
+    async def _replicar_peticiones_cuaderno(self, peticiones, opciones, tablas, tablas_primera):
+        plantillas = [plantilla for plantilla in (plantilla_peticion_cuaderno(p, opciones[0]['numero']) for p in peticiones) if plantilla]
+        if not plantillas:
+            log.info("No se identificó la petición del cambio de cuaderno")
+            return {}
+
+        lote = [armar_peticion_cuaderno(plantilla, opcion['numero']) for plantilla in plantillas for opcion in opciones]
+        tablas_js = {nombre: {'filas': f"{tabla['tabla']} tbody tr", 'documentos': tabla['documentos']} for nombre, tabla in tablas.items()}
+        try:
+            respuestas = await self.page.evaluate(JS_REPLICAR_PETICIONES, [lote, tablas_js, list(ENCABEZADOS_FECHA), MAX_CUADERNOS_PARALELOS])
+        except Exception as e:
+            log.warning(f"No se pudieron cargar los cuadernos en paralelo: {str(e)}")
+            return {}
 
-                        #modificacion para titulo correo
-                        libro_titulo = libro_text.replace(f"Libro :", "").strip().replace("/", "-")
+        paralelas = {}
+        for nombre, tabla in tablas.items():
+            esperadas = [fila['celdas'] for fila in tablas_primera[nombre]]
+            if not esperadas:
+                continue
+            for idx_plantilla in range(len(plantillas)):
+                respuestas_plantilla = respuestas[idx_plantilla * len(opciones):(idx_plantilla + 1) * len(opciones)]
+                if any(respuesta is None for respuesta in respuestas_plantilla):
+                    continue
+                filas = [self._normalizar_filas(respuesta[nombre], tabla['columna_fecha'], tabla['tabla']) for respuesta in respuestas_plantilla]
+                if [fila['celdas'] for fila in filas[0]] == esperadas:
+                    paralelas[nombre] = {opcion['texto']: filas_cuaderno for opcion, filas_cuaderno in zip(opciones, filas)}
+                    log.info(f"Tabla {nombre} de {len(opciones)} cuadernos cargada en paralelo")
+                    break
+        return paralelas
+
+    #Nombre del PDF a partir de la plantilla de la especificación, respetando los límites por campo
+    def _nombre_pdf(self, plantilla, partes, limites):
+        valores = {clave: limpiar_nombre_archivo(valor)[:limites.get(clave)] if limites.get(clave) else limpiar_nombre_archivo(valor)
+                   for clave, valor in partes.items()}
+        return plantilla.format(**valores).strip()
+
+    #Texto del identificador de la causa para el nombre del PDF
+    def _identificador_pdf(self, causa):
+        clave = self.config['identificador']
+        texto = causa.get(clave)
+        if not texto:
+            return f"sin {clave}"
+        separador = self.config.get('separador_identificador', " ")
+        return limpiar_identificador(texto).replace("/", separador).replace("-", separador)
+
+    #URL de descarga según el tipo de formulario encontrado en la fila
+    def _url_documento(self, doc, documentos):
+        spec = documentos[doc['tipo']]
+        url = spec.get('url')
+        for fragmento, url_alternativa in spec.get('url_por_action', {}).items():
+            if fragmento in doc['action']:
+                url = url_alternativa
+        if url is None:
+            base = doc['action_absoluta']
+            url = f"{base}{'&' if '?' in base else '?'}{spec['input']}="
+        return url + doc['token']
+
+    #Descarga los documentos de una fila; cada PDF pasa a los hilos de documentos (resumen y
+    #nombre final) apenas termina su descarga
+    async def _descargar_documentos(self, fila, documentos, carpeta, plantilla, partes, etiqueta):
+        docs = [doc for doc in fila['documentos'] if doc['token']]
+        if not docs:
+            log.warning(f"No hay PDF disponible para el movimiento {etiqueta}")
+            return []
+        log.info(f"Se encontraron {len(docs)} documentos para el folio {etiqueta}")
+        os.makedirs(carpeta, exist_ok=True)
+        limites = self.config.get('limites', {})
+
+        def finalizar(pdf_filename_tmp, partes_doc, doc_suffix):
+            with TRAZADOR.span(os.path.basename(pdf_filename_tmp), "resumen"):
+                partes_doc['resumen'] = extraer_resumen_pdf(pdf_filename_tmp)
+            pdf_filename = f"{carpeta}/{self._nombre_pdf(plantilla, partes_doc, limites)}{doc_suffix}.pdf"
+            return finalizar_pdf_descargado(pdf_filename_tmp, pdf_filename)
+
+        async def descargar(doc_idx, doc):
+            doc_suffix = f"_doc{doc_idx + 1}" if len(docs) > 1 else ""
+            partes_doc = dict(partes, sufijo=documentos[doc['tipo']].get('sufijo', ""), resumen="")
+            # Nombre temporal antes de tener el resumen
+            pdf_filename_tmp = f"{carpeta}/{self._nombre_pdf(plantilla, partes_doc, limites)}{doc_suffix}_temp.pdf"
+            async with self.descargas:
+                with TRAZADOR.span(os.path.basename(pdf_filename_tmp), "descarga"):
+                    descargado = await descargar_pdf_directo(self._url_documento(doc, documentos), pdf_filename_tmp, self.page)
+            if not descargado:
+                log.error(f"No se pudo descargar el PDF {doc_idx + 1} para folio {etiqueta}")
+                return None
+            TRAZADOR.contar("pdf_descargados")
+            return await en_hilo_documentos(finalizar, pdf_filename_tmp, partes_doc, doc_suffix)
+
+        pdf_paths = await asyncio.gather(*(descargar(doc_idx, doc) for doc_idx, doc in enumerate(docs)))
+        return [path for path in pdf_paths if path]
+
+    #Descarga los documentos del movimiento y retorna el MovimientoPJUD (None si falla)
+    async def _registrar_movimiento(self, fila, documentos, carpeta, plantilla, partes, etiqueta, span, datos_movimiento):
+        TRAZADOR.nuevo_carril()
+        try:
+            with TRAZADOR.span(etiqueta, "movimiento", **span):
+                pdf_paths = await self._descargar_documentos(fila, documentos, carpeta, plantilla, partes, etiqueta)
+            return MovimientoPJUD(pdf_paths=pdf_paths, **datos_movimiento)
+        except Exception as e:
+            log.error(f"Error procesando movimiento {etiqueta}: {str(e)}")
+            return None
 
-                    fecha_causa = panel.query_selector("td:has-text('Fecha')").inner_text().split(":")[1].strip()
-                except Exception as e:
-                    print(f"[WARN] No se pudo extraer toda la información del panel: {str(e)}")
+    #Captura el panel de la causa (solo con CAPTURA_PANEL). La imagen se guarda en
+    #CAPTURAS_PANEL_DIR con el hash del HTML del panel y se reutiliza mientras no cambie
+    async def _capturar_panel(self, detalle_panel_path):
+        if not CAPTURA_PANEL:
+            return
+        if os.path.exists(detalle_panel_path):
+            log.info(f"El archivo {detalle_panel_path} ya existe. No se generará nuevamente.")
+            return
+        try:
+            panel = await self.page.query_selector(self.config['panel_selector'])
+            if not panel:
+                log.warning("No se encontró el panel de información")
+                return
+            panel_html = await panel.evaluate("(element) => element.outerHTML")
+            captura_cache = CAPTURAS_PANEL_DIR / f"{hashlib.sha256(panel_html.encode('utf-8')).hexdigest()}.png"
+            if not captura_cache.exists():
+                CAPTURAS_PANEL_DIR.mkdir(parents=True, exist_ok=True)
+                await self.page.evaluate("(element) => element.scrollIntoView({ block: 'center' })", panel)
+                await random_sleep(1, 2)
+                await panel.screenshot(path=str(captura_cache), timeout=10000)
+            else:
+                log.info(f"Captura del panel reutilizada desde caché: {captura_cache.name}")
+            shutil.copyfile(captura_cache, detalle_panel_path)
+            log.info(f"Captura del panel de información guardada: {detalle_panel_path}")
+        except Exception as e:
+            log.warning(f"No se pudo tomar la captura del panel: {str(e)}")
+
+    async def _procesar_contenido(self, tab_name, caratulado, corte=None):
+        try:
+            log.info(f"Verificando movimientos nuevos en pestaña '{tab_name}'...")
+            if not await self._preparar_modal():
+                self.error_causa = True
+                return False
+
+            carpeta_caratulado = f"{tab_name.replace(' ', '_')}/{caratulado}"
+            if self.config.get('cuaderno_selector'):
+                opciones_cuaderno = await self._obtener_opciones_cuaderno()
+                if not opciones_cuaderno:
+                    log.warning("No se pudieron obtener las opciones del cuaderno")
+                    self.error_causa = True
+                    return False
+                with TRAZADOR.span("carga de cuadernos", "carga_cuadernos", pestana=tab_name, cuadernos=len(opciones_cuaderno)):
+                    tablas_por_cuaderno = await self._leer_tablas_cuadernos(opciones_cuaderno)
             else:
-                print("[WARN] No se encontró el panel de información")
-            self.page.wait_for_selector("table.table-bordered", timeout=10000)
-            movimientos = self.page.query_selector_all("table.table-bordered tbody tr")
-            print(f"[INFO] Se encontraron {len(movimientos)} movimientos")
+                opciones_cuaderno = [None]
+                await self.page.wait_for_selector(self.config['tabla_movimientos'], state='attached', timeout=10000)
+                tablas_por_cuaderno = {None: await self._leer_tablas(self._tablas_cuaderno())}
+
+            causa = await self._leer_panel()
             movimientos_nuevos = False
-            for movimiento in movimientos:
+            for opcion in opciones_cuaderno:
+                texto = opcion['texto'] if opcion else None
+                tablas = tablas_por_cuaderno[texto]
                 try:
-                    folio = movimiento.query_selector("td:nth-child(1)").inner_text().strip()
-                    fecha_tramite_str = movimiento.query_selector("td:nth-child(5)").inner_text().strip()
-                    fecha_tramite_pdf = fecha_tramite_str[6:10] + fecha_tramite_str[3:5] + fecha_tramite_str[0:2]
-                    
-                    if fecha_tramite_str == "01/12/2022":
-                        movimientos_nuevos = True
-                        carpeta_general = tab_name.replace(' ', '_')
-                        carpeta_caratulado = f"{carpeta_general}/{caratulado}"
-                        if not os.path.exists(carpeta_caratulado):
-                            print(f"[INFO] Creando carpeta: {carpeta_caratulado}")
-                            os.makedirs(carpeta_caratulado)
-                        else:
-                            print(f"[INFO] La carpeta {carpeta_caratulado} ya existe.")
+                    if opcion:
+                        # Limpiar el texto para usarlo como nombre de carpeta
+                        texto_limpio = re.sub(r'[<>:"/\\|?*]', '_', texto)[:50]
+                        carpeta_cuaderno = f"{carpeta_caratulado}/Cuaderno_{texto_limpio}"
+                        carpeta_documentos = f"{carpeta_cuaderno}/Historia"
+                        detalle_panel_path = f"{carpeta_cuaderno}/Detalle_causa_Cuaderno_{texto_limpio}.png"
+                    else:
+                        carpeta_cuaderno = carpeta_documentos = carpeta_caratulado
                         detalle_panel_path = f"{carpeta_caratulado}/Detalle_causa.png"
-                        if panel:
-                            # Verificar si el archivo ya existe
-                            if os.path.exists(detalle_panel_path):
-                                print(f"[INFO] El archivo {detalle_panel_path} ya existe. No se generará nuevamente.")
-                            else:
-                                panel.screenshot(path=detalle_panel_path)
-                                print(f"[INFO] Captura del panel de información guardada: {detalle_panel_path}")
-                        pdf_forms = movimiento.query_selector_all("form[name='frmPdf']")
-                        pdf_paths = []
-                        if pdf_forms:
-                            print(f"[INFO] Se encontraron {len(pdf_forms)} documentos para el folio {folio}")
-                            for doc_idx, pdf_form in enumerate(pdf_forms):
-                                token = pdf_form.query_selector("input[name='valorFile']").get_attribute("value")
-                                causa_str = f"Causa_{numero_causa}_" if numero_causa else ""
-                                
-                                # Agregar sufijo para múltiples documentos
-                                doc_suffix = f"_doc{doc_idx + 1}" if len(pdf_forms) > 1 else ""
-                                # Nombre temporal antes de tener el resumen
-                                pdf_filename_tmp = f"{carpeta_caratulado}/{fecha_tramite_pdf} {libro_pdf} temp.pdf"
-                                preview_path = pdf_filename_tmp.replace('.pdf', '_preview.png')
-
-                                if token:
-                                    base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/suprema/documentos/docCausaSuprema.php?valorFile="
-                                    original_url = base_url + token
-                                    try:
-                                        pdf_descargado = descargar_pdf_directo(original_url, pdf_filename_tmp, self.page)
-                                        if pdf_descargado:                                        
-                                            resumen_pdf = extraer_resumen_pdf(pdf_filename_tmp)
-                                            resumen_pdf_limpio = limpiar_nombre_archivo(resumen_pdf)
-                                            # Nombre final
-                                            pdf_filename = f"{carpeta_caratulado}/{fecha_tramite_pdf} {libro_pdf}{doc_suffix} {resumen_pdf_limpio}.pdf"
-                                            # Renombrar el archivo temporal al nombre final
-                                            try:
-                                                os.rename(pdf_filename_tmp, pdf_filename)
-                                            except Exception as e:
-                                                print(f"[WARN] No se pudo renombrar el archivo temporal: {pdf_filename_tmp} -> {pdf_filename} - {e}")
-                                            finally:
-                                                if os.path.exists(pdf_filename_tmp):
-                                                    try:
-                                                        os.remove(pdf_filename_tmp)
-                                                        print(f"[INFO] Archivo temporal eliminado: {pdf_filename_tmp}")
-                                                    except Exception as e:
-                                                        print(f"[WARN] No se pudo eliminar el archivo temporal: {pdf_filename_tmp} - {e}")                                        
-                                            pdf_paths.append(pdf_filename)
-                                            preview_path = pdf_filename.replace('.pdf', '_preview.png')
-
-                                            # Generar preview si no existe
-                                            if not os.path.exists(preview_path):
-                                                print(f"[INFO] Generando vista previa del PDF para {pdf_filename}...")
-                                                generar_preview_pdf(pdf_filename, preview_path)
-                                        else:
-                                            print(f"[ERROR] No se pudo descargar el PDF {doc_idx + 1} para folio {folio}")
-                                    except Exception as e:
-                                        print(f"[ERROR] Error descargando PDF {doc_idx + 1} para folio {folio}, causa {numero_causa}: {e}")
-                        else:
-                            print(f"[WARN] No hay PDF disponible para el movimiento {folio}")
-                        
-                        # Usar el primer PDF como referencia principal para compatibilidad
-                        pdf_path = pdf_paths[0] if pdf_paths else None
-                                                
-                        # Crear y agregar el movimiento a la lista global usando la nueva función
-                        movimiento_pjud = MovimientoPJUD(
-                            folio=folio,
-                            seccion=tab_name,
-                            caratulado=caratulado,
-                            libro=libro_td,
-                            fecha=fecha_tramite_str,
-                            pdf_path=pdf_path
-                        )
-                        if agregar_movimiento_sin_duplicar(movimiento_pjud):
-                            print(f"[INFO] Movimiento agregado exitosamente al diccionario global")
-                        else:
-                            print(f"[INFO] El movimiento ya existía en el diccionario global")
+
+                    if texto:
+                        PUNTO_CONTROL.marcar_posicion(tab_name, cuaderno=texto)
+                    with TRAZADOR.span(texto or caratulado, "cuaderno", pestana=tab_name), contexto_registro(cuaderno=texto):
+                        movimientos_nuevos |= await self._procesar_movimientos(
+                            tab_name, caratulado, corte, texto, causa, tablas['movimientos'],
+                            carpeta_documentos, detalle_panel_path)
+                        if 'escritos' in tablas:
+                            await self._procesar_escritos_por_resolver(
+                                tab_name, caratulado, texto, causa, tablas['escritos'], carpeta_cuaderno)
                 except Exception as e:
-                    print(f"[ERROR] Error procesando movimiento: {str(e)}")
+                    log.error(f"Error procesando cuaderno {texto}: {str(e)}")
+                    self.error_causa = True
                     continue
             return movimientos_nuevos
         except Exception as e:
-            print(f"[ERROR] Error al verificar movimientos nuevos: {str(e)}")
+            log.error(f"Error al verificar movimientos nuevos: {str(e)}")
+            self.error_causa = True
             return False
 
-    #Expediente Corte Apelaciones, pestaña dentro de corte suprema
-    def _cambiar_pestana_modal(self, caratulado, tab_name):
-        # Por defecto, no hace nada. Las subclases pueden sobrescribir si lo necesitan.
-        pass
+    #Procesa las filas de movimientos de la causa (o del cuaderno, si hay cuadernos)
+    async def _procesar_movimientos(self, tab_name, caratulado, corte, cuaderno, causa, filas, carpeta_documentos, detalle_panel_path):
+        log.info(f"Se encontraron {len(filas)} movimientos" + (f" en el cuaderno {cuaderno}" if cuaderno else ""))
+        documentos = self.config['documentos']
+        columna_folio = self.config.get('columna_folio', 0)
+        fecha_objetivo = self.config.get('fecha_objetivo')
+        identificador_pdf = self._identificador_pdf(causa)
+        movimientos_nuevos = False
+        panel_capturado = False
+        for fila in filas:
+            try:
+                folio = fila['celdas'][columna_folio]
+                fecha_tramite_str = fila['fecha']
+                if self.config.get('folio_numerico') and not folio.isdigit():
+                    continue
+                if not fecha_en_ventana(fecha_tramite_str, fecha_objetivo):
+                    log.debug("Movimiento ignorado - Folio: %s, Fecha: %s (no coincide con fecha objetivo)", folio, fecha_tramite_str)
+                    TRAZADOR.contar("movimientos_ignorados")
+                    continue
+
+                log.info(f"Movimiento nuevo encontrado - Folio: {folio}, Fecha: {fecha_tramite_str}")
+                movimientos_nuevos = True
+                os.makedirs(carpeta_documentos, exist_ok=True)
+                if not panel_capturado:
+                    await self._capturar_panel(detalle_panel_path)
+                    panel_capturado = True
+
+                partes = {
+                    'fecha': fecha_tramite_str[6:10] + fecha_tramite_str[3:5] + fecha_tramite_str[0:2],
+                    'folio': folio,
+                    'identificador': identificador_pdf,
+                }
+                datos_movimiento = dict(
+                    folio=folio,
+                    seccion=tab_name,
+                    caratulado=caratulado,
+                    fecha=fecha_tramite_str,
+                    tribunal=causa['tribunal'],
+                    corte=corte,
+                    cuaderno=cuaderno,
+                    historia_causa_cuaderno=cuaderno,
+                    detalle_causa=causa['detalle'],
+                    **{self.config['identificador']: causa[self.config['identificador']]}
+                )
+                with contexto_registro(folio=folio):
+                    self._en_segundo_plano(self._registrar_movimiento(
+                        fila, documentos, carpeta_documentos, self.config['nombre_pdf'], partes, folio,
+                        dict(pestana=tab_name, fecha=fecha_tramite_str), datos_movimiento))
+            except Exception as e:
+                log.error(f"Error procesando movimiento: {str(e)}")
+                self.error_causa = True
+                continue
+        return movimientos_nuevos
+
+    #Procesa las filas de Escritos por Resolver de un cuaderno y agrega nuevos movimientos
+    async def _procesar_escritos_por_resolver(self, tab_name, caratulado, cuaderno_nombre, causa, escritos, carpeta_cuaderno):
+        escritos_spec = self.config['escritos']
+        documentos = escritos_spec['documentos']
+        log.info(f"Se encontraron {len(escritos)} escritos por resolver")
+        identificador_pdf = self._identificador_pdf(causa)
+        for escrito in escritos:
+            try:
+                fecha_ingreso = escrito['fecha']
+                if not fecha_en_ventana(fecha_ingreso, escritos_spec.get('fecha_objetivo')):
+                    continue
+                tipo_escrito = escrito['celdas'][escritos_spec['columna_tipo']]
+                partes = {
+                    'fecha': fecha_ingreso[6:10] + fecha_ingreso[3:5] + fecha_ingreso[0:2],
+                    'identificador': identificador_pdf,
+                }
+                datos_movimiento = dict(
+                    folio=None,
+                    seccion=tab_name,
+                    caratulado=caratulado,
+                    fecha=fecha_ingreso,
+                    historia_causa_cuaderno=f"{cuaderno_nombre}, Escritos por Resolver",
+                    tribunal=causa['tribunal'],
+                    detalle_causa=causa['detalle'],
+                    **{self.config['identificador']: causa[self.config['identificador']]}
+                )
+                self._en_segundo_plano(self._registrar_movimiento(
+                    escrito, documentos, f"{carpeta_cuaderno}/EscritosPorResolver",
+                    escritos_spec['nombre_pdf'], partes, tipo_escrito,
+                    dict(pestana=tab_name, fecha=fecha_ingreso, escrito=True), datos_movimiento))
+            except Exception as e:
+                log.error(f"Error procesando escrito por resolver: {str(e)}")
+                self.error_causa = True
+                continue
+
+    #Selecciona un cuaderno en el dropdown y espera a que la tabla de movimientos se actualice.
+    #Con registrar_peticiones devuelve las peticiones xhr/fetch que disparó el cambio
+    async def _seleccionar_cuaderno(self, texto, max_retries=3, registrar_peticiones=False):
+        if registrar_peticiones:
+            peticiones = []
+            def registrar(request):
+                if request.resource_type in ('xhr', 'fetch'):
+                    peticiones.append(request)
+            self.page.on("request", registrar)
+            try:
+                await self._seleccionar_cuaderno(texto, max_retries)
+                try:
+                    await self.page.wait_for_load_state("networkidle", timeout=5000)
+                except Exception:
+                    pass
+            finally:
+                self.page.remove_listener("request", registrar)
+            return peticiones
+
+        cuaderno_selector = self.config['cuaderno_selector']
+        filas_selector = f"{self.config['tabla_movimientos']} tbody tr"
+        for attempt in range(max_retries):
+            try:
+                # Esperar a que el dropdown esté visible y habilitado
+                dropdown = await self.page.wait_for_selector(f"{cuaderno_selector}:not([disabled])", timeout=5000)
+                if not dropdown:
+                    raise Exception("No se encontró el dropdown")
+                await dropdown.click()
+                await random_sleep(0.5, 1)
+
+                success = await self.page.evaluate("""
+                    ([selector, texto]) => {
+                        const select = document.querySelector(selector);
+                        if (!select) return false;
+                        const targetOption = Array.from(select.options).find(opt => opt.textContent.trim() === texto);
+                        if (!targetOption) return false;
+                        select.value = targetOption.value;
+                        select.dispatchEvent(new Event('change', { bubbles: true }));
+                        return true;
+                    }
+                """, [cuaderno_selector, texto])
+                if not success:
+                    raise Exception(f"No se pudo seleccionar la opción: {texto}")
+
+                # Esperar a que la tabla tenga filas
+                await self.page.wait_for_selector(filas_selector, timeout=5000)
+                rows = await self.page.query_selector_all(filas_selector)
+                if not rows:
+                    raise Exception("La tabla está vacía")
+                log.debug("Tabla actualizada con %s filas", len(rows))
+                return
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    log.error(f"No se pudo seleccionar la opción después de {max_retries} intentos: {str(e)}")
+                    raise
+                log.warning(f"Intento {attempt + 1} fallido: {str(e)}")
+                await random_sleep(1, 2)
+
+    #Obtiene todas las opciones del dropdown de cuadernos
+    async def _obtener_opciones_cuaderno(self):
+        try:
+            log.debug("Obteniendo opciones del dropdown de cuadernos de %s...", self.tab_name)
+            cuaderno_selector = self.config['cuaderno_selector']
+            dropdown = await self.page.wait_for_selector(f"{cuaderno_selector}:not([disabled])", timeout=5000)
+            if not dropdown:
+                raise Exception("No se encontró el dropdown")
+
+            opciones = await self.page.evaluate("""
+                (selector) => {
+                    const select = document.querySelector(selector);
+                    if (!select) return [];
+                    return Array.from(select.options).map(option => ({
+                        numero: option.value,
+                        texto: option.textContent.trim(),
+                        es_seleccionado: option.selected
+                    }));
+                }
+            """, cuaderno_selector)
+
+            if not opciones:
+                log.warning("No se encontraron opciones en el dropdown")
+                return []
+            log.debug("Se encontraron %s opciones en el dropdown", len(opciones))
+            return opciones
+        except Exception as e:
+            log.error(f"Error al obtener opciones del dropdown: {str(e)}")
+            return []
 
     #Cierra correctamente ambos modales: Detalle Causa Apelaciones y Detalle Causa Suprema
-    def _cerrar_ambos_modales(self):
+    async def _cerrar_ambos_modales(self):
         try:
-            print("  Cerrando todos los modales abiertos...")
+            log.debug("Cerrando todos los modales abiertos...")
             
             #Cierre directo de todos los modales mediante manipulación del DOM
-            self.page.evaluate("""
+            await self.page.evaluate("""
                 () => {
                     // Asegurar que no queden modales visibles
                     document.querySelectorAll('.modal.in, .modal[style*="display: block"]').forEach(modal => {
@@ -776,7 +2306,7 @@ class ControladorLupa:
             """)
             
             # Verificar el estado de los modales después de la limpieza
-            any_modal_open = self.page.evaluate("""
+            any_modal_open = await self.page.evaluate("""
                 () => {
                     return !!document.querySelector('.modal.in, .modal[style*="display: block"]') || 
                            !!document.querySelector('.modal-backdrop') ||
@@ -785,1527 +2315,117 @@ class ControladorLupa:
             """)
             
             if not any_modal_open:
-                print("  Todos los modales cerrados correctamente")
+                log.debug("Todos los modales cerrados correctamente")
             else:
-                print("  ALERTA: Puede que algunos modales sigan abiertos")
+                log.warning("Puede que algunos modales sigan abiertos")
                 
-            random_sleep(1, 2)
+            await random_sleep(1, 2)
                 
         except Exception as e:
-            print(f"  Error al cerrar los modales: {str(e)}")
+            log.error(f"Error al cerrar los modales: {str(e)}")
+
+# Función para obtener el controlador de lupa correspondiente
+def obtener_controlador_lupa(tab_name, page):
+    if tab_name not in ESPECIFICACIONES_PESTANAS:
+        raise ValueError(f"Pestaña '{tab_name}' sin especificación de lupa")
+    return ControladorLupa(page, tab_name)
+
+async def lupa(page, config):
+    """
+    Función genérica para manejar clics en lupa y sus modales asociados
+    
+    Args:
+        page: La página de Playwright
+        config: Diccionario con la configuración específica:
+            - tab_name: Nombre de la pestaña actual (clave de ESPECIFICACIONES_PESTANAS)
+    """
+    controlador = obtener_controlador_lupa(config['tab_name'], page)
+    return await controlador.manejar(config['tab_name'])
 
-    #Verifica los movimientos en el modal de Apelaciones y guarda los resultados
-    def _verificar_movimientos_apelaciones(self, subcarpeta):        
+#Hace clic en una pestaña de Mis Causas; retorna False si no la encuentra
+async def abrir_pestana(page, tab_name):
+    try:
+        # Primero intentar con el texto exacto
+        await page.click(f"a:has-text('{tab_name}')")
+    except:
         try:
-            print(f"  Verificando movimientos en modal de Apelaciones...")
-            
-            # Obtener el número de causa
-            numero_causa = None
-            try:
-                panel_titulos = self.page.query_selector("#modalDetalleApelaciones table.table-titulos")
-                if panel_titulos:
-                    libro_td = panel_titulos.query_selector("td:has-text('libro')")
-                    if libro_td:
-                        libro_text = libro_td.inner_text()
-                        print(f"  Texto completo del libro extraído: {libro_text}")
-            except Exception as e:
-                print(f"  No se pudo extraer el número de causa: {str(e)}")
-            
-            # Tomar captura de la sección de información de la causa
-            archivos_apelaciones = []
-            try:
-                # Identificar la sección superior del modal con la información general de la causa
-                info_panel = self.page.query_selector("#modalDetalleApelaciones .modal-body > div:first-child")
-                
-                # Si no se encuentra con ese selector, intentar con otro selector más específico
-                if not info_panel:
-                    info_panel = self.page.query_selector("#modalDetalleApelaciones table.table-titulos")
-                
-                if info_panel:
-                    # Asegurar que exista la carpeta
-                    if not os.path.exists(subcarpeta):
-                        os.makedirs(subcarpeta)
-                    
-                    # Hacer scroll para asegurar que el elemento es visible
-                    info_panel.scroll_into_view_if_needed()
-                    random_sleep(0.5, 1)
-                    
-                    # Guardar la captura de la sección de información
-                    panel_screenshot_path = f"{subcarpeta}/Detalle_Causa_Apelaciones.png"
-                    info_panel.screenshot(path=panel_screenshot_path)
-                    archivos_apelaciones.append(panel_screenshot_path)
-                    print(f"  Captura de la información de la causa guardada en: {panel_screenshot_path}")
-                else:
-                    print("  No se pudo encontrar la sección de información para capturar")
-            except Exception as capture_error:
-                print(f"  Error al capturar la sección de información: {str(capture_error)}")
+            # Si falla, intentar con una coincidencia más flexible
+            await page.click(f"a:has-text('{tab_name}', 'i')")
+        except:
+            log.warning(f"No se pudo encontrar la pestaña '{tab_name}'. Continuando...")
+            return False
+    
+    log.info(f"Clic exitoso en pestaña '{tab_name}'")
+    return True
 
-            # Asegurarse de que el tab "movimientosApe" esté activo
-            print("  Activando la pestaña de movimientos...")
-            try:
-                # Verificar si ya hay alguna pestaña activa
-                active_tab = self.page.query_selector("#modalDetalleApelaciones .tab-pane.active")
-                if active_tab:
-                    active_id = self.page.evaluate("el => el.id", active_tab)
-                    print(f"  Pestaña activa actualmente: {active_id}")
-                
-                # Hacer clic en la pestaña de movimientos para activarla
-                self.page.evaluate("""
-                    () => {
-                        // Buscar el enlace que apunta al tab movimientosApe
-                        const tabLink = document.querySelector('#modalDetalleApelaciones .nav-tabs a[href="#movimientosApe"]');
-                        if (tabLink) {
-                            console.log('Enlace a pestaña encontrado, haciendo clic...');
-                            tabLink.click();
-                            return true;
-                        } else {
-                            console.log('No se encontró el enlace a la pestaña');
-                            return false;
-                        }
-                    }
-                """)
-                
-                # Esperar a que la pestaña esté activa
-                self.page.wait_for_selector("#modalDetalleApelaciones #movimientosApe.active", timeout=5000)
-                print("  Pestaña de movimientos activada correctamente")
-                
-                # Pequeña pausa para asegurar que todo cargue correctamente
-                random_sleep(1, 2)
-            except Exception as tab_error:
-                print(f"  Error al activar la pestaña de movimientos: {str(tab_error)}")
-                # Si hay un error, intentamos continuar 
-            
-            # Esperar a que la tabla de movimientos esté visible usando el nuevo selector
-            print("  Esperando por la tabla de movimientos en el tab activo...")
-            self.page.wait_for_selector("#movimientosApe table.table-bordered", timeout=10000)
-            
-            # Fecha específica para la verificación de movimientos de apelaciones
-            fecha_actual_str = "20/01/2023"
-            
-            print(f"  Verificando movimientos del día: {fecha_actual_str}")
-            
-            # Obtener todos los movimientos usando el selector correcto para la pestaña activa
-            movimientos = self.page.query_selector_all("#movimientosApe table.table-bordered tbody tr")
-            print(f"  Se encontraron {len(movimientos)} movimientos")
-            
-            # Revisar cada movimiento
-            for movimiento in movimientos:
-                try:
-                    folio = movimiento.query_selector("td:nth-child(1)").inner_text().strip()
-                    fecha_tramite_str = movimiento.query_selector("td:nth-child(6)").inner_text().strip()  
-                    
-                    # Verificar si el movimiento es de la fecha especificada
-                    if fecha_tramite_str == fecha_actual_str:
-                        print(f"  Movimiento nuevo encontrado - Folio: {folio}, Fecha: {fecha_tramite_str}")
-                        
-                        # Verificar si hay PDFs disponibles
-                        pdf_forms = movimiento.query_selector_all("form[name='frmDoc']")
-                        if pdf_forms:
-                            print(f"  Se encontraron {len(pdf_forms)} documentos para el folio {folio}")
-                            # Procesar cada formulario/documento
-                            for doc_idx, pdf_form in enumerate(pdf_forms):
-                                # Obtener el token para descargar el PDF 
-                                token = pdf_form.query_selector("input[name='valorDoc']").get_attribute("value")
-                                causa_str = f"Causa_{numero_causa}_" if numero_causa else ""
-                                
-                                # Agregar sufijo para múltiples documentos
-                                doc_suffix = f"_doc{doc_idx + 1}" if len(pdf_forms) > 1 else ""
-                                pdf_filename = f"{subcarpeta}/{causa_str}folio_{folio}_fecha_{fecha_tramite_str.replace('/', '_')}.pdf"
-                                if len(pdf_forms) > 1:
-                                    base_name, ext = os.path.splitext(pdf_filename)
-                                    pdf_filename = f"{base_name}{doc_suffix}{ext}"
-                                
-                                preview_path = pdf_filename.replace('.pdf', '_preview.png')
-
-                                # Construir la URL para descargar el PDF
-                                if token:
-                                    # URL para la descarga de PDF en Corte Apelaciones
-                                    base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/apelaciones/documentos/docCausaApelaciones.php?valorDoc="
-                                    original_url = base_url + token
-                                    
-                                    # Descargar el PDF
-                                    print(f"  Descargando PDF de Apelaciones {doc_idx + 1}...")
-                                    pdf_descargado = descargar_pdf_directo(original_url, pdf_filename, self.page)
-                                    
-                                    if pdf_descargado:
-                                        archivos_apelaciones.append(pdf_filename)
-                                        # Generar una vista previa del PDF (mitad superior, redimensionada)
-                                        try:
-                                            print(f"  Generando vista previa del PDF para {pdf_filename}...")
-                                            generar_preview_pdf(pdf_filename, preview_path)
-                                            if os.path.exists(preview_path):
-                                                archivos_apelaciones.append(preview_path)
-                                                print(f"  Vista previa guardada en: {preview_path}")
-                                            else:
-                                                print(f"  No se pudo generar la vista previa para {pdf_filename}")
-                                        except Exception as prev_error:
-                                            print(f"  Error al generar la vista previa del PDF: {str(prev_error)}")
-                        else:
-                            print(f"  No hay PDF disponible para el movimiento {folio}")
-                except Exception as e:
-                    print(f"  Error procesando movimiento de Apelaciones: {str(e)}")
-                    continue
-            
-            return archivos_apelaciones
-            
-        except Exception as e:
-            print(f"  Error al verificar movimientos en modal de Apelaciones: {str(e)}")
-            return []
-
-#Aqui se maneja la navegacion en la pestaña Corte Suprema de Mis Causas
-class ControladorLupaSuprema(ControladorLupa):
-    def obtener_config(self):
-        return {
-            'lupa_selector': "#dtaTableDetalleMisCauSup tbody tr td a[href*='modalDetalleMisCauSuprema']",
-            'modal_selector': "#modalDetalleMisCauSuprema",
-            'modal_title': "Detalle Causa",
-            'table_selector': ".modal-content table.table-bordered",
-            'expected_headers': ['Folio', 'Tipo', 'Descripción', 'Fecha', 'Documento'],
-            'process_content': True
-        }
-
-# Controlador de lupas corte Suprema 
-    def manejar(self, tab_name):
-        try:
-            print(f"  Procesando lupa tipo '{self.__class__.__name__}' en pestaña '{tab_name}'...")
-            for pagina in manejar_paginacion(self.page, tab_name):
-                lupas = self._obtener_lupas()
-                if not lupas:
-                    print("  No se encontraron lupas en la pestaña.")
-                    return False
-                
-                for idx, lupa_link in enumerate(lupas):
-                    try:
-                        fila = lupa_link.evaluate_handle('el => el.closest("tr")')
-                        tds = fila.query_selector_all('td')
-                        if len(tds) < 3:
-                            continue
-                        caratulado = tds[2].inner_text().strip()
-                        corte_text = tds[5].inner_text().strip() 
-                        print(f"  Procesando lupa {idx+1} de {len(lupas)} (caratulado: {caratulado})")
-                        
-                        lupa_link.scroll_into_view_if_needed()
-                        random_sleep(0.5, 1)
-                        lupa_link.click()
-                        random_sleep(1, 2)
-                        self._verificar_modal()
-                        self._verificar_tabla()
-                        movimientos_nuevos = self._procesar_contenido_suprema(tab_name, caratulado, corte_text)
-                        self._cerrar_modal()
-                        
-                        #break para procesar solo la primera lupa
-                        break
-                        
-                    except Exception as e:
-                        print(f"  Error procesando la lupa {idx+1}: {str(e)}")
-                        self._manejar_error(e)
-                        self._cerrar_modal()
-                        continue
-            return True
-        except Exception as e:
-            self._manejar_error(e)
-            return False
-
-    def _procesar_contenido_suprema(self, tab_name, caratulado, corte=None):
-        try:
-            print(f"[INFO] Verificando movimientos nuevos en pestaña '{tab_name}'...")
-            # Selector para obtener el panel completo de detalles de causas
-            panel = self.page.query_selector("#modalDetalleMisCauSuprema .modal-body .panel.panel-default")
-            numero_causa = None
-            if panel:
-                panel.scroll_into_view_if_needed()
-                random_sleep(1, 2)
-                try:
-                    # Buscar el número de causa en el panel completo
-                    libro_td = panel.query_selector("td:has-text('libro')")
-                    if libro_td:
-                        libro_text = libro_td.inner_text()
-                        print(f"[INFO] Texto completo del libro extraído: {libro_text}")
-                except Exception as e:
-                    print(f"[WARN] No se pudo extraer el número de causa: {str(e)}")
-            else:
-                print("[WARN] No se encontró el panel de información")
-            self.page.wait_for_selector("table.table-bordered", timeout=10000)
-            movimientos = self.page.query_selector_all("table.table-bordered tbody tr")
-            print(f"[INFO] Se encontraron {len(movimientos)} movimientos")
-            movimientos_nuevos = False
-            
-            # Fecha específica para Corte Suprema
-            fecha_objetivo = "12/03/2024"
-            print(f"[INFO] Buscando movimientos de la fecha: {fecha_objetivo}")
-            
-            for movimiento in movimientos:
-                try:
-                    tds = movimiento.query_selector_all('td')
-                    if len(tds) < 5:
-                        continue
-                    folio_text = tds[0].inner_text().strip()
-                    if not folio_text.isdigit():
-                        continue
-                    folio = folio_text
-                    fecha_tramite_str = tds[4].inner_text().strip()
-                    
-                    # Solo procesar movimientos de la fecha objetivo
-                    if fecha_tramite_str == fecha_objetivo:
-                        print(f"[INFO] Movimiento encontrado - Folio: {folio}, Fecha: {fecha_tramite_str}")
-                        movimientos_nuevos = True
-                        carpeta_general = tab_name.replace(' ', '_')
-                        carpeta_caratulado = f"{carpeta_general}/{caratulado}"
-                        if not os.path.exists(carpeta_caratulado):
-                            print(f"[INFO] Creando carpeta: {carpeta_caratulado}")
-                            os.makedirs(carpeta_caratulado)
-                        else:
-                            print(f"[INFO] La carpeta {carpeta_caratulado} ya existe.")
-                        # Modificar el formato del nombre del archivo para incluir el número de causa
-                        detalle_panel_path = f"{carpeta_caratulado}/Detalle_causa_{numero_causa}.png" if numero_causa else f"{carpeta_caratulado}/Detalle_causa.png"
-                        if panel:
-                            # Verificar si el archivo ya existe
-                            if os.path.exists(detalle_panel_path):
-                                print(f"[INFO] El archivo {detalle_panel_path} ya existe. No se generará nuevamente.")
-                            else:
-                                try:
-                                    # Hacer scroll al panel
-                                    self.page.evaluate("""
-                                        (element) => {
-                                            element.scrollIntoView({ behavior: 'smooth', block: 'center' });
-                                        }
-                                    """, panel)
-                                    random_sleep(1, 2)
-                                    # Tomar la captura del panel completo
-                                    panel.screenshot(path=detalle_panel_path)
-                                    print(f"[INFO] Captura del panel de información guardada: {detalle_panel_path}")
-                                except Exception as e:
-                                    print(f"[WARN] No se pudo tomar la captura del panel: {str(e)}")
-                        pdf_forms = movimiento.query_selector_all("form[name='frmPdf']")
-                        pdf_paths = []
-                        if pdf_forms:
-                            print(f"[INFO] Se encontraron {len(pdf_forms)} documentos para el folio {folio}")
-                            for doc_idx, pdf_form in enumerate(pdf_forms):
-                                token = pdf_form.query_selector("input[name='valorFile']").get_attribute("value")
-                                # Construir nombre base del archivo usando fecha y libro
-                                fecha_tramite_pdf = fecha_tramite_str[6:10] + fecha_tramite_str[3:5] + fecha_tramite_str[0:2]
-                                libro_pdf = libro_text.replace("Libro :", "").strip().replace("/", "").replace("-", "")
-                                
-                                # Agregar sufijo para múltiples documentos
-                                doc_suffix = f"_doc{doc_idx + 1}" if len(pdf_forms) > 1 else ""
-                                # Nombre temporal antes de tener el resumen
-                                pdf_filename_tmp = f"{carpeta_caratulado}/{fecha_tramite_pdf} {libro_pdf}_temp.pdf"
-                                preview_path = pdf_filename_tmp.replace('.pdf', '_preview.png')
-
-                                if token:
-                                    base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/suprema/documentos/docCausaSuprema.php?valorFile="
-                                    original_url = base_url + token
-                                    try:
-                                        pdf_descargado = descargar_pdf_directo(original_url, pdf_filename_tmp, self.page)
-                                        if pdf_descargado:
-                                            resumen_pdf = extraer_resumen_pdf(pdf_filename_tmp)
-                                            resumen_pdf_limpio = limpiar_nombre_archivo(resumen_pdf)
-                                            pdf_filename = f"{carpeta_caratulado}/{fecha_tramite_pdf} {libro_pdf} {resumen_pdf_limpio}.pdf"
-                                            # Si hay múltiples documentos, agregar sufijo al nombre final
-                                            if len(pdf_forms) > 1:
-                                                base_name, ext = os.path.splitext(pdf_filename)
-                                                pdf_filename = f"{base_name}{doc_suffix}{ext}"
-                                            try:
-                                                os.rename(pdf_filename_tmp, pdf_filename)
-                                            except Exception as e:
-                                                print(f"[WARN] No se pudo renombrar el archivo temporal: {pdf_filename_tmp} -> {pdf_filename} - {e}")
-                                            finally:
-                                                if os.path.exists(pdf_filename_tmp):
-                                                    try:
-                                                        os.remove(pdf_filename_tmp)
-                                                        print(f"[INFO] Archivo temporal eliminado: {pdf_filename_tmp}")
-                                                    except Exception as e:
-                                                        print(f"[WARN] No se pudo eliminar el archivo temporal: {pdf_filename_tmp} - {e}")
-                                            pdf_paths.append(pdf_filename)
-                                            preview_path = pdf_filename.replace('.pdf', '_preview.png')
-                                            # Generar preview si no existe
-                                            if not os.path.exists(preview_path):
-                                                print(f"[INFO] Generando vista previa del PDF para {pdf_filename}...")
-                                                generar_preview_pdf(pdf_filename, preview_path)
-                                        else:
-                                            print(f"[ERROR] No se pudo descargar el PDF {doc_idx + 1} para folio {folio}")
-                                    except Exception as e:
-                                        print(f"[ERROR] Error descargando PDF {doc_idx + 1} para folio {folio}, causa {numero_causa}: {e}")
-                        else:
-                            print(f"[WARN] No hay PDF disponible para el movimiento {folio}")
-                        
-                        # Usar el primer PDF como referencia principal para compatibilidad
-                        pdf_path = pdf_paths[0] if pdf_paths else None
-                        
-                        # Crear y agregar el movimiento a la lista global
-                        movimiento_pjud = MovimientoPJUD(
-                            folio=folio,
-                            seccion=tab_name,
-                            caratulado=caratulado,
-                            libro=libro_text,
-                            fecha=fecha_tramite_str,
-                            pdf_path=pdf_path,
-                            corte=corte
-                        )
-                        if agregar_movimiento_sin_duplicar(movimiento_pjud):
-                            print(f"[INFO] Movimiento agregado exitosamente al diccionario global")
-                        else:
-                            print(f"[INFO] El movimiento ya existía en el diccionario global")
-                    else:
-                        print(f"[INFO] Movimiento ignorado - Folio: {folio}, Fecha: {fecha_tramite_str} (no coincide con fecha objetivo)")
-                except Exception as e:
-                    print(f"[ERROR] Error procesando movimiento {folio if 'folio' in locals() else ''}: {str(e)}")
-                    continue
-            
-            # Cambiar a la pestaña de Apelaciones
-            #self._cambiar_pestana_modal(caratulado, tab_name)
-            
-            return movimientos_nuevos
-        except Exception as e:
-            print(f"[ERROR] Error al verificar movimientos nuevos: {str(e)}")
-            return False
-
-#Aqui se maneja la navegacion en la pestaña Corte Apelaciones de Mis Causas
-class ControladorLupaApelacionesPrincipal(ControladorLupa):
-    def obtener_config(self):
-        return {
-            'lupa_selector': "#dtaTableDetalleMisCauApe a[href*='modalDetalleMisCauApelaciones']",
-            'modal_selector': "#modalDetalleMisCauApelaciones",
-            'modal_title': "Detalle Causa",
-            'table_selector': ".modal-content table.table-bordered",
-            'expected_headers': ['Folio', 'Doc.', 'Anexo', 'Trámite', 'Descripción', 'Fecha', 'Sala', 'Estado', 'Georeferencia'],
-            'process_content': True
-        }
-
-    def manejar(self, tab_name):
-        try:
-            print(f"  Procesando lupa tipo '{self.__class__.__name__}' en pestaña '{tab_name}'...")
-            for pagina in manejar_paginacion(self.page, tab_name):
-                lupas = self._obtener_lupas()
-                if not lupas:
-                    print("  No se encontraron lupas en la pestaña.")
-                    return False
-                
-                for idx, lupa_link in enumerate(lupas):
-                    try:
-                        fila = lupa_link.evaluate_handle('el => el.closest("tr")')
-                        tds = fila.query_selector_all('td')
-                        if len(tds) < 4:
-                            continue
-                        # Usar la columna 4 (índice 3) para el caratulado
-                        caratulado = tds[3].inner_text().strip()
-                        #extraer corte
-                        corte_text = tds[2].inner_text().replace("Corte:", "").strip()
-                        print(f" Corte: {corte_text} ")
-                        print(f"  Procesando lupa {idx+1} de {len(lupas)} (caratulado: {caratulado})")
-                        
-                        lupa_link.scroll_into_view_if_needed()
-                        random_sleep(0.5, 1)
-                        lupa_link.click()
-                        random_sleep(1, 2)
-                        self._verificar_modal()
-                        self._verificar_tabla()
-                        movimientos_nuevos = self._procesar_contenido(tab_name, caratulado,corte_text)
-                        self._cerrar_modal()
-                        
-                        #break para procesar solo la primera lupa
-                        break
-                        
-                    except Exception as e:
-                        print(f"  Error procesando la lupa {idx+1}: {str(e)}")
-                        self._manejar_error(e)
-                        self._cerrar_modal()
-                        continue
-            return True
-        except Exception as e:
-            self._manejar_error(e)
-            return False
-
-    def _procesar_contenido(self, tab_name, caratulado, corte=None):
+#Navega a una pestaña de Mis Causas en la página dada y procesa sus lupas
+async def procesar_pestana(page, tab_name):
+    span_pestana = TRAZADOR.abrir(tab_name, "pestana")
+    contexto_pestana = abrir_contexto(pestana=tab_name)
+    try:
+        log.info(f"Navegando a pestaña '{tab_name}'...")
+        
+        # Antes de cambiar de pestaña, verificamos si hay modales abiertos y los cerramos
         try:
-            print(f"[INFO] Procesando movimientos en Corte Apelaciones (principal)...")
-            
-            modal_usable = self.page.evaluate(f"""
-                () => {{
-                    const modal = document.querySelector('{self.config["modal_selector"]}');
-                    if (!modal) return false;
-                    
-                    // Verificar si hay contenido visible
-                    const tables = modal.querySelectorAll('table');
-                    if (!tables || tables.length === 0) return false;
-                    
-                    return true;
-                }}
-            """)
-            
-            if not modal_usable:
-                print("[WARN] El modal parece estar en estado bloqueado o incompleto. Intentando recuperarlo...")
-                return False
-            
-            # Asegurarse de que el tab-pane "movimientosApe" está activo
-            print("[INFO] Verificando y activando el tab-pane de movimientos...")
-            tab_activo = self.page.evaluate("""
+            any_modal_open = await page.evaluate("""
                 () => {
-                    // Verificar si el tab movimientosApe ya está activo
-                    const tabMovimientos = document.querySelector('#movimientosApe');
-                    if (tabMovimientos && tabMovimientos.classList.contains('active')) {
-                        return true;
-                    }
-                    
-                    // Si no está activo, intentar activarlo
-                    const tabLink = document.querySelector('a[href="#movimientosApe"]');
-                    if (tabLink) {
-                        tabLink.click();
-                        return true;
-                    }
-                    
-                    return false;
+                    return !!document.querySelector('.modal.in, .modal[style*="display: block"]') || 
+                           !!document.querySelector('.modal-backdrop') ||
+                           document.body.classList.contains('modal-open');
                 }
             """)
             
-            if not tab_activo:
-                print("[WARN] No se pudo activar el tab-pane de movimientos")
-                return False
-            
-            # Esperar  para asegurar que el tab-pane esté visible
-            random_sleep(1, 2)
-            
-            # Selector para obtener el panel completo de detalles de causas
-            panel = self.page.query_selector("#modalDetalleMisCauApelaciones .modal-body .panel.panel-default")
-            numero_causa = None
-            if panel:
-                try:
-                    panel.scroll_into_view_if_needed()
-                    random_sleep(1, 2)
-                                            # Extraer el número de causa del Libro
-                    try:
-                        libro_td = panel.query_selector("td:has-text('libro')")
-                        if libro_td:
-                            libro_text = libro_td.inner_text()
-                            print(f"  Texto completo del libro extraído: {libro_text}")
-                    except Exception as e:
-                            print(f"  No se pudo extraer el número de causa: {str(e)}")
-                except Exception as scroll_error:
-                    print(f"[WARN] No se pudo hacer scroll al panel: {str(scroll_error)}")
-                    return False
-            else:
-                print("[WARN] No se encontró el panel de información")
-                
-            try:
-                self.page.wait_for_selector("#modalDetalleMisCauApelaciones #movimientosApe table.table-bordered", timeout=5000)
-                movimientos = self.page.query_selector_all("#modalDetalleMisCauApelaciones #movimientosApe table.table-bordered tbody tr")
-                print(f"[INFO] Se encontraron {len(movimientos)} movimientos")
-            except Exception as table_error:
-                print(f"[WARN] No se pudo encontrar la tabla de movimientos: {str(table_error)}")
-                return False
-                
-            movimientos_nuevos = False
-            for movimiento in movimientos:
-                try:
-                    folio = movimiento.query_selector("td:nth-child(1)").inner_text().strip()
-                    fecha_tramite_str = movimiento.query_selector("td:nth-child(6)").inner_text().strip() 
-                    if fecha_tramite_str == "12/06/2025":
-                        movimientos_nuevos = True
-                        carpeta_general = tab_name.replace(' ', '_')
-                        carpeta_caratulado = f"{carpeta_general}/{caratulado}"
-                        if not os.path.exists(carpeta_caratulado):
-                            print(f"[INFO] Creando carpeta: {carpeta_caratulado}")
-                            os.makedirs(carpeta_caratulado)
-                        else:
-                            print(f"[INFO] La carpeta {carpeta_caratulado} ya existe.")
-                        # Modificar el formato del nombre del archivo para incluir el número de causa
-                        detalle_panel_path = f"{carpeta_caratulado}/Detalle_causa_{numero_causa}.png" if numero_causa else f"{carpeta_caratulado}/Detalle_causa.png"
-                        if panel:
-                            # Verificar si el archivo ya existe
-                            if os.path.exists(detalle_panel_path):
-                                print(f"[INFO] El archivo {detalle_panel_path} ya existe. No se generará nuevamente.")
-                            else:
-                                try:
-                                    # Hacer scroll al panel
-                                    self.page.evaluate("""
-                                        (element) => {
-                                            element.scrollIntoView({ behavior: 'smooth', block: 'center' });
-                                        }
-                                    """, panel)
-                                    random_sleep(1, 2)
-                                    # Tomar la captura del panel completo
-                                    panel.screenshot(path=detalle_panel_path)
-                                    print(f"[INFO] Captura del panel de información guardada: {detalle_panel_path}")
-                                except Exception as e:
-                                    print(f"[WARN] No se pudo tomar la captura del panel: {str(e)}")
-                        pdf_forms = movimiento.query_selector_all("form[name='frmDoc']")
-                        pdf_paths = []
-                        if pdf_forms:
-                            print(f"[INFO] Se encontraron {len(pdf_forms)} documentos para el folio {folio}")
-                            for doc_idx, pdf_form in enumerate(pdf_forms):
-                                token = pdf_form.query_selector("input[name='valorDoc']").get_attribute("value")
-                                # Construir nombre base del archivo usando fecha y libro
-                                fecha_tramite_pdf = fecha_tramite_str[6:10] + fecha_tramite_str[3:5] + fecha_tramite_str[0:2]
-                                libro_pdf = libro_text.replace("Libro :", "").strip().replace("/", "").replace("-", "")
-                                
-                                # Agregar sufijo para múltiples documentos
-                                doc_suffix = f"_doc{doc_idx + 1}" if len(pdf_forms) > 1 else ""
-                                # Nombre temporal antes de tener el resumen
-                                pdf_filename_tmp = f"{carpeta_caratulado}/{fecha_tramite_pdf} {libro_pdf}_temp.pdf"
-                                preview_path = pdf_filename_tmp.replace('.pdf', '_preview.png')
-
-                                if token:
-                                    base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/apelaciones/documentos/docCausaApelaciones.php?valorDoc="
-                                    original_url = base_url + token
-                                    pdf_descargado = descargar_pdf_directo(original_url, pdf_filename_tmp, self.page)
-                                    if pdf_descargado:
-                                        resumen_pdf = extraer_resumen_pdf(pdf_filename_tmp)
-                                        resumen_pdf_limpio = limpiar_nombre_archivo(resumen_pdf)
-                                        pdf_filename = f"{carpeta_caratulado}/{fecha_tramite_pdf} {libro_pdf} {resumen_pdf_limpio}.pdf"
-                                        # Si hay múltiples documentos, agregar sufijo al nombre final
-                                        if len(pdf_forms) > 1:
-                                            base_name, ext = os.path.splitext(pdf_filename)
-                                            pdf_filename = f"{base_name}{doc_suffix}{ext}"
-                                        try:
-                                            os.rename(pdf_filename_tmp, pdf_filename)
-                                        except Exception as e:
-                                            print(f"[WARN] No se pudo renombrar el archivo temporal: {pdf_filename_tmp} -> {pdf_filename} - {e}")
-                                        finally:
-                                            if os.path.exists(pdf_filename_tmp):
-                                                try:
-                                                    os.remove(pdf_filename_tmp)
-                                                    print(f"[INFO] Archivo temporal eliminado: {pdf_filename_tmp}")
-                                                except Exception as e:
-                                                    print(f"[WARN] No se pudo eliminar el archivo temporal: {pdf_filename_tmp} - {e}")
-                                        pdf_paths.append(pdf_filename)
-                                        preview_path = pdf_filename.replace('.pdf', '_preview.png')
-                                        # Generar vista previa si no existe
-                                        if not os.path.exists(preview_path):
-                                            print(f"[INFO] Generando vista previa del PDF para {pdf_filename}...")
-                                            generar_preview_pdf(pdf_filename, preview_path)
-                                    else:
-                                        print(f"[ERROR] No se pudo descargar el PDF {doc_idx + 1} para folio {folio}")
-                        else:
-                            print(f"[WARN] No hay PDF disponible para el movimiento {folio}")
+            if any_modal_open:
+                log.info("Se detectaron modales abiertos. Intentando cerrarlos antes de cambiar de pestaña...")
+                await page.evaluate("""
+                    () => {
+                        // Asegurar que no queden modales visibles
+                        document.querySelectorAll('.modal.in, .modal[style*="display: block"]').forEach(modal => {
+                            modal.style.display = 'none';
+                            modal.classList.remove('in');
+                        });
                         
-                        # Usar el primer PDF como referencia principal para compatibilidad
-                        pdf_path = pdf_paths[0] if pdf_paths else None
+                        // Asegurar que el body no tenga la clase modal-open
+                        document.body.classList.remove('modal-open');
                         
-                        # Crear y agregar el movimiento a la lista global
-                        movimiento_pjud = MovimientoPJUD(
-                            folio=folio,
-                            seccion=tab_name,
-                            caratulado=caratulado,
-                            libro=libro_text,
-                            fecha=fecha_tramite_str,
-                            pdf_path=pdf_path,
-                            corte=corte
-                        )
-                        if agregar_movimiento_sin_duplicar(movimiento_pjud):
-                            print(f"[INFO] Movimiento agregado exitosamente al diccionario global")
-                        else:
-                            print(f"[INFO] El movimiento ya existía en el diccionario global")
-                    else:
-                        print(f"[INFO] Movimiento ignorado - Folio: {folio}, Fecha: {fecha_tramite_str} (no coincide con fecha objetivo)")
-                                
-                except Exception as e:
-                    print(f"[ERROR] Error procesando movimiento: {str(e)}")
-                    continue
-            return movimientos_nuevos
-        except Exception as e:
-            print(f"[ERROR] Error al verificar movimientos nuevos: {str(e)}")
-            return False
-
-#Aqui se maneja la navegacion en la pestaña Civil de Mis Causas
-class ControladorLupaCivil(ControladorLupa):
-    def obtener_config(self):
-        return {
-            'lupa_selector': "#dtaTableDetalleMisCauCiv a[href*='modalAnexoCausaCivil']",
-            'modal_selector': "#modalDetalleMisCauCivil",
-            'modal_title': "Detalle Causa",
-            'table_selector': ".modal-content table.table-bordered",
-            'expected_headers': ['Folio', 'Doc.', 'Anexo', 'Etapa', 'Trámite', 'Desc. Trámite', 'Fec. Trámite', 'Foja', 'Georeferencia'],
-            'process_content': True
-        }
-
-    def _procesar_contenido(self, tab_name, caratulado):
-        try:
-            print(f"[INFO] Procesando movimientos en Civil...")
-            
-            # Obtener opciones del dropdown
-            opciones_cuaderno = self._obtener_opciones_cuaderno()
-            if not opciones_cuaderno:
-                print("[WARN] No se pudieron obtener las opciones del cuaderno")
-                return False
-                
-            movimientos_nuevos = False
-            carpeta_general = tab_name.replace(' ', '_')
-            
-            # Procesar cada opción del dropdown
-            for opcion in opciones_cuaderno:
-                try:
-                    numero = opcion['numero']
-                    texto = opcion['texto']
-                    
-                    print(f"  Procesando cuaderno: {texto}")
-                    
-                    # Limpiar el texto para usarlo como nombre de carpeta
-                    texto_limpio = re.sub(r'[<>:"/\\|?*]', '_', texto)
-                    texto_limpio = texto_limpio[:50]                     
-                    
-                    # Intentar seleccionar la opción en el dropdown con retry
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        try:
-                            # Esperar a que el dropdown esté visible y habilitado
-                            dropdown = self.page.wait_for_selector('#selCuaderno:not([disabled])', timeout=5000)
-                            if not dropdown:
-                                raise Exception("No se encontró el dropdown")
-                            
-                            # Hacer clic en el dropdown para abrirlo
-                            dropdown.click()
-                            random_sleep(0.5, 1)
-                            
-                            # Intentar seleccionar la opción usando el texto
-                            success = self.page.evaluate(f"""
-                                () => {{
-                                    const select = document.querySelector('#selCuaderno');
-                                    if (!select) return false;
-                                    
-                                    // Buscar la opción por texto
-                                    const options = Array.from(select.options);
-                                    const targetOption = options.find(opt => opt.textContent.trim() === '{texto}');
-                                    
-                                    if (!targetOption) {{
-                                        console.log('No se encontró la opción:', '{texto}');
-                                        return false;
-                                    }}
-                                    
-                                    // Cambiar el valor
-                                    select.value = targetOption.value;
-                                    
-                                    // Verificar si el cambio fue exitoso
-                                    if (select.value !== targetOption.value) {{
-                                        console.log('El cambio de valor falló');
-                                        return false;
-                                    }}
-                                    
-                                    // Disparar el evento change
-                                    select.dispatchEvent(new Event('change', {{ bubbles: true }}));
-                                    return true;
-                                }}
-                            """)
-                            
-                            if not success:
-                                raise Exception("No se pudo cambiar el valor del dropdown")
-                            
-                            # Esperar a que la tabla se actualice
-                            try:
-                                # Esperar a que la tabla tenga filas
-                                self.page.wait_for_selector("#historiaCiv table.table-bordered tbody tr", timeout=5000)
-                                
-                                # Verificar que la tabla tenga contenido
-                                rows = self.page.query_selector_all("#historiaCiv table.table-bordered tbody tr")
-                                if len(rows) > 0:
-                                    print(f"  Tabla actualizada con {len(rows)} filas")
-                                    break
-                                else:
-                                    raise Exception("La tabla está vacía")
-                            except Exception as e:
-                                if attempt == max_retries - 1:
-                                    raise e
-                                print(f"[WARN] Intento {attempt + 1} fallido al esperar la tabla: {str(e)}")
-                                random_sleep(1, 2)
-                                continue
-                                
-                        except Exception as e:
-                            if attempt == max_retries - 1:
-                                print(f"[ERROR] No se pudo seleccionar la opción después de {max_retries} intentos: {str(e)}")
-                                raise e
-                            print(f"[WARN] Intento {attempt + 1} fallido: {str(e)}")
-                            random_sleep(1, 2)                    
-                    
-                    # Obtener movimientos de la tabla
-                    movimientos = self.page.query_selector_all("#historiaCiv table.table-bordered tbody tr")
-                    print(f"[INFO] Se encontraron {len(movimientos)} movimientos en el cuaderno {texto}")
-                    
-                    # Fecha específica según el cuaderno
-                    fecha_objetivo = "27/06/2025" 
-                    
-                    #crear carpeta para el caratulado
-                    carpeta_caratulado = f"{carpeta_general}/{caratulado}"                                
-                    # Crear carpeta para el cuaderno con nombre limpio
-                    nombre_carpeta = f"Cuaderno_{texto_limpio}"
-                    carpeta_cuaderno = f"{carpeta_caratulado}/{nombre_carpeta}"
-                    
-                    for movimiento in movimientos:
-                        try:
-                            folio = movimiento.query_selector("td:nth-child(1)").inner_text().strip()
-                            fecha_tramite_str = movimiento.query_selector("td:nth-child(7)").inner_text().strip()
-                            # Manejar fechas con paréntesis
-                            if '(' in fecha_tramite_str:
-                                fecha_tramite_str = fecha_tramite_str.split('(')[0].strip()
-                            if fecha_tramite_str == fecha_objetivo:
-                                movimientos_nuevos = True
-                                if not os.path.exists(carpeta_cuaderno):
-                                    os.makedirs(carpeta_cuaderno)
-                                # Capturar panel de detalles
-                                try:
-                                    tribunal_td = None
-                                    print(f"  Intentando capturar panel de detalles para cuaderno {texto}...")
-                                    # Esperar a que el panel esté visible
-                                    panel = self.page.wait_for_selector("#modalDetalleMisCauCivil .modal-body .panel.panel-default", timeout=5000)
-                                    numero_causa = None
-                                    if panel:
-                                        # Extraer el número de causa del ROL
-                                        try:
-                                            rol_td = panel.query_selector("td:has-text('ROL:')")
-                                            if rol_td:
-                                                rol_text = rol_td.inner_text()
-                                                print(f"[INFO] Texto completo del ROL extraído: {rol_text}")
-                                        except Exception as rol_error:
-                                            print(f"[WARN] Error extrayendo el número de causa del ROL: {str(rol_error)}")
-
-                                        #extraer el tribunal
-                                        try:
-                                            tribunal_td = panel.query_selector("td:has-text('Tribunal:')")
-                                            if tribunal_td:
-                                                tribunal_text = tribunal_td.inner_text().replace("Tribunal:", "").strip()
-                                                print(f"[INFO] Texto limpio del Tribunal extraído: {tribunal_text}")
-                                        except Exception as tribunal_error:
-                                            print(f"[WARN] Error extrayendo el Tribunal: {str(tribunal_error)}")
-
-                                        # Intentar hacer scroll
-                                        self.page.evaluate("""
-                                            (element) => {
-                                                element.scrollIntoView({ behavior: 'smooth', block: 'center' });
-                                            }
-                                        """, panel)
-                                        random_sleep(1, 2)
-                                        # Intentar captura de pantalla
-                                        detalle_panel_path = f"{carpeta_cuaderno}/Detalle_causa_{numero_causa}_Cuaderno_{texto_limpio}.png" if numero_causa else f"{carpeta_cuaderno}/Detalle_causa_Cuaderno_{texto_limpio}.png"
-                                        try:
-                                            panel.screenshot(path=detalle_panel_path, timeout=10000)
-                                            print(f"[INFO] Captura del panel guardada: {detalle_panel_path}")
-                                        except Exception as screenshot_error:
-                                            print(f"[WARN] No se pudo tomar la captura del panel: {str(screenshot_error)}")
-                                            # Intentar captura alternativa usando JavaScript
-                                            try:
-                                                self.page.evaluate("""
-                                                    (element) => {
-                                                        const canvas = document.createElement('canvas');
-                                                        const context = canvas.getContext('2d');
-                                                        const rect = element.getBoundingClientRect();
-                                                        canvas.width = rect.width;
-                                                        canvas.height = rect.height;
-                                                        context.drawWindow(
-                                                            window,
-                                                            rect.left,
-                                                            rect.top,
-                                                            rect.width,
-                                                            rect.height,
-                                                            'rgb(255,255,255)'
-                                                        );
-                                                        return canvas.toDataURL();
-                                                    }
-                                                """, panel)
-                                                print("[INFO] Captura alternativa del panel realizada")
-                                            except Exception as js_error:
-                                                print(f"[WARN] No se pudo realizar la captura alternativa: {str(js_error)}")
-                                    else:
-                                        print(f"[WARN] No se pudo procesar el panel: {str(panel_error)}")
-                                except Exception as panel_error:
-                                    print(f"[WARN] No se pudo procesar el panel: {str(panel_error)}")
-                                
-                                # Crear carpeta Historia
-                                carpeta_historia = f"{carpeta_cuaderno}/Historia"
-                                if not os.path.exists(carpeta_historia):
-                                    os.makedirs(carpeta_historia)
-                                print(f"[INFO] Movimiento nuevo encontrado - Folio: {folio}, Fecha: {fecha_tramite_str}")
-                                # Buscar TODOS los formularios de PDF (form y certCivil)
-                                pdf_forms = movimiento.query_selector_all("form")
-                                # Filtrar solo los formularios que tienen inputs con tokens PDF
-                                pdf_forms_validos = []
-                                for form in pdf_forms:
-                                    if form.query_selector("input[name='dtaDoc']") or form.query_selector("input[name='dtaCert']"):
-                                        pdf_forms_validos.append(form)
-                                pdf_forms = pdf_forms_validos
-                                pdf_paths = []
-                                if pdf_forms:
-                                    print(f"[INFO] Se encontraron {len(pdf_forms)} documentos para el folio {folio}")
-                                    for doc_idx, pdf_form in enumerate(pdf_forms):
-                                        # Obtener el token según el tipo de formulario
-                                        token_input = pdf_form.query_selector("input[name='dtaDoc']")
-                                        if token_input:
-                                            token = token_input.get_attribute("value")
-                                            token_type = "dtaDoc"
-                                        else:
-                                            token_input = pdf_form.query_selector("input[name='dtaCert']")
-                                            if token_input:
-                                                token = token_input.get_attribute("value")
-                                                token_type = "dtaCert"
-                                            else:
-                                                print(f"[WARN] No se encontró token en formulario {doc_idx + 1}")
-                                                continue
-                                        
-                                        fecha_tramite_pdf = fecha_tramite_str[6:10] + fecha_tramite_str[3:5] + fecha_tramite_str[0:2]
-                                        # Extraer el texto del rol para el nombre del PDF
-                                        panel = self.page.query_selector("#modalDetalleMisCauCivil .modal-body .panel.panel-default")
-                                        rol_td = panel.query_selector("td:has-text('rol')") if panel else None
-                                        if rol_td:
-                                            rol_text = rol_td.inner_text()
-                                            rol_pdf = rol_text.replace("ROL: ", "").strip().replace("/", " ").replace("-", " ")
-                                        else:
-                                            rol_pdf = "sin rol"
-                                        
-                                        # Agregar sufijo para múltiples documentos y tipo de documento
-                                        doc_suffix = f"_doc{doc_idx + 1}" if len(pdf_forms) > 1 else ""
-                                        tipo_suffix = "_cert" if token_type == "dtaCert" else ""
-                                        # Nombre temporal antes de tener el resumen
-                                        pdf_filename_tmp = f"{carpeta_historia}/{fecha_tramite_pdf} {folio} {rol_pdf}{tipo_suffix}_temp.pdf"
-                                        preview_path = pdf_filename_tmp.replace('.pdf', '_preview.png')
-
-                                        if token:
-                                            # Determinar la URL base según el tipo de documento
-                                            action = pdf_form.get_attribute("action") or ""
-                                            if token_type == "dtaCert":
-                                                base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/civil/documentos/docCertificadoEscrito.php?dtaCert="
-                                            elif "docuS.php" in action:
-                                                base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/civil/documentos/docuS.php?dtaDoc="
-                                            else:
-                                                base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/civil/documentos/docuN.php?dtaDoc="
-                                            original_url = base_url + token
-                                            pdf_descargado = descargar_pdf_directo(original_url, pdf_filename_tmp, self.page)
-                                            if pdf_descargado:
-                                                resumen_pdf = extraer_resumen_pdf(pdf_filename_tmp)
-                                                print(f"[DEBUG] Resumen antes de limpiar: {resumen_pdf!r}")
-                                                resumen_pdf_limpio = limpiar_nombre_archivo(resumen_pdf)
-                                                print(f"[DEBUG] Resumen después de limpiar: {resumen_pdf_limpio!r}")
-
-                                                pdf_filename = f"{carpeta_historia}/{fecha_tramite_pdf} {folio} {rol_pdf}{tipo_suffix} {resumen_pdf_limpio}.pdf"
-                                                # Si hay múltiples documentos, agregar sufijo al nombre final
-                                                if len(pdf_forms) > 1:
-                                                    base_name, ext = os.path.splitext(pdf_filename)
-                                                    pdf_filename = f"{base_name}{doc_suffix}{ext}"
-                                                # Evitar sobrescribir archivos existentes
-                                                if os.path.exists(pdf_filename):
-                                                    print(f"[WARN] El archivo final {pdf_filename} ya existe. Se eliminará para evitar conflicto.")
-                                                    os.remove(pdf_filename)
-                                                # Limitar el nombre del archivo si es demasiado largo
-                                                max_filename_len = 156
-                                                base, ext = os.path.splitext(pdf_filename)
-                                                if len(pdf_filename) > max_filename_len:
-                                                    pdf_filename = base[:max_filename_len - len(ext)] + ext
-                                                #renombrar el archivo temporal al nombre final
-                                                try:
-                                                    os.rename(pdf_filename_tmp, pdf_filename)
-                                                except Exception as e:
-                                                    print(f"[WARN] No se pudo renombrar el archivo temporal: {pdf_filename_tmp} -> {pdf_filename} - {e}")
-                                                finally:
-                                                    if os.path.exists(pdf_filename_tmp):
-                                                        try:
-                                                            os.remove(pdf_filename_tmp)
-                                                            print(f"[INFO] Archivo temporal eliminado: {pdf_filename_tmp}")
-                                                        except Exception as e:
-                                                            print(f"[WARN] No se pudo eliminar el archivo temporal: {pdf_filename_tmp} - {e}")
-                                                pdf_paths.append(pdf_filename)
-                                                preview_path = pdf_filename.replace('.pdf', '_preview.png')
-                                                if not os.path.exists(preview_path):
-                                                    print(f"[INFO] Generando vista previa del PDF para {pdf_filename}...")
-                                                    generar_preview_pdf(pdf_filename, preview_path)
-                                else:
-                                    print(f"[WARN] No hay PDF disponible para el movimiento {folio}")
-
-                                # Usar la lista completa de PDFs
-                                # Crear y agregar el movimiento a la lista global 
-                                movimiento_pjud = MovimientoPJUD(
-                                    folio=folio,
-                                    seccion=tab_name,
-                                    caratulado=caratulado,
-                                    rol=rol_text,
-                                    fecha=fecha_tramite_str,
-                                    pdf_paths=pdf_paths,  # Pasar la lista completa de PDFs
-                                    tribunal=tribunal_text,
-                                    cuaderno=texto,  # Agregamos el nombre del cuaderno
-                                    historia_causa_cuaderno=texto  # Agregamos el cuaderno de historia para Civil
-                                )
-                                if agregar_movimiento_sin_duplicar(movimiento_pjud):
-                                    print(f"[INFO] Movimiento agregado exitosamente al diccionario global")
-                                else:
-                                    print(f"[INFO] El movimiento ya existía en el diccionario global")
-                            else:
-                                print(f"[INFO] Movimiento ignorado - Folio: {folio}, Fecha: {fecha_tramite_str} (no coincide con fecha objetivo)")
-                                
-                        except Exception as e:
-                            print(f"[ERROR] Error procesando movimiento: {str(e)}")
-                            continue
-                    
-                    # Cambiar a la pestaña Escritos por Resolver
-                    self.page.click('a[href="#escritosCiv"]')
-                    random_sleep(1, 2)
-                    self._procesar_escritos_por_resolver(tab_name, caratulado, carpeta_cuaderno, texto)
-                    
-                except Exception as e:
-                    print(f"[ERROR] Error procesando cuaderno {texto}: {str(e)}")
-                    continue
-            
-            return movimientos_nuevos
-            
-        except Exception as e:
-            print(f"[ERROR] Error al verificar movimientos nuevos: {str(e)}")
-            return False
-
-    def _procesar_escritos_por_resolver(self, tab_name, caratulado, carpeta_cuaderno, cuaderno_nombre):
-        """
-        Procesa la tabla de Escritos por Resolver en Civil y agrega nuevos movimientos.
-        """
-        try:
-            #Extraer ROL y Tribunal del panel de detalles
-            rol_text = None
-            tribunal_text = None
-            try:
-                panel = self.page.query_selector("#modalDetalleMisCauCivil .modal-body .panel.panel-default")
-                if panel:
-                    # Extraer ROL
-                    rol_td = panel.query_selector("td:has-text('ROL:')")
-                    if rol_td:
-                        rol_text = rol_td.inner_text().strip() 
-                    # Extraer Tribunal
-                    tribunal_td = panel.query_selector("td:has-text('Tribunal:')")
-                    if tribunal_td:
-                        tribunal_text = tribunal_td.inner_text().replace("Tribunal:", "").strip()
-            except Exception as e:
-                print(f"[WARN] No se pudo extraer ROL o Tribunal: {str(e)}")
-
-            # Asegura que la pestaña esté activa
-            self.page.click('a[href="#escritosCiv"]')
-            self.page.wait_for_selector('#escritosCiv.active.in', timeout=5000)
-            # Espera a que la tabla esté presente (aunque esté vacía)
-            self.page.wait_for_selector('#escritosCiv table.table-bordered tbody', timeout=5000, state="attached")
-            escritos = self.page.query_selector_all('#escritosCiv table.table-bordered tbody tr')
-            print(f"[INFO] Se encontraron {len(escritos)} escritos por resolver")
-            fecha_objetivo_escrito = "04/07/2025"
-            for escrito in escritos:
-                try:
-                    fecha_ingreso = escrito.query_selector("td:nth-child(3)").inner_text().strip()
-                    tipo_escrito = escrito.query_selector("td:nth-child(4)").inner_text().strip()
-                    solicitante = escrito.query_selector("td:nth-child(5)").inner_text().strip()
-                    pdf_forms = escrito.query_selector_all("form[name='formAneEsc']")
-                    pdf_paths = []
-                    if fecha_ingreso == fecha_objetivo_escrito:
-                        carpeta_escritos = f"{carpeta_cuaderno}/EscritosPorResolver"
-                        if not os.path.exists(carpeta_escritos):
-                            os.makedirs(carpeta_escritos, exist_ok=True)
-                        # Descargar PDFs si existen
-                        if pdf_forms:
-                            print(f"[INFO] Se encontraron {len(pdf_forms)} documentos para el escrito")
-                            for doc_idx, pdf_form in enumerate(pdf_forms):
-                                token = pdf_form.query_selector("input[name='dtaDoc']").get_attribute("value")
-                                fecha_ingreso_limpia = limpiar_nombre_archivo(fecha_ingreso.replace("/", "-"))
-                                tipo_escrito_limpio = limpiar_nombre_archivo(tipo_escrito)
-                                
-                                # Agregar sufijo para múltiples documentos
-                                doc_suffix = f"_doc{doc_idx + 1}" if len(pdf_forms) > 1 else ""
-                                pdf_filename_tmp = f"{carpeta_escritos}/{fecha_ingreso_limpia} {tipo_escrito_limpio}_temp.pdf"
-                                
-                                if token:
-                                    base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/civil/documentos/docuN.php?dtaDoc="
-                                    original_url = base_url + token
-                                    pdf_descargado = descargar_pdf_directo(original_url, pdf_filename_tmp, self.page)
-                                    if pdf_descargado:
-                                        resumen_pdf = extraer_resumen_pdf(pdf_filename_tmp)
-                                        resumen_pdf_limpio = limpiar_nombre_archivo(resumen_pdf)
-
-                                        # Formato fecha: AAAAMMDD
-                                        fecha_ingreso_pdf = fecha_ingreso[6:10] + fecha_ingreso[3:5] + fecha_ingreso[0:2]
-                                        # Formato rol: "ROL: V-82-2025" -> "V 82 2025"
-                                        rol_pdf = ""
-                                        if rol_text:
-                                            rol_pdf = limpiar_nombre_archivo(
-                                                rol_text.replace("ROL:", "").replace("-", " ").replace("/", " ").strip()
-                                            )
-                                        # Nombre final
-                                        pdf_filename = f"{carpeta_escritos}/{fecha_ingreso_pdf} {rol_pdf} {resumen_pdf_limpio}.pdf"
-                                        # Si hay múltiples documentos, agregar sufijo al nombre final
-                                        if len(pdf_forms) > 1:
-                                            base_name, ext = os.path.splitext(pdf_filename)
-                                            pdf_filename = f"{base_name}{doc_suffix}{ext}"
-
-                                        if os.path.exists(pdf_filename):
-                                            print(f"[WARN] El archivo final {pdf_filename} ya existe. Se eliminará para evitar conflicto.")
-                                            os.remove(pdf_filename)
-                                        max_filename_len = 156
-                                        base, ext = os.path.splitext(pdf_filename)
-                                        if len(pdf_filename) > max_filename_len:
-                                            pdf_filename = base[:max_filename_len - len(ext)] + ext
-                                        try:
-                                            os.rename(pdf_filename_tmp, pdf_filename)
-                                        except Exception as e:
-                                            print(f"[WARN] No se pudo renombrar el archivo temporal: {pdf_filename_tmp} -> {pdf_filename} - {e}")
-                                        finally:
-                                            if os.path.exists(pdf_filename_tmp):
-                                                try:
-                                                    os.remove(pdf_filename_tmp)
-                                                    print(f"[INFO] Archivo temporal eliminado: {pdf_filename_tmp}")
-                                                except Exception as e:
-                                                    print(f"[WARN] No se pudo eliminar el archivo temporal: {pdf_filename_tmp} - {e}")
-                                        pdf_paths.append(pdf_filename)
-                                        preview_path = pdf_filename.replace('.pdf', '_preview.png')
-                                        if not os.path.exists(preview_path):
-                                            print(f"[INFO] Generando vista previa del PDF para {pdf_filename}...")
-                                            generar_preview_pdf(pdf_filename, preview_path)
+                        // Eliminar todos los backdrops
+                        document.querySelectorAll('.modal-backdrop').forEach(backdrop => {
+                            if (backdrop.parentNode) {
+                                backdrop.parentNode.removeChild(backdrop);
+                            }
+                        });
                         
-                        # Agregar movimiento a la lista global con todos los PDFs
-                        movimiento_pjud = MovimientoPJUD(
-                            folio=None,
-                            seccion=tab_name,
-                            caratulado=caratulado,
-                            fecha=fecha_ingreso,
-                            pdf_paths=pdf_paths,  # Pasar la lista completa de PDFs
-                            historia_causa_cuaderno = cuaderno_nombre + ", Escritos por Resolver",
-                            rol=rol_text,          
-                            tribunal=tribunal_text 
-                        )
-                        if agregar_movimiento_sin_duplicar(movimiento_pjud):
-                            print(f"[INFO] Escrito por resolver agregado exitosamente al diccionario global")
-                        else:
-                            print(f"[INFO] El escrito ya existía en el diccionario global")
-                except Exception as e:
-                    print(f"[ERROR] Error procesando escrito por resolver: {str(e)}")
-                    continue
-        except Exception as e:
-            print(f"[WARN] No se pudo procesar la tabla de Escritos por Resolver: {str(e)}") 
-    
-    def _obtener_opciones_cuaderno(self):
-        """Obtiene todas las opciones del dropdown de cuadernos"""
-        try:
-            print("  Obteniendo opciones del dropdown de cuadernos...")
-            
-            # Esperar a que el dropdown esté visible
-            self.page.wait_for_selector('#selCuaderno', timeout=5000)
-            
-            # Obtener opciones usando JavaScript
-            opciones = self.page.evaluate("""
-                () => {
-                    const select = document.querySelector('#selCuaderno');
-                    if (!select) return [];
-                    
-                    return Array.from(select.options).map(option => ({
-                        numero: option.value,
-                        texto: option.textContent.trim(),
-                        es_seleccionado: option.selected
-                    }));
-                }
-            """)
-            
-            if not opciones:
-                print("  No se encontraron opciones en el dropdown")
-                return []
-                
-            print(f"  Se encontraron {len(opciones)} opciones en el dropdown")
-            return opciones
-            
-        except Exception as e:
-            print(f"  Error al obtener opciones del dropdown: {str(e)}")
-            return []
-
-#Aqui se maneja la navegacion en la pestaña Cobranza de Mis Causas
-class ControladorLupaCobranza(ControladorLupa):
-    def obtener_config(self):
-        return {
-            'lupa_selector': "#dtaTableDetalleMisCauCob a[href*='modalAnexoCausaCobranza']",
-            'modal_selector': "#modalDetalleMisCauCobranza",
-            'modal_title': "Detalle Causa",
-            'table_selector': "#historiaCob table.table-bordered",
-            'expected_headers': ['Folio', 'Doc.', 'Anexo', 'Etapa', 'Trámite', 'Desc. Trámite', 'Estado Firma', 'Fec. Trámite', 'Georeferencia'],
-            'process_content': True
-        }
-
-    def _procesar_contenido(self, tab_name, caratulado):
-        try:
-            print(f"[INFO] Procesando movimientos en Cobranza...")
-            
-            # Obtener opciones del dropdown
-            opciones_cuaderno = self._obtener_opciones_cuaderno()
-            if not opciones_cuaderno:
-                print("[WARN] No se pudieron obtener las opciones del cuaderno")
-                return False
-                
-            movimientos_nuevos = False
-            carpeta_general = tab_name.replace(' ', '_')
- 
-            # Procesar cada opción del dropdown
-            for opcion in opciones_cuaderno:
-                try:
-                    numero = opcion['numero']
-                    texto = opcion['texto']
-                    
-                    print(f"  Procesando cuaderno: {texto}")
-                    
-                    # Limpiar el texto para usarlo como nombre de carpeta
-                    texto_limpio = re.sub(r'[<>:"/\\|?*]', '_', texto)
-                    texto_limpio = texto_limpio[:50] 
-                    
-                    # Intentar seleccionar la opción en el dropdown con retry
-                    max_retries = 3
-                    for attempt in range(max_retries):
-                        try:
-                            # Esperar a que el dropdown esté visible y habilitado
-                            dropdown = self.page.wait_for_selector('#selCuadernoCob:not([disabled])', timeout=5000)
-                            if not dropdown:
-                                raise Exception("No se encontró el dropdown")
-                            
-                            # Hacer clic en el dropdown para abrirlo
-                            dropdown.click()
-                            random_sleep(0.5, 1)
-                            
-                            # Intentar seleccionar la opción usando el texto
-                            success = self.page.evaluate(f"""
-                                () => {{
-                                    const select = document.querySelector('#selCuadernoCob');
-                                    if (!select) return false;
-                                    
-                                    // Buscar la opción por texto
-                                    const options = Array.from(select.options);
-                                    const targetOption = options.find(opt => opt.textContent.trim() === '{texto}');
-                                    
-                                    if (!targetOption) {{
-                                        console.log('No se encontró la opción:', '{texto}');
-                                        return false;
-                                    }}
-                                    
-                                    // Seleccionar la opción
-                                    select.value = targetOption.value;
-                                    
-                                    // Disparar evento change
-                                    const event = new Event('change', {{ bubbles: true }});
-                                    select.dispatchEvent(event);
-                                    
-                                    return true;
-                                }}
-                            """)
-                            
-                            if not success:
-                                raise Exception(f"No se pudo seleccionar la opción: {texto}")
-                            
-                            # Esperar a que la tabla se actualice
-                            try:
-                                # Esperar a que la tabla tenga filas
-                                self.page.wait_for_selector("#historiaCob table.table-bordered tbody tr", timeout=5000)
-                                
-                                # Verificar que la tabla tenga contenido
-                                rows = self.page.query_selector_all("#historiaCob table.table-bordered tbody tr")
-                                if len(rows) > 0:
-                                    print(f"  Tabla actualizada con {len(rows)} filas")
-                                    break
-                                else:
-                                    raise Exception("La tabla está vacía")
-                            except Exception as e:
-                                if attempt == max_retries - 1:
-                                    raise e
-                                print(f"[WARN] Intento {attempt + 1} fallido al esperar la tabla: {str(e)}")
-                                random_sleep(1, 2)
-                                continue
-                                
-                        except Exception as e:
-                            if attempt == max_retries - 1:
-                                print(f"[ERROR] No se pudo seleccionar la opción después de {max_retries} intentos: {str(e)}")
-                                raise e
-                            print(f"[WARN] Intento {attempt + 1} fallido: {str(e)}")
-                            random_sleep(1, 2)                    
-                    
-                    # Obtener movimientos de la tabla
-                    movimientos = self.page.query_selector_all("#historiaCob table.table-bordered tbody tr")
-                    print(f"[INFO] Se encontraron {len(movimientos)} movimientos en el cuaderno {texto}")
-                    
-                    # Fecha específica según el cuaderno
-                    fecha_objetivo = "11/08/2006"
-                    
-                    for movimiento in movimientos:
-                        try:
-                            folio = movimiento.query_selector("td:nth-child(1)").inner_text().strip()
-                            fecha_tramite_str = movimiento.query_selector("td:nth-child(8)").inner_text().strip()
-                            # Manejar fechas con paréntesis
-                            if '(' in fecha_tramite_str:
-                                fecha_tramite_str = fecha_tramite_str.split('(')[0].strip()
-                            if fecha_tramite_str == fecha_objetivo:
-                                movimientos_nuevos = True
-                                #Crear carpeta Caratulado
-                                carpeta_caratulado = f"{carpeta_general}/{caratulado}"
-                                # Crear carpeta para el cuaderno con nombre limpio
-                                nombre_carpeta = f"Cuaderno_{texto_limpio}"
-                                carpeta_cuaderno = f"{carpeta_caratulado}/{nombre_carpeta}"
-                                if not os.path.exists(carpeta_cuaderno):
-                                    os.makedirs(carpeta_cuaderno)
-                                
-                                # Capturar panel de detalles
-                                try:
-                                    tribunal_td = None
-                                    print(f"  Intentando capturar panel de detalles para cuaderno {texto}...")
-                                    # Esperar a que el panel esté visible
-                                    panel = self.page.wait_for_selector("#modalDetalleMisCauCobranza .modal-body .panel.panel-default", timeout=5000)
-                                    numero_causa = None
-                                    if panel:
-                                        # Extraer el número de causa del RIT
-                                        try:
-                                            rit_td = panel.query_selector("td:has-text('RIT')")
-                                            if rit_td:
-                                                rit_text = rit_td.inner_text()
-                                                print(f"[INFO] Texto completo del RIT extraído: {rit_text}")
-
-                                        except Exception as rit_error:
-                                            print(f"[WARN] Error extrayendo el número de causa del RIT: {str(rit_error)}")
-                                        
-                                        #extraer el tribunal
-                                        try:
-                                            tribunal_td = panel.query_selector("td:has-text('Tribunal:')")
-                                            if tribunal_td:
-                                                tribunal_text = tribunal_td.inner_text().replace("Tribunal:", "").strip()
-                                                print(f"[INFO] Texto completo del Tribunal extraído: {tribunal_text}")
-                                        except Exception as tribunal_error:
-                                            print(f"[WARN] Error extrayendo el Tribunal: {str(tribunal_error)}")
-                                        
-                                        # Intentar hacer scroll
-                                        self.page.evaluate("""
-                                            (element) => {
-                                                element.scrollIntoView({ behavior: 'smooth', block: 'center' });
-                                            }
-                                        """, panel)
-                                        random_sleep(1, 2)
-                                        
-                                        # Guardar captura del panel
-                                        detalle_panel_path = f"{carpeta_cuaderno}/Detalle_causa_{numero_causa}_Cuaderno_{texto_limpio}.png" if numero_causa else f"{carpeta_cuaderno}/Detalle_causa_Cuaderno_{texto_limpio}.png"
-                                        panel.screenshot(path=detalle_panel_path)
-                                        print(f"[INFO] Captura del panel guardada: {detalle_panel_path}")
-                                    else:
-                                        print("[WARN] No se encontró el panel de información")
-                                except Exception as panel_error:
-                                    print(f"[WARN] No se pudo procesar el panel: {str(panel_error)}")
-                                
-                                # Crear carpeta Historia
-                                carpeta_historia = f"{carpeta_cuaderno}/Historia"
-                                if not os.path.exists(carpeta_historia):
-                                    os.makedirs(carpeta_historia)                                
-                                
-                                print(f"[INFO] Movimiento nuevo encontrado - Folio: {folio}, Fecha: {fecha_tramite_str}")
-                                # Buscar los formularios de PDF
-                                pdf_forms = movimiento.query_selector_all("form[name='frmDocH']")
-                                pdf_paths = []
-                                if pdf_forms:
-                                    print(f"[INFO] Se encontraron {len(pdf_forms)} documentos para el folio {folio}")
-                                    for doc_idx, pdf_form in enumerate(pdf_forms):
-                                        token = pdf_form.query_selector("input[name='dtaDoc']").get_attribute("value")
-                                        fecha_tramite_pdf = fecha_tramite_str[6:10] + fecha_tramite_str[3:5] + fecha_tramite_str[0:2]
-                                        # Extraer el texto del rol para el nombre del PDF
-                                        panel = self.page.query_selector("#modalDetalleMisCauCobranza .modal-body .panel.panel-default")                                       
-                                        rit_td = panel.query_selector("td:has-text('rit')") if panel else None
-                                        if rit_td:
-                                            rit_text = rit_td.inner_text()
-                                            rit_pdf = rit_text.replace("RIT: ", "").strip().replace("/", " ").replace("-", " ")
-                                        else:
-                                            rit_pdf = "sin rit"
-                                        
-                                        folio_limpio = limpiar_nombre_archivo(folio)[:10]
-                                        rit_pdf_limpio = limpiar_nombre_archivo(rit_pdf)[:20]
-                                        
-                                        # Agregar sufijo para múltiples documentos
-                                        doc_suffix = f"_doc{doc_idx + 1}" if len(pdf_forms) > 1 else ""
-                                        # Nombre temporal antes de tener el resumen
-                                        pdf_filename_tmp = f"{carpeta_historia}/{fecha_tramite_pdf} {folio_limpio} {rit_pdf_limpio}_temp.pdf"
-                                        preview_path = pdf_filename_tmp.replace('.pdf', '_preview.png')
-
-                                        if token:
-                                            base_url = "https://oficinajudicialvirtual.pjud.cl/misCausas/cobranza/documentos/docuCobranza.php?dtaDoc="
-                                            original_url = base_url + token
-                                            pdf_descargado = descargar_pdf_directo(original_url, pdf_filename_tmp, self.page)
-                                            if pdf_descargado:
-                                                resumen_pdf = extraer_resumen_pdf(pdf_filename_tmp)                                                                                
-                                                print(f"[DEBUG] Resumen antes de limpiar: {resumen_pdf!r}")
-                                                
-                                                # Limpiar y limitar el resumen a 40 caracteres
-                                                resumen_pdf_limpio = limpiar_nombre_archivo(resumen_pdf)[:40]
-                                                print(f"[DEBUG] Resumen después de limpiar: {resumen_pdf_limpio!r}")
-                                               
-                                                pdf_filename = f"{carpeta_historia}/{fecha_tramite_pdf} {folio_limpio} {rit_pdf_limpio} {resumen_pdf_limpio}.pdf"
-                                                # Si hay múltiples documentos, agregar sufijo al nombre final
-                                                if len(pdf_forms) > 1:
-                                                    base_name, ext = os.path.splitext(pdf_filename)
-                                                    pdf_filename = f"{base_name}{doc_suffix}{ext}"
-                                                # Evitar sobrescribir archivos existentes
-                                                if os.path.exists(pdf_filename):
-                                                    print(f"[WARN] El archivo final {pdf_filename} ya existe. Se eliminará para evitar conflicto.")
-                                                    os.remove(pdf_filename)                                            
-                                                # Limitar el nombre del archivo si es demasiado largo
-                                                max_filename_len = 156
-                                                base, ext = os.path.splitext(pdf_filename)
-                                                if len(pdf_filename) > max_filename_len:
-                                                    pdf_filename = base[:max_filename_len - len(ext)] + ext
-                                                #renombrar el archivo temporal al nombre final
-                                                try:
-                                                    os.rename(pdf_filename_tmp, pdf_filename)
-                                                except Exception as e:
-                                                    print(f"[WARN] No se pudo renombrar el archivo temporal: {pdf_filename_tmp} -> {pdf_filename} - {e}")
-                                                finally:
-                                                    if os.path.exists(pdf_filename_tmp):
-                                                        try:
-                                                            os.remove(pdf_filename_tmp)
-                                                            print(f"[INFO] Archivo temporal eliminado: {pdf_filename_tmp}")
-                                                        except Exception as e:
-                                                            print(f"[WARN] No se pudo eliminar el archivo temporal: {pdf_filename_tmp} - {e}")
-                                                pdf_paths.append(pdf_filename)
-                                                preview_path = pdf_filename.replace('.pdf', '_preview.png')
-
-                                                if not os.path.exists(preview_path):
-                                                    print(f"[INFO] Generando vista previa del PDF para {pdf_filename}...")
-                                                    generar_preview_pdf(pdf_filename, preview_path)
-                                else:
-                                    print(f"[WARN] No hay PDF disponible para el movimiento {folio}")
-                                
-                                # Usar el primer PDF como referencia principal para compatibilidad
-                                pdf_path = pdf_paths[0] if pdf_paths else None
-                                
-                                # Crear y agregar el movimiento a la lista global
-                                movimiento_pjud = MovimientoPJUD(
-                                    folio=folio,
-                                    seccion=tab_name,
-                                    caratulado=caratulado,
-                                    rit=rit_text,
-                                    tribunal=tribunal_text,
-                                    fecha=fecha_tramite_str,
-                                    pdf_path=pdf_path,
-                                    cuaderno=texto,  # Agregamos el nombre del cuaderno
-                                    historia_causa_cuaderno=texto  # Agregamos el cuaderno de historia para Cobranza
-                                )
-                                if agregar_movimiento_sin_duplicar(movimiento_pjud):
-                                    print(f"[INFO] Movimiento agregado exitosamente al diccionario global")
-                                else:
-                                    print(f"[INFO] El movimiento ya existía en el diccionario global")
-                            else:
-                                print(f"[INFO] Movimiento ignorado - Folio: {folio}, Fecha: {fecha_tramite_str} (no coincide con fecha objetivo)")
-                                
-                        except Exception as e:
-                            print(f"[ERROR] Error procesando movimiento: {str(e)}")
-                            continue
-                    
-                except Exception as e:
-                    print(f"[ERROR] Error procesando cuaderno {texto}: {str(e)}")
-                    continue
-            
-            return movimientos_nuevos
+                        return true;
+                    }
+                """)
+                # Esperar a que terminen de cerrarse los modales
+                await random_sleep(2, 3)
+        except Exception as modal_error:
+            log.error(f"Error al intentar cerrar modales antes del cambio de pestaña: {str(modal_error)}")
+        
+        # Pausa antes de cambiar de pestaña
+        await random_sleep(3, 5)
             
-        except Exception as e:
-            print(f"[ERROR] Error al verificar movimientos nuevos: {str(e)}")
-            return False
+        # Intentar encontrar y hacer clic en la pestaña
+        if not await abrir_pestana(page, tab_name):
+            return
         
-    #Obtiene todas las opciones del dropdown de cuadernos de Cobranza
-    def _obtener_opciones_cuaderno(self):
+        # Esperar a que cargue la pestaña
+        await random_sleep(2, 4)
         
-        try:
-            print("  Obteniendo opciones del dropdown de cuadernos de Cobranza...")
-            
-            # Esperar a que el dropdown esté visible y habilitado
-            dropdown = self.page.wait_for_selector('#selCuadernoCob:not([disabled])', timeout=5000)
-            if not dropdown:
-                raise Exception("No se encontró el dropdown")
-            
-            # Obtener opciones usando JavaScript
-            opciones = self.page.evaluate("""
-                () => {
-                    const select = document.querySelector('#selCuadernoCob');
-                    if (!select) return [];
-                    
-                    return Array.from(select.options).map(option => ({
-                        numero: option.value,
-                        texto: option.textContent.trim(),
-                        es_seleccionado: option.selected
-                    }));
-                }
-            """)
-            
-            if not opciones:
-                print("  No se encontraron opciones en el dropdown")
-                return []
+        # Ejecutar la función de búsqueda si está definida para esta pestaña
+        if tab_name in ESPECIFICACIONES_PESTANAS:
+            if not await lupa(page, {'tab_name': tab_name}):
+                log.error(f"Error al manejar la lupa de {tab_name}")
+            # El vigilante de memoria pudo reemplazar la página durante las lupas
+            page = VIGILANTE_MEMORIA.vigente(page)
                 
-            print(f"  Se encontraron {len(opciones)} opciones en el dropdown")
-            return opciones
-            
-        except Exception as e:
-            print(f"  Error al obtener opciones del dropdown: {str(e)}")
-            return []
-
-# Función para obtener el controlador de lupa correspondiente
-def obtener_controlador_lupa(tipo, page):
-    controladores = {
-        'suprema': ControladorLupaSuprema,
-        'apelaciones': ControladorLupaApelacionesPrincipal,
-        'apelaciones_principal': ControladorLupaApelacionesPrincipal,
-        'civil': ControladorLupaCivil,
-        'cobranza': ControladorLupaCobranza
-    }
-    controlador_clase = controladores.get(tipo)
-    if not controlador_clase:
-        raise ValueError(f"Tipo de lupa '{tipo}' no reconocido")
-    return controlador_clase(page)
-
-def lupa(page, config):
-    """
-    Función genérica para manejar clics en lupa y sus modales asociados
-    
-    Args:
-        page: La página de Playwright
-        config: Diccionario con la configuración específica:
-            - tipo: Tipo de lupa ('suprema', 'apelaciones', etc.)
-            - tab_name: Nombre de la pestaña actual
-    """
-    controlador = obtener_controlador_lupa(config['tipo'], page)
-    return controlador.manejar(config['tab_name'])
-
-# Mapeo de pestañas a tipo de lupa
-TIPO_LUPA_MAP = {
-    "Corte Suprema": "suprema",
-    "Corte Apelaciones": "apelaciones_principal",
-    "Civil": "civil",
-    "Cobranza": "cobranza"
-}
-
-#Navega por todas las pestañas en la sección Mis Causas
-def navigate_mis_causas_tabs(page):
-    print("\n--- Navegando por pestañas de Mis Causas ---")
-    
-    # Llevar un registro de las pestañas ya visitadas
-    visited_tabs = set()
-    
-    for tab_name in MIS_CAUSAS_TABS:
-        try:
-            print(f"  Navegando a pestaña '{tab_name}'...")
-            
-            # si ya se visitó la pagina se evita hacerlo de nuevo
-            if tab_name in visited_tabs:
-                print(f"  Pestaña '{tab_name}' ya fue visitada. Continuando...")
-                continue
-            
-            # Tratamiento especial para la pestaña "Corte Apelaciones" (se debe actualizar la pagina antes, si no, el modal de la causa queda inactivo)
-            if tab_name == "Corte Apelaciones":
-                print("  Implementando estrategia especial para Corte Apelaciones...")
-                
-                # Refrescar la página para asegurar un estado limpio
-                print("  Refrescando la página...")
-                page.reload()
-                random_sleep(3, 5)
-                
-                # Volver a navegar a Mis Causas
-                print("  Navegando de nuevo a 'Mis Causas'...")
-                try:
-                    # Intentar hacer clic mediante JavaScript
-                    page.evaluate("misCausas();")
-                    print("  Navegación a 'Mis Causas' mediante JS exitosa!")
-                except Exception as js_error:
-                    print(f"  Error al ejecutar JavaScript: {str(js_error)}")
-                    
-                    # Intento alternativo haciendo clic directamente en el elemento
-                    try:
-                        page.click("a:has-text('Mis Causas')")
-                        print("  Navegación a 'Mis Causas' mediante clic directo exitosa!")
-                    except Exception as click_error:
-                        print(f"  Error al hacer clic directo: {str(click_error)}")
-                        continue
+            # Esperamos un tiempo adicional después de procesar las lupas
+            await random_sleep(3, 5)
                 
-                # Esperar a que cargue la página
-                random_sleep(3, 5)
-            
-            # Antes de cambiar de pestaña, verificamos si hay modales abiertos y los cerramos
+            # Verificar si quedaron modales abiertos
             try:
-                any_modal_open = page.evaluate("""
+                any_modal_open = await page.evaluate("""
                     () => {
                         return !!document.querySelector('.modal.in, .modal[style*="display: block"]') || 
                                !!document.querySelector('.modal-backdrop') ||
@@ -2314,8 +2434,8 @@ def navigate_mis_causas_tabs(page):
                 """)
                 
                 if any_modal_open:
-                    print("  Se detectaron modales abiertos. Intentando cerrarlos antes de cambiar de pestaña...")
-                    page.evaluate("""
+                    log.warning("Quedaron modales abiertos después de procesar lupas. Intentando cerrarlos...")
+                    await page.evaluate("""
                         () => {
                             // Asegurar que no queden modales visibles
                             document.querySelectorAll('.modal.in, .modal[style*="display: block"]').forEach(modal => {
@@ -2337,160 +2457,263 @@ def navigate_mis_causas_tabs(page):
                         }
                     """)
                     # Esperar a que terminen de cerrarse los modales
-                    random_sleep(2, 3)
-            except Exception as modal_error:
-                print(f"  Error al intentar cerrar modales antes del cambio de pestaña: {str(modal_error)}")
+                    await random_sleep(2, 3)
+            except Exception as modal_check_error:
+                log.error(f"Error al verificar modales abiertos: {str(modal_check_error)}")
             
-            # Pausa antes de cambiar de pestaña
-            random_sleep(3, 5)
-                
-            # Intentar encontrar y hacer clic en la pestaña
+        # Pausa después de procesar cada pestaña
+        await random_sleep(3, 5)
+
+        
+    except Exception as e:
+        log.error(f"Error navegando a pestaña '{tab_name}': {str(e)}")
+    finally:
+        cerrar_contexto(contexto_pestana)
+        TRAZADOR.cerrar(span_pestana)
+
+#Páginas que recorren pestañas al mismo tiempo. Por defecto una pestaña a la vez: varias páginas
+#con la misma sesión solo se han medido contra el portal simulado (PJUD_PAGINAS_PARALELAS=2 lo activa)
+MAX_PAGINAS_PARALELAS = max(1, int(os.getenv("PJUD_PAGINAS_PARALELAS", "1")))
+
+#Navega por todas las pestañas en la sección Mis Causas. Hasta MAX_PAGINAS_PARALELAS pestañas
+#avanzan a la vez, cada una en su propia página del mismo contexto (misma sesión)
+async def navigate_mis_causas_tabs(page):
+    log.info("--- Navegando por pestañas de Mis Causas ---")
+    url_ojv = page.url
+    paginas_libres = [page]
+    paginas_extra = []
+    semaforo = asyncio.Semaphore(MAX_PAGINAS_PARALELAS)
+
+    #Abre una página nueva del mismo contexto (misma sesión) en Mis Causas
+    async def abrir_pagina():
+        nueva = await page.context.new_page()
+        paginas_extra.append(nueva)
+        await nueva.goto(url_ojv)
+        await navigate_to_mis_causas(nueva)
+        return nueva
+
+    #Toma una página libre o abre una nueva
+    async def tomar_pagina():
+        if paginas_libres:
+            return paginas_libres.pop()
+        return await abrir_pagina()
+
+    #Página para una pestaña: la precargada, una propia abierta en su turno o una libre
+    async def pagina_para(tab_name):
+        if tab_name in paginas_propias:
+            return await paginas_propias[tab_name]
+        if ESPECIFICACIONES_PESTANAS.get(tab_name, {}).get('pagina_propia'):
+            return await abrir_pagina()
+        return await tomar_pagina()
+
+    async def recorrer(tab_name):
+        async with semaforo:
+            TRAZADOR.nuevo_carril()
             try:
-                # Primero intentar con el texto exacto
-                page.click(f"a:has-text('{tab_name}')")
-            except:
-                try:
-                    # Si falla, intentar con una coincidencia más flexible
-                    page.click(f"a:has-text('{tab_name}', 'i')")
-                except:
-                    print(f"  No se pudo encontrar la pestaña '{tab_name}'. Continuando...")
-                    continue
-            
-            print(f"  Clic exitoso en pestaña '{tab_name}'")
-            
-            # Registrar que hemos visitado esta pestaña
-            visited_tabs.add(tab_name)
-            
-            # Esperar a que cargue la pestaña
-            random_sleep(2, 4)
-            
-            # Ejecutar la función de búsqueda si está definida para esta pestaña
-            tipo_lupa = TIPO_LUPA_MAP.get(tab_name)
-            if tipo_lupa:
-                if not lupa(page, {'tipo': tipo_lupa, 'tab_name': tab_name}):
-                    print(f"  Error al manejar la lupa de {tab_name}")
-                    
-                # Esperamos un tiempo adicional después de procesar las lupas
-                random_sleep(3, 5)
-                    
-                # Verificar si quedaron modales abiertos
-                try:
-                    any_modal_open = page.evaluate("""
-                        () => {
-                            return !!document.querySelector('.modal.in, .modal[style*="display: block"]') || 
-                                   !!document.querySelector('.modal-backdrop') ||
-                                   document.body.classList.contains('modal-open');
-                        }
-                    """)
-                    
-                    if any_modal_open:
-                        print("  ALERTA: Quedaron modales abiertos después de procesar lupas. Intentando cerrarlos...")
-                        page.evaluate("""
-                            () => {
-                                // Asegurar que no queden modales visibles
-                                document.querySelectorAll('.modal.in, .modal[style*="display: block"]').forEach(modal => {
-                                    modal.style.display = 'none';
-                                    modal.classList.remove('in');
-                                });
-                                
-                                // Asegurar que el body no tenga la clase modal-open
-                                document.body.classList.remove('modal-open');
-                                
-                                // Eliminar todos los backdrops
-                                document.querySelectorAll('.modal-backdrop').forEach(backdrop => {
-                                    if (backdrop.parentNode) {
-                                        backdrop.parentNode.removeChild(backdrop);
-                                    }
-                                });
-                                
-                                return true;
-                            }
-                        """)
-                        # Esperar a que terminen de cerrarse los modales
-                        random_sleep(2, 3)
-                except Exception as modal_check_error:
-                    print(f"  Error al verificar modales abiertos: {str(modal_check_error)}")
-                
-            # Pausa después de procesar cada pestaña
-            random_sleep(3, 5)
-            
-        except Exception as e:
-            print(f"  Error navegando a pestaña '{tab_name}': {str(e)}")
-            # Si ocurre un error, intentamos seguir con la siguiente pestaña
-            continue    
-    print("--- Finalizada navegación por pestañas de Mis Causas ---\n")
+                pagina = await pagina_para(tab_name)
+            except Exception as e:
+                log.error(f"No se pudo preparar una página para la pestaña '{tab_name}': {str(e)}")
+                return
+            try:
+                await procesar_pestana(pagina, tab_name)
+            finally:
+                paginas_libres.append(VIGILANTE_MEMORIA.vigente(pagina))
+
+    # dict.fromkeys: cada pestaña se visita una sola vez, en el orden de MIS_CAUSAS_TABS
+    pestanas = []
+    for tab_name in dict.fromkeys(MIS_CAUSAS_TABS):
+        if PUNTO_CONTROL.pestana_completa(tab_name):
+            log.info(f"Pestaña '{tab_name}' ya procesada en la ejecución anterior")
+        else:
+            pestanas.append(tab_name)
+
+    # Con páginas en paralelo, las pestañas con página propia (Corte Apelaciones) la cargan en
+    # segundo plano mientras se recorren las demás. Con una sola página la abren en su turno:
+    # precargarla pondría dos páginas activas sobre la misma sesión del portal
+    paginas_propias = {}
+    if MAX_PAGINAS_PARALELAS > 1:
+        paginas_propias = {tab_name: asyncio.create_task(abrir_pagina()) for tab_name in pestanas
+                           if ESPECIFICACIONES_PESTANAS.get(tab_name, {}).get('pagina_propia')}
+    await asyncio.gather(*(recorrer(tab_name) for tab_name in pestanas))
+    for pagina in paginas_extra:
+        await VIGILANTE_MEMORIA.vigente(pagina).close()
+    log.info("--- Finalizada navegación por pestañas de Mis Causas ---")
+
+#Imprime el resumen de movimientos y envía el correo con el resultado de la ejecución
+async def informar_movimientos():
+    # Las pestañas terminan en cualquier orden; el correo mantiene el orden de MIS_CAUSAS_TABS
+    pestanas = list(dict.fromkeys(MIS_CAUSAS_TABS))
+    MOVIMIENTOS_GLOBALES.sort(key=lambda m: pestanas.index(m.seccion) if m.seccion in pestanas else len(pestanas))
+
+    print("\n=== RESUMEN DE MOVIMIENTOS ENCONTRADOS ===")
+    for idx, movimiento in enumerate(MOVIMIENTOS_GLOBALES, 1):
+        print(f"\nMovimiento {idx}:")
+        print(f"  Folio: {movimiento.folio}")
+        print(f"  Instancia: {movimiento.seccion}")
+        print(f"  Caratulado: {movimiento.caratulado}")
+        print(f"  {movimiento.identificador_causa or 'No disponible'}")
+        print(f"  Fecha: {movimiento.fecha}")
+        print(f"  PDF: {'Sí' if movimiento.tiene_pdf() else 'No'}")
+        if movimiento.tiene_pdf():
+            if len(movimiento.pdf_paths) == 1:
+                print(f"  Ruta PDF: {movimiento.pdf_paths[0]}")
+            else:
+                print(f"  PDFs ({len(movimiento.pdf_paths)}):")
+                for i, pdf_path in enumerate(movimiento.pdf_paths, 1):
+                    print(f"    {i}. {pdf_path}")
+    print("\n===========================================\n")
+
+    if not ENVIAR_CORREO:
+        log.info("Correo desactivado; el resultado queda solo en el resumen")
+        PUNTO_CONTROL.finalizar()
+        return True
+
+    # Enviar correo solo en dos casos: si hay o no hay movimientos nuevos
+    with TRAZADOR.span("enviar_correo", "correo", movimientos=len(MOVIMIENTOS_GLOBALES)):
+        if MOVIMIENTOS_GLOBALES:
+            asunto = f"Nuevos movimientos en el Poder Judicial"
+            correo_enviado = await asyncio.to_thread(enviar_correo, MOVIMIENTOS_GLOBALES, asunto)
+        else:
+            correo_enviado = await asyncio.to_thread(enviar_correo, asunto="No hay nuevos movimientos en el Poder Judicial")
 
+    # Solo una ejecución completa informada por correo cuenta como punto de partida de la próxima
+    # ventana; si el correo falla, el punto de control queda y la próxima ejecución solo reintenta el envío
+    if correo_enviado:
+        if not seleccion_parcial():
+            registrar_ejecucion_exitosa()
+        PUNTO_CONTROL.finalizar()
+    return bool(correo_enviado)
 
-#Función principal del flujo PJUD
-def automatizar_poder_judicial(page, username, password):
+
+#Función principal del flujo PJUD (corrutina; la página ya debe estar creada). Con "sesion"
+#(modo servicio) se reutiliza la sesión guardada en sesion['url'] si sigue vigente y, tras un
+#login, se guarda ahí la dirección de la Oficina Judicial Virtual
+async def automatizar_poder_judicial_async(page, username, password, sesion=None):
     try:
-        print("\n=== INICIANDO AUTOMATIZACIÓN DEL PODER JUDICIAL ===\n")
+        log.info("=== INICIANDO AUTOMATIZACIÓN DEL PODER JUDICIAL ===")
         
         # Limpiar la lista global de movimientos
         MOVIMIENTOS_GLOBALES.clear()
+
+        # Retomar una ejecución interrumpida con los movimientos que ya había encontrado
+        if PUNTO_CONTROL.iniciar(PUNTO_CONTROL_PATH, clave_ejecucion(), REANUDAR_EJECUCION):
+            for movimiento in PUNTO_CONTROL.movimientos():
+                agregar_movimiento_sin_duplicar(movimiento)
+            if not PUNTO_CONTROL.pestanas_pendientes(MIS_CAUSAS_TABS):
+                log.info("Todas las pestañas ya estaban procesadas; solo falta informar el resultado")
+                return await informar_movimientos()
         
-        # Abrir la página principal
-        print("Accediendo a la página principal de PJUD...")
-        page.goto(BASE_URL_PJUD)
-        
-        # Esperar y hacer clic en "Todos los servicios"
-        print("Buscando botón 'Todos los servicios'...")
-        page.click("button:has-text('Todos los servicios')")
-        
-        # Esperar y hacer clic en "Clave Única"
-        print("Buscando opción 'Clave Única'...")
-        page.click("a:has-text('Clave Única')")
-        
-        # Llama a la función de login
-        login_success = login(page, username, password)
+        if sesion is not None and await sesion_vigente(page, sesion.get('url')):
+            log.info("Sesión de la ejecución anterior vigente; se omite el login")
+            login_success = True
+        else:
+            # Abrir la página principal
+            log.info("Accediendo a la página principal de PJUD...")
+            await page.goto(BASE_URL_PJUD)
+            
+            # Esperar y hacer clic en "Todos los servicios"
+            log.info("Buscando botón 'Todos los servicios'...")
+            await page.click("button:has-text('Todos los servicios')")
+            
+            # Esperar y hacer clic en "Clave Única"
+            log.info("Buscando opción 'Clave Única'...")
+            await page.click("a:has-text('Clave Única')")
+            
+            # Llama a la función de login
+            login_success = await login(page, username, password)
+            if login_success:
+                # Dar un tiempo para que la página principal se cargue completamente
+                await random_sleep(2, 4)
+                if sesion is not None:
+                    sesion['url'] = page.url
     
         if login_success:
-            print("Login completado con éxito")
-            
-            # Dar un tiempo para que la página principal se cargue completamente
-            random_sleep(2, 4)
+            log.info("Login completado con éxito")
             
             # 1. Navegar a Mis Causas
-            mis_causas_success = navigate_to_mis_causas(page)
+            mis_causas_success = await navigate_to_mis_causas(page)
             
             if mis_causas_success:
                 # Navegar por las pestañas de Mis Causas
-                navigate_mis_causas_tabs(page)
-                
-                print("\n=== RESUMEN DE MOVIMIENTOS ENCONTRADOS ===")
-                for idx, movimiento in enumerate(MOVIMIENTOS_GLOBALES, 1):
-                    print(f"\nMovimiento {idx}:")
-                    print(f"  Folio: {movimiento.folio}")
-                    print(f"  Instancia: {movimiento.seccion}")
-                    print(f"  Caratulado: {movimiento.caratulado}")
-                    print(f"  {movimiento.identificador_causa or 'No disponible'}")
-                    print(f"  Fecha: {movimiento.fecha}")
-                    print(f"  PDF: {'Sí' if movimiento.tiene_pdf() else 'No'}")
-                    if movimiento.tiene_pdf():
-                        if len(movimiento.pdf_paths) == 1:
-                            print(f"  Ruta PDF: {movimiento.pdf_paths[0]}")
-                        else:
-                            print(f"  PDFs ({len(movimiento.pdf_paths)}):")
-                            for i, pdf_path in enumerate(movimiento.pdf_paths, 1):
-                                print(f"    {i}. {pdf_path}")
-                print("\n===========================================\n")
-
-                # Enviar correo solo en dos casos: si hay o no hay movimientos nuevos
-                if MOVIMIENTOS_GLOBALES:
-                    asunto = f"Nuevos movimientos en el Poder Judicial"
-                    enviar_correo(MOVIMIENTOS_GLOBALES, asunto)
-                else:
-                    enviar_correo(asunto="No hay nuevos movimientos en el Poder Judicial")
-                
-                return True
+                await navigate_mis_causas_tabs(page)
+
+                # Con pestañas sin terminar se conserva el punto de control y el correo se envía
+                # una sola vez, cuando una próxima ejecución completa el resultado
+                pendientes = PUNTO_CONTROL.pestanas_pendientes(MIS_CAUSAS_TABS)
+                if pendientes and PUNTO_CONTROL.puede_reintentar():
+                    log.warning(f"Pestañas sin terminar: {', '.join(pendientes)}. Vuelva a ejecutar para retomar desde el punto de control")
+                    return False
+                return await informar_movimientos()
             else:
-                print("No se pudo completar el proceso de login")
+                log.warning("No se pudo completar el proceso de login")
                 return False
                 
     except Exception as e:
-        print(f"Error en la automatización del Poder Judicial: {str(e)}")
+        log.error(f"Error en la automatización del Poder Judicial: {str(e)}")
         return False
 
+#Abre el navegador, ejecuta el flujo completo y cierra el navegador
+async def ejecutar_automatizacion(username, password):
+    from playwright.async_api import async_playwright
+
+    async with async_playwright() as playwright:
+        log.info("Iniciando navegador...")
+        browser, page = await setup_browser(playwright)
+        try:
+            with TRAZADOR.span("automatizar_poder_judicial", "ejecucion"):
+                return await automatizar_poder_judicial_async(page, username, password)
+        finally:
+            log.info("Cerrando el navegador...")
+            await browser.close()
+
+#Punto de entrada síncrono del flujo PJUD
+def automatizar_poder_judicial(username, password):
+    # Configuración del logging: escritura en segundo plano, texto y eventos JSON con pestaña/causa
+    configurar_registro('email_sender.log', 'pjud_eventos.jsonl')
+    return asyncio.run(ejecutar_automatizacion(username, password))
+
+#Navegador que se conserva entre ejecuciones (modo servicio, servicio.py): la primera ejecución
+#lo abre e inicia sesión; las siguientes reutilizan la página mientras la sesión siga vigente.
+#Todas las ejecuciones deben correr en el mismo event loop
+class NavegadorPersistente:
+    def __init__(self):
+        self.playwright = None
+        self.browser = None
+        self.page = None
+        self.sesion = {}
+
+    def abierto(self):
+        return self.page is not None and not self.page.is_closed()
+
+    async def abrir(self):
+        from playwright.async_api import async_playwright
+
+        await self.cerrar()
+        log.info("Iniciando navegador...")
+        self.playwright = await async_playwright().start()
+        self.browser, self.page = await setup_browser(self.playwright)
+
+    async def ejecutar(self, username, password):
+        if not self.abierto():
+            await self.abrir()
+        with TRAZADOR.span("automatizar_poder_judicial", "ejecucion"):
+            resultado = await automatizar_poder_judicial_async(self.page, username, password, self.sesion)
+        # La página pudo reciclarse por memoria durante la ejecución
+        self.page = VIGILANTE_MEMORIA.vigente(self.page)
+        return resultado
+
+    async def cerrar(self):
+        if self.browser:
+            log.info("Cerrando el navegador...")
+            try:
+                await self.browser.close()
+            except Exception as e:
+                log.debug("El navegador ya estaba cerrado: %s", e)
+        if self.playwright:
+            await self.playwright.stop()
+        self.playwright = self.browser = self.page = None
+        self.sesion = {}
+
 def limpiar_identificador(texto):
     if not texto:
         return ""
@@ -2528,6 +2751,9 @@ def construir_cuerpo_html(movimientos, imagenes_cid=None):
                 .movimiento ul { list-style-type: none; padding-left: 0; }
                 .movimiento li { margin-bottom: 10px; }
                 .movimiento strong { color: #555; }
+                .detalle-causa { border-collapse: collapse; margin: 0 auto 15px auto; }
+                .detalle-causa th, .detalle-causa td { border: 1px solid #ccc; padding: 4px 8px; text-align: left; font-size: 13px; }
+                .detalle-causa th { background: #f2f2f2; color: #555; }
             </style>
         </head>
         <body>
@@ -2547,12 +2773,18 @@ def construir_cuerpo_html(movimientos, imagenes_cid=None):
                     <h2 style="text-align: center;">{identificador_limpio}, {mov.caratulado}{', ' + mov.corte if mov.corte else (', ' + mov.tribunal if mov.tribunal else '')}:</h2>
             """
             
+            # Detalle de la causa extraído del panel, en lugar de la captura de pantalla
+            if mov.detalle_causa:
+                html += '<table class="detalle-causa">'
+                for campo, valor in mov.detalle_causa.items():
+                    html += f"<tr><th>{campo}</th><td>{valor}</td></tr>"
+                html += '</table>'
+
             # Insertar imágenes preview para todos los PDFs
             if imagenes_cid and mov.tiene_pdf():
                 for pdf_path in mov.pdf_paths:
-                    preview_path = pdf_path.replace('.pdf', '_preview.png')
-                    if preview_path in imagenes_cid:
-                        html += f'<div style="text-align: center;"><img src="cid:{imagenes_cid[preview_path]}" style="max-width:600px;display:block;margin:0 auto 10px auto;"></div>'
+                    if pdf_path in imagenes_cid:
+                        html += f'<div style="text-align: center;"><img src="cid:{imagenes_cid[pdf_path]}" style="max-width:600px;display:block;margin:0 auto 10px auto;"></div>'
             
             html += f"""
                     <ul>
@@ -2627,12 +2859,10 @@ def construir_cuerpo_html(movimientos, imagenes_cid=None):
 
 #Envía un correo electrónico con archivos adjuntos
 def enviar_correo(movimientos=None, asunto="Notificación de Sistema de Poder Judicial"):
-    from email.mime.image import MIMEImage  # por si no está arriba
-
     try:
         # Verificar credenciales
         if not all([EMAIL_SENDER, EMAIL_PASSWORD, EMAIL_RECIPIENTS]):
-            logging.error("Faltan credenciales de correo electrónico")
+            log.error("Faltan credenciales de correo electrónico")
             return False
 
         msg = MIMEMultipart()
@@ -2640,25 +2870,32 @@ def enviar_correo(movimientos=None, asunto="Notificación de Sistema de Poder Ju
         msg['To'] = ", ".join(EMAIL_RECIPIENTS)
         msg['Subject'] = asunto
 
-        # Adjuntar imágenes preview como inline y PDFs/archivos como adjuntos
+        # Previews solo de los PDF que van en este correo, generados en paralelo (los ya generados se reutilizan)
+        pdfs_correo = [pdf_path for movimiento in movimientos or [] if movimiento.tiene_pdf() for pdf_path in movimiento.pdf_paths]
+        previews = dict(zip(pdfs_correo, EJECUTOR_DOCUMENTOS.map(preview_para_correo, pdfs_correo)))
+
+        # Adjuntar imágenes preview como inline y PDFs/archivos como adjuntos (imagenes_cid: PDF -> cid)
         imagenes_cid = {}
+        bytes_previews = 0
         if movimientos:
             for movimiento in movimientos:
                 # Adjuntar imágenes preview como inline para todos los PDFs
                 if movimiento.tiene_pdf():
                     for pdf_path in movimiento.pdf_paths:
-                        preview_path = pdf_path.replace('.pdf', '_preview.png')
-                        if os.path.exists(preview_path):
+                        preview_path = previews.get(pdf_path)
+                        if preview_path and os.path.exists(preview_path):
                             cid = str(uuid.uuid4())
-                            imagenes_cid[preview_path] = cid
+                            imagenes_cid[pdf_path] = cid
                             try:
                                 with open(preview_path, 'rb') as img:
-                                    img_part = MIMEImage(img.read(), _subtype="png")
+                                    datos = img.read()
+                                    img_part = MIMEImage(datos, _subtype="png" if preview_path.endswith('.png') else "jpeg")
                                     img_part.add_header('Content-ID', f'<{cid}>')
                                     img_part.add_header('Content-Disposition', 'inline', filename=os.path.basename(preview_path))
                                     msg.attach(img_part)
+                                    bytes_previews += len(datos)
                             except Exception as e:
-                                logging.error(f"Error adjuntando imagen inline {preview_path}: {str(e)}")
+                                log.error(f"Error adjuntando imagen inline {preview_path}: {str(e)}")
                 
                 # Adjuntar todos los PDFs si existen
                 if movimiento.tiene_pdf():
@@ -2669,7 +2906,7 @@ def enviar_correo(movimientos=None, asunto="Notificación de Sistema de Poder Ju
                                 part['Content-Disposition'] = f'attachment; filename="{os.path.basename(pdf_path)}"'
                                 msg.attach(part)
                         except Exception as e:
-                            logging.error(f"Error adjuntando archivo {pdf_path}: {str(e)}")
+                            log.error(f"Error adjuntando archivo {pdf_path}: {str(e)}")
                 # Adjuntar archivos de apelaciones si existen
                 if movimiento.archivos_apelaciones:
                     for archivo_apelacion in movimiento.archivos_apelaciones:
@@ -2679,7 +2916,10 @@ def enviar_correo(movimientos=None, asunto="Notificación de Sistema de Poder Ju
                                 part['Content-Disposition'] = f'attachment; filename="{os.path.basename(archivo_apelacion)}"'
                                 msg.attach(part)
                         except Exception as e:
-                            logging.error(f"Error adjuntando archivo de apelación {archivo_apelacion}: {str(e)}")
+                            log.error(f"Error adjuntando archivo de apelación {archivo_apelacion}: {str(e)}")
+
+        if imagenes_cid:
+            log.info(f"{len(imagenes_cid)} previews en el correo ({bytes_previews // 1024} KB)")
 
         # Construir cuerpo HTML con los movimientos y los cid de las imágenes
         html_cuerpo = construir_cuerpo_html(movimientos, imagenes_cid)
@@ -2694,22 +2934,86 @@ def enviar_correo(movimientos=None, asunto="Notificación de Sistema de Poder Ju
                     server.starttls()
                     server.login(EMAIL_SENDER, EMAIL_PASSWORD)
                     server.send_message(msg)
-                logging.info("Correo enviado exitosamente")
+                log.info("Correo enviado exitosamente")
                 return True
             except Exception as e:
                 if intento < max_intentos - 1:
-                    logging.warning(f"Intento {intento + 1} fallido. Reintentando...")
+                    log.warning(f"Intento {intento + 1} fallido. Reintentando...")
                     time.sleep(5)
                 else:
-                    logging.error(f"Error enviando correo después de {max_intentos} intentos: {str(e)}")
+                    log.error(f"Error enviando correo después de {max_intentos} intentos: {str(e)}")
                     return False
 
     except Exception as e:
-        logging.error(f"Error general en envío de correo: {str(e)}")
+        log.error(f"Error general en envío de correo: {str(e)}")
         return False
     
+#Acepta el nombre de una pestaña sin distinguir mayúsculas ("civil", "corte suprema")
+def pestana_argumento(texto):
+    for tab_name in ESPECIFICACIONES_PESTANAS:
+        if tab_name.casefold() == texto.strip().casefold():
+            return tab_name
+    raise argparse.ArgumentTypeError(f"pestaña desconocida '{texto}' (disponibles: {', '.join(ESPECIFICACIONES_PESTANAS)})")
+
+def fecha_argumento(texto):
+    fecha = parsear_fecha(texto)
+    if not fecha:
+        raise argparse.ArgumentTypeError(f"fecha inválida '{texto}' (formato dd/mm/yyyy)")
+    return fecha
+
+#Opciones de una ejecución (selección, fechas, navegador y pausas); las usa también benchmark_ojv.py
+def agregar_argumentos_ejecucion(parser):
+    parser.add_argument("--pestanas", nargs="+", type=pestana_argumento, metavar="PESTANA",
+                        help=f"pestañas de Mis Causas a revisar (por defecto {', '.join(PESTANAS_VERIFICADAS)})")
+    parser.add_argument("--max-causas", type=int, metavar="N", help="causas revisadas como máximo en cada pestaña")
+    parser.add_argument("--fecha", type=fecha_argumento, help="revisar los movimientos de este día dd/mm/yyyy en vez de hoy")
+    parser.add_argument("--desde", type=fecha_argumento, help="inicio de la ventana dd/mm/yyyy (PJUD_FECHA_DESDE)")
+    parser.add_argument("--hasta", type=fecha_argumento, help="fin de la ventana dd/mm/yyyy, por defecto hoy (PJUD_FECHA_HASTA)")
+    parser.add_argument("--desde-ultima", action="store_true", help="ventana desde la última ejecución exitosa (PJUD_VENTANA=desde_ultima)")
+    parser.add_argument("--con-interfaz", dest="headless", action="store_false", default=NAVEGADOR_HEADLESS,
+                        help="mostrar el navegador (PJUD_HEADLESS=0)")
+    parser.add_argument("--sin-interfaz", dest="headless", action="store_true", help="navegador sin interfaz gráfica")
+    parser.add_argument("--pausas", choices=list(PERFILES_PAUSAS), default=PERFIL_PAUSAS,
+                        help="perfil de pausas aleatorias entre acciones (PJUD_PAUSAS)")
+    parser.add_argument("--sin-correo", action="store_true", help="imprimir el resultado sin enviar el correo")
+
+#Aplica las opciones de agregar_argumentos_ejecucion; sin opciones de fecha se usa el entorno
+def configurar_desde_argumentos(parser, args):
+    global MAX_CAUSAS_POR_PESTANA, NAVEGADOR_HEADLESS, FACTOR_PAUSAS, ENVIAR_CORREO
+    if args.fecha and (args.desde or args.hasta or args.desde_ultima):
+        parser.error("--fecha no se combina con --desde, --hasta ni --desde-ultima")
+    if args.hasta and not (args.desde or args.desde_ultima):
+        parser.error("--hasta requiere --desde o --desde-ultima")
+    if args.desde and args.hasta and args.desde > args.hasta:
+        parser.error("--desde debe ser anterior o igual a --hasta")
+    if args.max_causas is not None and args.max_causas < 1:
+        parser.error("--max-causas debe ser al menos 1")
+
+    if args.pestanas:
+        MIS_CAUSAS_TABS[:] = args.pestanas
+        sin_verificar = [tab for tab in args.pestanas if tab not in PESTANAS_VERIFICADAS]
+        if sin_verificar:
+            log.warning(f"Selectores sin comprobar contra el portal: {', '.join(sin_verificar)}")
+    MAX_CAUSAS_POR_PESTANA = args.max_causas
+    NAVEGADOR_HEADLESS = args.headless
+    FACTOR_PAUSAS = PERFILES_PAUSAS.get(args.pausas, 1.0)
+    ENVIAR_CORREO = not args.sin_correo
+
+    if args.fecha:
+        configurar_ventana_fechas(desde=args.fecha, hasta=args.fecha)
+    elif args.desde or args.desde_ultima:
+        configurar_ventana_fechas(desde=args.desde, hasta=args.hasta, desde_ultima_ejecucion=args.desde_ultima)
+    else:
+        configurar_ventana_desde_entorno()
+
 #flujo principal del script
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revisa los movimientos nuevos de Mis Causas en la Oficina Judicial Virtual")
+    agregar_argumentos_ejecucion(parser)
+    args = parser.parse_args(argv)
+    configurar_registro('email_sender.log', 'pjud_eventos.jsonl')
+    configurar_desde_argumentos(parser, args)
+
     # Verificar si es fin de semana
     #today = datetime.datetime.now()
     #is_weekend = today.weekday() >= 5  # 5 = sábado, 6 = domingo
@@ -2724,41 +3028,34 @@ def main():
     
     # Verifica si se cargaron las variables de entorno
     if USERNAME and PASSWORD:
-        print("Las claves se han cargado correctamente.")
+        log.info("Las claves se han cargado correctamente.")
     else:
-        print("Faltan claves en el archivo .env.")
+        log.error("Faltan claves en el archivo .env.")
         return
         
     # Verifica las credenciales de correo
     if not all([EMAIL_SENDER, EMAIL_PASSWORD, EMAIL_RECIPIENTS]):
-        print("ADVERTENCIA: Faltan credenciales de correo electrónico en el archivo .env")
-        print("Se requiere configurar:")
-        if not EMAIL_SENDER:
-            print("- EMAIL_SENDER: Correo del remitente")
-        if not EMAIL_PASSWORD:
-            print("- EMAIL_PASSWORD: Contraseña del correo")
-        if not EMAIL_RECIPIENTS:
-            print("- EMAIL_RECIPIENTS: Lista de correos destinatarios separados por coma")
-        print("\nEl script continuará pero no se enviarán correos electrónicos.")
-
-    playwright = None
-    browser = None
+        faltantes = [nombre for nombre, valor in (("EMAIL_SENDER", EMAIL_SENDER), ("EMAIL_PASSWORD", EMAIL_PASSWORD),
+                                                  ("EMAIL_RECIPIENTS", EMAIL_RECIPIENTS)) if not valor]
+        log.warning(f"Faltan credenciales de correo electrónico en el archivo .env ({', '.join(faltantes)}); "
+                    "el script continuará pero no se enviarán correos electrónicos")
+
+    if seleccion_parcial():
+        log.info(f"Revisión parcial: {', '.join(dict.fromkeys(MIS_CAUSAS_TABS))}"
+                 + (f", hasta {MAX_CAUSAS_POR_PESTANA} causas por pestaña" if MAX_CAUSAS_POR_PESTANA else ""))
+
     try:
-        print("Iniciando navegador...")
-        playwright, browser, page = setup_browser()
-        
         # Ejecutar la automatización de PJUD
-        automatizar_poder_judicial(page, USERNAME, PASSWORD)
+        automatizar_poder_judicial(USERNAME, PASSWORD)
         
     except Exception as e:
-        print(f"Error en la ejecución principal: {str(e)}")
+        log.error(f"Error en la ejecución principal: {str(e)}")
 
     finally:
-        if browser:
-            print("Cerrando el navegador...")
-            browser.close()
-        if playwright:
-            playwright.stop()
+        if FILTRO_RECURSOS:
+            FILTRO_RECURSOS.imprimir_resumen()
+        TRAZADOR.imprimir_resumen()
+        TRAZADOR.exportar()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,91 @@
+import os, sys, json, queue, atexit, logging, datetime, contextlib, contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+#-------------------------------------------------------------------------------
+#Registro compartido por pjud_script.py y codigo_script.py. Los mensajes se
+#encolan y un hilo en segundo plano los escribe en consola, en el log de texto y
+#en un archivo JSON por línea con el contexto (pestaña, causa, cuaderno...).
+#
+#   LOG_NIVEL=DEBUG  -> incluye los eventos por fila (desactivados no cuestan nada)
+#   LOG_JSON=0       -> no escribe el archivo JSON
+#-------------------------------------------------------------------------------
+
+FORMATO_TEXTO = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Campos de contexto que se agregan a cada evento del bloque activo
+CONTEXTO_REGISTRO = contextvars.ContextVar("contexto_registro", default={})
+
+# Listener activo (uno por proceso)
+_LISTENER = None
+
+#Agrega el contexto activo al evento en el hilo que lo emite, antes de encolarlo
+class FiltroContexto(logging.Filter):
+    def filter(self, record):
+        record.contexto = CONTEXTO_REGISTRO.get()
+        return True
+
+#Una línea JSON por evento: fecha, nivel, origen, mensaje y contexto
+class FormatoJSON(logging.Formatter):
+    def format(self, record):
+        evento = {
+            'ts': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'origen': record.name,
+            'mensaje': record.getMessage(),
+        }
+        evento.update(getattr(record, 'contexto', None) or {})
+        datos = getattr(record, 'datos', None)
+        if datos:
+            evento.update(datos)
+        if record.exc_info:
+            evento['excepcion'] = self.formatException(record.exc_info)
+        return json.dumps(evento, ensure_ascii=False, default=str)
+
+#Configura el registro del proceso; las llamadas siguientes no vuelven a configurarlo
+def configurar_registro(archivo_texto, archivo_json=None, nivel=None):
+    global _LISTENER
+    if _LISTENER:
+        return _LISTENER
+    nivel = nivel or os.getenv("LOG_NIVEL", "INFO").upper()
+
+    formato = logging.Formatter(FORMATO_TEXTO)
+    consola = logging.StreamHandler(sys.stdout)
+    consola.setFormatter(formato)
+    texto = logging.FileHandler(archivo_texto, encoding="utf-8")
+    texto.setFormatter(formato)
+    destinos = [consola, texto]
+    if archivo_json and os.getenv("LOG_JSON", "1") != "0":
+        eventos = logging.FileHandler(archivo_json, encoding="utf-8")
+        eventos.setFormatter(FormatoJSON())
+        destinos.append(eventos)
+
+    cola = queue.SimpleQueue()
+    encolador = QueueHandler(cola)
+    encolador.addFilter(FiltroContexto())
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(encolador)
+    raiz.setLevel(nivel)
+
+    _LISTENER = QueueListener(cola, *destinos, respect_handler_level=True)
+    _LISTENER.start()
+    # Vacía la cola al terminar el proceso
+    atexit.register(_LISTENER.stop)
+    return _LISTENER
+
+#Agrega campos de contexto (pestana=..., causa=...) a todos los eventos del bloque
+@contextlib.contextmanager
+def contexto_registro(**campos):
+    token = abrir_contexto(**campos)
+    try:
+        yield
+    finally:
+        cerrar_contexto(token)
+
+#Versión sin "with" para bloques largos: abrir_contexto() al inicio y cerrar_contexto() en un finally
+def abrir_contexto(**campos):
+    return CONTEXTO_REGISTRO.set({**CONTEXTO_REGISTRO.get(), **campos})
+
+def cerrar_contexto(token):
+    CONTEXTO_REGISTRO.reset(token)
@@ -0,0 +1,255 @@
+import os, sys, json, time, signal, asyncio, logging, argparse, datetime, importlib, threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from registro import configurar_registro
+
+#-------------------------------------------------------------------------------
+#Modo servicio: un solo proceso ejecuta la revisión PJUD y la de SII/BCN a las horas
+#configuradas y conserva entre ejecuciones lo que un arranque en frío paga cada vez:
+#los módulos ya importados, Chromium con la sesión de la OJV iniciada, los Chrome de
+#SII y BCN abiertos y el ChromeDriver ya instalado.
+#
+#   python servicio.py --pjud 08:30 13:30 18:30 --sii 09:00 --puerto 8765
+#
+#El estado (próxima ejecución, duración y resultado de la última de cada tarea) se
+#escribe en servicio_estado.json y, con --puerto, se sirve en http://127.0.0.1:<puerto>/
+#-------------------------------------------------------------------------------
+
+DIRECTORIO_BASE = Path(__file__).parent
+ESTADO_PATH = DIRECTORIO_BASE / "servicio_estado.json"
+
+# Minutos hasta retomar una ejecución PJUD que dejó pestañas pendientes en el punto de control
+REINTENTO_PJUD_MIN = 10
+
+# Revisión del reloj mientras se espera: detecta cambios de hora y la suspensión del equipo
+ESPERA_MAXIMA_S = 60
+
+log = logging.getLogger("servicio")
+
+#Convierte "08:30" en datetime.time
+def parsear_hora(texto):
+    return datetime.datetime.strptime(texto.strip(), "%H:%M").time()
+
+#Una revisión programada: horas del día, la corrutina que la ejecuta y su estado
+class Tarea:
+    def __init__(self, nombre, horas, funcion):
+        self.nombre = nombre
+        self.horas = sorted(horas)
+        self.funcion = funcion
+        self.proxima = self.siguiente(datetime.datetime.now())
+        self.en_curso = False
+        self.estado = {
+            'horas': [hora.strftime("%H:%M") for hora in self.horas],
+            'proxima': self.proxima.isoformat(timespec="seconds"),
+            'ejecuciones': 0,
+            'en_curso': False,
+        }
+
+    def siguiente(self, desde):
+        for dias in (0, 1):
+            fecha = desde.date() + datetime.timedelta(days=dias)
+            for hora in self.horas:
+                momento = datetime.datetime.combine(fecha, hora)
+                if momento > desde:
+                    return momento
+
+    def programar(self, momento):
+        self.proxima = momento
+        self.estado['proxima'] = momento.isoformat(timespec="seconds")
+
+class Servicio:
+    def __init__(self, tareas, ruta_estado=ESTADO_PATH):
+        self.tareas = tareas
+        self.ruta_estado = Path(ruta_estado)
+        self.lock = threading.Lock()
+        self.estado = {
+            'pid': os.getpid(),
+            'inicio': datetime.datetime.now().isoformat(timespec="seconds"),
+            'tareas': {tarea.nombre: tarea.estado for tarea in tareas},
+        }
+        self.guardar()
+
+    def guardar(self):
+        with self.lock:
+            self.estado['actualizado'] = datetime.datetime.now().isoformat(timespec="seconds")
+            contenido = json.dumps(self.estado, indent=2, ensure_ascii=False, default=str)
+        tmp_path = self.ruta_estado.with_suffix(".tmp")
+        tmp_path.write_text(contenido, encoding="utf-8")
+        os.replace(tmp_path, self.ruta_estado)
+
+    def instantanea(self):
+        with self.lock:
+            return json.dumps(self.estado, indent=2, ensure_ascii=False, default=str)
+
+    async def ejecutar(self, tarea):
+        tarea.en_curso = True
+        tarea.estado.update(en_curso=True, ultima_inicio=datetime.datetime.now().isoformat(timespec="seconds"))
+        self.guardar()
+        log.info(f"Iniciando tarea '{tarea.nombre}'")
+        inicio = time.perf_counter()
+        resultado, error, reintentar = None, None, False
+        try:
+            resultado, reintentar = await tarea.funcion()
+        except Exception as e:
+            log.exception(f"Error en la tarea '{tarea.nombre}'")
+            error = f"{type(e).__name__}: {e}"
+        duracion = round(time.perf_counter() - inicio, 1)
+
+        tarea.en_curso = False
+        tarea.estado.update(
+            en_curso=False,
+            ejecuciones=tarea.estado['ejecuciones'] + 1,
+            ultima_duracion_s=duracion,
+            ultimo_resultado=resultado,
+            ultimo_error=error,
+            ultima_fin=datetime.datetime.now().isoformat(timespec="seconds"),
+        )
+        if reintentar:
+            retomar = datetime.datetime.now() + datetime.timedelta(minutes=REINTENTO_PJUD_MIN)
+            if retomar < tarea.proxima:
+                tarea.programar(retomar)
+        self.guardar()
+        log.info(f"Tarea '{tarea.nombre}' terminada en {duracion}s", extra={'datos': {'tarea': tarea.nombre, 'duracion_s': duracion}})
+
+    async def bucle(self, inmediato=False):
+        if inmediato:
+            for tarea in self.tareas:
+                tarea.programar(datetime.datetime.now())
+        for tarea in self.tareas:
+            log.info(f"Tarea '{tarea.nombre}' a las {', '.join(tarea.estado['horas'])}; próxima: {tarea.estado['proxima']}")
+        self.guardar()
+
+        en_curso = set()
+        while True:
+            ahora = datetime.datetime.now()
+            for tarea in self.tareas:
+                if tarea.proxima <= ahora and not tarea.en_curso:
+                    tarea.programar(tarea.siguiente(ahora))
+                    # Las tareas son independientes y pueden coincidir; cada una corre una vez a la vez
+                    ejecucion = asyncio.create_task(self.ejecutar(tarea))
+                    en_curso.add(ejecucion)
+                    ejecucion.add_done_callback(en_curso.discard)
+            espera = min(tarea.proxima for tarea in self.tareas) - datetime.datetime.now()
+            await asyncio.sleep(min(max(espera.total_seconds(), 1), ESPERA_MAXIMA_S))
+
+#Responde GET con el estado del servicio en JSON
+def iniciar_servidor_estado(servicio, puerto):
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            cuerpo = servicio.instantanea().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, formato, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), Manejador)
+    threading.Thread(target=servidor.serve_forever, name="estado", daemon=True).start()
+    log.info(f"Estado disponible en http://127.0.0.1:{puerto}/")
+    return servidor
+
+#Revisión PJUD con el navegador y la sesión de la ejecución anterior
+def tarea_pjud(pjud, navegador, username, password):
+    async def ejecutar():
+        pjud.configurar_ventana_desde_entorno()
+        pjud.TRAZADOR.reiniciar()
+        try:
+            resultado = await navegador.ejecutar(username, password)
+        except Exception:
+            # Un navegador en mal estado no se reutiliza: la próxima ejecución abre otro
+            await navegador.cerrar()
+            raise
+        finally:
+            pjud.TRAZADOR.imprimir_resumen()
+            pjud.TRAZADOR.exportar()
+        # Tras informar por correo el punto de control se borra y no queda nada pendiente
+        pendientes = pjud.PUNTO_CONTROL.pestanas_pendientes(pjud.MIS_CAUSAS_TABS) if pjud.PUNTO_CONTROL.estado else []
+        resultado = {
+            'exito': bool(resultado),
+            'movimientos': len(pjud.MOVIMIENTOS_GLOBALES),
+            'pestanas_pendientes': pendientes,
+            'navegador_abierto': navegador.abierto(),
+        }
+        return resultado, bool(pendientes) and pjud.PUNTO_CONTROL.puede_reintentar()
+    return ejecutar
+
+#Revisión SII/BCN en un hilo, con los Chrome y el ChromeDriver de la ejecución anterior
+def tarea_sii(codigo, navegadores):
+    async def ejecutar():
+        try:
+            resultado = await asyncio.to_thread(codigo.main, navegadores)
+        except Exception:
+            navegadores.close()
+            raise
+        return resultado, False
+    return ejecutar
+
+async def servir(args):
+    tareas, cierres = [], []
+
+    # El módulo PJUD carga el .env al importarse; codigo_script toma de ahí las credenciales de correo
+    if args.pjud:
+        pjud = importlib.import_module("pjud_script")
+        username, password = os.getenv("RUT"), os.getenv("CLAVE")
+        if not (username and password):
+            raise SystemExit("Faltan RUT y CLAVE en el archivo .env")
+        navegador = pjud.NavegadorPersistente()
+        tareas.append(Tarea("pjud", args.pjud, tarea_pjud(pjud, navegador, username, password)))
+        cierres.append(navegador.cerrar)
+
+    if args.sii:
+        codigo = importlib.import_module("codigo_script")
+        navegadores = codigo.WarmBrowsers()
+        tareas.append(Tarea("sii_bcn", args.sii, tarea_sii(codigo, navegadores)))
+        cierres.append(lambda: asyncio.to_thread(navegadores.close))
+
+    if not tareas:
+        raise SystemExit("No hay tareas programadas: use --pjud y/o --sii")
+
+    servicio = Servicio(tareas, args.estado)
+    servidor = iniciar_servidor_estado(servicio, args.puerto) if args.puerto else None
+    # SIGTERM (systemd, docker stop) detiene el bucle y cierra los navegadores como Ctrl+C
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    except NotImplementedError:
+        pass
+    try:
+        await servicio.bucle(inmediato=args.ahora)
+    finally:
+        log.info("Deteniendo el servicio...")
+        for cerrar in cierres:
+            try:
+                await cerrar()
+            except Exception as e:
+                log.warning(f"Error al cerrar un navegador: {e}")
+        if servidor:
+            servidor.shutdown()
+
+def horas_desde_entorno(variable):
+    return [hora for hora in os.getenv(variable, "").split(",") if hora.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta las revisiones PJUD y SII/BCN a horas fijas con los navegadores abiertos entre ejecuciones")
+    parser.add_argument("--pjud", nargs="*", type=parsear_hora, default=[parsear_hora(h) for h in horas_desde_entorno("SERVICIO_PJUD_HORAS")],
+                        help="horas HH:MM de la revisión PJUD (SERVICIO_PJUD_HORAS, separadas por coma)")
+    parser.add_argument("--sii", nargs="*", type=parsear_hora, default=[parsear_hora(h) for h in horas_desde_entorno("SERVICIO_SII_HORAS")],
+                        help="horas HH:MM de la revisión SII/BCN (SERVICIO_SII_HORAS, separadas por coma)")
+    parser.add_argument("--puerto", type=int, default=int(os.getenv("SERVICIO_PUERTO", "0")) or None,
+                        help="puerto local del estado en JSON (SERVICIO_PUERTO)")
+    parser.add_argument("--estado", default=str(ESTADO_PATH), help="archivo de estado")
+    parser.add_argument("--ahora", action="store_true", help="ejecutar todas las tareas al iniciar, además de a sus horas")
+    args = parser.parse_args()
+
+    # Un solo registro para el servicio: los módulos que se importan después no lo reconfiguran
+    configurar_registro("servicio.log", "servicio_eventos.jsonl")
+    sys.path.insert(0, str(DIRECTORIO_BASE))
+    try:
+        asyncio.run(servir(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import json
+
+import codigo_script
+from codigo_script import BCNLedger
+
+def crear_ledger(tmp_path):
+    return BCNLedger(str(tmp_path / "descargadas.jsonl"), str(tmp_path / "descargadas.json"))
+
+def test_registra_y_da_de_baja(tmp_path):
+    ledger = crear_ledger(tmp_path)
+    ledger.record("1001", "https://www.bcn.cl/leychile/navegar?idNorma=1001", str(tmp_path / "no_existe.pdf"))
+    ledger.record("1002", "https://www.bcn.cl/leychile/navegar?idNorma=1002", str(tmp_path / "no_existe.pdf"))
+    ledger.forget("1001")
+
+    assert crear_ledger(tmp_path).ids() == {"1002"}
+
+def test_descarta_linea_incompleta_al_final(tmp_path):
+    ledger = crear_ledger(tmp_path)
+    ledger.record("1001", "https://www.bcn.cl/leychile/navegar?idNorma=1001", str(tmp_path / "no_existe.pdf"))
+    with open(ledger.path, "a", encoding="utf-8") as f:
+        f.write('{"id": "1002", "url": "https://www.bc')
+
+    # Al cargar se recorta la línea cortada; el siguiente registro queda en su propia línea
+    ledger = crear_ledger(tmp_path)
+    assert ledger.ids() == {"1001"}
+    ledger.record("1003", "https://www.bcn.cl/leychile/navegar?idNorma=1003", str(tmp_path / "no_existe.pdf"))
+
+    with open(ledger.path, "r", encoding="utf-8") as f:
+        lineas = [json.loads(linea) for linea in f]
+    assert [linea["id"] for linea in lineas] == ["1001", "1003"]
+
+def test_migra_el_json_anterior(tmp_path, monkeypatch):
+    monkeypatch.setattr(codigo_script, "DOWNLOAD_DIR_BCN", str(tmp_path))
+    (tmp_path / "BCN_Ley-ID-2001.pdf").write_bytes(b"%PDF-1.4 prueba")
+    with open(tmp_path / "descargadas.json", "w", encoding="utf-8") as f:
+        json.dump({"descargadas": [{"id": "2001"}, {"id": "2002"}]}, f)
+
+    ledger = crear_ledger(tmp_path)
+
+    assert ledger.ids() == {"2001", "2002"}
+    assert ledger.entries["2001"]["size"] == len(b"%PDF-1.4 prueba")
+    assert ledger.entries["2002"]["sha256"] is None
+    # La migración deja el registro nuevo escrito; el JSON anterior ya no se vuelve a leer
+    assert crear_ledger(tmp_path).ids() == {"2001", "2002"}
+
+def test_reutiliza_el_hash_del_manifiesto(tmp_path, monkeypatch):
+    def sin_hash(ruta):
+        raise AssertionError("no debe volver a calcular el hash")
+    monkeypatch.setattr(codigo_script, "file_sha256", sin_hash)
+    ruta = tmp_path / "BCN_Ley-ID-1001.pdf"
+    ruta.write_bytes(b"%PDF-1.4 prueba")
+
+    entrada = crear_ledger(tmp_path).record("1001", "https://www.bcn.cl/leychile/navegar?idNorma=1001", str(ruta),
+                                            {"sha256": "abc123", "size": 15})
+
+    assert (entrada["sha256"], entrada["size"]) == ("abc123", 15)
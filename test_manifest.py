@@ -0,0 +1,67 @@
+import os
+
+from codigo_script import PdfManifest
+
+def crear_manifiesto(tmp_path):
+    return PdfManifest(str(tmp_path / "manifest.jsonl"), (str(tmp_path / "sii"),))
+
+def crear_pdf(tmp_path, nombre, contenido=b"%PDF-1.4 prueba"):
+    ruta = tmp_path / "sii" / nombre
+    ruta.parent.mkdir(exist_ok=True)
+    ruta.write_bytes(contenido)
+    return str(ruta)
+
+def test_sync_indexa_nuevos_y_da_de_baja_borrados(tmp_path):
+    circular = crear_pdf(tmp_path, "circu7_2025.pdf")
+    resolucion = crear_pdf(tmp_path, "reso12_2025.pdf")
+    manifiesto = crear_manifiesto(tmp_path)
+    assert manifiesto.sync() == (2, 0)
+    assert manifiesto.entries[circular]["type"] == "circu"
+    assert manifiesto.entries[circular]["number"] == 7
+    assert manifiesto.entries[circular]["year"] == "2025"
+
+    # Sin cambios en disco no se vuelve a indexar nada
+    assert manifiesto.sync() == (0, 0)
+
+    os.remove(resolucion)
+    crear_pdf(tmp_path, "circu7_2025.pdf", b"%PDF-1.4 contenido distinto")
+    assert manifiesto.sync() == (1, 1)
+    assert set(crear_manifiesto(tmp_path).entries) == {circular}
+
+def test_record_conserva_la_url_y_forget_deja_lapida(tmp_path):
+    circular = crear_pdf(tmp_path, "circu7_2025.pdf")
+    manifiesto = crear_manifiesto(tmp_path)
+    manifiesto.record(circular, url="https://www.sii.cl/normativa_legislacion/circulares/2025/circu7.pdf")
+    manifiesto.record(circular)
+    assert manifiesto.entries[circular]["url"].endswith("circu7.pdf")
+
+    manifiesto.forget(circular)
+    recargado = crear_manifiesto(tmp_path)
+    assert not recargado.contains(circular)
+    assert recargado.line_count == 3
+
+def test_compact_reescribe_solo_las_entradas_vigentes(tmp_path):
+    circulares = [crear_pdf(tmp_path, f"circu{numero}_2025.pdf") for numero in range(1, 4)]
+    manifiesto = crear_manifiesto(tmp_path)
+    for circular in circulares:
+        manifiesto.record(circular)
+    manifiesto.forget(circulares[0])
+    manifiesto.forget(circulares[1])
+    assert manifiesto.needs_compaction()
+
+    manifiesto.compact()
+
+    recargado = crear_manifiesto(tmp_path)
+    assert recargado.line_count == 1
+    assert set(recargado.entries) == {circulares[2]}
+    assert not os.path.exists(f"{manifiesto.path}.tmp")
+
+def test_top_files_toma_los_mas_recientes_por_tipo(tmp_path):
+    rutas = [crear_pdf(tmp_path, nombre) for nombre in
+             ("circu3_2024.pdf", "circu1_2025.pdf", "circu9_2025.pdf", "reso4_2025.pdf")]
+    manifiesto = crear_manifiesto(tmp_path)
+    manifiesto.sync()
+
+    seleccion = manifiesto.top_files(rutas, per_type=2)
+
+    assert [os.path.basename(ruta) for ruta in seleccion] == ["circu9_2025.pdf", "circu1_2025.pdf", "reso4_2025.pdf"]
@@ -0,0 +1,183 @@
+import os
+import re
+import shutil
+
+import pytest
+
+import benchmark_pdf
+from codigo_script import FileUtils
+
+# Cascada de extracción anterior a la tabla de estrategias precompiladas (texto completo de
+# las 3 primeras páginas, un re.search por intento); la nueva debe producir lo mismo
+MESES = {"01": "ENERO", "02": "FEBRERO", "03": "MARZO", "04": "ABRIL", "05": "MAYO", "06": "JUNIO",
+         "07": "JULIO", "08": "AGOSTO", "09": "SEPTIEMBRE", "10": "OCTUBRE", "11": "NOVIEMBRE", "12": "DICIEMBRE"}
+MESES_ABR = {"ENE": "ENERO", "FEB": "FEBRERO", "MAR": "MARZO", "ABR": "ABRIL", "MAY": "MAYO", "JUN": "JUNIO",
+             "JUL": "JULIO", "AGO": "AGOSTO", "SEP": "SEPTIEMBRE", "OCT": "OCTUBRE", "NOV": "NOVIEMBRE", "DIC": "DICIEMBRE"}
+CODIGOS = r'\b[A-Z]{2,}\d{5,}\b|\b[A-Za-z]{1,}\s?\d{5,}\b|\b[A-Za-z0-9\-]{2,}\s?-?\d{4,}\s?\d{10,}\b'
+FIN_CIRCU = r"(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))"
+FIN_RESO = r"(?=\n*(?:SANTIAGO|[A-Z]{5,}:|\n\s*\n|$))"
+
+def fecha_como_antes(texto, nombre):
+    corte = len(texto)
+    for patron in [r"se ha", r"de acuerdo", r"\. de acuerdo", r"\. se ha", r"1\. se ha"]:
+        match = re.search(patron, texto, re.IGNORECASE)
+        if match and match.start() < corte:
+            corte = match.start()
+    texto = texto[:corte]
+    for patron in [r"(?:ORD\.|OFICIO|RESOLUCIÓN|CIRCULAR)\s*(?:N°|Nº|N[o°]\s*)?\d+\s*[,-]\s*DE\s*(\d{2}\.\d{2}\.\d{4})",
+                   r"(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})",
+                   r"(\d{2}-\w{3}-\d{4})",
+                   r"SANTIAGO[,\s]*(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})",
+                   r"FECHA\s*:\s*(\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4})",
+                   r".*?_(\d{2}_\d{2}_\d{4})\.pdf",
+                   r".*?-(\d{2}_\d{2}_\d{4})\.pdf"]:
+        match = re.search(patron, texto, re.IGNORECASE)
+        if match:
+            fecha = match.group(1)
+            try:
+                if "." in fecha:
+                    dia, mes, anio = fecha.split(".")
+                    return f"{int(dia)} DE {MESES[mes]} DE {anio}"
+                if "_" in fecha:
+                    dia, mes, anio = fecha.split("_")
+                    return f"{int(dia)} DE {MESES[mes]} DE {anio}"
+                if "-" in fecha and len(fecha.split("-")[1]) == 3:
+                    dia, mes, anio = fecha.split("-")
+                    return f"{int(dia)} DE {MESES_ABR[mes.upper()]} DE {anio}"
+                return fecha.upper()
+            except Exception:
+                continue
+    for patron in [r".*?_(\d{2}_\d{2}_\d{4})\.pdf", r".*?-(\d{2}_\d{2}_\d{4})\.pdf"]:
+        match = re.search(patron, nombre)
+        if match:
+            dia, mes, anio = match.group(1).split("_")
+            return f"{int(dia)} DE {MESES[mes]} DE {anio}"
+    return "No disponible"
+
+def primera_coincidencia(patrones, texto):
+    for patron, flags in patrones:
+        match = re.search(patron, texto, flags)
+        if match:
+            return match
+    return None
+
+def normalizar(materia):
+    materia = re.sub(r'(\n\s*)+\n+', '\n\n', materia)
+    materia = re.sub(r'[ \t]{2,}', ' ', materia)
+    return re.sub(r'(?<=[A-Z])(ART[ÍI]CULO|ART\.)', r'\n\1', materia)
+
+def recortar(materia, limite):
+    return materia[:limite - 3] + '...' if len(materia) > limite else materia
+
+def materia_fecha_como_antes(texto, nombre):
+    sin_codigos = lambda m: re.sub(CODIGOS, '', m, flags=re.IGNORECASE).strip()
+    encontrada = lambda match: match.group(1).strip() if match else "No disponible"
+    if "BCN_Ley" in nombre:
+        materia = encontrada(re.search(r"(Ley\s+\d{4,5}[\s\S]+?)(?=\n*(?:Publicación|Fecha Publicación)|\Z)", texto, re.IGNORECASE))
+        materia = recortar(normalizar(materia), 500)
+        match = re.search(r"Promulgación:\s*(\d{2}-\w{3}-\d{4})", texto) or re.search(r"Publicación:\s*(\d{2}-\w{3}-\d{4})", texto)
+        return materia, match.group(1) if match else fecha_como_antes(texto, nombre)
+    if "circu" in nombre:
+        match = primera_coincidencia([(r"MATERIA\s*:\s*(.+?)" + FIN_CIRCU, re.DOTALL | re.IGNORECASE),
+                                      (r"MATERIA\s+(.+?)" + FIN_CIRCU, re.DOTALL | re.IGNORECASE),
+                                      (r"SISTEMA:\s*(.+?)" + FIN_CIRCU, re.DOTALL | re.IGNORECASE),
+                                      (r"(SUBDIRECCIÓN[\s\S]+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|\Z))", re.IGNORECASE | re.DOTALL),
+                                      (r"(DIRECCIÓN[\s\S]+?)(?=\n*(?:REF\.\s*LEGAL|REFERENCIA|SANTIAGO|\Z))", re.IGNORECASE | re.DOTALL)], texto)
+        return recortar(sin_codigos(encontrada(match)), 300), fecha_como_antes(texto, nombre)
+    if "reso" in nombre:
+        match = primera_coincidencia([(r"MATERIA\s*:\s*(.+?)" + FIN_RESO, re.DOTALL | re.IGNORECASE),
+                                      (r"MATERIA\s+(.+?)" + FIN_RESO, re.DOTALL | re.IGNORECASE),
+                                      (r"SISTEMA:\s*(.+?)" + FIN_RESO, re.DOTALL | re.IGNORECASE),
+                                      (r"(SUBDIRECCIÓN[\s\S]+?)(?=\n*(?:SANTIAGO|\Z))", re.IGNORECASE),
+                                      (r"(DIRECCIÓN[\s\S]+?)(?=\n*(?:SANTIAGO|\Z))", re.IGNORECASE),
+                                      (r"(.*?)(?=\n*SANTIAGO,\s*\d{1,2}\s+DE\s+[A-ZÁÉÍÓÚÑ]+\s+DE\s+\d{4}\.?)", re.DOTALL | re.IGNORECASE)], texto)
+        return recortar(sin_codigos(encontrada(match)), 500), fecha_como_antes(texto, nombre)
+    if "RENTA" in nombre:
+        match = primera_coincidencia([(r"(RENTA(?: – LEY SOBRE IMPUESTO A LA)?[\s\S]+?)(?=\n*(De acuerdo|Se ha|$))", re.IGNORECASE),
+                                      (r"(VENTAS Y SERVICIOS – LEY SOBRE IMPUESTO A LAS[\s\S]+?)(?=\n*(De acuerdo|Se ha|$))", re.IGNORECASE)], texto)
+        return recortar(sin_codigos(normalizar(encontrada(match))), 600), fecha_como_antes(texto, nombre)
+    if "VENTAS" in nombre:
+        match = re.search(r"(VENTAS Y SERVICIOS(?: – LEY SOBRE IMPUESTO A LA)?[\s\S]+?)(?=\n*(?:Se ha|De acuerdo|1\.|$))", texto, re.IGNORECASE)
+        return recortar(sin_codigos(normalizar(encontrada(match))), 600), fecha_como_antes(texto, nombre)
+    if "OTRAS_NORMAS" in nombre:
+        match = re.search(r"(.*?)(?=\n*(?:Se ha|De acuerdo))", texto, re.DOTALL | re.IGNORECASE)
+        if match:
+            materia = match.group(1).strip()
+        else:
+            limpio = re.sub(r'[ \t]{2,}', ' ', texto.strip())
+            limpio = re.sub(r'(\n\s*)+\n+', '\n\n', limpio)
+            limpio = re.sub(r'(?<=[A-Z])(ART[ÍI]CULO|ART\.)', r'\n\1', limpio)
+            materia = limpio[:447] + '...' if len(limpio) > 450 else limpio
+        return recortar(sin_codigos(materia), 500), fecha_como_antes(texto, nombre)
+    return "No disponible", "No disponible"
+
+def extraer_como_antes(ruta):
+    from PyPDF2 import PdfReader
+
+    with open(ruta, 'rb') as f:
+        reader = PdfReader(f)
+        texto = "".join(pagina.extract_text() or "" for pagina in reader.pages[:3])
+        materia, fecha = materia_fecha_como_antes(texto, os.path.basename(ruta))
+        return {'page_count': len(reader.pages), 'materia': materia, 'fecha': fecha}
+
+@pytest.fixture(scope="module")
+def corpus(tmp_path_factory):
+    directorio = tmp_path_factory.mktemp("bench_corpus")
+    benchmark_pdf.generar_corpus(directorio)
+    # Las mismas páginas bajo los nombres de los demás tipos recorren el resto de las estrategias
+    for origen, alias in [("circu40.pdf", "RENTA_15-03_02_2025.pdf"), ("reso101.pdf", "VENTAS_7-12_05_2025.pdf"),
+                          ("reso102.pdf", "OTRAS_NORMAS_ORD_3-01_04_2025.pdf"), ("circu41.pdf", "OTRAS_NORMAS_ORD_4-02_04_2025.pdf")]:
+        shutil.copy(directorio / origen, directorio / alias)
+    return sorted(str(ruta) for ruta in directorio.glob("*.pdf"))
+
+@pytest.fixture(scope="module")
+def secuencial(corpus):
+    return FileUtils.get_pdf_metadata(corpus, cache_path=None)
+
+def como_antes_o_error(ruta):
+    try:
+        return extraer_como_antes(ruta)
+    except Exception:
+        return 'error'
+
+def campos(metadatos):
+    return 'error' if 'error' in metadatos else {campo: metadatos[campo] for campo in ('page_count', 'materia', 'fecha')}
+
+def test_misma_salida_que_la_cascada_anterior(corpus, secuencial):
+    for ruta in corpus:
+        assert campos(secuencial[ruta]) == como_antes_o_error(ruta), os.path.basename(ruta)
+
+def test_deja_de_leer_paginas_con_los_campos_completos(corpus, monkeypatch):
+    iter_page_text = FileUtils.iter_page_text
+    leidas = []
+
+    def contar(reader, max_pages=3):
+        leidas.append(0)
+        for texto in iter_page_text(reader, max_pages):
+            leidas[-1] += 1
+            yield texto
+
+    monkeypatch.setattr(FileUtils, "iter_page_text", staticmethod(contar))
+    leyes = [ruta for ruta in corpus if "BCN_Ley" in ruta]
+    for ruta in leyes:
+        FileUtils.extract_pdf_metadata(ruta)
+
+    # Las leyes de 200 páginas tienen encabezado y fechas en la primera
+    assert leidas == [1] * len(leyes)
+
+def test_paralelo_igual_que_secuencial(corpus, secuencial):
+    paralelo = FileUtils.get_pdf_metadata_parallel(corpus, cache_path=None, max_workers=2)
+
+    assert {ruta: campos(m) for ruta, m in paralelo.items()} == {ruta: campos(m) for ruta, m in secuencial.items()}
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="requiere os.mkfifo")
+def test_proceso_bloqueado_se_corta_por_tiempo(corpus, tmp_path):
+    # Abrir un FIFO sin escritor bloquea al proceso que lo lee, como un PDF que nunca termina
+    bloqueado = str(tmp_path / "reso_bloqueado.pdf")
+    os.mkfifo(bloqueado)
+    validos = [ruta for ruta in corpus if os.path.basename(ruta).startswith("circu")][:4]
+
+    resultado = FileUtils.get_pdf_metadata_parallel([bloqueado] + validos, cache_path=None, max_workers=2, timeout=2)
+
+    assert resultado[bloqueado]['error'].startswith("Tiempo agotado")
+    assert all('error' not in resultado[ruta] for ruta in validos)
@@ -0,0 +1,51 @@
+import random
+
+from codigo_script import RetryScheduler, PartialDownloadError
+
+def test_espera_exponencial_con_tope(monkeypatch):
+    planificador = RetryScheduler(attempts=6, base_delay=5, max_delay=60)
+
+    monkeypatch.setattr(random, "uniform", lambda a, b: a)
+    assert [planificador.delay(intento) for intento in range(1, 6)] == [2.5, 5, 10, 20, 30]
+    monkeypatch.setattr(random, "uniform", lambda a, b: b)
+    assert [planificador.delay(intento) for intento in range(1, 6)] == [5, 10, 20, 40, 60]
+
+def test_recupera_cuando_la_accion_termina_bien():
+    planificador = RetryScheduler(attempts=4, base_delay=0)
+    llamadas = []
+
+    def accion():
+        llamadas.append(1)
+        if len(llamadas) < 2:
+            raise ConnectionError("sin respuesta")
+        return ["reso5_2025.pdf"]
+
+    planificador.schedule("SII reso5", accion)
+
+    assert planificador.run() == {"SII reso5": ["reso5_2025.pdf"]}
+    assert len(llamadas) == 2
+    assert planificador.failed == []
+
+def test_se_rinde_al_agotar_los_intentos():
+    planificador = RetryScheduler(attempts=3, base_delay=0)
+    llamadas = []
+
+    def accion():
+        llamadas.append(1)
+        raise PartialDownloadError("descarga incompleta", [f"parcial{len(llamadas)}.pdf"])
+
+    # El intento original ya se hizo: quedan dos reintentos
+    planificador.schedule("BCN 1001", accion)
+    recuperados = planificador.run()
+
+    assert len(llamadas) == 2
+    assert planificador.failed == ["BCN 1001"]
+    assert recuperados == {"BCN 1001": ["parcial1.pdf", "parcial2.pdf"]}
+    assert not planificador.pending
+
+def test_una_clave_pendiente_conserva_su_turno():
+    planificador = RetryScheduler(attempts=4, base_delay=0)
+    planificador.schedule("SII circu7", lambda: ["primera.pdf"])
+    planificador.schedule("SII circu7", lambda: ["segunda.pdf"])
+
+    assert planificador.run() == {"SII circu7": ["primera.pdf"]}
@@ -0,0 +1,76 @@
+import os
+import datetime
+
+import benchmark_pdf
+import codigo_script
+from codigo_script import SIIDownloader, PdfManifest, YEAR
+
+class GrupoFalso:
+    def acquire(self, folder):
+        return folder
+
+    def release(self, driver, healthy):
+        pass
+
+def test_rango_y_anios_sueltos():
+    assert SIIDownloader.parse_years("2022-2024") == ["2022", "2023", "2024"]
+    assert SIIDownloader.parse_years("2025, 2020") == ["2020", "2025"]
+
+def test_sin_duplicados_ni_partes_vacias():
+    assert SIIDownloader.parse_years("2023-2025,2024,,") == ["2023", "2024", "2025"]
+
+def test_rango_invertido():
+    assert SIIDownloader.parse_years("2025-2023") == ["2023", "2024", "2025"]
+
+def test_valor_invalido_revisa_el_anio_en_curso(caplog):
+    for spec in ("2023-", "abc", "", "2023,x"):
+        assert SIIDownloader.parse_years(spec) == [YEAR]
+    assert "SII_ANIOS inválido" in caplog.text
+
+def test_nombre_local_lleva_el_anio():
+    assert SIIDownloader.probe_filename("reso", 12, "2024") == "reso12_2024.pdf"
+
+def test_un_listado_no_reemplaza_el_archivo_de_otro_anio(tmp_path, monkeypatch):
+    monkeypatch.setattr(codigo_script, "DOWNLOAD_DIR_SII", str(tmp_path))
+    manifiesto = PdfManifest(str(tmp_path / "manifest.jsonl"), (str(tmp_path),))
+    monkeypatch.setattr(codigo_script, "_MANIFEST", manifiesto)
+    monkeypatch.setattr(SIIDownloader, "navigate_to_page", staticmethod(lambda driver, url: True))
+
+    def descargar(contenido):
+        def find_and_download(driver, xpath, prefix, staging_dir, failures):
+            with open(os.path.join(staging_dir, "VENTAS_12-03_01_2024.pdf"), "wb") as f:
+                f.write(contenido)
+        monkeypatch.setattr(SIIDownloader, "find_and_download", staticmethod(find_and_download))
+
+    descargar(b"%PDF-1.4 listado 2024")
+    primero = SIIDownloader.download_page_source("2024", "VENTAS", GrupoFalso())
+    descargar(b"%PDF-1.4 listado 2025")
+    segundo = SIIDownloader.download_page_source("2025", "VENTAS", GrupoFalso())
+
+    ruta = str(tmp_path / "VENTAS_12-03_01_2024.pdf")
+    assert primero["files"] == [ruta] and segundo["files"] == []
+    assert (tmp_path / "VENTAS_12-03_01_2024.pdf").read_bytes() == b"%PDF-1.4 listado 2024"
+    assert manifiesto.entries[ruta]["url"].endswith("ley_impuesto_ventas_jadm2024.htm")
+    assert not os.path.exists(tmp_path / ".VENTAS_2025")
+
+def test_archivo_anterior_toma_el_anio_del_documento_y_no_de_la_descarga(tmp_path):
+    enero_2026 = datetime.datetime(2026, 1, 5).timestamp()
+    sondeos = tmp_path / "sii"
+    sondeos.mkdir()
+    # Documento de 2025 (según su fecha) descargado en enero de 2026, sin URL registrada
+    benchmark_pdf.escribir_pdf(sondeos / "reso100.pdf", [{'lineas': [
+        "RESOLUCIÓN EX. SII N° 100", "MATERIA: Establece retención.", "", "SANTIAGO, 13 DE AGOSTO DE 2025."]}])
+    # URL registrada: manda sobre el contenido
+    (sondeos / "circu7.pdf").write_bytes(b"%PDF-1.4 prueba")
+    # Sin URL ni fecha legible: último recurso, el año de la descarga
+    (sondeos / "reso8.pdf").write_bytes(b"no es un pdf")
+    for ruta in sondeos.iterdir():
+        os.utime(ruta, (enero_2026, enero_2026))
+
+    manifiesto = PdfManifest(str(tmp_path / "manifest.jsonl"), (str(sondeos),))
+    manifiesto.sync()
+    manifiesto.record(str(sondeos / "circu7.pdf"), url="https://www.sii.cl/normativa_legislacion/circulares/2024/circu7.pdf")
+
+    assert SIIDownloader.migrate_legacy_files(manifiesto) == 3
+    assert sorted(os.listdir(sondeos)) == ["circu7_2024.pdf", "reso100_2025.pdf", "reso8_2026.pdf"]
+    assert manifiesto.entries[str(sondeos / "reso100_2025.pdf")]["year"] == "2025"
@@ -0,0 +1,52 @@
+import argparse
+import datetime
+
+import pytest
+
+import pjud_script
+from pjud_script import configurar_ventana_fechas, fecha_en_ventana, registrar_ejecucion_exitosa, agregar_argumentos_ejecucion, configurar_desde_argumentos
+
+@pytest.fixture(autouse=True)
+def estado_aislado(tmp_path, monkeypatch):
+    # Cada prueba parte sin ventana activa y con su propio registro de última ejecución
+    monkeypatch.setattr(pjud_script, "VENTANA_FECHAS", None)
+    monkeypatch.setattr(pjud_script, "ULTIMA_EJECUCION_PATH", tmp_path / "pjud_ultima_ejecucion.json")
+
+def test_sin_ventana_compara_con_la_fecha_objetivo():
+    assert configurar_ventana_fechas() is None
+    assert fecha_en_ventana("Movimiento del 15/03/2025", "15/03/2025")
+    assert not fecha_en_ventana("14/03/2025", "15/03/2025")
+    assert fecha_en_ventana(datetime.date.today().strftime("%d/%m/%Y"))
+
+def test_ventana_incluye_ambos_extremos():
+    assert configurar_ventana_fechas("10/03/2025", "15/03/2025") == (datetime.date(2025, 3, 10), datetime.date(2025, 3, 15))
+    assert fecha_en_ventana("10/03/2025")
+    assert fecha_en_ventana("15/03/2025")
+    assert not fecha_en_ventana("09/03/2025")
+    assert not fecha_en_ventana("16/03/2025")
+    assert not fecha_en_ventana("sin fecha")
+
+def test_desde_posterior_a_hasta_es_un_error():
+    parser = argparse.ArgumentParser()
+    agregar_argumentos_ejecucion(parser)
+    args = parser.parse_args(["--desde", "20/03/2025", "--hasta", "15/03/2025"])
+
+    with pytest.raises(SystemExit):
+        configurar_desde_argumentos(parser, args)
+
+def test_desde_ultima_ejecucion():
+    # Sin registro previo se revisa solo la fecha objetivo
+    assert configurar_ventana_fechas(desde_ultima_ejecucion=True) is None
+
+    configurar_ventana_fechas("01/03/2025", "12/03/2025")
+    registrar_ejecucion_exitosa()
+    # El día registrado se vuelve a revisar: pudo tener movimientos después de la ejecución
+    assert configurar_ventana_fechas(hasta="20/03/2025", desde_ultima_ejecucion=True) == (datetime.date(2025, 3, 12), datetime.date(2025, 3, 20))
+
+def test_ventana_antigua_no_retrocede_el_registro():
+    configurar_ventana_fechas("01/03/2025", "12/03/2025")
+    registrar_ejecucion_exitosa()
+    configurar_ventana_fechas("01/01/2024", "05/01/2024")
+    registrar_ejecucion_exitosa()
+
+    assert pjud_script.leer_ultima_ejecucion() == datetime.date(2025, 3, 12)